@@ -5,17 +5,140 @@ Purpose: Separate agent logic for modularity and testing
 
 from langchain_core.messages import HumanMessage,SystemMessage,ToolMessage
 from app.agent.state import MultiAgentState
+from app.agent.artifacts import expand_artifacts, expand_messages
+from app.agent.evidence import select_evidence
+from app.agent.indexes import index_updates, recent_tool_results, tool_message_count
+from app.agent.tokens import PromptSection, allocate, count_tokens, fit_sections, truncate_tokens
 from typing import Dict 
+import re
+
+
+# ===== PROMPTS =====
+# System prompts are the same for every run and come first, so providers that
+# cache prompt prefixes reuse them across runs; the query and everything else
+# that varies follows in HumanMessages.
+
+PLANNER_PROMPT = """You plan research.
+
+Split the query in the user message into at most {max_branches} distinct sub-questions
+that can be researched independently and together cover the query.
+Reply with one sub-question per line and nothing else."""
+
+RESEARCHER_PROMPT = """You are a research assistant.
+
+Research the query in the first user message with the available tools.
+The last user message says what to do in this turn."""
+
+PRIOR_RESEARCH_HEADER = """Related earlier research (reuse what answers the query; only search for
+what is missing or may have changed since):"""
+
+FACT_CHECKER_PROMPT = """You are a fact-checking assistant.
+
+Instructions:
+1. Identify 3-5 key claims from the research findings in the user message
+2. Assess their credibility
+3. ONLY use web_search if you find a SUSPICIOUS or DOUBTFUL claim
+4. DO NOT search for general verification - trust reputable sources
+5. Provide a brief fact-check summary
+
+Be efficient - avoid unnecessary searches."""
+
+BATCH_FACT_CHECKER_PROMPT = """You are a fact-checking assistant.
+
+Instructions:
+1. Identify the 2-3 key claims in the new search results in the user message
+2. Assess their credibility (agreement between sources, source quality)
+3. Reply with a brief bullet list: claim - verdict
+
+Be efficient - do not repeat claims checked earlier."""
+
+SUMMARIZER_PROMPT = """Create a comprehensive report for the query in the user message,
+from its research data and verified facts.
+
+Instructions:
+1. Write an executive summary
+2. Present key findings
+3. Note any uncertainties
+4. Make it clear and professional
+
+Use markdown formatting."""
+
+
+# ===== HISTORY BUDGET =====
+
+def fit_history(messages: list, budget: int, *sections: PromptSection) -> tuple:
+    """
+    Expanded copies of messages whose tool results are cut to what budget
+    leaves after the other messages. sections (earlier in the prompt) are
+    kept first, then tool results newest first, so the oldest are cut first.
+    Returns (messages, section texts)
+    """
+    history = expand_messages(messages)
+    results = [i for i, message in enumerate(history) if isinstance(message, ToolMessage)]
+    budget -= sum(
+        count_tokens(str(message.content)) + count_tokens(str(getattr(message, "tool_calls", "") or ""))
+        for message in history if not isinstance(message, ToolMessage)
+    )
+    texts = fit_sections([
+        *sections,
+        *(PromptSection(str(history[i].content), priority=len(results) - rank) for rank, i in enumerate(results))
+    ], budget)
+    for i, text in zip(results, texts[len(sections):]):
+        if text != history[i].content:
+            history[i] = history[i].model_copy(update={"content": text})
+    return history, texts[:len(sections)]
 
 
 # ===== AGENTS =====
 
+class PlannerAgent:
+    """Planner agent that splits a broad query into sub-questions (parallel mode)"""
+    
+    def __init__(self, llm, max_branches: int = 3):
+        self.llm = llm
+        self.max_branches = max_branches
+        self.system_prompt = PLANNER_PROMPT.format(max_branches=max_branches)
+        self.name = "Planner"
+    
+    def __call__(self, state: MultiAgentState):
+        """Execute planner agent"""
+        query = state.get("query", "")
+        
+        print(f"🗺️  Planner: Splitting '{query}' into up to {self.max_branches} sub-questions")
+        
+        response = self.llm.invoke([
+            SystemMessage(content=self.system_prompt),
+            HumanMessage(content=f'Query: "{query}"'),
+        ])
+        sub_questions = self.parse(response.content)
+        if not sub_questions:
+            sub_questions = [query]  # Nothing usable: research the query as one branch
+        
+        print(f"✅ Planner: {len(sub_questions)} sub-question(s)")
+        
+        return {"sub_questions": sub_questions}
+    
+    def parse(self, content) -> list:
+        """Sub-questions from the reply, without list markers or duplicates"""
+        if not isinstance(content, str):
+            content = "\n".join(
+                item.get("text", "") if isinstance(item, dict) else str(item) for item in content
+            )
+        questions = []
+        for line in content.splitlines():
+            line = re.sub(r"^\s*(?:[-*•]|\d+[.)])\s*", "", line).strip()
+            if len(line) >= 5 and line.lower() not in (q.lower() for q in questions):
+                questions.append(line)
+        return questions[:self.max_branches]
+
+
 class ResearcherAgent:
     """Researcher agent that conducts initial research"""
     
-    def __init__(self, llm, tools):
+    def __init__(self, llm, tools, max_prompt_tokens: int = 8000):
         self.llm = llm
         self.llm_with_tools = llm.bind_tools(tools)
+        self.max_prompt_tokens = max_prompt_tokens
         self.name = "Researcher"
     
     def __call__(self, state: MultiAgentState):
@@ -27,25 +150,38 @@ class ResearcherAgent:
         print(f"🔬 Researcher: Starting iteration {iteration + 1} for '{query}'")
         
         # Check if we have previous research
-        tool_messages = [msg for msg in messages if isinstance(msg, ToolMessage)]
-        has_results = len(tool_messages) > 0
+        has_results = tool_message_count(state) > 0
         
         if not has_results:
             instruction = "Use the web_search tool NOW to find information. Make your first search."
+        elif state.get("research_sufficient"):
+            instruction = "The results so far answer the query. Write the summary of findings now."
         else:
             instruction = "Review the search results. Either search for more details OR provide a summary of findings."
         
-        system_msg = SystemMessage(content=f"""You are a research assistant.
-
-Query: "{query}"
-
-{instruction}
-
-Current iteration: {iteration + 1}
-""")
+        task = f'Query: "{query}"'
+        turn = f"{instruction}\n\nCurrent iteration: {iteration + 1}"
+        
+        # After the instructions: earlier research, then this run's tool results,
+        # newest first (the oldest are cut first). Artifact references are expanded
+        # for the prompt only
+        history, (prior_research,) = fit_history(messages, self.max_prompt_tokens - sum(
+            count_tokens(text) for text in (RESEARCHER_PROMPT, task, PRIOR_RESEARCH_HEADER, turn)
+        ) - 2, PromptSection(state.get("prior_research", "")))
+        if prior_research:
+            task = f"{task}\n\n{PRIOR_RESEARCH_HEADER}\n{prior_research}"
         
-        conversation = [system_msg] + messages
-        response = self.llm_with_tools.invoke(conversation)
+        # Static prefix, then what stays the same for the whole run (task, earlier turns),
+        # then this turn's instruction
+        conversation = [
+            SystemMessage(content=RESEARCHER_PROMPT),
+            HumanMessage(content=task),
+            *history,
+            HumanMessage(content=turn),
+        ]
+        # No tools for the summary turn after an early exit
+        llm = self.llm if state.get("research_sufficient") else self.llm_with_tools
+        response = llm.invoke(conversation)
         
         print(f"✅ Researcher: Completed iteration {iteration + 1}")
         if hasattr(response, "tool_calls") and response.tool_calls:
@@ -53,7 +189,8 @@ Current iteration: {iteration + 1}
         
         return {
             "messages": [response],
-            "iteration": iteration + 1
+            "iteration": iteration + 1,
+            **index_updates([response], self.name)
         }
 
 
@@ -62,9 +199,10 @@ Current iteration: {iteration + 1}
 class FactCheckerAgent:
     """Fact-checker agent that verifies research"""
     
-    def __init__(self, llm, tools):
+    def __init__(self, llm, tools, max_prompt_tokens: int = 3000):
         self.llm = llm
         self.llm_with_tools = llm.bind_tools(tools)
+        self.max_prompt_tokens = max_prompt_tokens
         self.name = "Fact-Checker"
     
     def __call__(self, state: MultiAgentState):
@@ -79,35 +217,36 @@ class FactCheckerAgent:
         
         # Use research_data directly, or extract from messages if empty
         if not research_data or len(research_data) < 50:
-            tool_contents = [
-                msg.content for msg in state.get("messages", [])
-                if isinstance(msg, ToolMessage)
-            ]
+            tool_contents = recent_tool_results(state, 3)
             if tool_contents:
-                research_data = "\n\n".join(tool_contents[-3:])  # Last 3 tool results
+                research_data = "\n\n".join(
+                    expand_artifacts(content) for content in tool_contents
+                )  # Last 3 tool results
                 print(f"   ⚠️  Using last 3 tool results: {len(research_data)} chars")
         
-        # CRITICAL: Restrictive prompt to avoid excessive tool use
-        system_msg = SystemMessage(content=f"""You are a fact-checking assistant.
-
-Query: "{query}"
+        def task(findings):
+            return f"""Query: "{query}"
 
 Research findings (excerpt):
-{research_data[:2000]}...
-
-Instructions:
-1. Identify 3-5 key claims from the research
-2. Assess their credibility
-3. ONLY use web_search if you find a SUSPICIOUS or DOUBTFUL claim
-4. DO NOT search for general verification - trust reputable sources
-5. Provide a brief fact-check summary
-
-Iteration: {fact_check_iteration + 1}/{max_fact_check}
+{findings}...
 
-Be efficient - avoid unnecessary searches.""")
+Iteration: {fact_check_iteration + 1}/{max_fact_check}"""
         
-        # Only use recent messages to avoid context bloat
-        messages = [system_msg] + state.get("messages", [])[-8:]
+        # Findings get at least half the budget, and what the recent messages
+        # don't need; the messages get the rest (the oldest tool results are cut first).
+        # Only recent messages are used, to avoid context bloat
+        recent = expand_messages(state.get("messages", [])[-8:])
+        budget = self.max_prompt_tokens - count_tokens(FACT_CHECKER_PROMPT) - count_tokens(task(""))
+        history_tokens = sum(count_tokens(str(message.content)) for message in recent)
+        findings = select_evidence(state, research_data, max(budget // 2, budget - history_tokens))
+        history, _ = fit_history(recent, budget - count_tokens(findings))
+        
+        # CRITICAL: Restrictive (static) prompt to avoid excessive tool use
+        messages = [
+            SystemMessage(content=FACT_CHECKER_PROMPT),
+            *history,
+            HumanMessage(content=task(findings)),
+        ]
         response = self.llm_with_tools.invoke(messages)
         
         print("✅ Fact-Checker: Verification complete")
@@ -116,50 +255,104 @@ Be efficient - avoid unnecessary searches.""")
         
         return {
             "messages": [response],
-            "fact_check_iteration": fact_check_iteration + 1
+            "fact_check_iteration": fact_check_iteration + 1,
+            **index_updates([response], self.name)
+        }
+
+
+class IncrementalFactCheckerAgent:
+    """Fact-checker for pipelined mode: checks new tool results while research continues"""
+    
+    def __init__(self, llm, max_prompt_tokens: int = 1000):
+        self.llm = llm
+        self.max_prompt_tokens = max_prompt_tokens
+        self.name = "Fact-Checker"
+    
+    def __call__(self, state: MultiAgentState):
+        """Check tool results not checked yet; append to verified_facts"""
+        query = state.get("query", "")
+        checked = state.get("fact_checked_results", 0)
+        total = tool_message_count(state)
+        new_results = recent_tool_results(state, total - checked)
+        
+        if not new_results:
+            return {}
+        
+        print(f"🔍 Fact-Checker: Checking {len(new_results)} new tool result(s)")
+        
+        def task(batch):
+            return f'Query: "{query}"\n\nNew search results (excerpt):\n{batch}...'
+        
+        # Every new result keeps an equal share; unused shares go to the earlier ones
+        separator = "\n\n---\n\n"
+        budget = (self.max_prompt_tokens - count_tokens(BATCH_FACT_CHECKER_PROMPT) - count_tokens(task(""))
+                  - count_tokens(separator) * (len(new_results) - 1))
+        results = fit_sections([
+            PromptSection(str(expand_artifacts(content)), priority=i, min_tokens=budget // len(new_results))
+            for i, content in enumerate(new_results)
+        ], budget)
+        response = self.llm.invoke([
+            SystemMessage(content=BATCH_FACT_CHECKER_PROMPT),
+            HumanMessage(content=task(separator.join(results))),
+        ])
+        verified_facts = state.get("verified_facts", "")
+        if verified_facts:
+            verified_facts += "\n\n"
+        
+        print("✅ Fact-Checker: Batch verified")
+        
+        return {
+            "verified_facts": verified_facts + str(response.content),
+            "fact_checked_results": total
         }
 
 
 class SummarizerAgent:
     """Summarizer agent that creates final report"""
     
-    def __init__(self, llm):
+    def __init__(self, llm, max_prompt_tokens: int = 4000):
         self.llm = llm
+        self.max_prompt_tokens = max_prompt_tokens
         self.name = "Summarizer"
     
     def __call__(self, state: MultiAgentState):
         """Execute summarizer agent"""
         query = state.get("query", "")
-        research_data = state.get("research_data", "")
-        verified_facts = state.get("verified_facts", "")
-        
-        print(f"📝 Summarizer: Creating final report")
-        print(f"   Research: {len(research_data)} chars")
-        print(f"   Verified: {len(verified_facts)} chars")
         
-        system_msg = SystemMessage(content=f"""Create a comprehensive report for: "{query}"
+        def task(research_data, verified_facts):
+            return f"""Query: "{query}"
 
 Research Data:
 {research_data}
 
 Verified Facts:
-{verified_facts}
-
-Instructions:
-1. Write an executive summary
-2. Present key findings
-3. Note any uncertainties
-4. Make it clear and professional
-
-Use markdown formatting.""")
+{verified_facts}"""
+        
+        # Research comes first; verified facts keep at least a quarter of the budget
+        budget = self.max_prompt_tokens - count_tokens(SUMMARIZER_PROMPT) - count_tokens(task("", ""))
+        research_tokens, facts_tokens = allocate([
+            PromptSection(state.get("research_data", ""), priority=0),
+            PromptSection(state.get("verified_facts", ""), priority=1, min_tokens=budget // 4),
+        ], budget)
+        # Long research (merged branches, raw tool output) -> most relevant evidence
+        research_data = select_evidence(state, state.get("research_data", ""), research_tokens)
+        verified_facts = truncate_tokens(state.get("verified_facts", ""), facts_tokens)
+        
+        print(f"📝 Summarizer: Creating final report")
+        print(f"   Research: {count_tokens(research_data)} tokens")
+        print(f"   Verified: {count_tokens(verified_facts)} tokens")
         
-        response = self.llm.invoke([system_msg])
+        response = self.llm.invoke([
+            SystemMessage(content=SUMMARIZER_PROMPT),
+            HumanMessage(content=task(research_data, verified_facts)),
+        ])
         
         print("✅ Report complete!")
         
         return {
             "messages": [response],
-            "final_report": response.content
+            "final_report": response.content,
+            **index_updates([response], self.name)
         }
 
 
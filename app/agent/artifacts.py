@@ -0,0 +1,198 @@
+"""
+Artifacts Module - Keep large tool outputs out of the graph state
+Purpose: Store raw search/scrape text once, by content hash, and carry only
+a compact reference with a short excerpt in ToolMessages
+
+LangGraph copies (and checkpoints) the state on every step; references keep
+that cheap. Agents call expand_artifacts()/expand_messages() when they
+build prompts, so the LLM still sees the full text.
+
+Backends: "memory" (per process, bounded LRU), "file" (content-addressed
+files, shared by workers on one host) or "none" (disabled).
+"""
+
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+
+from langchain_core.messages import ToolMessage
+from langchain_core.runnables import RunnableConfig
+
+from app.agent.state import MultiAgentState
+from app.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_PATTERN = re.compile(
+    r"\[artifact sha256:(?P<key>[0-9a-f]{64}) (?P<chars>\d+) chars\]\n(?P<excerpt>.*?)\n\[/artifact\]",
+    re.DOTALL,
+)
+
+
+def artifact_key(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def artifact_reference(key: str, text: str, excerpt_chars: int) -> str:
+    """Compact stand-in for text: reference plus the first excerpt_chars characters"""
+    excerpt = text[:excerpt_chars].rstrip()
+    return f"[artifact sha256:{key} {len(text)} chars]\n{excerpt} ...\n[/artifact]"
+
+
+class ArtifactStore:
+    """Interface for artifact stores; keys are SHA-256 hex digests of the text"""
+
+    def put(self, text: str) -> str:
+        raise NotImplementedError
+
+    def get(self, key: str):
+        raise NotImplementedError
+
+
+class MemoryArtifactStore(ArtifactStore):
+    """Per-process LRU bounded by total characters"""
+
+    def __init__(self, max_chars: int = 50_000_000):
+        self.max_chars = max_chars
+        self._artifacts = OrderedDict()
+        self._chars = 0
+        self._lock = threading.Lock()
+
+    def put(self, text):
+        key = artifact_key(text)
+        with self._lock:
+            if key in self._artifacts:
+                self._artifacts.move_to_end(key)
+                return key
+            self._artifacts[key] = text
+            self._chars += len(text)
+            while self._chars > self.max_chars and len(self._artifacts) > 1:
+                _, evicted = self._artifacts.popitem(last=False)
+                self._chars -= len(evicted)
+        return key
+
+    def get(self, key):
+        with self._lock:
+            text = self._artifacts.get(key)
+            if text is not None:
+                self._artifacts.move_to_end(key)
+            return text
+
+
+class FileArtifactStore(ArtifactStore):
+    """One file per artifact under directory/<first 2 hex chars>/<key>"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def put(self, text):
+        key = artifact_key(text)
+        path = self._path(key)
+        if os.path.exists(path):
+            return key  # Same content, already stored
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, so readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+        return key
+
+    def get(self, key):
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+
+def create_artifact_store(name: str):
+    """Backend factory for ARTIFACT_STORE (None when disabled)"""
+    if name == "none":
+        return None
+    if name == "memory":
+        return MemoryArtifactStore(settings.ARTIFACT_MEMORY_MAX_CHARS)
+    if name == "file":
+        return FileArtifactStore(settings.ARTIFACT_DIR)
+    raise ValueError(f"Unknown artifact store: {name}")
+
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_artifact_store():
+    """Process-wide artifact store, or None when disabled"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = create_artifact_store(settings.ARTIFACT_STORE)
+    return _store
+
+
+def expand_artifacts(text, store: ArtifactStore = None):
+    """Replace artifact references in text with the stored content"""
+    if not isinstance(text, str) or "[artifact sha256:" not in text:
+        return text
+    store = store or get_artifact_store()
+
+    def expand(match):
+        content = store.get(match["key"]) if store is not None else None
+        if content is None:
+            logger.warning("Artifact %s is no longer stored; using its excerpt", match["key"][:12])
+            return match["excerpt"]
+        return content
+
+    return ARTIFACT_PATTERN.sub(expand, text)
+
+
+def expand_messages(messages: list, store: ArtifactStore = None) -> list:
+    """Copies of the messages with artifact references in ToolMessages expanded"""
+    expanded = []
+    for message in messages:
+        if isinstance(message, ToolMessage):
+            content = expand_artifacts(message.content, store)
+            if content is not message.content:
+                message = message.model_copy(update={"content": content})
+        expanded.append(message)
+    return expanded
+
+
+class ArtifactToolNode:
+    """
+    Tool node wrapper: moves tool results of at least min_chars into the
+    artifact store, leaving a reference and an excerpt in the ToolMessage
+    """
+
+    def __init__(self, tool_node, store: ArtifactStore = None, min_chars: int = 1000,
+                 excerpt_chars: int = 240):
+        self.tool_node = tool_node
+        self.store = store or get_artifact_store()
+        self.min_chars = min_chars
+        self.excerpt_chars = excerpt_chars
+
+    def invoke(self, state: MultiAgentState, config: RunnableConfig = None):
+        return self(state, config)
+
+    def __call__(self, state: MultiAgentState, config: RunnableConfig):
+        output = self.tool_node.invoke(state, config)
+        if not isinstance(output, dict):
+            output = {"messages": output}
+
+        messages = []
+        for message in output.get("messages", []):
+            content = message.content if isinstance(message, ToolMessage) else None
+            if isinstance(content, str) and len(content) >= self.min_chars:
+                key = self.store.put(content)
+                message = message.model_copy(
+                    update={"content": artifact_reference(key, content, self.excerpt_chars)}
+                )
+            messages.append(message)
+        return {**output, "messages": messages}
@@ -0,0 +1,262 @@
+"""
+Calculator Module - Safe arithmetic for the calculate tool
+Purpose: Evaluate LLM-written expressions without eval(), in bounded time
+
+Expressions are parsed with ast and only whitelisted nodes (numbers,
+arithmetic operators, lists, a few constants and functions) are compiled
+into nested closures, cached per expression. Scalars use exact Python
+ints/floats; lists and range() become float64 NumPy arrays, so operations
+on them are vectorized. Every call is bounded: expression length and node
+count, integer size (checked before computing powers), array length, and a
+deadline checked at every node.
+"""
+
+import ast
+import math
+import operator
+import time
+from functools import lru_cache
+
+import numpy as np
+
+MAX_EXPRESSION_CHARS = 500
+MAX_NODES = 200
+MAX_INT_BITS = 4096
+MAX_ARRAY_SIZE = 100_000
+MAX_SECONDS = 0.05
+MAX_FACTORIAL = 1000
+MAX_SHOWN_VALUES = 20
+
+
+class CalculationError(ValueError):
+    """Expression rejected or failed (message is shown to the LLM)"""
+
+
+# ===== BOUNDED OPERATIONS =====
+
+def _check(value):
+    if isinstance(value, int) and value.bit_length() > MAX_INT_BITS:
+        raise CalculationError(f"Result exceeds {MAX_INT_BITS} bits")
+    if isinstance(value, complex):
+        raise CalculationError("Result is not a real number")
+    if isinstance(value, float) and math.isinf(value):
+        raise CalculationError("Result overflows")
+    if isinstance(value, np.ndarray) and value.size > MAX_ARRAY_SIZE:
+        raise CalculationError(f"Arrays are limited to {MAX_ARRAY_SIZE} values")
+    return value
+
+
+def _power(base, exponent):
+    if isinstance(base, int) and isinstance(exponent, int) and exponent > 0 and abs(base) > 1:
+        # Estimate the size before computing: 9**9**9 is refused, not attempted
+        if (abs(base).bit_length() - 1) * exponent > MAX_INT_BITS:
+            raise CalculationError(f"Result exceeds {MAX_INT_BITS} bits")
+    if isinstance(base, np.ndarray) or isinstance(exponent, np.ndarray):
+        return np.power(np.asarray(base, dtype=float), exponent)
+    return base ** exponent  # Float overflow raises OverflowError
+
+
+BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: _power,
+    ast.BitXor: _power,  # "2^10" means a power in an arithmetic question
+}
+
+UNARY_OPERATORS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+CONSTANTS = {"pi": math.pi, "e": math.e, "tau": math.tau}
+
+
+def _elementwise(scalar_fn, array_fn):
+    def apply(x):
+        return array_fn(x) if isinstance(x, np.ndarray) else scalar_fn(x)
+    return apply
+
+
+def _factorial(n):
+    if isinstance(n, float) and n.is_integer():
+        n = int(n)
+    if not isinstance(n, int) or not 0 <= n <= MAX_FACTORIAL:
+        raise CalculationError(f"factorial() takes an integer from 0 to {MAX_FACTORIAL}")
+    return math.factorial(n)
+
+
+def _aggregate(scalar_fn, array_fn):
+    def apply(*args):
+        if len(args) == 1 and isinstance(args[0], np.ndarray):
+            if not args[0].size:
+                raise CalculationError("Empty list")
+            return array_fn(args[0])
+        if not args or any(isinstance(arg, np.ndarray) for arg in args):
+            raise CalculationError("Pass one list or several numbers")
+        return scalar_fn(args)
+    return apply
+
+
+def _range(*args):
+    if not 1 <= len(args) <= 3 or not all(isinstance(arg, (int, float)) for arg in args):
+        raise CalculationError("range() takes 1 to 3 numbers")
+    start, stop, step = (0, args[0], 1) if len(args) == 1 else (args + (1,))[:3]
+    if step == 0:
+        raise CalculationError("range() step must not be zero")
+    if math.ceil((stop - start) / step) > MAX_ARRAY_SIZE:
+        raise CalculationError(f"Arrays are limited to {MAX_ARRAY_SIZE} values")
+    return np.arange(start, stop, step, dtype=float)
+
+
+def _round(x, digits=0):
+    if not isinstance(digits, int):
+        raise CalculationError("round() digits must be an integer")
+    return np.round(x, digits) if isinstance(x, np.ndarray) else round(x, digits)
+
+
+FUNCTIONS = {
+    "sqrt": _elementwise(math.sqrt, np.sqrt),
+    "exp": _elementwise(math.exp, np.exp),
+    "log": _elementwise(math.log, np.log),
+    "ln": _elementwise(math.log, np.log),
+    "log10": _elementwise(math.log10, np.log10),
+    "log2": _elementwise(math.log2, np.log2),
+    "sin": _elementwise(math.sin, np.sin),
+    "cos": _elementwise(math.cos, np.cos),
+    "tan": _elementwise(math.tan, np.tan),
+    "asin": _elementwise(math.asin, np.arcsin),
+    "acos": _elementwise(math.acos, np.arccos),
+    "atan": _elementwise(math.atan, np.arctan),
+    "floor": _elementwise(math.floor, np.floor),
+    "ceil": _elementwise(math.ceil, np.ceil),
+    "abs": _elementwise(abs, np.abs),
+    "round": _round,
+    "factorial": _factorial,
+    "range": _range,
+    "sum": _aggregate(sum, np.sum),
+    "mean": _aggregate(lambda values: sum(values) / len(values), np.mean),
+    "avg": _aggregate(lambda values: sum(values) / len(values), np.mean),
+    "min": _aggregate(min, np.min),
+    "max": _aggregate(max, np.max),
+    "len": _aggregate(len, lambda array: array.size),
+}
+
+
+# ===== COMPILER =====
+
+def _compile_node(node):
+    """Closure evaluating node(deadline); raises CalculationError for anything not whitelisted"""
+    if isinstance(node, ast.Constant):
+        value = node.value
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise CalculationError(f"Unsupported value: {value!r}")
+        _check(value)
+        return lambda deadline: value
+
+    if isinstance(node, ast.Name):
+        if node.id not in CONSTANTS:
+            raise CalculationError(f"Unknown name: {node.id}")
+        value = CONSTANTS[node.id]
+        return lambda deadline: value
+
+    if isinstance(node, ast.BinOp) and type(node.op) in BINARY_OPERATORS:
+        op = BINARY_OPERATORS[type(node.op)]
+        left, right = _compile_node(node.left), _compile_node(node.right)
+
+        def binary(deadline):
+            a, b = left(deadline), right(deadline)
+            _tick(deadline)
+            return _check(op(a, b))
+        return binary
+
+    if isinstance(node, ast.UnaryOp) and type(node.op) in UNARY_OPERATORS:
+        op = UNARY_OPERATORS[type(node.op)]
+        operand = _compile_node(node.operand)
+        return lambda deadline: op(operand(deadline))
+
+    if isinstance(node, (ast.List, ast.Tuple)):
+        if len(node.elts) > MAX_NODES:
+            raise CalculationError("List too long")
+        items = [_compile_node(element) for element in node.elts]
+
+        def array(deadline):
+            values = [item(deadline) for item in items]
+            if any(isinstance(value, np.ndarray) for value in values):
+                raise CalculationError("Nested lists are not supported")
+            return np.array(values, dtype=float)
+        return array
+
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and not node.keywords:
+        function = FUNCTIONS.get(node.func.id)
+        if function is None:
+            raise CalculationError(f"Unknown function: {node.func.id}")
+        arguments = [_compile_node(arg) for arg in node.args]
+
+        def call(deadline):
+            values = [argument(deadline) for argument in arguments]
+            _tick(deadline)
+            return _check(function(*values))
+        return call
+
+    raise CalculationError(f"Unsupported syntax: {type(node).__name__}")
+
+
+def _tick(deadline):
+    if time.perf_counter() > deadline:
+        raise CalculationError("Calculation took too long")
+
+
+@lru_cache(maxsize=1024)
+def compile_expression(expression: str):
+    """Parse and validate once; returns a function of the deadline"""
+    if len(expression) > MAX_EXPRESSION_CHARS:
+        raise CalculationError(f"Expressions are limited to {MAX_EXPRESSION_CHARS} characters")
+    try:
+        tree = ast.parse(expression.strip(), mode="eval")
+    except SyntaxError:
+        raise CalculationError("Invalid expression") from None
+    if sum(1 for _ in ast.walk(tree)) > MAX_NODES:
+        raise CalculationError(f"Expressions are limited to {MAX_NODES} terms")
+    return _compile_node(tree.body)
+
+
+def evaluate(expression: str, max_seconds: float = MAX_SECONDS):
+    """Value of the expression (int, float or NumPy array)"""
+    compiled = compile_expression(expression)
+    try:
+        with np.errstate(all="ignore"):
+            return compiled(time.perf_counter() + max_seconds)
+    except CalculationError:
+        raise
+    except ZeroDivisionError:
+        raise CalculationError("Division by zero") from None
+    except OverflowError:
+        raise CalculationError("Result overflows") from None
+    except (ValueError, TypeError) as e:
+        raise CalculationError(str(e)) from None
+
+
+def _format_number(value) -> str:
+    if isinstance(value, (np.floating, np.integer)):
+        value = value.item()
+    if isinstance(value, float):
+        if value.is_integer() and abs(value) < 2 ** 53:
+            return str(int(value))
+        return f"{value:.12g}"
+    return str(value)
+
+
+def format_result(value) -> str:
+    """Numbers as written; long arrays shortened, with their length"""
+    if isinstance(value, np.ndarray):
+        values = [_format_number(v) for v in value.tolist()] if value.size <= MAX_SHOWN_VALUES else (
+            [_format_number(v) for v in value[:5].tolist()] + ["..."]
+            + [_format_number(v) for v in value[-5:].tolist()]
+        )
+        suffix = f" ({value.size} values)" if value.size > MAX_SHOWN_VALUES else ""
+        return f"[{', '.join(values)}]{suffix}"
+    return _format_number(value)
@@ -0,0 +1,285 @@
+"""
+Cancellation Module - Cooperative cancellation of a research run
+Purpose: Stop a run between graph steps and abandon its in-flight LLM and
+tool calls once it is cancelled
+
+research() streams the graph and checks the run's CancelToken after every
+step. The token is also the current one (a context variable) for the code
+the graph runs, in its worker threads too: LLM calls and tool steps go
+through run_cancellable(), which returns as soon as the token is cancelled
+instead of waiting for the provider, and loops such as the streaming
+scraper call check_cancelled() to stop early.
+
+Calls run on a shared pool: at most CANCELLABLE_CALL_THREADS at a time. A
+cancelled call that has not started never runs; one that has is abandoned.
+It finishes in its thread and its result is dropped, but it moves to one of
+CANCELLABLE_ABANDONED_CALLS extra threads, so abandoned calls cannot starve
+other runs. Once those are taken too, abandoned calls keep their place
+until they return. Calls with a coroutine version (LLM ainvoke) run as
+tasks on a shared event loop instead, and cancelling the run cancels the
+task, which closes its HTTP request.
+"""
+
+import asyncio
+import contextvars
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+
+from app.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ResearchCancelled(Exception):
+    """The research run was cancelled"""
+
+
+class CancelToken:
+    def __init__(self):
+        self._event = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self):
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def on_cancel(self, callback):
+        """Call callback when cancelled (now, if already); returns a function removing it"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return lambda: self._remove(callback)
+        callback()
+        return lambda: None
+
+    def _remove(self, callback):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def check(self):
+        if self._event.is_set():
+            raise ResearchCancelled("Research was cancelled")
+
+
+_current = contextvars.ContextVar("research_cancel_token", default=None)
+
+
+@contextmanager
+def cancellation_scope(token: CancelToken):
+    """Make token the current one (for this thread and the threads the graph starts)"""
+    reset = _current.set(token)
+    try:
+        yield token
+    finally:
+        _current.reset(reset)
+
+
+def check_cancelled():
+    """Raise ResearchCancelled if the current run was cancelled"""
+    token = _current.get()
+    if token is not None:
+        token.check()
+
+
+class _CallPool:
+    """
+    Runs up to `threads` calls at a time; abandoned calls that are still
+    running stop counting against them while fewer than `abandoned` are
+    """
+
+    def __init__(self, threads: int, abandoned: int):
+        self._executor = ThreadPoolExecutor(threads + abandoned, thread_name_prefix="cancellable-call")
+        self._free = threads        # Live calls that may start
+        self._spare = abandoned     # Abandoned calls that may move off the live threads
+        self._abandoned = set()
+        self._queued = deque()
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args) -> Future:
+        future = Future()
+        with self._lock:
+            self._queued.append((future, fn, args))
+            started = self._take_queued()
+        self._start(started)
+        return future
+
+    def abandon(self, future: Future):
+        """Stop waiting for future: it never runs if it has not started"""
+        if future.cancel():
+            return
+        with self._lock:
+            if future.done() or future in self._abandoned:
+                return
+            if not self._spare:
+                logger.warning("All %d threads for abandoned calls are taken; this one keeps a live thread",
+                               len(self._abandoned))
+                return
+            self._spare -= 1
+            self._abandoned.add(future)
+            self._free += 1
+            started = self._take_queued()
+        self._start(started)
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+    def _take_queued(self) -> list:
+        """Claim live threads for queued calls (lock held)"""
+        started = []
+        while self._free and self._queued:
+            call = self._queued.popleft()
+            if call[0].cancelled():
+                continue
+            self._free -= 1
+            started.append(call)
+        return started
+
+    def _start(self, calls: list):
+        for future, fn, args in calls:
+            self._executor.submit(self._run, future, fn, args)
+
+    def _run(self, future: Future, fn, args):
+        try:
+            if future.set_running_or_notify_cancel():
+                try:
+                    result = fn(*args)
+                except BaseException as exc:
+                    future.set_exception(exc)
+                else:
+                    future.set_result(result)
+        finally:
+            with self._lock:
+                if future in self._abandoned:
+                    self._abandoned.discard(future)
+                    self._spare += 1
+                else:
+                    self._free += 1
+                started = self._take_queued()
+            self._start(started)
+
+
+_pool = None
+_loop = None
+_pool_lock = threading.Lock()
+_in_call = threading.local()  # Set in pool threads: nested calls run inline
+
+
+def _call_pool() -> _CallPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = _CallPool(settings.CANCELLABLE_CALL_THREADS, settings.CANCELLABLE_ABANDONED_CALLS)
+    return _pool
+
+
+def _event_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    if _loop is None:
+        with _pool_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, daemon=True, name="cancellable-loop").start()
+                _loop = loop
+    return _loop
+
+
+def _pool_call(fn, args, kwargs):
+    _in_call.active = True
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        _in_call.active = False
+
+
+def _start_task(future: Future, coroutine_fn, args, kwargs, tasks: list):
+    """On the event loop, in the caller's context: run the coroutine as a task resolving future"""
+    if not future.set_running_or_notify_cancel():
+        return
+
+    def resolve(task):
+        if task.cancelled():
+            future.set_exception(ResearchCancelled("Research was cancelled"))
+        elif task.exception() is not None:
+            future.set_exception(task.exception())
+        else:
+            future.set_result(task.result())
+
+    try:
+        task = asyncio.ensure_future(coroutine_fn(*args, **kwargs))
+    except BaseException as exc:
+        future.set_exception(exc)
+        return
+    tasks.append(task)
+    task.add_done_callback(resolve)
+
+
+def run_cancellable(fn, *args, async_fn=None, **kwargs):
+    """
+    fn(*args, **kwargs), abandoned with ResearchCancelled as soon as the
+    current run is cancelled (runs inline when there is no current run).
+    With async_fn, the coroutine version of fn, the call runs on the shared
+    event loop and is cancelled with the run instead of abandoned.
+    """
+    token = _current.get()
+    if token is None:
+        return fn(*args, **kwargs)
+    token.check()
+
+    context = contextvars.copy_context()
+    tasks = []
+    if async_fn is not None:
+        future = Future()
+        loop = _event_loop()
+        loop.call_soon_threadsafe(_start_task, future, async_fn, args, kwargs, tasks, context=context)
+
+        def stop():
+            future.cancel()  # Not started yet
+            loop.call_soon_threadsafe(lambda: [task.cancel() for task in tasks])
+    elif getattr(_in_call, "active", False):
+        return fn(*args, **kwargs)  # Already in a cancellable call; waiting for the pool could deadlock
+    else:
+        pool = _call_pool()
+        future = pool.submit(context.run, _pool_call, fn, args, kwargs)
+
+        def stop():
+            pool.abandon(future)
+
+    done = threading.Event()
+    future.add_done_callback(lambda _: done.set())
+    remove = token.on_cancel(done.set)
+    try:
+        done.wait()
+    finally:
+        remove()
+    if not future.done():
+        stop()
+        token.check()
+    return future.result()
+
+
+class CancellableToolNode:
+    """Tool node wrapper: a cancelled run stops waiting for its tool calls"""
+
+    def __init__(self, tool_node):
+        self.tool_node = tool_node
+
+    def invoke(self, state, config=None):
+        return run_cancellable(self.tool_node.invoke, state, config)
+
+    def __call__(self, state, config):
+        return self.invoke(state, config)
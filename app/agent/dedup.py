@@ -0,0 +1,264 @@
+"""
+Dedup Module - Collapse near-duplicate tool results before they enter state
+Purpose: Keep overlapping search results and repeated scrapes out of every
+later prompt
+
+Tool outputs are split into sentences. Each sentence gets a MinHash
+signature of its word 3-grams; sentences whose estimated Jaccard similarity
+to one already returned in this run (earlier tool results or earlier in the
+same batch) reaches the threshold are dropped. LSH banding keeps lookups
+cheap as results accumulate.
+
+Each run (run_id; per sub-question in parallel mode) keeps its index in
+process memory, so a tool step only hashes its own results. The index is
+rebuilt from the messages when it is not in this process or no longer
+matches the run's tool history.
+"""
+
+import hashlib
+import random
+import re
+import threading
+from collections import OrderedDict
+
+from langchain_core.messages import ToolMessage
+from langchain_core.runnables import RunnableConfig
+
+from app.agent.artifacts import expand_artifacts
+from app.agent.indexes import tool_message_count
+from app.agent.state import MultiAgentState
+from app.agent.tokens import count_tokens
+
+DEDUP_TOOLS = ("google_web_search", "duck_duck_web_search", "web_scrape")
+DUPLICATE_RESULT = "[Duplicate result: already returned by an earlier tool call]"
+TRIMMED_RESULT = "[Sentences already returned by an earlier tool call removed]"
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+def split_sentences(text: str) -> list:
+    return [part for part in _SENTENCE_BREAK.split(text) if part.strip()]
+
+
+class MinHasher:
+    """MinHash signatures of word n-grams, split into LSH bands"""
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, shingle_size: int = 3, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        # Universal hashing a*x + b mod p as the permutations (fixed seed: stable across runs)
+        rng = random.Random(seed)
+        self._perms = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+
+    def shingles(self, text: str) -> set:
+        words = re.findall(r"\w+", text.lower())
+        size = self.shingle_size
+        if len(words) < size:
+            return {" ".join(words)} if words else set()
+        return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+    def signature(self, text: str) -> tuple:
+        hashes = [
+            int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "big")
+            for shingle in self.shingles(text)
+        ]
+        if not hashes:
+            return ()
+        return tuple(min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in self._perms)
+
+    def band_keys(self, signature: tuple):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows]
+
+    @staticmethod
+    def similarity(first: tuple, second: tuple) -> float:
+        """Estimated Jaccard similarity of two signatures"""
+        return sum(a == b for a, b in zip(first, second)) / len(first)
+
+
+class NearDuplicateIndex:
+    """Signatures seen so far, bucketed by LSH band"""
+
+    def __init__(self, hasher: MinHasher, threshold: float):
+        self.hasher = hasher
+        self.threshold = threshold
+        self._buckets = {}
+        self.tool_results = 0  # Tool results indexed (DedupToolNode)
+        self.lock = threading.Lock()
+
+    def add(self, signature: tuple):
+        for key in self.hasher.band_keys(signature):
+            self._buckets.setdefault(key, []).append(signature)
+
+    def contains(self, signature: tuple) -> bool:
+        for key in self.hasher.band_keys(signature):
+            for candidate in self._buckets.get(key, ()):
+                if MinHasher.similarity(signature, candidate) >= self.threshold:
+                    return True
+        return False
+
+
+class ToolResultDeduplicator:
+    """Removes sentences of new tool results that were already returned"""
+
+    def __init__(self, threshold: float = 0.8, min_sentence_chars: int = 30, hasher: MinHasher = None):
+        self.threshold = threshold
+        self.min_sentence_chars = min_sentence_chars
+        self.hasher = hasher or MinHasher()
+
+    def sentences(self, text: str) -> list:
+        return split_sentences(text)
+
+    def build_index(self, history: list) -> NearDuplicateIndex:
+        index = NearDuplicateIndex(self.hasher, self.threshold)
+        self.add_results(index, history)
+        return index
+
+    def add_results(self, index: NearDuplicateIndex, results: list):
+        """Index results as returned (no dedup)"""
+        for text in results:
+            for sentence in self.sentences(text):
+                if len(sentence) >= self.min_sentence_chars:
+                    index.add(self.hasher.signature(sentence))
+
+    def dedup(self, history: list, new_results: list) -> tuple:
+        """
+        Deduplicate new_results (strings) against history (earlier results)
+        Returns (deduplicated results, characters removed)
+        """
+        return self.dedup_against(self.build_index(history), new_results)
+
+    def dedup_against(self, index: NearDuplicateIndex, new_results: list) -> tuple:
+        """dedup() against an existing index, which the kept sentences are added to"""
+        deduplicated, removed = [], 0
+        for text in new_results:
+            kept, dropped = [], False
+            for sentence in self.sentences(text):
+                if len(sentence) < self.min_sentence_chars:
+                    kept.append(sentence)  # Headers and fragments carry no evidence to repeat
+                    continue
+                signature = self.hasher.signature(sentence)
+                if index.contains(signature):
+                    dropped = True
+                    continue
+                index.add(signature)
+                kept.append(sentence)
+
+            if not dropped:
+                deduplicated.append(text)  # Keep the original formatting
+                continue
+            if any(len(sentence) >= self.min_sentence_chars for sentence in kept):
+                result = f"{' '.join(kept)}\n{TRIMMED_RESULT}"
+            else:
+                result = DUPLICATE_RESULT
+            removed += max(0, len(text) - len(result))
+            deduplicated.append(result)
+        return deduplicated, removed
+
+
+# ===== PER-RUN INDEXES =====
+
+MAX_INDEXES = 256
+_indexes = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def _run_key(state: MultiAgentState):
+    # Parallel branches share the run_id but each has its own messages
+    run_id = state.get("run_id")
+    return (run_id, state.get("query", "")) if run_id else None
+
+
+class DedupToolNode:
+    """
+    Tool node wrapper: runs the tools, then deduplicates search/scrape
+    results against earlier tool results before they are added to state.
+    Records dedup_chars_removed / dedup_tokens_removed per run.
+    """
+
+    def __init__(self, tool_node, deduplicator: ToolResultDeduplicator = None, tool_names=DEDUP_TOOLS):
+        self.tool_node = tool_node
+        self.deduplicator = deduplicator or ToolResultDeduplicator()
+        self.tool_names = set(tool_names)
+
+    def invoke(self, state: MultiAgentState, config: RunnableConfig = None):
+        return self(state, config)
+
+    def __call__(self, state: MultiAgentState, config: RunnableConfig):
+        output = self.tool_node.invoke(state, config)
+        messages = output.get("messages", []) if isinstance(output, dict) else output
+        targets = [
+            i for i, message in enumerate(messages)
+            if isinstance(message, ToolMessage) and message.name in self.tool_names
+            and isinstance(message.content, str)
+        ]
+        new_results = sum(isinstance(message, ToolMessage) for message in messages)
+        if not targets:
+            self._index(state, new_results, [
+                message.content for message in messages
+                if isinstance(message, ToolMessage) and isinstance(message.content, str)
+            ])
+            return output
+
+        index = self._run_index(state)
+        with index.lock:
+            results, removed = self.deduplicator.dedup_against(index, [messages[i].content for i in targets])
+            self.deduplicator.add_results(index, [
+                message.content for i, message in enumerate(messages)
+                if i not in targets and isinstance(message, ToolMessage) and isinstance(message.content, str)
+            ])
+            index.tool_results += new_results
+        messages = list(messages)
+        tokens_removed = 0
+        for i, content in zip(targets, results):
+            if content is not messages[i].content:
+                tokens_removed += max(0, count_tokens(messages[i].content) - count_tokens(content))
+                messages[i] = messages[i].model_copy(update={"content": content})
+
+        if removed:
+            print(f"🧹 Dedup: removed {removed} chars ({tokens_removed} tokens) of repeated results")
+        return {
+            "messages": messages,
+            "dedup_chars_removed": removed,
+            "dedup_tokens_removed": tokens_removed,
+        }
+
+    def _run_index(self, state: MultiAgentState) -> NearDuplicateIndex:
+        """The run's index, rebuilt from the messages unless it covers exactly the state's tool results"""
+        key = _run_key(state)
+        count = tool_message_count(state)
+        with _indexes_lock:
+            index = _indexes.get(key) if key else None
+            if index is not None:
+                _indexes.move_to_end(key)
+        if index is not None and index.tool_results == count and index.threshold == self.deduplicator.threshold:
+            return index
+
+        index = self.deduplicator.build_index([
+            expand_artifacts(message.content) for message in state.get("messages", [])
+            if isinstance(message, ToolMessage) and isinstance(message.content, str)
+        ])
+        index.tool_results = count
+        if key:
+            with _indexes_lock:
+                _indexes[key] = index
+                while len(_indexes) > MAX_INDEXES:
+                    _indexes.popitem(last=False)
+        return index
+
+    def _index(self, state: MultiAgentState, new_results: int, contents: list):
+        """Add results that needed no dedup, keeping the run's index current"""
+        if not new_results or _run_key(state) is None:
+            return
+        index = self._run_index(state)
+        with index.lock:
+            self.deduplicator.add_results(index, contents)
+            index.tool_results += new_results
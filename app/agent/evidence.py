@@ -0,0 +1,277 @@
+"""
+Evidence Module - Typed, BM25-ranked index of what the tools returned
+Purpose: Give the fact-checker and summarizer the most relevant evidence
+instead of an arbitrary prefix of the research text
+
+Tool results are split into short passages as they arrive. Each passage is
+indexed with its source (URL, or tool and query), title, timestamp and the
+checkable claims in it. The index is column-oriented (parallel lists and
+arrays, postings as arrays of ids/term counts) and lives in process memory,
+one per research run (run_id). It is rebuilt from the messages when a run's
+index is not in this process.
+"""
+
+import math
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig
+
+from app.agent.artifacts import expand_artifacts
+from app.agent.dedup import DUPLICATE_RESULT, TRIMMED_RESULT, split_sentences
+from app.agent.state import MultiAgentState
+from app.agent.sufficiency import NO_RESULT_MARKERS, URL_PATTERN, terms
+from app.agent.tokens import count_tokens, truncate_tokens
+from app.config.settings import settings
+
+EVIDENCE_TOOLS = ("google_web_search", "duck_duck_web_search", "web_scrape")
+MAX_PASSAGE_CHARS = 320
+MIN_SENTENCE_CHARS = 30
+
+
+@dataclass(frozen=True)
+class Evidence:
+    """One ranked passage"""
+    source: str
+    title: str
+    snippet: str
+    claims: tuple
+    timestamp: float
+    score: float = 0.0
+
+
+def index_terms(text: str) -> list:
+    """terms() plus version prefixes (3.14.0 also indexes 3.14)"""
+    found = []
+    for term in terms(text):
+        found.append(term)
+        parts = term.split(".")
+        if len(parts) > 2 and all(part.isdigit() for part in parts):
+            found.extend(".".join(parts[:n]) for n in range(2, len(parts)))
+    return found
+
+
+def is_claim(sentence: str) -> bool:
+    """Checkable statements: figures, dates, versions or named things"""
+    words = sentence.split()
+    return any(ch.isdigit() for ch in sentence) or sum(w[:1].isupper() for w in words[1:]) >= 2
+
+
+def extract_evidence(tool_name: str, args: dict, content: str) -> list:
+    """Passages (source, title, snippet, claims) from one tool result"""
+    content = content.replace(DUPLICATE_RESULT, "").replace(TRIMMED_RESULT, "").strip()
+    if not content or any(marker in content[:200].lower() for marker in NO_RESULT_MARKERS):
+        return []
+
+    lines = content.splitlines()
+    if tool_name == "web_scrape":
+        source = str(args.get("url", "")) or "web page"
+        lines = [line for line in lines if not line.startswith("Webpage Content")]
+        # First short line without navigation separators is usually the page title
+        title = next((line.strip() for line in lines if 10 <= len(line.strip()) <= 100
+                      and "|" not in line), source)
+    else:
+        query = str(next(iter(args.values()), "")) if args else ""
+        urls = URL_PATTERN.findall(content)
+        source = urls[0] if urls else f"{tool_name}: {query}"
+        title = query or tool_name
+
+    passages, current = [], []
+    for sentence in split_sentences("\n".join(lines)):
+        sentence = sentence.strip()
+        if len(sentence) < MIN_SENTENCE_CHARS or sentence == title:
+            continue
+        if current and len(" ".join(current + [sentence])) > MAX_PASSAGE_CHARS:
+            passages.append(current)
+            current = []
+        current.append(sentence)
+    if current:
+        passages.append(current)
+
+    return [
+        {"source": source, "title": title, "snippet": " ".join(sentences),
+         "claims": tuple(s for s in sentences if is_claim(s))}
+        for sentences in passages
+    ]
+
+
+class EvidenceIndex:
+    """Column-oriented passage store with an Okapi BM25 inverted index"""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.sources, self.titles, self.snippets, self.claims = [], [], [], []
+        self.timestamps = array("d")
+        self.lengths = array("I")
+        self.postings = {}  # term -> (array of passage ids, array of term counts)
+        self.total_length = 0
+        self._seen = set()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.snippets)
+
+    def add(self, source: str, title: str, snippet: str, claims=(), timestamp: float = None):
+        """Index a passage; returns its id (None for a repeat)"""
+        words = index_terms(snippet)
+        with self._lock:
+            if not words or snippet in self._seen:
+                return None
+            self._seen.add(snippet)
+            passage_id = len(self.snippets)
+            self.sources.append(source)
+            self.titles.append(title)
+            self.snippets.append(snippet)
+            self.claims.append(tuple(claims))
+            self.timestamps.append(time.time() if timestamp is None else timestamp)
+            self.lengths.append(len(words))
+            self.total_length += len(words)
+
+            counts = {}
+            for word in words:
+                counts[word] = counts.get(word, 0) + 1
+            for word, count in counts.items():
+                ids, tfs = self.postings.setdefault(word, (array("I"), array("I")))
+                ids.append(passage_id)
+                tfs.append(count)
+            return passage_id
+
+    def add_tool_result(self, tool_name: str, args: dict, content: str) -> int:
+        added = 0
+        for passage in extract_evidence(tool_name, args, content):
+            added += self.add(**passage) is not None
+        return added
+
+    def search(self, query: str, k: int = 8) -> list:
+        """Top-k passages for the query by BM25 score"""
+        with self._lock:
+            count = len(self.snippets)
+            if not count:
+                return []
+            average = self.total_length / count
+            scores = {}
+            for word in set(index_terms(query)):
+                ids, tfs = self.postings.get(word, ((), ()))
+                if not ids:
+                    continue
+                idf = math.log(1 + (count - len(ids) + 0.5) / (len(ids) + 0.5))
+                for passage_id, tf in zip(ids, tfs):
+                    norm = self.k1 * (1 - self.b + self.b * self.lengths[passage_id] / average)
+                    scores[passage_id] = scores.get(passage_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+            ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:k]
+            return [
+                Evidence(self.sources[i], self.titles[i], self.snippets[i], self.claims[i],
+                         self.timestamps[i], round(score, 4))
+                for i, score in ranked
+            ]
+
+
+def format_evidence(evidence: list, max_tokens: int = None) -> str:
+    """Numbered passages with their sources, up to max_tokens"""
+    blocks, used = [], 0
+    for number, item in enumerate(evidence, 1):
+        block = f"[{number}] {item.snippet}\n    Source: {item.source}"
+        tokens = count_tokens(block) + 1
+        if max_tokens is not None and used + tokens > max_tokens:
+            if not blocks:
+                blocks.append(truncate_tokens(block, max_tokens))
+            break
+        blocks.append(block)
+        used += tokens
+    return "\n\n".join(blocks)
+
+
+# ===== PER-RUN INDEXES =====
+
+MAX_INDEXES = 256
+_indexes = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def get_evidence_index(run_id: str) -> EvidenceIndex:
+    """The run's index in this process (created on first use; oldest runs evicted)"""
+    with _indexes_lock:
+        index = _indexes.get(run_id)
+        if index is None:
+            index = _indexes[run_id] = EvidenceIndex()
+            while len(_indexes) > MAX_INDEXES:
+                _indexes.popitem(last=False)
+        else:
+            _indexes.move_to_end(run_id)
+        return index
+
+
+def build_evidence_index(messages: list) -> EvidenceIndex:
+    """Index every search/scrape result in the messages"""
+    index = EvidenceIndex()
+    calls = {}
+    for message in messages:
+        if isinstance(message, AIMessage):
+            calls.update({call["id"]: call for call in message.tool_calls or []})
+        elif isinstance(message, ToolMessage) and message.name in EVIDENCE_TOOLS:
+            call = calls.get(message.tool_call_id, {})
+            index.add_tool_result(message.name, call.get("args", {}), str(expand_artifacts(message.content)))
+    return index
+
+
+def evidence_index(state: MultiAgentState) -> EvidenceIndex:
+    run_id = state.get("run_id")
+    with _indexes_lock:
+        index = _indexes.get(run_id) if run_id else None
+    if index is not None and len(index):
+        return index
+    return build_evidence_index(state.get("messages", []))
+
+
+def select_evidence(state: MultiAgentState, text: str, max_tokens: int, k: int = None) -> str:
+    """
+    text if it fits in max_tokens, else the top-k passages for the query:
+    from the evidence index, or from text itself when nothing was indexed
+    """
+    if count_tokens(text) <= max_tokens:
+        return text
+    query = state.get("query", "")
+    k = settings.EVIDENCE_TOP_K if k is None else k
+    index = evidence_index(state)
+    if not len(index):
+        index = EvidenceIndex()
+        for passage in extract_evidence("research", {}, text):
+            index.add(**{**passage, "source": "research findings"})
+    selected = format_evidence(index.search(query, k), max_tokens)
+    return selected or truncate_tokens(text, max_tokens)
+
+
+class EvidenceToolNode:
+    """Tool node wrapper indexing search/scrape results as they arrive"""
+
+    def __init__(self, tool_node, tool_names=EVIDENCE_TOOLS):
+        self.tool_node = tool_node
+        self.tool_names = set(tool_names)
+
+    def invoke(self, state: MultiAgentState, config: RunnableConfig = None):
+        return self(state, config)
+
+    def __call__(self, state: MultiAgentState, config: RunnableConfig):
+        output = self.tool_node.invoke(state, config)
+        messages = output.get("messages", []) if isinstance(output, dict) else output
+        run_id = state.get("run_id")
+        if not run_id:
+            return output
+
+        last = state.get("messages", [])[-1] if state.get("messages") else None
+        calls = {call["id"]: call for call in getattr(last, "tool_calls", None) or []}
+        index = get_evidence_index(run_id)
+        added = 0
+        for message in messages:
+            if isinstance(message, ToolMessage) and message.name in self.tool_names:
+                args = calls.get(message.tool_call_id, {}).get("args", {})
+                added += index.add_tool_result(message.name, args, str(message.content))
+        if added:
+            print(f"🗂️  Evidence: indexed {added} passage(s) ({len(index)} total)")
+        return output
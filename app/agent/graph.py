@@ -3,110 +3,354 @@ Graph Module - Builds and manages the workflow
 Purpose: Main orchestration logic
 """
 
+import uuid
+
 from langgraph.graph import StateGraph,END
 from langgraph.prebuilt import ToolNode
 from langchain_groq import ChatGroq
 
 # my project files 
 from app.agent.state import MultiAgentState
-from app.agent.agents import ResearcherAgent,FactCheckerAgent,SummarizerAgent
+from app.agent.agents import (
+    PlannerAgent,
+    ResearcherAgent,
+    FactCheckerAgent,
+    IncrementalFactCheckerAgent,
+    SummarizerAgent
+)
 from app.agent.router import (
     should_continue_research,
     should_continue_fact_checking,
     after_tools,
+    after_tools_pipelined,
+    fan_out_research,
+    merge_research_data,
     save_research_data,
     save_verified_facts
 )
+from app.agent.artifacts import ArtifactToolNode, get_artifact_store
+from app.agent.cancellation import CancelToken, CancellableToolNode, cancellation_scope
+from app.agent.dedup import DedupToolNode, ToolResultDeduplicator
+from app.agent.evidence import EvidenceToolNode
+from app.agent.indexes import indexed_tool_node, initial_indexes
+from app.agent.llm_dispatch import DispatchingLLM, get_micro_batcher
+from app.agent.sufficiency import HeuristicSufficiencyScorer, SufficiencyCheck
 from app.agent.tools import my_tools
+from app.config.settings import settings
 from dotenv import load_dotenv
 load_dotenv()
 # ===== BUILD WORKFLOW =====
 
-# Initialize components
-llm = ChatGroq(model="openai/gpt-oss-120b", temperature=0.7)
-researcher = ResearcherAgent(llm, my_tools)
-fact_checker = FactCheckerAgent(llm, my_tools)
-summarizer = SummarizerAgent(llm)
-tool_node = ToolNode(my_tools)
+def add_sufficiency_check(workflow: StateGraph, sufficiency_scorer) -> str:
+    """Run the early-exit scorer after each tool step; returns the node to route from"""
+    if sufficiency_scorer is None:
+        return "tools"
+    workflow.add_node("check_sufficiency", SufficiencyCheck(sufficiency_scorer))
+    workflow.add_edge("tools", "check_sufficiency")
+    return "check_sufficiency"
 
-# Build graph
-workflow = StateGraph(MultiAgentState)
-
-# Add nodes
-workflow.add_node("researcher", researcher)
-workflow.add_node("fact_checker", fact_checker)
-workflow.add_node("summarizer", summarizer)
-workflow.add_node("tools", tool_node)
-workflow.add_node("save_research", save_research_data)
-workflow.add_node("save_facts", save_verified_facts)
-
-# Set entry point
-workflow.set_entry_point("researcher")
-
-# Researcher flow
-workflow.add_conditional_edges(
-    "researcher",
-    should_continue_research,
-    {
-        "tools": "tools",
-        "researcher": "researcher",
-        "save_research": "save_research"  # FIXED
-    }
-)
 
-workflow.add_edge("save_research", "fact_checker")
+def build_workflow(researcher, fact_checker, summarizer, tool_node, sufficiency_scorer=None) -> StateGraph:
+    """Wire the agents and tool node into the research workflow"""
+    workflow = StateGraph(MultiAgentState)
 
-# Fact-checker flow
-workflow.add_conditional_edges(
-    "fact_checker",
-    should_continue_fact_checking,
-    {
-        "tools": "tools",
-        "save_facts": "save_facts"
-    }
-)
+    # Add nodes
+    workflow.add_node("researcher", researcher)
+    workflow.add_node("fact_checker", fact_checker)
+    workflow.add_node("summarizer", summarizer)
+    workflow.add_node("tools", indexed_tool_node(tool_node))
+    workflow.add_node("save_research", save_research_data)
+    workflow.add_node("save_facts", save_verified_facts)
 
-workflow.add_edge("save_facts", "summarizer")
-workflow.add_edge("summarizer", END)
+    # Set entry point
+    workflow.set_entry_point("researcher")
 
-# Tools routing
-workflow.add_conditional_edges(
-    "tools",
-    after_tools,
-    {
-        "researcher": "researcher",
-        "fact_checker": "fact_checker",
-        "save_research": "save_research"
-    }
-)
+    # Researcher flow
+    workflow.add_conditional_edges(
+        "researcher",
+        should_continue_research,
+        {
+            "tools": "tools",
+            "researcher": "researcher",
+            "save_research": "save_research"  # FIXED
+        }
+    )
+
+    workflow.add_edge("save_research", "fact_checker")
+
+    # Fact-checker flow
+    workflow.add_conditional_edges(
+        "fact_checker",
+        should_continue_fact_checking,
+        {
+            "tools": "tools",
+            "save_facts": "save_facts"
+        }
+    )
+
+    workflow.add_edge("save_facts", "summarizer")
+    workflow.add_edge("summarizer", END)
+
+    # Tools routing
+    workflow.add_conditional_edges(
+        add_sufficiency_check(workflow, sufficiency_scorer),
+        after_tools,
+        {
+            "researcher": "researcher",
+            "fact_checker": "fact_checker",
+            "save_research": "save_research"
+        }
+    )
+
+    return workflow
+
+
+def build_branch_workflow(researcher, tool_node, sufficiency_scorer=None) -> StateGraph:
+    """Researcher/tools loop for one sub-question (parallel mode)"""
+    workflow = StateGraph(MultiAgentState)
+
+    workflow.add_node("researcher", researcher)
+    workflow.add_node("tools", indexed_tool_node(tool_node))
+    workflow.add_node("save_research", save_research_data)
+
+    workflow.set_entry_point("researcher")
+    workflow.add_conditional_edges(
+        "researcher",
+        should_continue_research,
+        {
+            "tools": "tools",
+            "researcher": "researcher",
+            "save_research": "save_research"
+        }
+    )
+    workflow.add_conditional_edges(
+        add_sufficiency_check(workflow, sufficiency_scorer),
+        after_tools,
+        {
+            "researcher": "researcher",
+            "save_research": "save_research"
+        }
+    )
+    workflow.add_edge("save_research", END)
+
+    return workflow
+
+
+class ResearchBranch:
+    """Node running one sub-question through its own branch graph"""
+
+    def __init__(self, researcher, tool_node, sufficiency_scorer=None):
+        self.graph = build_branch_workflow(researcher, tool_node, sufficiency_scorer).compile()
 
+    def __call__(self, branch: dict):
+        # Each branch keeps its own messages; only the findings are merged
+        result = self.graph.invoke({
+            "messages": [],
+            "query": branch["query"],
+            "run_id": branch.get("run_id", ""),
+            "prior_research": branch.get("prior_research", ""),
+            "research_data": "",
+            "iteration": 0,
+            "max_iterations": branch["max_iterations"],
+            "dedup_chars_removed": 0,
+            "dedup_tokens_removed": 0,
+            **initial_indexes(),
+        })
+        return {"branch_findings": [{
+            "index": branch["index"],
+            "query": branch["query"],
+            "findings": result.get("research_data", ""),
+            "iterations": result.get("iteration", 0),
+            "iterations_saved": result.get("iterations_saved", 0),
+        }],
+            "dedup_chars_removed": result.get("dedup_chars_removed", 0),
+            "dedup_tokens_removed": result.get("dedup_tokens_removed", 0)}
+
+
+def build_parallel_workflow(planner, researcher, fact_checker, summarizer, tool_node,
+                            sufficiency_scorer=None) -> StateGraph:
+    """
+    Parallel mode: planner -> N research branches at once -> merge -> fact-check
+
+    Branches are dispatched with Send (map-reduce), so research takes about
+    as long as the slowest branch instead of the sum of all iterations.
+    """
+    workflow = StateGraph(MultiAgentState)
+
+    workflow.add_node("planner", planner)
+    workflow.add_node("research_branch", ResearchBranch(researcher, tool_node, sufficiency_scorer))
+    workflow.add_node("merge_research", merge_research_data)
+    workflow.add_node("fact_checker", fact_checker)
+    workflow.add_node("tools", indexed_tool_node(tool_node))
+    workflow.add_node("save_facts", save_verified_facts)
+    workflow.add_node("summarizer", summarizer)
+
+    workflow.set_entry_point("planner")
+    workflow.add_conditional_edges("planner", fan_out_research, ["research_branch"])
+    workflow.add_edge("research_branch", "merge_research")
+    workflow.add_edge("merge_research", "fact_checker")
+
+    # Fact-checking and summary as in the serial workflow
+    workflow.add_conditional_edges(
+        "fact_checker",
+        should_continue_fact_checking,
+        {
+            "tools": "tools",
+            "save_facts": "save_facts"
+        }
+    )
+    workflow.add_edge("tools", "fact_checker")
+    workflow.add_edge("save_facts", "summarizer")
+    workflow.add_edge("summarizer", END)
+
+    return workflow
+
+
+def build_pipelined_workflow(researcher, batch_fact_checker, summarizer, tool_node,
+                             sufficiency_scorer=None) -> StateGraph:
+    """
+    Pipelined mode: fact-check each batch of tool results during research
+
+    After every tool step the researcher's next turn and a check of the new
+    results run concurrently; verified_facts grows batch by batch. A final
+    check picks up anything left before the summary.
+    """
+    workflow = StateGraph(MultiAgentState)
+
+    workflow.add_node("researcher", researcher)
+    workflow.add_node("tools", indexed_tool_node(tool_node))
+    workflow.add_node("check_batch", batch_fact_checker)
+    workflow.add_node("save_research", save_research_data)
+    workflow.add_node("fact_checker", batch_fact_checker)
+    workflow.add_node("summarizer", summarizer)
+
+    workflow.set_entry_point("researcher")
+    workflow.add_conditional_edges(
+        "researcher",
+        should_continue_research,
+        {
+            "tools": "tools",
+            "researcher": "researcher",
+            "save_research": "save_research"
+        }
+    )
+    workflow.add_conditional_edges(
+        add_sufficiency_check(workflow, sufficiency_scorer),
+        after_tools_pipelined,
+        ["researcher", "save_research", "check_batch"]
+    )
+
+    # check_batch ends its branch; the final check waits for the last one
+    workflow.add_edge("save_research", "fact_checker")
+    workflow.add_edge("fact_checker", "summarizer")
+    workflow.add_edge("summarizer", END)
+
+    return workflow
+
+
+def default_sufficiency_scorer():
+    """Early-exit scorer from settings (None when RESEARCH_EARLY_EXIT is off)"""
+    if not settings.RESEARCH_EARLY_EXIT:
+        return None
+    return HeuristicSufficiencyScorer(threshold=settings.RESEARCH_SUFFICIENCY_THRESHOLD)
+
+
+def default_tool_node(tools, dedup: bool = None):
+    """
+    Tool node from settings: deduplicates repeated results (TOOL_RESULT_DEDUP),
+    indexes them as evidence and moves large outputs into the artifact store
+    (ARTIFACT_STORE)
+    """
+    tool_node = CancellableToolNode(ToolNode(tools))
+    if settings.TOOL_RESULT_DEDUP if dedup is None else dedup:
+        tool_node = DedupToolNode(tool_node, ToolResultDeduplicator(settings.TOOL_RESULT_DEDUP_THRESHOLD))
+    tool_node = EvidenceToolNode(tool_node)
+    store = get_artifact_store()
+    if store is not None:
+        tool_node = ArtifactToolNode(
+            tool_node, store, settings.ARTIFACT_MIN_CHARS, settings.ARTIFACT_EXCERPT_CHARS
+        )
+    return tool_node
+
+
+# Initialize components
+# Shared by every run in the process: metered, and micro-batched when LLM_MICRO_BATCH is on
+llm = DispatchingLLM(ChatGroq(model="openai/gpt-oss-120b", temperature=0.7), get_micro_batcher())
+researcher = ResearcherAgent(llm, my_tools, settings.RESEARCH_PROMPT_TOKENS)
+fact_checker = FactCheckerAgent(llm, my_tools, settings.FACT_CHECK_PROMPT_TOKENS)
+summarizer = SummarizerAgent(llm, settings.SUMMARY_PROMPT_TOKENS)
+tool_node = default_tool_node(my_tools)
+planner = PlannerAgent(llm, settings.RESEARCH_PARALLEL_BRANCHES)
+sufficiency_scorer = default_sufficiency_scorer()
+
+# Build graph
+workflow = build_workflow(researcher, fact_checker, summarizer, tool_node, sufficiency_scorer)
 agent = workflow.compile()
+parallel_agent = build_parallel_workflow(
+    planner, researcher, fact_checker, summarizer, tool_node, sufficiency_scorer
+).compile()
+pipelined_agent = build_pipelined_workflow(
+    researcher, IncrementalFactCheckerAgent(llm, settings.FACT_CHECK_PROMPT_TOKENS), summarizer, tool_node, sufficiency_scorer
+).compile()
+
+AGENTS_BY_MODE = {"serial": agent, "parallel": parallel_agent, "pipelined": pipelined_agent}
 
 # ===== EXECUTE =====
 
-def research(query: str,max_iterations: int =2):
+def research(query: str,max_iterations: int =2, mode: str = "serial", prior_research: str = "",
+             cancel_token: CancelToken = None):
+    """
+    Run the workflow
+    mode "parallel" researches planned sub-questions concurrently;
+    "pipelined" fact-checks tool results while research continues.
+    prior_research: related earlier findings the researcher may reuse
+    cancel_token: raises ResearchCancelled once cancelled (checked after
+    every graph step; in-flight LLM and tool calls are abandoned)
+    """
+    if mode not in AGENTS_BY_MODE:
+        raise ValueError(f"Unknown research mode: {mode}")
+
     initial_state = {
         "messages": [],
         "query": query,
+        "run_id": uuid.uuid4().hex,
+        "prior_research": prior_research,
         "research_data": "",
         "verified_facts": "",
         "final_report": "",
         "iteration": 0,
         "max_iterations": max_iterations,
         "fact_check_iteration": 0,  # CRITICAL
-        "max_fact_check_iterations": 1  # CRITICAL: Limit to 1 iteration
+        "max_fact_check_iterations": 1,  # CRITICAL: Limit to 1 iteration
+        "sub_questions": [],
+        "branch_findings": [],
+        "fact_checked_results": 0,
+        "research_sufficient": False,
+        "iterations_saved": 0,
+        "dedup_chars_removed": 0,
+        "dedup_tokens_removed": 0,
+        **initial_indexes()
     }
     
     print("="*80)
-    print("🚀 Starting Multi-Agent Research System")
+    print(f"🚀 Starting Multi-Agent Research System ({mode})")
     print("="*80)
     
-    result = agent.invoke(initial_state)
+    token = cancel_token or CancelToken()
+    result = initial_state
+    with cancellation_scope(token):
+        for result in AGENTS_BY_MODE[mode].stream(initial_state, stream_mode="values"):
+            token.check()
     
     print("\n" + "="*80)
     print("📊 FINAL REPORT")
     print("="*80)
     print(result.get("final_report", "No report generated"))
+    if result.get("iterations_saved"):
+        print(f"⏭️  Early exit saved {result['iterations_saved']} researcher iteration(s)")
+    if result.get("dedup_chars_removed"):
+        print(f"🧹 Dedup removed {result['dedup_chars_removed']} chars "
+              f"({result['dedup_tokens_removed']} tokens) of repeated tool results")
     return result
 
 # ===== TEST =====
@@ -0,0 +1,116 @@
+"""
+Indexes Module - Incremental views of the message history
+Purpose: Let routers and agents read recent outputs in O(1) instead of
+rescanning every message on every step
+
+Nodes that add messages also return index_updates() for them; the state
+reducers keep the indexes current. The readers fall back to scanning the
+messages for states built by hand (tests, callers outside the graph).
+"""
+
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig
+
+from app.agent.state import MultiAgentState
+
+# An AI message must have more text than this to count as an agent's output
+MIN_OUTPUT_CHARS = 50
+
+
+def message_text(content) -> str:
+    """Text of a message, joining list-form content"""
+    if isinstance(content, str):
+        return content
+    return "\n".join(
+        item.get("text", "") if isinstance(item, dict) else str(item) for item in content
+    )
+
+
+def initial_indexes() -> dict:
+    return {
+        "agent_outputs": {},
+        "last_ai_output": "",
+        "recent_tool_results": [],
+        "tool_message_count": 0,
+    }
+
+
+def index_updates(messages: list, agent_name: str = None) -> dict:
+    """State updates indexing messages a node is about to add"""
+    updates = {}
+    outputs = [
+        text for text in (message_text(m.content) for m in messages if isinstance(m, AIMessage))
+        if len(text) > MIN_OUTPUT_CHARS
+    ]
+    if outputs:
+        updates["last_ai_output"] = outputs[-1]
+        if agent_name:
+            updates["agent_outputs"] = {agent_name: outputs[-1]}
+
+    tool_results = [m.content for m in messages if isinstance(m, ToolMessage)]
+    if tool_results:
+        updates["recent_tool_results"] = tool_results
+        updates["tool_message_count"] = len(tool_results)
+    return updates
+
+
+def is_indexed(state: MultiAgentState) -> bool:
+    return "tool_message_count" in state
+
+
+def agent_output(state: MultiAgentState, agent_name: str) -> str:
+    """Latest substantial output of the agent, else of any agent ("" if none)"""
+    if is_indexed(state):
+        return state.get("agent_outputs", {}).get(agent_name) or state.get("last_ai_output", "")
+
+    for message in reversed(state.get("messages", [])):
+        if isinstance(message, AIMessage):
+            text = message_text(message.content)
+            if len(text) > MIN_OUTPUT_CHARS:
+                return text
+    return ""
+
+
+def tool_message_count(state: MultiAgentState) -> int:
+    if is_indexed(state):
+        return state["tool_message_count"]
+    return sum(isinstance(message, ToolMessage) for message in state.get("messages", []))
+
+
+def recent_tool_results(state: MultiAgentState, limit: int) -> list:
+    """The last `limit` tool results, oldest first"""
+    if limit <= 0:
+        return []
+    if is_indexed(state):
+        buffer = state.get("recent_tool_results", [])
+        if limit <= len(buffer) or len(buffer) == state["tool_message_count"]:
+            return buffer[-limit:]
+
+    # Older than the ring buffer holds (or not indexed): scan
+    results = []
+    for message in reversed(state.get("messages", [])):
+        if isinstance(message, ToolMessage):
+            results.append(message.content)
+            if len(results) >= limit:
+                break
+    return list(reversed(results))
+
+
+class IndexedToolNode:
+    """Tool node wrapper adding index updates for the tool results it returns"""
+
+    def __init__(self, tool_node):
+        self.tool_node = tool_node
+
+    def invoke(self, state: MultiAgentState, config: RunnableConfig = None):
+        return self(state, config)
+
+    def __call__(self, state: MultiAgentState, config: RunnableConfig):
+        output = self.tool_node.invoke(state, config)
+        if not isinstance(output, dict):
+            output = {"messages": output}
+        return {**output, **index_updates(output.get("messages", []))}
+
+
+def indexed_tool_node(tool_node):
+    return tool_node if isinstance(tool_node, IndexedToolNode) else IndexedToolNode(tool_node)
@@ -0,0 +1,166 @@
+"""
+LLM Dispatch Module - Metered LLM calls with optional micro-batching
+Purpose: Measure how much of each prompt the provider served from its
+prefix cache, and group concurrent calls for backends that batch
+
+Agents call the model through DispatchingLLM, which records prompt tokens,
+cached prompt tokens (usage_metadata input_token_details.cache_read, as
+reported by providers with prefix caching) and batch sizes in llm_stats,
+exposed by GET /health/llm.
+
+With LLM_MICRO_BATCH on, calls to the same bound model (same tools) that
+arrive within LLM_BATCH_WINDOW_MS, e.g. summarizer calls of concurrent
+research runs, are sent as one batch() of up to LLM_BATCH_MAX_SIZE inputs:
+the first caller's thread sends it, the others wait for their result. This
+pays off with backends whose batch() is a real batched request; LangChain's
+default batch() only runs the calls concurrently, so it is off by default.
+"""
+
+import threading
+from collections import Counter
+from concurrent.futures import Future
+
+from app.agent.cancellation import run_cancellable
+from app.config.settings import settings
+
+
+class LLMStats:
+    """Process-wide counters of LLM calls, prompt-cache hits and batch sizes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.calls = 0
+            self.prompt_tokens = 0
+            self.cached_prompt_tokens = 0
+            self.batch_sizes = Counter()
+
+    def record_call(self, response):
+        usage = getattr(response, "usage_metadata", None) or {}
+        cached = (usage.get("input_token_details") or {}).get("cache_read") or 0
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += usage.get("input_tokens") or 0
+            self.cached_prompt_tokens += cached
+
+    def record_batch(self, size: int):
+        with self._lock:
+            self.batch_sizes[size] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            batches = sum(self.batch_sizes.values())
+            batched_calls = sum(size * count for size, count in self.batch_sizes.items())
+            return {
+                "calls": self.calls,
+                "prompt_tokens": self.prompt_tokens,
+                "cached_prompt_tokens": self.cached_prompt_tokens,
+                "cache_hit_rate": round(self.cached_prompt_tokens / self.prompt_tokens, 4)
+                if self.prompt_tokens else 0.0,
+                "batches": batches,
+                "mean_batch_size": round(batched_calls / batches, 2) if batches else 0.0,
+                "max_batch_size": max(self.batch_sizes, default=0),
+                "batch_sizes": {str(size): self.batch_sizes[size] for size in sorted(self.batch_sizes)},
+            }
+
+
+llm_stats = LLMStats()
+
+
+class _Batch:
+    def __init__(self, runnable):
+        self.runnable = runnable
+        self.inputs = []
+        self.futures = []
+        self.full = threading.Event()
+
+
+class MicroBatcher:
+    """Groups invoke() calls per runnable into batch() calls"""
+
+    def __init__(self, window_seconds: float = 0.02, max_size: int = 8, stats: LLMStats = llm_stats):
+        self.window_seconds = window_seconds
+        self.max_size = max_size
+        self.stats = stats
+        self._open = {}  # id(runnable) -> batch still accepting calls
+        self._lock = threading.Lock()
+
+    def submit(self, runnable, messages):
+        """Result of runnable.invoke(messages), sent along with concurrent calls"""
+        key = id(runnable)
+        future = Future()
+        with self._lock:
+            batch = self._open.get(key)
+            leader = batch is None
+            if leader:
+                batch = self._open[key] = _Batch(runnable)
+            batch.inputs.append(messages)
+            batch.futures.append(future)
+            if len(batch.inputs) >= self.max_size:
+                del self._open[key]  # Full: the next call opens a new batch
+                batch.full.set()
+
+        if leader:
+            batch.full.wait(self.window_seconds)
+            with self._lock:
+                if self._open.get(key) is batch:
+                    del self._open[key]
+            self._send(batch)
+        return future.result()
+
+    def _send(self, batch: _Batch):
+        self.stats.record_batch(len(batch.inputs))
+        try:
+            if len(batch.inputs) == 1:
+                outputs = [batch.runnable.invoke(batch.inputs[0])]
+            else:
+                outputs = batch.runnable.batch(batch.inputs, return_exceptions=True)
+        except Exception as exc:
+            outputs = [exc] * len(batch.inputs)
+        for future, output in zip(batch.futures, outputs):
+            if isinstance(output, Exception):
+                future.set_exception(output)
+            else:
+                future.set_result(output)
+
+
+class DispatchingLLM:
+    """Chat model wrapper for the agents (invoke and bind_tools): metered, optionally batched"""
+
+    def __init__(self, llm, batcher: MicroBatcher = None, stats: LLMStats = llm_stats, runnable=None):
+        self.llm = llm
+        self.batcher = batcher
+        self.stats = stats
+        self.runnable = runnable or llm
+
+    def bind_tools(self, tools, **kwargs):
+        return DispatchingLLM(self.llm, self.batcher, self.stats, self.llm.bind_tools(tools, **kwargs))
+
+    def invoke(self, messages, config=None, **kwargs):
+        # A cancelled run stops waiting for the provider (see app.agent.cancellation)
+        if self.batcher is not None and config is None and not kwargs:
+            response = run_cancellable(self.batcher.submit, self.runnable, messages)
+        else:
+            # Coroutine version, when the model has one: cancelling the run closes the request
+            response = run_cancellable(self.runnable.invoke, messages, config,
+                                       async_fn=getattr(self.runnable, "ainvoke", None), **kwargs)
+        self.stats.record_call(response)
+        return response
+
+
+_batcher = None
+_batcher_lock = threading.Lock()
+
+def get_micro_batcher():
+    """Process-wide batcher, or None when LLM_MICRO_BATCH is off"""
+    global _batcher
+    if not settings.LLM_MICRO_BATCH:
+        return None
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                _batcher = MicroBatcher(settings.LLM_BATCH_WINDOW_MS / 1000, settings.LLM_BATCH_MAX_SIZE)
+    return _batcher
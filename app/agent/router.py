@@ -4,8 +4,12 @@ Router Module - Defines routing/decision logic
 Purpose: Separate routing logic for clarity and testing
 """
 
-from app.agent.state import MultiAgentState
-from langchain_core.messages import AIMessage,ToolMessage
+from langchain_core.messages import ToolMessage
+
+from app.agent.state import TOOL_RESULT_BUFFER, MultiAgentState
+from app.agent.artifacts import expand_artifacts
+from app.agent.indexes import agent_output, recent_tool_results
+from langgraph.types import Send
 
 # ===== ROUTING FUNCTIONS =====
 
@@ -21,6 +25,11 @@ def should_continue_research(state: MultiAgentState) -> str:
         print(f"🔧 Router: Researcher -> Tools (iteration {iteration}/{max_iterations})")
         return "tools"
     
+    # Early exit: the researcher just summarized results found sufficient
+    if state.get("research_sufficient"):
+        print(f"⏭️  Router: Researcher -> Save Research (sufficient at iteration {iteration}/{max_iterations})")
+        return "save_research"
+    
     # FIXED: Check iteration limit - go to save_research
     if iteration >= max_iterations:
         print(f"✅ Router: Researcher -> Save Research ({max_iterations} iterations complete)")
@@ -63,6 +72,15 @@ def after_tools(state: MultiAgentState) -> str:
         print(f"🔍 Router: Tools -> Fact Checker (has research data)")
         return "fact_checker"
     
+    # Sufficiency check found the results already cover the query: one last turn to
+    # summarize, unless it would be the last turn anyway (then save them as found)
+    if state.get("research_sufficient"):
+        if iteration + 1 < max_iterations:
+            print(f"⏭️  Router: Tools -> Researcher (summary; sufficient at iteration {iteration}/{max_iterations})")
+            return "researcher"
+        print(f"⏭️  Router: Tools -> Save Research (sufficient at iteration {iteration}/{max_iterations})")
+        return "save_research"
+    
     # Otherwise, we're in research phase
     if iteration < max_iterations:
         print(f"🔬 Router: Tools -> Researcher (iteration {iteration}/{max_iterations})")
@@ -72,6 +90,41 @@ def after_tools(state: MultiAgentState) -> str:
         return "save_research"
 
 
+def after_tools_pipelined(state: MultiAgentState) -> list:
+    """
+    Pipelined mode: fact-check the new tool results while research continues
+
+    Both targets run in the same step, so the check overlaps the
+    researcher's next turn (or saving the research after the last one).
+    """
+    iteration = state.get("iteration", 0)
+    max_iterations = state.get("max_iterations", 2)
+    
+    # Sufficient research still gets the researcher's summary turn, unless it is the last
+    if iteration < max_iterations and not (state.get("research_sufficient") and iteration + 1 >= max_iterations):
+        print(f"🔀 Router: Tools -> Researcher + Fact Checker (iteration {iteration}/{max_iterations})")
+        return ["researcher", "check_batch"]
+    
+    print(f"🔀 Router: Tools -> Save Research + Fact Checker (research complete)")
+    return ["save_research", "check_batch"]
+
+
+def fan_out_research(state: MultiAgentState) -> list:
+    """Parallel mode: one research branch per planned sub-question"""
+    sub_questions = state.get("sub_questions") or [state.get("query", "")]
+    print(f"🌿 Router: Planner -> {len(sub_questions)} parallel research branch(es)")
+    return [
+        Send("research_branch", {
+            "index": index,
+            "query": question,
+            "run_id": state.get("run_id", ""),
+            "prior_research": state.get("prior_research", ""),
+            "max_iterations": state.get("max_iterations", 2),
+        })
+        for index, question in enumerate(sub_questions)
+    ]
+
+
 
 # ===== HELPER FUNCTIONS =====
 
@@ -79,45 +132,31 @@ def extract_agent_output(state: MultiAgentState, agent_name: str) -> str:
     """
     Extract output from specific agent with multiple fallback strategies
     """
-    messages = state.get("messages", [])
-    
-    # Strategy 1: Look for AIMessage with substantial text content
-    for message in reversed(messages):
-        if isinstance(message, AIMessage):
-            content = message.content
-            # Handle both string and list content formats
-            if isinstance(content, str) and len(content) > 50:
-                return content
-            elif isinstance(content, list):
-                # Content might be a list of dicts with 'text' keys
-                text_parts = [
-                    item.get('text', '') if isinstance(item, dict) else str(item)
-                    for item in content
-                ]
-                combined = '\n'.join(text_parts)
-                if len(combined) > 50:
-                    return combined
+    # Strategy 1: Latest substantial AI output (indexed as agents reply)
+    output = agent_output(state, agent_name)
+    if output:
+        return output
     
     # Strategy 2: If no substantial AIMessage, collect recent ToolMessages
-    tool_contents = []
-    for message in reversed(messages):
-        if isinstance(message, ToolMessage):
-            tool_contents.append(message.content)
-        # Stop after collecting 3 tool results
-        if len(tool_contents) >= 3:
-            break
-    
-    if tool_contents:
-        combined = "\n\n---\n\n".join(reversed(tool_contents))
-        return combined
-    
-    # Strategy 3: Last resort - return empty string
-    return ""
+    # (empty string as a last resort)
+    return recent_tool_output(state)
+
+
+def recent_tool_output(state: MultiAgentState, limit: int = 3) -> str:
+    """Join the last few tool results (oldest first), artifacts expanded"""
+    return "\n\n---\n\n".join(
+        expand_artifacts(result) for result in recent_tool_results(state, limit)
+    )
 
 
 def save_research_data(state: MultiAgentState) -> dict:
     """Save research output"""
-    output = extract_agent_output(state, "Researcher")
+    messages = state.get("messages", [])
+    if state.get("research_sufficient") and messages and isinstance(messages[-1], ToolMessage):
+        # Sufficient on the last turn: saved as found, without a researcher summary
+        output = recent_tool_output(state, TOOL_RESULT_BUFFER)
+    else:
+        output = extract_agent_output(state, "Researcher")
     print(f"💾 Saved research data: {len(output)} chars")
     return {"research_data": output}
 
@@ -126,4 +165,20 @@ def save_verified_facts(state: MultiAgentState) -> dict:
     """Save verified facts output"""
     output = extract_agent_output(state, "Fact-Checker")
     print(f"💾 Saved verified facts: {len(output)} chars")
-    return {"verified_facts": output}
\ No newline at end of file
+    return {"verified_facts": output}
+
+
+def merge_research_data(state: MultiAgentState) -> dict:
+    """Merge parallel branch findings into research_data, in planner order"""
+    findings = sorted(state.get("branch_findings", []), key=lambda branch: branch["index"])
+    sections = [
+        f"## {branch['query']}\n\n{branch['findings']}"
+        for branch in findings if branch["findings"]
+    ]
+    output = "\n\n".join(sections)
+    print(f"💾 Merged {len(findings)} branch(es) into research data: {len(output)} chars")
+    return {
+        "research_data": output,
+        "iteration": sum(branch["iterations"] for branch in findings),
+        "iterations_saved": sum(branch.get("iterations_saved", 0) for branch in findings)
+    }
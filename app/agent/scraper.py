@@ -0,0 +1,207 @@
+"""
+Scraper Module - Streaming page fetch and main-content extraction
+Purpose: Give web_scrape the article text of a page, not its navigation,
+while reading as little of it as possible
+
+The response is streamed: non-HTML content types and pages declaring more
+than SCRAPE_MAX_CONTENT_LENGTH bytes are refused from the headers alone,
+reading stops after SCRAPE_MAX_BYTES, and chunks are fed to an incremental
+HTML parser as they arrive. The parser drops scripts, styles and page chrome
+(nav, header, footer, aside, forms, and elements whose class/id looks like
+menus, banners or comments), prefers text inside <article>/<main>, and
+drops link-heavy blocks. Reading also stops once the main element closes
+with enough text.
+"""
+
+import codecs
+import re
+from html.parser import HTMLParser
+
+import requests
+
+from app.agent.cancellation import check_cancelled
+from app.agent.tokens import MAX_CHARS_PER_TOKEN, truncate_tokens
+from app.config.settings import settings
+
+HTML_TYPES = ("text/html", "application/xhtml+xml")
+TEXT_TYPES = ("text/plain",)
+USER_AGENT = "Mozilla/5.0 (compatible; ResearchAssistant/1.0)"
+CHUNK_BYTES = 16 * 1024
+
+SKIP_TAGS = {
+    "script", "style", "noscript", "svg", "template", "iframe", "canvas", "head",
+    "nav", "header", "footer", "aside", "form", "button", "select", "dialog",
+}
+MAIN_TAGS = {"article", "main"}
+BLOCK_TAGS = {
+    "p", "div", "section", "article", "main", "li", "ul", "ol", "table", "tr", "td", "th",
+    "blockquote", "pre", "dd", "dt", "dl", "figcaption", "br", "hr",
+    "h1", "h2", "h3", "h4", "h5", "h6",
+}
+HEADING_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+BOILERPLATE = re.compile(
+    r"(^|[\s_-])(nav|navbar|menu|breadcrumbs?|footer|sidebar|cookies?|banner|comments?|share|"
+    r"social|subscribe|newsletter|promo|advert|ads|related|popup|modal)($|[\s_-])",
+    re.IGNORECASE,
+)
+META_CHARSET = re.compile(rb"""<meta[^>]+charset=["']?([\w-]+)""", re.IGNORECASE)
+MIN_BLOCK_CHARS = 40
+MAX_LINK_DENSITY = 0.5
+
+
+class ScrapeError(Exception):
+    """Page refused or unreadable (message is shown to the LLM)"""
+
+
+class MainContentParser(HTMLParser):
+    """
+    Incremental extractor: feed() chunks, then text(max_chars). done turns
+    True when the main element has closed with at least min_chars of text.
+    """
+
+    def __init__(self, min_chars: int = 1000):
+        super().__init__(convert_charrefs=True)
+        self.min_chars = min_chars
+        self.title = ""
+        self.blocks = []  # (text, link chars, in main element, heading)
+        self.done = False
+        self._stack = []  # (tag, skipped, main)
+        self._skip_depth = 0
+        self._main_depth = 0
+        self._link_depth = 0
+        self._in_title = False
+        self._parts, self._link_chars, self._heading = [], 0, False
+
+    def _flush(self):
+        text = " ".join("".join(self._parts).split())
+        if text:
+            self.blocks.append((text, self._link_chars, self._main_depth > 0, self._heading))
+        self._parts, self._link_chars, self._heading = [], 0, False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "title":
+            self._in_title = True
+        if tag in VOID_TAGS:
+            if tag in BLOCK_TAGS:
+                self._flush()
+            return
+        attributes = dict(attrs)
+        hints = f"{attributes.get('class') or ''} {attributes.get('id') or ''} {attributes.get('role') or ''}"
+        skipped = tag in SKIP_TAGS or bool(BOILERPLATE.search(hints)) or attributes.get("aria-hidden") == "true"
+        main = tag in MAIN_TAGS or attributes.get("role") == "main"
+        if tag in BLOCK_TAGS or skipped:
+            self._flush()
+        self._stack.append((tag, skipped, main))
+        self._skip_depth += skipped
+        self._main_depth += main
+        self._link_depth += tag == "a"
+        if tag in HEADING_TAGS:
+            self._heading = True
+
+    def handle_endtag(self, tag):
+        if tag == "title":
+            self._in_title = False
+        if not any(open_tag == tag for open_tag, _, _ in self._stack):
+            return  # Stray end tag
+        if tag in BLOCK_TAGS:
+            self._flush()
+        # Close unclosed children too (<p>, <li> without end tags)
+        while self._stack:
+            open_tag, skipped, main = self._stack.pop()
+            self._skip_depth -= skipped
+            self._main_depth -= main
+            self._link_depth -= open_tag == "a"
+            if open_tag == tag:
+                break
+        if tag in MAIN_TAGS and not self._main_depth and self._main_chars() >= self.min_chars:
+            self.done = True
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+        if self._skip_depth:
+            return
+        self._parts.append(data)
+        if self._link_depth:
+            self._link_chars += len(data.strip())
+
+    def _main_chars(self) -> int:
+        return sum(len(text) for text, _, main, _ in self.blocks if main)
+
+    def text(self, max_chars: int) -> str:
+        """Main content, at most max_chars, cut at a word boundary"""
+        self._flush()
+        in_main = [block for block in self.blocks if block[2]]
+        blocks = in_main if sum(len(block[0]) for block in in_main) >= MIN_BLOCK_CHARS else self.blocks
+        kept = [
+            text for text, link_chars, _, heading in blocks
+            if link_chars <= MAX_LINK_DENSITY * len(text) and (heading or len(text) >= MIN_BLOCK_CHARS)
+        ]
+        text = "\n".join(kept) or "\n".join(block[0] for block in blocks)
+        if len(text) > max_chars:
+            text = text[:max_chars].rsplit(" ", 1)[0]
+        return text
+
+
+def extract_main_content(html: str, max_chars: int = 1000) -> tuple:
+    """(title, main text) of an HTML document"""
+    parser = MainContentParser(max_chars)
+    parser.feed(html)
+    parser.close()
+    return " ".join(parser.title.split()), parser.text(max_chars)
+
+
+def _encoding(response, first_chunk: bytes) -> str:
+    content_type = response.headers.get("Content-Type", "")
+    if "charset=" in content_type.lower():
+        charset = content_type.lower().split("charset=")[-1].split(";")[0].strip(" \"'")
+    else:
+        match = META_CHARSET.search(first_chunk[:2048])
+        charset = match.group(1).decode("ascii") if match else "utf-8"
+    try:
+        return codecs.lookup(charset).name
+    except LookupError:
+        return "utf-8"
+
+
+def scrape_page(url: str, max_tokens: int = None, max_bytes: int = None) -> tuple:
+    """(title, main text of at most max_tokens) of the page at url; raises ScrapeError or requests errors"""
+    max_tokens = max_tokens or settings.SCRAPE_MAX_TOKENS
+    max_bytes = max_bytes or settings.SCRAPE_MAX_BYTES
+    max_chars = max_tokens * MAX_CHARS_PER_TOKEN
+    with requests.get(url, stream=True, timeout=settings.SCRAPE_TIMEOUT_SECONDS,
+                      headers={"User-Agent": USER_AGENT, "Accept": "text/html,application/xhtml+xml,text/plain"}) as response:
+        response.raise_for_status()
+        content_type = response.headers.get("Content-Type", "text/html").split(";")[0].strip().lower()
+        if content_type not in HTML_TYPES + TEXT_TYPES:
+            raise ScrapeError(f"unsupported content type {content_type}")
+        declared = response.headers.get("Content-Length", "")
+        if declared.isdigit() and int(declared) > settings.SCRAPE_MAX_CONTENT_LENGTH:
+            raise ScrapeError(f"page too large ({int(declared)} bytes)")
+
+        # Main element closed with about max_tokens of text: enough read
+        parser = MainContentParser(max_tokens * 4) if content_type in HTML_TYPES else None
+        decoder, text, read = None, [], 0
+        for chunk in response.iter_content(CHUNK_BYTES):
+            if decoder is None:
+                decoder = codecs.getincrementaldecoder(_encoding(response, chunk))(errors="replace")
+            chunk = chunk[:max_bytes - read]
+            read += len(chunk)
+            decoded = decoder.decode(chunk)
+            if parser is None:
+                text.append(decoded)
+                if sum(map(len, text)) >= max_chars:
+                    break
+            else:
+                parser.feed(decoded)
+                if parser.done:
+                    break
+            if read >= max_bytes:
+                break
+            check_cancelled()  # Stop downloading for a cancelled run
+
+    if parser is None:
+        return "", truncate_tokens(" ".join("".join(text).split()), max_tokens)
+    parser.close()
+    return " ".join(parser.title.split()), truncate_tokens(parser.text(max_chars), max_tokens)
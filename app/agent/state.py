@@ -3,15 +3,34 @@ State Module - Defines the shared state structure
 Purpose: Central state definition for type safety and clarity
 """
 
-from typing import TypedDict,List,Annotated
+import operator
+from typing import TypedDict,List,Dict,Annotated
 from langchain_core.messages import BaseMessage
 from langgraph.graph import add_messages 
 
+# Tool results kept in the recent_tool_results ring buffer
+TOOL_RESULT_BUFFER = 10
+
+
+def keep_recent(existing: list, new: list) -> list:
+    """Reducer: append, keeping only the last TOOL_RESULT_BUFFER entries"""
+    return (existing + new)[-TOOL_RESULT_BUFFER:]
+
+
+def merge_outputs(existing: dict, new: dict) -> dict:
+    """Reducer: latest output per agent wins"""
+    return {**existing, **new}
+
+
 class MultiAgentState(TypedDict):
     """State for the multi-agent research system"""
 
     messages : Annotated[List[BaseMessage],add_messages]
     query : str
+    # Identifies the run (keys its in-process evidence index)
+    run_id : str
+    # Related earlier research (reused as researcher context)
+    prior_research : str
     research_data : str
     verified_facts : str
     final_report : str
@@ -19,5 +38,21 @@ class MultiAgentState(TypedDict):
     max_iterations : int 
     fact_check_iteration : int
     fact_check_max_iterations : int
+    # Parallel mode: planner output and one entry per finished branch
+    sub_questions : List[str]
+    branch_findings : Annotated[List[dict],operator.add]
+    # Pipelined mode: tool results already fact-checked
+    fact_checked_results : int
+    # Early exit: set by the sufficiency check after research tool steps
+    research_sufficient : bool
+    iterations_saved : int
+    # Tool-result dedup: repeated text kept out of state (summed per run)
+    dedup_chars_removed : Annotated[int,operator.add]
+    dedup_tokens_removed : Annotated[int,operator.add]
+    # Incremental indexes over messages, so nodes don't rescan the history
+    agent_outputs : Annotated[Dict[str,str],merge_outputs]
+    last_ai_output : str
+    recent_tool_results : Annotated[List[str],keep_recent]
+    tool_message_count : Annotated[int,operator.add]
 
     
@@ -0,0 +1,265 @@
+"""
+Sufficiency Module - Decide when research already covers the query
+Purpose: Stop the researcher loop early instead of paying for turns that
+add nothing
+
+Scorers run after each research tool step and return a verdict. When it
+is sufficient, the researcher writes its summary in one last turn (no
+tools) instead of searching on to max_iterations; when that turn would be
+the last one anyway, the results are saved as found instead. Any
+object with an assess(state) method returning a SufficiencyVerdict can be
+plugged in.
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+from langchain_core.messages import AIMessage, ToolMessage
+
+from app.agent.artifacts import expand_artifacts
+from app.agent.dedup import DUPLICATE_RESULT, TRIMMED_RESULT
+from app.agent.indexes import recent_tool_results, tool_message_count
+from app.agent.state import MultiAgentState
+
+STOPWORDS = {
+    "the", "and", "for", "are", "was", "were", "what", "when", "which", "who", "how",
+    "why", "its", "his", "her", "their", "this", "that", "with", "from", "about",
+    "into", "does", "did", "has", "have", "had", "state", "latest", "current",
+}
+NO_RESULT_MARKERS = (
+    "no results", "no good google search result", "no content found", "error:", "error fetching",
+    "couldn't find",
+)
+URL_PATTERN = re.compile(r"https?://[^\s)\"'<>]+")
+
+
+@dataclass(frozen=True)
+class SufficiencyVerdict:
+    """Outcome of one assessment; reason is logged when stopping early"""
+    sufficient: bool
+    score: float
+    reason: str = ""
+
+
+class SufficiencyScorer:
+    """Interface for sufficiency scorers"""
+
+    def assess(self, state: MultiAgentState) -> SufficiencyVerdict:
+        raise NotImplementedError
+
+
+def terms(text: str) -> list:
+    """Lowercase content words, plural "s" stripped (keeps versions like 3.14)"""
+    found = []
+    for word in re.findall(r"[a-z0-9][a-z0-9.\-]*", text.lower()):
+        word = word.rstrip(".-")
+        if len(word) < 3 or word in STOPWORDS:
+            continue
+        if len(word) > 4 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        found.append(word)
+    return found
+
+
+def shingles(text: str, size: int = 3) -> set:
+    words = terms(text)
+    return {tuple(words[i:i + size]) for i in range(max(1, len(words) - size + 1))} if words else set()
+
+
+def split_tool_batches(messages) -> tuple:
+    """(earlier tool results, latest batch) as lists of strings"""
+    latest, earlier = [], []
+    in_latest = True
+    for message in reversed(messages):
+        if isinstance(message, ToolMessage):
+            (latest if in_latest else earlier).append(str(expand_artifacts(message.content)))
+        elif isinstance(message, AIMessage) and latest:
+            in_latest = False
+    return list(reversed(earlier)), list(reversed(latest))
+
+
+def host_of(url: str) -> str:
+    """Host of a URL without "www." ("" if it has none)"""
+    try:
+        host = urlsplit(url).hostname or ""
+    except ValueError:
+        return ""
+    return host[4:] if host.startswith("www.") else host
+
+
+@dataclass
+class RunSignals:
+    """What one run's tool results have shown so far (kept between checks)"""
+    tool_results: int = 0     # Tool results already assessed
+    batches: int = 0
+    covered: set = field(default_factory=set)   # Query terms found
+    shingles: set = field(default_factory=set)
+    urls: set = field(default_factory=set)
+
+
+class HeuristicSufficiencyScorer(SufficiencyScorer):
+    """
+    Cheap signals, no LLM call:
+    * coverage  - share of the query's content words found in the results
+    * evidence  - share of the latest results that are substantive
+    * novelty   - share of the latest results' word 3-grams not seen before
+    * duplicate URLs - share of the latest URLs already seen
+
+    Searching for the query itself covers its words at once, so the first
+    batch is only enough when it is also corroborated: score >= threshold,
+    every result substantive, and either URLs from at least
+    corroborating_hosts distinct hosts or a result repeating what another
+    one found (collapsed by dedup, or agreement_overlap of its word 3-grams
+    in the batch's earlier results; search snippets carry no URLs). From the
+    second batch on, research is
+    sufficient when the latest batch mostly confirms what was found
+    (score = coverage x evidence >= threshold and novelty below
+    confirm_novelty), or adds almost nothing (novelty below novelty_floor
+    or duplicate URLs above duplicate_url_ceiling) at half coverage or more.
+
+    Signals accumulate per run (run_id), so each check reads only the new
+    tool results from the state indexes; a run checked for the first time
+    in this process is rebuilt from its messages.
+    """
+
+    MAX_RUNS = 256
+
+    def __init__(self, threshold: float = 0.8, novelty_floor: float = 0.2, confirm_novelty: float = 0.5,
+                 duplicate_url_ceiling: float = 0.8, min_result_chars: int = 200, corroborating_hosts: int = 3,
+                 agreement_overlap: float = 0.5):
+        self.threshold = threshold
+        self.corroborating_hosts = corroborating_hosts
+        self.agreement_overlap = agreement_overlap
+        self.novelty_floor = novelty_floor
+        self.confirm_novelty = confirm_novelty
+        self.duplicate_url_ceiling = duplicate_url_ceiling
+        self.min_result_chars = min_result_chars
+        self._runs = OrderedDict()  # (run_id, query) -> RunSignals; parallel branches share run_id
+        self._lock = threading.Lock()
+
+    def _signals(self, state: MultiAgentState) -> tuple:
+        """(signals before the latest batch, latest batch as strings)"""
+        key = (state.get("run_id"), state.get("query", ""))
+        count = tool_message_count(state)
+        with self._lock:
+            signals = self._runs.get(key) if key[0] else None
+        if signals is not None and signals.tool_results < count:
+            latest = recent_tool_results(state, count - signals.tool_results)
+            return signals, [str(expand_artifacts(result)) for result in latest]
+
+        earlier, latest = split_tool_batches(state.get("messages", []))
+        signals = RunSignals(tool_results=count - len(latest))
+        if earlier:
+            self._add(signals, earlier, terms(state.get("query", "")))
+        return signals, latest
+
+    def _add(self, signals: RunSignals, results: list, query_terms: list):
+        text = " ".join(results).replace(DUPLICATE_RESULT, "").replace(TRIMMED_RESULT, "")
+        lowered = text.lower()
+        # Substring match, so "3.14" matches "3.14.0" and "framework" matches "frameworks"
+        signals.covered.update(term for term in query_terms if term in lowered)
+        signals.shingles |= shingles(text)
+        signals.urls.update(URL_PATTERN.findall(text))
+        signals.tool_results += len(results)
+        signals.batches += 1
+
+    def _remember(self, state: MultiAgentState, signals: RunSignals):
+        key = (state.get("run_id"), state.get("query", ""))
+        if not key[0]:
+            return
+        with self._lock:
+            self._runs[key] = signals
+            self._runs.move_to_end(key)
+            while len(self._runs) > self.MAX_RUNS:
+                self._runs.popitem(last=False)
+
+    def assess(self, state: MultiAgentState) -> SufficiencyVerdict:
+        signals, latest = self._signals(state)
+        if not latest:
+            return SufficiencyVerdict(False, 0.0)
+
+        query_terms = terms(state.get("query", ""))
+        unique_terms = set(query_terms)
+        seen_shingles, seen_urls, first_batch = set(signals.shingles), set(signals.urls), not signals.batches
+        self._add(signals, latest, query_terms)
+        self._remember(state, signals)
+        coverage = len(signals.covered) / len(unique_terms) if unique_terms else 0.0
+
+        # Results shortened by dedup repeat evidence already found, so they count
+        substantive = [
+            result for result in latest
+            if (len(result) >= self.min_result_chars or DUPLICATE_RESULT in result or TRIMMED_RESULT in result)
+            and not any(marker in result[:200].lower() for marker in NO_RESULT_MARKERS)
+        ]
+        evidence = len(substantive) / len(latest)
+        score = round(coverage * evidence, 3)
+        # Results collapsed by dedup count as nothing new
+        latest_text = " ".join(latest).replace(DUPLICATE_RESULT, "").replace(TRIMMED_RESULT, "")
+        if first_batch:
+            if score >= self.threshold and evidence == 1.0:
+                corroboration = self._corroboration(latest, latest_text)
+                if corroboration:
+                    return SufficiencyVerdict(True, score, f"coverage {coverage:.0%}, {corroboration}")
+            return SufficiencyVerdict(False, score)
+        if coverage < 0.5:
+            return SufficiencyVerdict(False, score)
+
+        new_shingles = shingles(latest_text)
+        novelty = len(new_shingles - seen_shingles) / len(new_shingles) if new_shingles else 0.0
+        if novelty < self.novelty_floor:
+            return SufficiencyVerdict(True, score, f"latest results only {novelty:.0%} new")
+        if score >= self.threshold and novelty < self.confirm_novelty:
+            return SufficiencyVerdict(True, score, f"coverage {coverage:.0%}, confirmed by the latest results")
+
+        new_urls = set(URL_PATTERN.findall(latest_text))
+        if new_urls:
+            repeated = len(new_urls & seen_urls) / len(new_urls)
+            if repeated >= self.duplicate_url_ceiling:
+                return SufficiencyVerdict(True, score, f"{repeated:.0%} of URLs already seen")
+
+        return SufficiencyVerdict(False, score)
+
+
+    def _corroboration(self, latest: list, latest_text: str) -> str:
+        """How the results of a batch confirm each other ("" if they don't)"""
+        hosts = {host_of(url) for url in URL_PATTERN.findall(latest_text)} - {""}
+        if len(hosts) >= self.corroborating_hosts:
+            return f"{len(hosts)} sources"
+        seen = set()
+        for result in latest:
+            if DUPLICATE_RESULT in result or TRIMMED_RESULT in result:
+                return "repeated by another result"
+            found = shingles(result)
+            if seen and found and len(found & seen) / len(found) >= self.agreement_overlap:
+                return "repeated by another result"
+            seen |= found
+        return ""
+
+
+class SufficiencyCheck:
+    """Node running a scorer after research tool steps; records iterations saved"""
+
+    def __init__(self, scorer: SufficiencyScorer):
+        self.scorer = scorer
+
+    def __call__(self, state: MultiAgentState):
+        # Tool steps of the fact-checker come after research is saved
+        if state.get("research_data"):
+            return {}
+
+        iteration = state.get("iteration", 0)
+        max_iterations = state.get("max_iterations", 2)
+        verdict = self.scorer.assess(state)
+        remaining = max_iterations - iteration
+        if not verdict.sufficient or remaining < 1:
+            return {"research_sufficient": False}
+        # The researcher takes one of the remaining turns to summarize; with
+        # only one left, the results are saved as found (see after_tools)
+        saved = max(remaining - 1, 1)
+
+        print(f"⏭️  Sufficiency: {verdict.reason} (score {verdict.score}); "
+              f"skipping {saved} researcher iteration(s)")
+        return {"research_sufficient": True, "iterations_saved": saved}
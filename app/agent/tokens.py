@@ -0,0 +1,155 @@
+"""
+Tokens Module - Token counting and prompt budgets
+Purpose: Fit every prompt section to a token budget of the model instead of
+slicing strings by characters
+
+The tokenizer is the model's tiktoken encoding (TOKENIZER_ENCODING), loaded
+on first use and shared by the process. Without tiktoken, or when its
+encoding file cannot be loaded, an approximate regex tokenizer (about one
+token per 4 characters of a word, one per punctuation mark) is used instead.
+Counts of repeated strings are cached under a digest of the text, so the
+cache holds no texts.
+
+Agents describe their prompt as PromptSections; allocate() hands out the
+budget by priority, so the sections that matter most are kept whole and
+the least important are cut first.
+"""
+
+import hashlib
+import logging
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from app.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# No token is assumed longer than this: text is pre-cut before encoding
+MAX_CHARS_PER_TOKEN = 16
+
+
+class ApproximateTokenizer:
+    """Fallback: word pieces of up to 4 characters and single punctuation marks"""
+
+    name = "approximate"
+    PIECE = re.compile(r"\w{1,4}|[^\w\s]")
+
+    def count(self, text: str) -> int:
+        return len(self.PIECE.findall(text))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        if max_tokens <= 0:
+            return ""
+        for number, match in enumerate(self.PIECE.finditer(text, 0, max_tokens * MAX_CHARS_PER_TOKEN), 1):
+            if number == max_tokens:
+                return text[:match.end()]
+        return text[:max_tokens * MAX_CHARS_PER_TOKEN]
+
+
+class TiktokenTokenizer:
+    def __init__(self, encoding):
+        self.encoding = encoding
+        self.name = encoding.name
+
+    def count(self, text: str) -> int:
+        return len(self.encoding.encode_ordinary(text))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        if max_tokens <= 0:
+            return ""
+        tokens = self.encoding.encode_ordinary(text[:max_tokens * MAX_CHARS_PER_TOKEN])
+        if len(tokens) <= max_tokens and len(text) <= max_tokens * MAX_CHARS_PER_TOKEN:
+            return text
+        # A cut inside a multi-byte character decodes to U+FFFD; drop it
+        return self.encoding.decode(tokens[:max_tokens]).rstrip("�")
+
+
+def load_tokenizer(encoding_name: str):
+    """tiktoken encoding, or the approximate tokenizer when it is unavailable"""
+    try:
+        import tiktoken
+        return TiktokenTokenizer(tiktoken.get_encoding(encoding_name))
+    except Exception as exc:  # ImportError, or the encoding file could not be fetched
+        logger.warning("Tokenizer %s unavailable (%s); using approximate token counts", encoding_name, exc)
+        return ApproximateTokenizer()
+
+
+_tokenizers = {}
+_tokenizers_lock = threading.Lock()
+
+def get_tokenizer(encoding_name: str = None):
+    """Process-wide tokenizer for the encoding (default TOKENIZER_ENCODING)"""
+    encoding_name = encoding_name or settings.TOKENIZER_ENCODING
+    tokenizer = _tokenizers.get(encoding_name)
+    if tokenizer is None:
+        with _tokenizers_lock:
+            tokenizer = _tokenizers.get(encoding_name)
+            if tokenizer is None:
+                tokenizer = _tokenizers[encoding_name] = load_tokenizer(encoding_name)
+    return tokenizer
+
+
+COUNT_CACHE_SIZE = 4096
+_counts = OrderedDict()  # (encoding, blake2b digest of the text) -> tokens, least recently used first
+_counts_lock = threading.Lock()
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    encoding_name = settings.TOKENIZER_ENCODING
+    key = (encoding_name, hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest())
+    with _counts_lock:
+        count = _counts.get(key)
+        if count is not None:
+            _counts.move_to_end(key)
+            return count
+    count = get_tokenizer(encoding_name).count(text)
+    with _counts_lock:
+        _counts[key] = count
+        if len(_counts) > COUNT_CACHE_SIZE:
+            _counts.popitem(last=False)
+    return count
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """text cut to at most max_tokens tokens (unchanged if it fits)"""
+    if not text:
+        return text
+    return get_tokenizer().truncate(text, max_tokens)
+
+
+@dataclass(frozen=True)
+class PromptSection:
+    """Variable part of a prompt; lower priority numbers are kept first"""
+    text: str
+    priority: int = 0
+    min_tokens: int = 0  # Reserved even when earlier sections could use it
+
+
+def allocate(sections: list, budget: int) -> list:
+    """
+    Tokens for each section (in input order): first every section's
+    min_tokens, then the remaining budget in priority order
+    """
+    needs = [count_tokens(section.text) for section in sections]
+    order = sorted(range(len(sections)), key=lambda i: sections[i].priority)
+    allocation = [0] * len(sections)
+    remaining = max(budget, 0)
+    for i in order:
+        allocation[i] = min(needs[i], sections[i].min_tokens, remaining)
+        remaining -= allocation[i]
+    for i in order:
+        extra = min(needs[i] - allocation[i], remaining)
+        allocation[i] += extra
+        remaining -= extra
+    return allocation
+
+
+def fit_sections(sections: list, budget: int) -> list:
+    """Section texts cut to their allocation of the budget"""
+    return [
+        truncate_tokens(section.text, tokens)
+        for section, tokens in zip(sections, allocate(sections, budget))
+    ]
@@ -1,11 +1,87 @@
 from langchain.tools import tool
 from langchain_community.tools import DuckDuckGoSearchRun
-from langchain_community.document_loaders import WebBaseLoader
 from langchain_google_community import GoogleSearchAPIWrapper
 from dotenv import load_dotenv
+from concurrent.futures import Future
+import os
+import requests
+import threading
+import time
 load_dotenv()
 
+from app.agent.cancellation import check_cancelled
+from app.agent.calculator import CalculationError, evaluate, format_result
+from app.agent.scraper import scrape_page
+from app.config.settings import settings
+
 search = DuckDuckGoSearchRun(region="us-en")
+
+# Optional Custom Search JSON-compatible endpoint that both search tools use
+# instead of Google/DuckDuckGo (a self-hosted search proxy, or the load-test
+# stub in benchmarks/stubs/search_server.py)
+SEARCH_API_URL = os.getenv("SEARCH_API_URL")
+
+def search_api(query: str, num: int = 10) -> str:
+    """Query SEARCH_API_URL and join result snippets (same format as Google)"""
+    response = requests.get(SEARCH_API_URL, params={"q": query, "num": num}, timeout=15)
+    response.raise_for_status()
+    items = response.json().get("items", [])
+    if not items:
+        return "No good Google Search Result was found"
+    return " ".join(item["snippet"] for item in items if "snippet" in item)
+
+class SharedSearches:
+    """
+    Identical searches share one provider call: concurrent callers (e.g.
+    the jobs of a batch) wait for the call in flight, later ones reuse its
+    result for ttl seconds. Google CSE and DuckDuckGo have no multi-query
+    requests, so this is how searches are grouped. Errors are not kept.
+    """
+
+    def __init__(self, ttl: float, max_size: int = 2048):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._results = {}  # key -> (expires_at, result)
+        self._in_flight = {}  # key -> Future
+        self._lock = threading.Lock()
+
+    def run(self, provider: str, query: str, fetch):
+        check_cancelled()  # No new provider calls for a cancelled run
+        if self.ttl <= 0:
+            return fetch(query)
+        key = (provider, " ".join(query.lower().split()))
+        with self._lock:
+            cached = self._results.get(key)
+            if cached is not None and cached[0] > time.monotonic():
+                return cached[1]
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = self._in_flight[key] = Future()
+        if not owner:
+            return future.result()
+
+        try:
+            result = fetch(query)
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+        with self._lock:
+            if len(self._results) >= self.max_size:
+                now = time.monotonic()
+                self._results = {k: v for k, v in self._results.items() if v[0] > now}
+                if len(self._results) >= self.max_size:
+                    self._results.clear()
+            self._results[key] = (time.monotonic() + self.ttl, result)
+        future.set_result(result)
+        return result
+
+
+shared_searches = SharedSearches(settings.SEARCH_SHARE_SECONDS)
+
 # ===== TOOLS =====
 @tool
 def duck_duck_web_search(query: str) -> str:
@@ -15,8 +91,10 @@ def duck_duck_web_search(query: str) -> str:
     Args:
         query: The search query string
     """
+    if SEARCH_API_URL:
+        return shared_searches.run("search_api", query, search_api)
     
-    result = search.invoke(query)
+    result = shared_searches.run("duckduckgo", query, search.invoke)
     print(f"\n📡 Search Result Preview: {result[:200]}...\n")
     return result
 
@@ -31,7 +109,9 @@ def google_web_search(query: str) -> str:
     Args:
         query: The search query string
     """
-    return google_search.run(query)
+    if SEARCH_API_URL:
+        return shared_searches.run("search_api", query, search_api)
+    return shared_searches.run("google", query, google_search.run)
 
 
 
@@ -44,13 +124,12 @@ def web_scrape(url: str)->str:
             url: Webpage URL
             
         Returns:
-            Webpage content (first 1000 chars)
+            Page title and main article text (SCRAPE_MAX_TOKENS tokens)
         """
         try:
             print(f"Web Scrape : {url}")
-            loader = WebBaseLoader(url)
-            docs = loader.load()
-            content = docs[0].page_content[:1000] if docs else "No content found"
+            title, content = scrape_page(url)
+            content = "\n".join(part for part in (title, content) if part) or "No content found"
             return f"Webpage Content : \n{content}"
         except Exception as e:
             print(f"Scrape error : {e}")
@@ -61,16 +140,18 @@ def calculate(expression:str)->str:
         Perform mathematical calculations
         
         Args:
-            expression: Mathematical expression
+            expression: Arithmetic expression: numbers, + - * / // % **,
+                lists like [1, 2, 3] and range(1, 11) (element-wise), pi, e,
+                sqrt, log, exp, sin/cos/tan, round, abs, sum, mean, min, max
             
         Returns:
             Calculation result
         """
         try:
             print(f"Calculating: {expression}")
-            result = eval(expression)
-            return f"Result: {result}"
-        except Exception as e:
+            result = evaluate(expression)
+            return f"Result: {format_result(result)}"
+        except CalculationError as e:
             print(f"Calculation error: {e}")
             return f"Calculation error: {str(e)}"
 
@@ -3,12 +3,32 @@ from sqlalchemy.orm import Session
 from pydantic import BaseModel, EmailStr
 from app.database.db import get_db
 from app.database.models import User
-from app.auth.security import hash_password, verify_password, create_access_token
+from app.auth.security import (
+    hash_password,
+    verify_password,
+    password_needs_rehash,
+    PasswordHashingBusy
+)
+from app.auth.tokens import (
+    issue_token_pair,
+    rotate_refresh_token,
+    revoke_refresh_token,
+    RefreshTokenError
+)
 from app.auth.dependencies import get_current_user
-from app.api.models import UserRegister, UserLogin, Token, UserResponse
+from app.auth.user_cache import UserPrincipal
+from app.api.models import UserRegister, UserLogin, Token, UserResponse, RefreshRequest
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
+def hashing_busy_error(exc: PasswordHashingBusy) -> HTTPException:
+    """429 telling the client to back off while the hashing pool drains"""
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Authentication service busy, please retry",
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 def register(user_data: UserRegister, db: Session = Depends(get_db)):
     """
@@ -32,11 +52,16 @@ def register(user_data: UserRegister, db: Session = Depends(get_db)):
             detail="Email already registered"
         )
     
+    try:
+        hashed_password = hash_password(user_data.password)
+    except PasswordHashingBusy as exc:
+        raise hashing_busy_error(exc)
+
     # Create new user
     new_user = User(
         username=user_data.username,
         email=user_data.email,
-        hashed_password=hash_password(user_data.password)
+        hashed_password=hashed_password
     )
     
     db.add(new_user)
@@ -59,30 +84,82 @@ def login(user_data: UserLogin, db: Session = Depends(get_db)):
     - **username**: Your username
     - **password**: Your password
     
-    Returns JWT token to use in Authorization header
+    Returns a short-lived JWT access token to use in the Authorization
+    header, plus a refresh token for /auth/refresh
     """
     # Find user
     user = db.query(User).filter(User.username == user_data.username).first()
     
-    if not user or not verify_password(user_data.password, user.hashed_password):
+    try:
+        valid = user is not None and verify_password(user_data.password, user.hashed_password)
+    except PasswordHashingBusy as exc:
+        raise hashing_busy_error(exc)
+
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+    # Transparently upgrade hashes made with older Argon2 parameters
+    if password_needs_rehash(user.hashed_password):
+        try:
+            user.hashed_password = hash_password(user_data.password)
+            db.commit()
+        except PasswordHashingBusy:
+            pass  # Not worth failing the login; we'll rehash next time
+    
+    # Short-lived access token (verifies without the DB) + stored refresh token
+    tokens = issue_token_pair(db, user)
+    
+    return {
+        **tokens,
+        "username": user.username,
+        "email": user.email
+    }
+
+@router.post("/refresh", response_model=Token)
+def refresh(request: RefreshRequest, db: Session = Depends(get_db)):
+    """
+    Exchange a refresh token for a new access token
     
-    # Create access token
-    access_token = create_access_token(data={"sub": user.username})
+    - **refresh_token**: Token returned by /auth/login or a previous refresh
+    
+    The refresh token is rotated: use the new one from the response next time.
+    """
+    try:
+        user, tokens = rotate_refresh_token(db, request.refresh_token)
+    except RefreshTokenError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=str(exc),
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     
     return {
-        "access_token": access_token,
-        "token_type": "bearer",
+        **tokens,
         "username": user.username,
         "email": user.email
     }
+
+@router.post("/logout")
+def logout(request: RefreshRequest, db: Session = Depends(get_db)):
+    """Revoke a refresh token"""
+    revoke_refresh_token(db, request.refresh_token)
+    return {"message": "Logged out successfully"}
+
 @router.get("/me", response_model=UserResponse)
-def get_current_user_info(user: User = Depends(get_current_user)):
+def get_current_user_info(
+    principal: UserPrincipal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
     """Get current user information"""
+    # Principals may come from token claims, so load the full profile here
+    user = db.query(User).filter(User.id == principal.id).first()
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
     return {
         "id": user.id,
         "username": user.username,
@@ -0,0 +1,94 @@
+"""
+Export Module - Stream a user's research history as NDJSON or CSV
+Purpose: Back GET /research/export without loading the history into memory
+
+Rows are read in pages from a server-side cursor where the database has one
+(yield_per; PostgreSQL streams, SQLite steps its cursor), selected as plain
+columns so no ORM objects accumulate, and encoded into ~64 KiB chunks,
+optionally gzip-compressed on the fly.
+"""
+
+import csv
+import io
+import json
+import zlib
+
+from sqlalchemy import select
+
+from app.database.models import ResearchSession
+
+EXPORT_COLUMNS = (
+    "id", "query", "status", "research_mode", "batch_id", "agent_iterations", "processing_time",
+    "created_at", "completed_at", "research_data", "verified_facts", "final_report",
+)
+CHUNK_BYTES = 64 * 1024
+PAGE_ROWS = 200
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+
+def export_rows(session_factory, user_id: int, since=None):
+    """The user's sessions, oldest first, as dicts (own session, closed when exhausted)"""
+    statement = select(*(getattr(ResearchSession, name) for name in EXPORT_COLUMNS))\
+        .where(ResearchSession.user_id == user_id)\
+        .order_by(ResearchSession.created_at, ResearchSession.id)\
+        .execution_options(yield_per=PAGE_ROWS)
+    if since is not None:
+        statement = statement.where(ResearchSession.completed_at >= since)
+
+    with session_factory() as db:
+        for row in db.execute(statement):
+            yield row._asdict()
+
+
+def _isoformat(value):
+    return value.isoformat()  # datetimes, the only non-JSON column type
+
+
+def _text(value) -> str:
+    if value is None:
+        return ""
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+
+def ndjson_chunks(rows):
+    buffer = []
+    size = 0
+    for row in rows:
+        line = json.dumps(row, default=_isoformat, ensure_ascii=False) + "\n"
+        buffer.append(line)
+        size += len(line)
+        if size >= CHUNK_BYTES:
+            yield "".join(buffer).encode()
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer).encode()
+
+
+def csv_chunks(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        writer.writerow([_text(row[name]) for name in EXPORT_COLUMNS])
+        if buffer.tell() >= CHUNK_BYTES:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def gzip_chunks(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31: gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_stream(session_factory, user_id: int, fmt: str, compress: bool = False, since=None):
+    """Byte chunks of the user's history in fmt ("ndjson" or "csv")"""
+    rows = export_rows(session_factory, user_id, since)
+    chunks = ndjson_chunks(rows) if fmt == "ndjson" else csv_chunks(rows)
+    return gzip_chunks(chunks) if compress else chunks
@@ -2,8 +2,8 @@
 API Models - Pydantic request/response models
 """
 
-from pydantic import BaseModel, ConfigDict, Field, EmailStr
-from typing import Optional
+from pydantic import AnyHttpUrl, BaseModel, ConfigDict, Field, EmailStr, field_validator
+from typing import List, Literal, Optional
 
 
 class UserRegister(BaseModel):
@@ -35,6 +35,13 @@ class Token(BaseModel):
     token_type: str
     username: str
     email: str
+    refresh_token: Optional[str] = None
+    expires_in: Optional[int] = None  # access token lifetime in seconds
+
+
+class RefreshRequest(BaseModel):
+    """Refresh (or logout) request"""
+    refresh_token: str
 
 
 class UserResponse(BaseModel):
@@ -50,12 +57,48 @@ class ResearchRequest(BaseModel):
     """Research request"""
     query: str = Field(..., min_length=5, description="Research question")
     max_iterations: Optional[int] = Field(2, ge=1, le=5)
+    mode: Literal["serial", "parallel", "pipelined"] = Field(
+        "serial",
+        description="parallel: research planned sub-questions concurrently; "
+                    "pipelined: fact-check search results while research continues"
+    )
+    callback_url: Optional[AnyHttpUrl] = Field(
+        None, description="POSTed the signed result when the research finishes (webhook)"
+    )
     
     model_config = ConfigDict(
         json_schema_extra={
             "example": {
                 "query": "Latest AI developments at End of 2025",
-                "max_iterations": 2
+                "max_iterations": 2,
+                "mode": "serial"
+            }
+        }
+    )
+
+
+class ResearchBatchRequest(BaseModel):
+    """Batch research request: questions share the run settings"""
+    queries: List[str] = Field(..., min_length=1, description="Research questions")
+    max_iterations: Optional[int] = Field(2, ge=1, le=5)
+    mode: Literal["serial", "parallel", "pipelined"] = "serial"
+    max_concurrent: Optional[int] = Field(
+        None, ge=1, description="Questions researched at once (default and cap: RESEARCH_BATCH_CONCURRENCY)"
+    )
+    
+    @field_validator("queries")
+    @classmethod
+    def check_queries(cls, queries):
+        if any(len(query.strip()) < 5 for query in queries):
+            raise ValueError("Each query needs at least 5 characters")
+        return queries
+    
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "queries": ["Latest AI developments at End of 2025", "State of solid-state batteries"],
+                "max_iterations": 2,
+                "mode": "serial"
             }
         }
     )
@@ -80,6 +123,47 @@ class ResearchHistoryItem(BaseModel):
     created_at: str
 
 
+class SimilarResearchItem(BaseModel):
+    """Earlier research related to a query"""
+    id: int
+    query: str
+    score: float
+    excerpt: str
+    created_at: str
+
+
+class ResearchBatchResponse(BaseModel):
+    """Batch progress"""
+    id: int
+    total: int
+    pending: int  # Includes repeated queries waiting for their twin
+    processing: int
+    completed: int
+    failed: int
+    cancelled: int = 0
+    progress: float  # Finished share of the jobs (0-1)
+    done: bool
+    created_at: str
+    items: List[ResearchHistoryItem]
+
+
+class WebhookSecretResponse(BaseModel):
+    """How to verify webhook signatures"""
+    secret: str
+    algorithm: str
+    header: str
+
+
+class ResearchSearchItem(BaseModel):
+    """Full-text search hit"""
+    id: int
+    query: str
+    status: str
+    score: float
+    snippet: str  # Report excerpt, matches wrapped in <mark></mark>
+    created_at: str
+
+
 class HealthResponse(BaseModel):
     """Health check response"""
     status: str
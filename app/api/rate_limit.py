@@ -0,0 +1,395 @@
+"""
+Rate Limit Module - Per-user rate limiting and concurrency quotas
+Purpose: Stop a single account from flooding expensive research runs
+
+Two checks guard `POST /research`:
+* a token bucket (RESEARCH_RATE_PER_MINUTE, burst RESEARCH_BURST)
+* a cap on in-flight runs (RESEARCH_MAX_CONCURRENT)
+
+`POST /research/batch` only spends a token; in inline mode each batch job
+takes its user's concurrency slot when a worker starts it.
+
+State lives in a backend: in-memory (per process), or Redis / the SQL
+database, which are shared by every worker so limits hold in multi-worker
+deployments.
+"""
+
+import math
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+
+from fastapi import Depends, HTTPException, status
+from sqlalchemy.exc import IntegrityError
+
+from app.auth.dependencies import get_current_user
+from app.auth.user_cache import UserPrincipal
+from app.config.settings import settings
+from app.database.models import RateLimitBucket, RateLimitSlot
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a user is over their rate limit or concurrency quota"""
+
+    def __init__(self, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+# ===== BACKENDS =====
+
+class RateLimitBackend(ABC):
+    """Interface for rate limit state storage"""
+
+    @abstractmethod
+    def take_token(self, key: str, rate_per_sec: float, capacity: int) -> float:
+        """Take one token from the bucket; returns 0 if allowed, else seconds to wait"""
+
+    @abstractmethod
+    def acquire_slot(self, key: str, limit: int, ttl: int):
+        """Acquire a concurrency slot; returns a slot id, or None if all are taken"""
+
+    @abstractmethod
+    def release_slot(self, key: str, slot_id: str):
+        """Give a slot back before it expires"""
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """
+    Process-local backend (one uvicorn worker)
+
+    A bucket that has refilled to capacity is the same as no bucket, so
+    such buckets (and keys whose slots all expired) are dropped every
+    SWEEP_SECONDS; memory follows recently active users, not all users.
+    """
+
+    SWEEP_SECONDS = 60
+
+    def __init__(self):
+        self._buckets = {}  # key -> (tokens, updated_at, full_at)
+        self._slots = {}    # key -> {slot_id: expires_at}
+        self._lock = threading.Lock()
+        self._swept_at = time.monotonic()
+
+    def take_token(self, key, rate_per_sec, capacity):
+        now = time.monotonic()
+        with self._lock:
+            self._sweep(now)
+            tokens, updated_at, _ = self._buckets.get(key, (capacity, now, now))
+            tokens = min(capacity, tokens + (now - updated_at) * rate_per_sec)
+            wait = 0.0 if tokens >= 1 else (1 - tokens) / rate_per_sec
+            if wait == 0:
+                tokens -= 1
+            self._buckets[key] = (tokens, now, now + (capacity - tokens) / rate_per_sec)
+            return wait
+
+    def acquire_slot(self, key, limit, ttl):
+        now = time.monotonic()
+        with self._lock:
+            self._sweep(now)
+            slots = self._slots.setdefault(key, {})
+            for slot_id, expires_at in list(slots.items()):
+                if expires_at <= now:
+                    del slots[slot_id]
+            if len(slots) >= limit:
+                return None
+            slot_id = uuid.uuid4().hex
+            slots[slot_id] = now + ttl
+            return slot_id
+
+    def release_slot(self, key, slot_id):
+        with self._lock:
+            slots = self._slots.get(key)
+            if slots is not None:
+                slots.pop(slot_id, None)
+                if not slots:
+                    del self._slots[key]
+
+    def _sweep(self, now):
+        """Drop full buckets and fully expired slot sets (caller holds the lock)"""
+        if now - self._swept_at < self.SWEEP_SECONDS:
+            return
+        self._swept_at = now
+        for key in [key for key, (_, _, full_at) in self._buckets.items() if full_at <= now]:
+            del self._buckets[key]
+        for key in [key for key, slots in self._slots.items() if max(slots.values(), default=now) <= now]:
+            del self._slots[key]
+
+
+# Token bucket as a single atomic script: KEYS[1]=bucket, ARGV=rate, capacity, now
+_TOKEN_BUCKET_LUA = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+else
+  wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+# Concurrency slots as a sorted set scored by expiry: KEYS[1]=set, ARGV=limit, ttl, now, id
+_ACQUIRE_SLOT_LUA = """
+local limit = tonumber(ARGV[1])
+local ttl = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+if redis.call('ZCARD', KEYS[1]) >= limit then
+  return 0
+end
+redis.call('ZADD', KEYS[1], now + ttl, ARGV[4])
+redis.call('EXPIRE', KEYS[1], ttl)
+return 1
+"""
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """Shared backend for multi-worker / multi-node deployments"""
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        try:
+            import redis
+        except ImportError as exc:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis requires the 'redis' package") from exc
+
+        self.prefix = prefix
+        self.client = redis.Redis.from_url(url)
+        self._take_token = self.client.register_script(_TOKEN_BUCKET_LUA)
+        self._acquire_slot = self.client.register_script(_ACQUIRE_SLOT_LUA)
+
+    def take_token(self, key, rate_per_sec, capacity):
+        wait = self._take_token(
+            keys=[f"{self.prefix}bucket:{key}"],
+            args=[rate_per_sec, capacity, time.time()],
+        )
+        return float(wait)
+
+    def acquire_slot(self, key, limit, ttl):
+        slot_id = uuid.uuid4().hex
+        acquired = self._acquire_slot(
+            keys=[f"{self.prefix}slots:{key}"],
+            args=[limit, ttl, time.time(), slot_id],
+        )
+        return slot_id if acquired else None
+
+    def release_slot(self, key, slot_id):
+        self.client.zrem(f"{self.prefix}slots:{key}", slot_id)
+
+
+class SQLRateLimitBackend(RateLimitBackend):
+    """
+    Shared backend on the app database (no Redis needed)
+
+    Buckets are updated with compare-and-set on updated_at, so concurrent
+    workers retry instead of overwriting each other. A slot is inserted
+    first and counted after; if that puts the user over the limit the row
+    is deleted again, so two racing requests can both lose but never both win.
+    """
+
+    MAX_RETRIES = 5
+
+    def __init__(self, session_factory=None):
+        if session_factory is None:
+            from app.database.db import SessionLocal
+            session_factory = SessionLocal
+        self.session_factory = session_factory
+
+    def take_token(self, key, rate_per_sec, capacity):
+        with self.session_factory() as db:
+            for _ in range(self.MAX_RETRIES):
+                now = time.time()
+                bucket = db.get(RateLimitBucket, key)
+                if bucket is None:
+                    db.add(RateLimitBucket(key=key, tokens=capacity - 1, updated_at=now))
+                    try:
+                        db.commit()
+                        return 0.0
+                    except IntegrityError:
+                        db.rollback()  # Another worker created it; retry on its row
+                        continue
+
+                seen_at = bucket.updated_at
+                tokens = min(capacity, bucket.tokens + max(0.0, now - seen_at) * rate_per_sec)
+                wait = 0.0 if tokens >= 1 else (1 - tokens) / rate_per_sec
+                updated = db.query(RateLimitBucket)\
+                    .filter(RateLimitBucket.key == key, RateLimitBucket.updated_at == seen_at)\
+                    .update({
+                        "tokens": tokens - 1 if wait == 0 else tokens,
+                        "updated_at": now,
+                    }, synchronize_session=False)
+                db.commit()
+                if updated:
+                    return wait
+                db.expire_all()  # Lost the race; reload the bucket
+        # Heavy contention on one user's bucket: treat as throttled
+        return 1 / rate_per_sec
+
+    def acquire_slot(self, key, limit, ttl):
+        now = time.time()
+        slot_id = uuid.uuid4().hex
+        with self.session_factory() as db:
+            db.query(RateLimitSlot)\
+                .filter(RateLimitSlot.key == key, RateLimitSlot.expires_at <= now)\
+                .delete(synchronize_session=False)
+            db.add(RateLimitSlot(id=slot_id, key=key, expires_at=now + ttl))
+            db.commit()
+
+            held = db.query(RateLimitSlot)\
+                .filter(RateLimitSlot.key == key, RateLimitSlot.expires_at > now)\
+                .count()
+            if held > limit:
+                self._delete_slot(db, slot_id)
+                return None
+        return slot_id
+
+    def release_slot(self, key, slot_id):
+        with self.session_factory() as db:
+            self._delete_slot(db, slot_id)
+
+    @staticmethod
+    def _delete_slot(db, slot_id):
+        db.query(RateLimitSlot).filter(RateLimitSlot.id == slot_id).delete(synchronize_session=False)
+        db.commit()
+
+
+def create_backend(name: str) -> RateLimitBackend:
+    """Backend factory for RATE_LIMIT_BACKEND"""
+    if name == "memory":
+        return MemoryRateLimitBackend()
+    if name == "redis":
+        return RedisRateLimitBackend(settings.REDIS_URL)
+    if name == "sql":
+        return SQLRateLimitBackend()
+    raise ValueError(f"Unknown rate limit backend: {name}")
+
+
+# ===== LIMITER =====
+
+class ResearchLimiter:
+    """Token bucket + concurrency quota for research runs, per user"""
+
+    # No way to predict when a running job finishes, so suggest a short wait
+    CONCURRENCY_RETRY_AFTER = 5
+
+    def __init__(self, backend: RateLimitBackend, rate_per_minute: float,
+                 burst: int, max_concurrent: int, slot_ttl: int):
+        self.backend = backend
+        self.rate_per_sec = rate_per_minute / 60
+        self.burst = burst
+        self.max_concurrent = max_concurrent
+        self.slot_ttl = slot_ttl
+
+    def acquire(self, user_id: int):
+        """
+        Admit one research run; returns a slot id to pass to release()
+
+        The concurrency slot is taken first so a rejected run never spends a
+        rate-limit token. Raises RateLimitExceeded.
+        """
+        slot_id = self.acquire_slot(user_id)
+        try:
+            self.take_token(user_id)
+        except RateLimitExceeded:
+            self.release(user_id, slot_id)
+            raise
+        return slot_id
+
+    def acquire_slot(self, user_id: int):
+        """Take a concurrency slot (None when unlimited); raises RateLimitExceeded"""
+        if self.max_concurrent <= 0:
+            return None
+        slot_id = self.backend.acquire_slot(str(user_id), self.max_concurrent, self.slot_ttl)
+        if slot_id is None:
+            raise RateLimitExceeded(
+                f"Too many research runs in progress (max {self.max_concurrent})",
+                retry_after=self.CONCURRENCY_RETRY_AFTER,
+            )
+        return slot_id
+
+    def take_token(self, user_id: int):
+        """Spend a rate-limit token; raises RateLimitExceeded"""
+        if self.rate_per_sec > 0:
+            wait = self.backend.take_token(str(user_id), self.rate_per_sec, self.burst)
+            if wait > 0:
+                raise RateLimitExceeded(
+                    "Research rate limit exceeded",
+                    retry_after=max(1, math.ceil(wait)),
+                )
+
+    def release(self, user_id: int, slot_id):
+        if slot_id is not None:
+            self.backend.release_slot(str(user_id), slot_id)
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+def get_research_limiter() -> ResearchLimiter:
+    """Process-wide limiter, built lazily from settings"""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = ResearchLimiter(
+                    backend=create_backend(settings.RATE_LIMIT_BACKEND),
+                    rate_per_minute=settings.RESEARCH_RATE_PER_MINUTE,
+                    burst=settings.RESEARCH_BURST,
+                    max_concurrent=settings.RESEARCH_MAX_CONCURRENT,
+                    slot_ttl=settings.RESEARCH_SLOT_TTL_SECONDS,
+                )
+    return _limiter
+
+
+# ===== FASTAPI DEPENDENCY =====
+
+def enforce_research_quota(
+    current_user: UserPrincipal = Depends(get_current_user),
+    limiter: ResearchLimiter = Depends(get_research_limiter)
+):
+    """
+    Dependency guarding research runs
+    Use it on expensive endpoints: dependencies=[Depends(enforce_research_quota)]
+
+    Holds a concurrency slot until the request finishes; answers 429 with
+    Retry-After when the user is over quota.
+    """
+    try:
+        slot_id = limiter.acquire(current_user.id)
+    except RateLimitExceeded as exc:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=exc.detail,
+            headers={"Retry-After": str(exc.retry_after)},
+        )
+    try:
+        yield
+    finally:
+        limiter.release(current_user.id, slot_id)
+
+
+def enforce_research_rate(
+    current_user: UserPrincipal = Depends(get_current_user),
+    limiter: ResearchLimiter = Depends(get_research_limiter)
+):
+    """
+    Rate limit only, for requests that start runs later (batches): each
+    run takes its concurrency slot when it starts
+    """
+    try:
+        limiter.take_token(current_user.id)
+    except RateLimitExceeded as exc:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=exc.detail,
+            headers={"Retry-After": str(exc.retry_after)},
+        )
@@ -1,21 +1,49 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session, sessionmaker
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Literal, Optional
 from datetime import datetime
-import time
 
+from app.agent.cancellation import ResearchCancelled
 from app.database.db import get_db
-from app.database.models import User, ResearchSession
+from app.database.models import ResearchBatch, ResearchSession, WebhookDelivery
 from app.auth.dependencies import get_current_user
-from app.agent.graph import research
-from app.api.models import ResearchRequest, ResearchResponse, ResearchHistoryItem
+from app.auth.user_cache import UserPrincipal
+from app.api.export import MEDIA_TYPES, export_stream
+from app.api.rate_limit import ResearchLimiter, enforce_research_quota, enforce_research_rate
+from app.config.settings import settings
+from app.jobs.batches import batch_status_counts, create_batch, has_active_batch
+from app.jobs.cancellation import cancel_local, watch_cancellation
+from app.jobs.queue import cancel_job, count_active_jobs
+from app.jobs.runner import run_research
+from app.jobs.webhooks import SIGNATURE_HEADER, enqueue_webhook, signing_key
+from app.search.full_text import search_research
+from app.search.vector_index import find_prior_research, find_similar, index_session
+from app.api.models import (
+    ResearchBatchRequest, ResearchBatchResponse, ResearchRequest, ResearchResponse, ResearchHistoryItem,
+    ResearchSearchItem, SimilarResearchItem, WebhookSecretResponse
+)
 router = APIRouter(prefix="/research", tags=["Research"])
 
-@router.post("/", response_model=ResearchResponse)
+def session_response(session: ResearchSession) -> dict:
+    return {
+        "id": session.id,
+        "query": session.query,
+        "research_data": session.research_data or "",
+        "verified_facts": session.verified_facts or "",
+        "final_report": session.final_report or "",
+        "iterations": session.agent_iterations,
+        "status": session.status,
+        "processing_time": session.processing_time,
+        "created_at": str(session.created_at)
+    }
+
+@router.post("/", response_model=ResearchResponse, dependencies=[Depends(enforce_research_quota)])
 def create_research(
     request: ResearchRequest,
-    current_user: User = Depends(get_current_user),
+    response: Response,
+    current_user: UserPrincipal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -26,59 +54,179 @@ def create_research(
     2. Fact-check the findings
     3. Generate a comprehensive report
     
-    Results are saved to your account.
+    mode "parallel" first splits the query into sub-questions and
+    researches them concurrently (faster for broad queries); mode
+    "pipelined" fact-checks search results while research continues.
+    
+    Results are saved to your account. Runs are rate limited per user
+    (429 with Retry-After when over quota).
+
+    With RESEARCH_EXECUTION=queue the run is handed to a worker: the
+    response is 202 with status "pending"; poll GET /research/{id}, or
+    pass callback_url to have the result POSTed there when it finishes
+    (signed, see GET /research/webhooks/secret).
+
+    A run can be stopped with POST /research/{id}/cancel (an inline
+    request then answers 409).
     """
+    queued = settings.RESEARCH_EXECUTION == "queue"
+    if queued and settings.RESEARCH_MAX_CONCURRENT > 0:
+        # Queued runs outlive the request, so count them in the database
+        if count_active_jobs(db, current_user.id) >= settings.RESEARCH_MAX_CONCURRENT:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=f"Too many research runs in progress (max {settings.RESEARCH_MAX_CONCURRENT})",
+                headers={"Retry-After": str(ResearchLimiter.CONCURRENCY_RETRY_AFTER)},
+            )
+
     # Create session in database
     research_session = ResearchSession(
         user_id=current_user.id,
         query=request.query,
-        status="processing"
+        max_iterations=request.max_iterations,
+        research_mode=request.mode,
+        callback_url=str(request.callback_url) if request.callback_url else None,
+        status="pending" if queued else "processing"
     )
     db.add(research_session)
     db.commit()
     db.refresh(research_session)
+
+    if queued:
+        response.status_code = status.HTTP_202_ACCEPTED
+        return session_response(research_session)
     
     try:
         # Run multi-agent research
-        start_time = time.time()
-        result = research(query=request.query, max_iterations=request.max_iterations)
-        processing_time = int(time.time() - start_time)
+        prior_research = find_prior_research(db, current_user.id, request.query)
+        session_factory = sessionmaker(bind=db.get_bind(), autoflush=False)
+        with watch_cancellation(research_session.id, session_factory) as cancel_token:
+            fields = run_research(request.query, request.max_iterations, request.mode, prior_research,
+                                  cancel_token)
+        current_status = db.query(ResearchSession.status)\
+            .filter(ResearchSession.id == research_session.id)\
+            .scalar()
+        if current_status != "processing":
+            raise ResearchCancelled("Research was cancelled")  # Cancelled or deleted as it finished
         
         # Update session with results
-        research_session.research_data = result["research_data"]
-        research_session.verified_facts = result["verified_facts"]
-        research_session.final_report = result["final_report"]
-        research_session.agent_iterations = result.get("iteration", 0)
+        for name, value in fields.items():
+            setattr(research_session, name, value)
         research_session.status = "completed"
-        research_session.processing_time = processing_time
         research_session.completed_at = datetime.now()
         
         db.commit()
         db.refresh(research_session)
+        index_session(db, research_session)
+        enqueue_webhook(db, research_session)
         
-        return {
-            "id": research_session.id,
-            "query": research_session.query,
-            "research_data": research_session.research_data,
-            "verified_facts": research_session.verified_facts,
-            "final_report": research_session.final_report,
-            "iterations": research_session.agent_iterations,
-            "status": research_session.status,
-            "processing_time": research_session.processing_time,
-            "created_at": str(research_session.created_at)
-        }
+        return session_response(research_session)
         
+    except ResearchCancelled:
+        # cancel_job already stored the status (and queued the webhook)
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Research was cancelled")
     except Exception as e:
         # Update status to failed
         research_session.status = "failed"
         db.commit()
+        enqueue_webhook(db, research_session)
         raise HTTPException(status_code=500, detail=f"Research failed: {str(e)}")
 
+def batch_response(db: Session, batch: ResearchBatch) -> dict:
+    counts = batch_status_counts(db, batch.id)
+    total = sum(counts.values())
+    finished = counts.get("completed", 0) + counts.get("failed", 0) + counts.get("cancelled", 0)
+    sessions = db.query(ResearchSession)\
+        .filter(ResearchSession.batch_id == batch.id)\
+        .order_by(ResearchSession.id)\
+        .all()
+    return {
+        "id": batch.id,
+        "total": total,
+        "pending": counts.get("pending", 0) + counts.get("waiting", 0),
+        "processing": counts.get("processing", 0),
+        "completed": counts.get("completed", 0),
+        "failed": counts.get("failed", 0),
+        "cancelled": counts.get("cancelled", 0),
+        "progress": round(finished / total, 4) if total else 1.0,
+        "done": finished == total,
+        "created_at": str(batch.created_at),
+        "items": [
+            {"id": s.id, "query": s.query, "status": s.status, "created_at": str(s.created_at)}
+            for s in sessions
+        ],
+    }
+
+@router.post("/batch", response_model=ResearchBatchResponse, status_code=status.HTTP_202_ACCEPTED,
+             dependencies=[Depends(enforce_research_rate)])
+def create_research_batch(
+    request: ResearchBatchRequest,
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Submit many research questions at once
+    
+    Questions are stored in one go and researched in the background by
+    the process's workers, at most max_concurrent at a time and each
+    counting against your in-flight runs; a question repeated in the
+    batch is researched once. Poll GET /research/batch/{id} for progress and
+    fetch finished reports with GET /research/{id}.
+    
+    One batch per user runs at a time (429 while another is unfinished).
+    """
+    if len(request.queries) > settings.RESEARCH_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=422,
+            detail=f"At most {settings.RESEARCH_BATCH_MAX_SIZE} queries per batch"
+        )
+    if has_active_batch(db, current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Another research batch is still running",
+            headers={"Retry-After": str(ResearchLimiter.CONCURRENCY_RETRY_AFTER)},
+        )
+
+    max_concurrent = min(request.max_concurrent or settings.RESEARCH_BATCH_CONCURRENCY,
+                         settings.RESEARCH_BATCH_CONCURRENCY)
+    batch = create_batch(db, current_user.id, request.queries, request.max_iterations, request.mode,
+                         max_concurrent)
+    return batch_response(db, batch)
+
+@router.get("/batch/{batch_id}", response_model=ResearchBatchResponse)
+def get_research_batch(
+    batch_id: int,
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Progress of one of your research batches"""
+    batch = db.query(ResearchBatch)\
+        .filter(ResearchBatch.id == batch_id, ResearchBatch.user_id == current_user.id)\
+        .first()
+    if not batch:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return batch_response(db, batch)
+
+@router.get("/webhooks/secret", response_model=WebhookSecretResponse)
+def get_webhook_secret(current_user: UserPrincipal = Depends(get_current_user)):
+    """
+    Key to verify the webhooks sent to your callback_url
+    
+    Each webhook carries X-Research-Signature: t=<unix time>,v1=<hex>,
+    where hex is the HMAC-SHA256 of "<t>.<raw body>" under this key.
+    Reject stale timestamps to prevent replays.
+    """
+    return {
+        "secret": signing_key(current_user.id),
+        "algorithm": "HMAC-SHA256",
+        "header": SIGNATURE_HEADER,
+    }
+
 @router.get("/history", response_model=List[ResearchHistoryItem])
 def get_research_history(
     skip: int = 0,
     limit: int = 10,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -105,10 +253,91 @@ def get_research_history(
         for s in sessions
     ]
 
+@router.get("/export")
+def export_research_history(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    compress: bool = False,
+    since: Optional[datetime] = None,
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Export your whole research history, reports included
+    
+    Streams one row per session (oldest first) as NDJSON or CSV, gzipped
+    with compress=true. since limits the export to sessions completed at
+    or after that time (incremental syncs).
+    """
+    # The stream outlives this request's session, so it opens its own
+    session_factory = sessionmaker(bind=db.get_bind(), autoflush=False)
+    filename = f"research_history.{format}" + (".gz" if compress else "")
+    return StreamingResponse(
+        export_stream(session_factory, current_user.id, format, compress, since),
+        media_type="application/gzip" if compress else MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@router.get("/search", response_model=List[ResearchSearchItem])
+def search_research_history(
+    q: str = Query(..., min_length=2, max_length=500),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=50),
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Search your research by keywords
+    
+    Matches the words of q in your queries and reports, best matches
+    first, each with a highlighted report snippet. Use skip and limit
+    for pagination.
+    """
+    return search_research(db, current_user.id, q, skip=skip, limit=limit)
+
+@router.get("/similar", response_model=List[SimilarResearchItem])
+def get_similar_research(
+    query: Optional[str] = Query(None, min_length=3),
+    research_id: Optional[int] = None,
+    limit: int = Query(5, ge=1, le=20),
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Find your completed research related to a query
+    
+    Pass either query (free text) or research_id (research similar to
+    one of your sessions). Results are ranked by semantic similarity.
+    """
+    exclude = ()
+    if research_id is not None:
+        session = db.query(ResearchSession)\
+            .filter(
+                ResearchSession.id == research_id,
+                ResearchSession.user_id == current_user.id
+            )\
+            .first()
+        if not session:
+            raise HTTPException(status_code=404, detail="Research not found")
+        query = f"{session.query}\n{session.final_report or ''}"
+        exclude = (session.id,)
+    elif not query:
+        raise HTTPException(status_code=422, detail="Pass query or research_id")
+    
+    return [
+        {
+            "id": s.id,
+            "query": s.query,
+            "score": score,
+            "excerpt": (s.final_report or s.research_data or "")[:300],
+            "created_at": str(s.created_at)
+        }
+        for s, score in find_similar(db, current_user.id, query, k=limit, exclude=exclude)
+    ]
+
 @router.get("/{research_id}", response_model=ResearchResponse)
 def get_research_by_id(
     research_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -127,24 +356,54 @@ def get_research_by_id(
     if not session:
         raise HTTPException(status_code=404, detail="Research not found")
     
-    return {
-        "id": session.id,
-        "query": session.query,
-        "research_data": session.research_data or "",
-        "verified_facts": session.verified_facts or "",
-        "final_report": session.final_report or "",
-        "status": session.status,
-        "processing_time": session.processing_time,
-        "created_at": str(session.created_at)
-    }
+    return session_response(session)
+
+@router.post("/{research_id}/cancel", response_model=ResearchResponse)
+def cancel_research(
+    research_id: int,
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Cancel a research run
+    
+    A pending run never starts; a running one stops after its current
+    step, abandoning in-flight LLM and tool calls. The session is kept
+    with status "cancelled" and its callback_url gets a
+    research.cancelled webhook. Cancelling again is a no-op; a finished
+    run can't be cancelled (409).
+    """
+    session = db.query(ResearchSession)\
+        .filter(
+            ResearchSession.id == research_id,
+            ResearchSession.user_id == current_user.id
+        )\
+        .first()
+    
+    if not session:
+        raise HTTPException(status_code=404, detail="Research not found")
+    
+    cancelled = cancel_job(db, session.id)
+    db.refresh(session)
+    if not cancelled:
+        if session.status == "cancelled":
+            return session_response(session)
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Research already {session.status}"
+        )
+    
+    cancel_local(session.id)  # Runs in other processes notice the status
+    enqueue_webhook(db, session)
+    return session_response(session)
 
 @router.delete("/{research_id}")
 def delete_research(
     research_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Delete a research session"""
+    """Delete a research session (a run still in progress is cancelled first)"""
     session = db.query(ResearchSession)\
         .filter(
             ResearchSession.id == research_id,
@@ -155,6 +414,12 @@ def delete_research(
     if not session:
         raise HTTPException(status_code=404, detail="Research not found")
     
+    if cancel_job(db, session.id):
+        cancel_local(session.id)
+    # ON DELETE CASCADE, for SQLite, which doesn't enforce foreign keys
+    db.query(WebhookDelivery)\
+        .filter(WebhookDelivery.research_id == session.id)\
+        .delete(synchronize_session=False)
     db.delete(session)
     db.commit()
     
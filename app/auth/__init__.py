@@ -1,5 +1,6 @@
 """Auth module initialization"""
 from app.auth.security import hash_password, verify_password, create_access_token
 from app.auth.dependencies import get_current_user
+from app.auth.user_cache import UserPrincipal
 
-__all__ = ['hash_password', 'verify_password', 'create_access_token', 'get_current_user']
+__all__ = ['hash_password', 'verify_password', 'create_access_token', 'get_current_user', 'UserPrincipal']
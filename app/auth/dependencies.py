@@ -1,45 +1,82 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
+from app.config.settings import settings
 from app.database.db import get_db
 from app.database.models import User
-from app.auth.security import decode_access_token
+from app.auth.security import decode_token_claims
+from app.auth.user_cache import UserPrincipal, user_cache
 
 # Security scheme for Swagger UI
 security = HTTPBearer()
 
+def principal_from_claims(claims: dict):
+    """
+    Build a principal from token claims alone (no database access)
+
+    Returns None when the token doesn't carry the full set of claims, or the
+    user was changed (e.g. deactivated) in this process after it was issued.
+    """
+    try:
+        principal = UserPrincipal(
+            id=int(claims["uid"]),
+            username=claims["sub"],
+            email=claims["email"],
+            is_active=bool(claims["active"]),
+        )
+    except (KeyError, TypeError, ValueError):
+        return None
+
+    if user_cache.invalidated_since(principal.username, claims.get("iat")):
+        return None
+    return principal
+
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
-) -> User:
+) -> UserPrincipal:
     """
     Dependency to get current authenticated user
     Use this in your endpoints: user = Depends(get_current_user)
+
+    Lookup order: token claims (if AUTH_CLAIMS_ONLY), then the in-process
+    user cache, then the database.
     """
     # Extract token
     token = credentials.credentials
-    
+
     # Decode token
-    username = decode_access_token(token)
-    if username is None:
+    claims = decode_token_claims(token)
+    if claims is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
-    # Get user from database
-    user = db.query(User).filter(User.username == username).first()
-    if user is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found"
-        )
-    
-    if not user.is_active:
+    username = claims["sub"]
+
+    principal = None
+    if settings.AUTH_CLAIMS_ONLY:
+        principal = principal_from_claims(claims)
+
+    if principal is None:
+        principal = user_cache.get(username)
+
+    if principal is None:
+        # Get user from database
+        user = db.query(User).filter(User.username == username).first()
+        if user is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User not found"
+            )
+        principal = UserPrincipal.from_user(user)
+        user_cache.set(principal)
+
+    if not principal.is_active:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Inactive user"
         )
-    
-    return user
\ No newline at end of file
+
+    return principal
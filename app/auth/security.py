@@ -1,44 +1,100 @@
 from argon2 import PasswordHasher
+from argon2.exceptions import VerificationError, InvalidHashError
 from jose import JWTError,jwt
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
 import os
+import threading
+import time
+from app.config.settings import settings
 
 # Password hashing
-pwd_context = PasswordHasher()
+pwd_context = PasswordHasher(
+    time_cost=settings.ARGON2_TIME_COST,
+    memory_cost=settings.ARGON2_MEMORY_COST,
+    parallelism=settings.ARGON2_PARALLELISM,
+)
+
+# Argon2 is CPU/memory heavy, so it runs on a small dedicated pool instead of
+# the request threads. Slots = running + waiting jobs; when all are taken we
+# refuse new work (HTTP 429) rather than let a login burst starve the API.
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="argon2"
+)
+_hash_slots = threading.BoundedSemaphore(
+    settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_QUEUE_SIZE
+)
 
 # JWT settings
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
 ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 24 hours
+ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES  # Short-lived; renewed via refresh tokens
+
+class PasswordHashingBusy(Exception):
+    """Raised when the password hashing pool is saturated"""
+    retry_after = 1  # seconds
+
+def _run_on_hash_pool(fn, *args):
+    """Run fn on the hashing pool and wait for it, or raise PasswordHashingBusy"""
+    if not _hash_slots.acquire(blocking=False):
+        raise PasswordHashingBusy()
+    try:
+        future = _hash_executor.submit(fn, *args)
+    except Exception:
+        _hash_slots.release()
+        raise
+    future.add_done_callback(lambda _: _hash_slots.release())
+    return future.result()
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    try:
+        return pwd_context.verify(hashed_password, plain_password)
+    except (VerificationError, InvalidHashError):
+        return False
 
 def hash_password(password: str) -> str:
     """Hash a plain password"""
-    return pwd_context.hash(password)
+    return _run_on_hash_pool(pwd_context.hash, password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify password against hash"""
-    return pwd_context.verify(hashed_password, plain_password)
+    return _run_on_hash_pool(_verify, plain_password, hashed_password)
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True if the hash was made with different Argon2 parameters"""
+    try:
+        return pwd_context.check_needs_rehash(hashed_password)
+    except InvalidHashError:
+        return True
 
 def create_access_token(data: dict, expires_delta: timedelta = None):
     """Create JWT access token"""
     to_encode = data.copy()
     
+    # JWT timestamps are UTC; a naive local time would skew expiry by the UTC offset
     if expires_delta:
-        expire = datetime.now() + expires_delta
+        expire = datetime.now(timezone.utc) + expires_delta
     else:
-        expire = datetime.now() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+        expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "iat": int(time.time())})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def decode_access_token(token: str):
-    """Decode and verify JWT token"""
+def decode_token_claims(token: str):
+    """Decode and verify JWT token, returning all claims (or None)"""
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            return None
-        return username
     except JWTError:
         return None
+    if payload.get("sub") is None:
+        return None
+    return payload
+
+def decode_access_token(token: str):
+    """Decode and verify JWT token"""
+    payload = decode_token_claims(token)
+    if payload is None:
+        return None
+    return payload["sub"]
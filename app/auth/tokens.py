@@ -0,0 +1,125 @@
+"""
+Tokens Module - Access/refresh token issuing, rotation and revocation
+Purpose: Keep access tokens short-lived and self-contained (no DB on the hot
+path) while long-lived sessions are held by stored, rotating refresh tokens.
+"""
+
+import hashlib
+import secrets
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import Session
+
+from app.auth.security import create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
+from app.config.settings import settings
+from app.database.models import RefreshToken, User
+
+
+class RefreshTokenError(Exception):
+    """Raised when a refresh token is unknown, expired, revoked or reused"""
+
+
+def create_user_access_token(user: User) -> str:
+    """Access token carrying everything needed to authenticate without the DB"""
+    return create_access_token(data={
+        "sub": user.username,
+        "uid": user.id,
+        "email": user.email,
+        "active": bool(user.is_active),
+        "type": "access",
+    })
+
+
+def _hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def issue_refresh_token(db: Session, user: User) -> str:
+    """Create and store a new refresh token; returns the plain token"""
+    now = datetime.now()
+
+    # Keep the table compact: drop this user's dead tokens as we go
+    db.query(RefreshToken).filter(
+        RefreshToken.user_id == user.id,
+        RefreshToken.expires_at < now,
+    ).delete(synchronize_session=False)
+
+    token = secrets.token_urlsafe(32)
+    db.add(RefreshToken(
+        user_id=user.id,
+        token_hash=_hash_token(token),
+        expires_at=now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+    ))
+    db.commit()
+    return token
+
+
+def issue_token_pair(db: Session, user: User) -> dict:
+    """Access + refresh token response fields for a user"""
+    return {
+        "access_token": create_user_access_token(user),
+        "refresh_token": issue_refresh_token(db, user),
+        "token_type": "bearer",
+        "expires_in": ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    }
+
+
+def rotate_refresh_token(db: Session, token: str):
+    """
+    Exchange a refresh token for a new access/refresh pair
+
+    The presented token is revoked. Presenting an already revoked token means
+    it was stolen or replayed, so every refresh token of that user is revoked.
+
+    Returns (user, token pair dict). Raises RefreshTokenError.
+    """
+    now = datetime.now()
+    stored = db.query(RefreshToken).filter(
+        RefreshToken.token_hash == _hash_token(token)
+    ).first()
+
+    if stored is None:
+        raise RefreshTokenError("Invalid refresh token")
+
+    if stored.revoked_at is not None:
+        revoke_all_refresh_tokens(db, stored.user_id)
+        raise RefreshTokenError("Refresh token reuse detected")
+
+    if stored.expires_at <= now:
+        raise RefreshTokenError("Refresh token expired")
+
+    user = db.query(User).filter(User.id == stored.user_id).first()
+    if user is None or not user.is_active:
+        revoke_all_refresh_tokens(db, stored.user_id)
+        raise RefreshTokenError("Inactive user")
+
+    # Conditional update so two concurrent refreshes can't both succeed
+    claimed = db.query(RefreshToken).filter(
+        RefreshToken.id == stored.id,
+        RefreshToken.revoked_at.is_(None),
+    ).update({"revoked_at": now}, synchronize_session=False)
+    if not claimed:
+        db.rollback()
+        revoke_all_refresh_tokens(db, stored.user_id)
+        raise RefreshTokenError("Refresh token reuse detected")
+
+    return user, issue_token_pair(db, user)
+
+
+def revoke_refresh_token(db: Session, token: str) -> bool:
+    """Revoke a single refresh token (logout); True if it was active"""
+    updated = db.query(RefreshToken).filter(
+        RefreshToken.token_hash == _hash_token(token),
+        RefreshToken.revoked_at.is_(None),
+    ).update({"revoked_at": datetime.now()}, synchronize_session=False)
+    db.commit()
+    return updated > 0
+
+
+def revoke_all_refresh_tokens(db: Session, user_id: int):
+    """Revoke every active refresh token of a user"""
+    db.query(RefreshToken).filter(
+        RefreshToken.user_id == user_id,
+        RefreshToken.revoked_at.is_(None),
+    ).update({"revoked_at": datetime.now()}, synchronize_session=False)
+    db.commit()
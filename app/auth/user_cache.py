@@ -0,0 +1,136 @@
+"""
+User Cache Module - Short-lived cache of authenticated user principals
+Purpose: Avoid a database round trip on every authenticated request
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import event, inspect
+
+from app.config.settings import settings
+from app.database.models import User
+
+
+@dataclass(frozen=True)
+class UserPrincipal:
+    """
+    Read-only snapshot of the authenticated user
+
+    Routes only read these fields, so a plain value object can be cached and
+    shared between requests (unlike ORM instances, which are bound to a session).
+    """
+    id: int
+    username: str
+    email: str
+    is_active: bool
+    created_at: Optional[datetime] = None
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserPrincipal":
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            is_active=bool(user.is_active),
+            created_at=user.created_at,
+        )
+
+
+class UserCache:
+    """Thread-safe LRU cache of principals keyed by token subject, with a TTL"""
+
+    def __init__(self, ttl_seconds: int, max_size: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries = OrderedDict()      # username -> (expires_at, principal)
+        self._invalidated = OrderedDict()  # username -> time of last invalidation
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_size > 0
+
+    def get(self, username: str) -> Optional[UserPrincipal]:
+        """Return the cached principal, or None if missing or expired"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, principal = entry
+            if expires_at <= time.monotonic():
+                del self._entries[username]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(username)
+            self.hits += 1
+            return principal
+
+    def set(self, principal: UserPrincipal):
+        """Cache a principal (inactive users are never cached)"""
+        if not self.enabled or not principal.is_active:
+            return
+        with self._lock:
+            self._entries[principal.username] = (
+                time.monotonic() + self.ttl_seconds,
+                principal,
+            )
+            self._entries.move_to_end(principal.username)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, username: str):
+        """Drop a user and remember when, so older claims-only tokens are re-checked"""
+        with self._lock:
+            self._entries.pop(username, None)
+            self._invalidated[username] = time.time()
+            self._invalidated.move_to_end(username)
+            while len(self._invalidated) > max(self.max_size, 1):
+                self._invalidated.popitem(last=False)
+
+    def invalidated_since(self, username: str, issued_at: Optional[float]) -> bool:
+        """True if the user changed after a token was issued (or iat is unknown)"""
+        with self._lock:
+            invalidated_at = self._invalidated.get(username)
+        if invalidated_at is None:
+            return False
+        return issued_at is None or issued_at <= invalidated_at
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._invalidated.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# Global cache instance (per process)
+user_cache = UserCache(
+    ttl_seconds=settings.USER_CACHE_TTL_SECONDS,
+    max_size=settings.USER_CACHE_MAX_SIZE,
+)
+
+
+# ===== INVALIDATION HOOKS =====
+
+@event.listens_for(User, "after_update")
+def _invalidate_on_update(mapper, connection, target):
+    """Deactivation (or any profile change) evicts the cached principal"""
+    user_cache.invalidate(target.username)
+    # A renamed user must also be evicted under the old subject
+    for old_username in inspect(target).attrs.username.history.deleted or ():
+        user_cache.invalidate(old_username)
+
+
+@event.listens_for(User, "after_delete")
+def _invalidate_on_delete(mapper, connection, target):
+    user_cache.invalidate(target.username)
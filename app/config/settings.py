@@ -32,8 +32,195 @@ class Settings(BaseSettings):
         DATABASE_URL (str): Storage backend.
         MAX_RESEARCH_ITERATIONS (int): Max loops per agent.
         DEFAULT_LLM_TEMPERATURE (float): Base LLM creativity.
+        USER_CACHE_TTL_SECONDS (int): Lifetime of cached user principals (0 disables).
+        USER_CACHE_MAX_SIZE (int): Max cached principals per process.
+        AUTH_CLAIMS_ONLY (bool): Trust token claims without loading the user. Deactivation
+            then only takes effect in other processes when the access token expires.
+        REFRESH_TOKEN_EXPIRE_DAYS (int): Refresh token validity period.
+        ARGON2_TIME_COST (int): Argon2 iterations.
+        ARGON2_MEMORY_COST (int): Argon2 memory in KiB.
+        ARGON2_PARALLELISM (int): Argon2 lanes/threads.
+        PASSWORD_HASH_WORKERS (int): Threads dedicated to password hashing.
+        PASSWORD_HASH_QUEUE_SIZE (int): Hash jobs allowed to wait before 429.
+        RESEARCH_RATE_PER_MINUTE (float): Sustained research runs per user.
+        RESEARCH_BURST (int): Research runs a user may start back to back.
+        RESEARCH_MAX_CONCURRENT (int): In-flight research runs per user.
+        RESEARCH_SLOT_TTL_SECONDS (int): Lifetime of a concurrency slot.
+        RATE_LIMIT_BACKEND (str): "memory" (per process), "redis" or "sql" (shared).
+        REDIS_URL (str): Redis connection URL for shared backends.
+        RESEARCH_PARALLEL_BRANCHES (int): Sub-questions researched at once in parallel mode.
+        RESEARCH_EARLY_EXIT (bool): Stop searching once later results only confirm earlier ones.
+        RESEARCH_SUFFICIENCY_THRESHOLD (float): Coverage x evidence score that counts as sufficient.
+        TOOL_RESULT_DEDUP (bool): Drop repeated sentences from search/scrape results.
+        TOOL_RESULT_DEDUP_THRESHOLD (float): MinHash similarity that counts as a duplicate.
+        EVIDENCE_TOP_K (int): Evidence passages given to the fact-checker/summarizer.
+        TOKENIZER_ENCODING (str): tiktoken encoding of the model, for prompt budgets.
+        RESEARCH_PROMPT_TOKENS (int): Researcher prompt: instructions, earlier research, the run's messages.
+        FACT_CHECK_PROMPT_TOKENS (int): Fact-checker prompt: instructions, findings, recent messages.
+        SUMMARY_PROMPT_TOKENS (int): Summarizer prompt (research, then verified facts).
+        LLM_MICRO_BATCH (bool): Group concurrent calls to the same model into batch() calls.
+        LLM_BATCH_WINDOW_MS (int): How long the first call of a batch waits for others.
+        LLM_BATCH_MAX_SIZE (int): Calls per batch.
+        ARTIFACT_STORE (str): Where large tool outputs live: "memory", "file" or "none".
+        ARTIFACT_DIR (str): Directory of the "file" artifact store.
+        ARTIFACT_MIN_CHARS (int): Tool outputs at least this long are stored as artifacts.
+        ARTIFACT_EXCERPT_CHARS (int): Excerpt kept in state next to an artifact reference.
+        ARTIFACT_MEMORY_MAX_CHARS (int): Size bound of the "memory" artifact store.
+        RESEARCH_EXECUTION (str): "inline" (in the request) or "queue" (workers).
+        RESEARCH_QUEUE_WORKERS (int): Queue worker threads per API process (batch jobs only when inline).
+        RESEARCH_LEASE_SECONDS (int): Job lease; renewed while the job runs.
+        RESEARCH_QUEUE_POLL_SECONDS (float): Idle poll interval of queue workers.
+        RESEARCH_CANCEL_POLL_SECONDS (float): How often a running job checks whether it was cancelled.
+        CANCELLABLE_CALL_THREADS (int): Tool and LLM calls of research runs running at once.
+        CANCELLABLE_ABANDONED_CALLS (int): Extra threads letting calls of cancelled runs finish.
+        RESULT_CACHE_BACKEND (str): "memory", "redis" or "sql".
+        RESULT_CACHE_TTL_SECONDS (int): Reuse identical research results (0 disables).
+        RESEARCH_BATCH_MAX_SIZE (int): Questions per POST /research/batch.
+        RESEARCH_BATCH_CONCURRENCY (int): Default and maximum running jobs per batch.
+        SEARCH_SHARE_SECONDS (int): Identical web searches share one provider call (0 disables).
+        SCRAPE_MAX_TOKENS (int): Main-content tokens web_scrape returns.
+        SCRAPE_MAX_BYTES (int): Bytes of a page read before web_scrape stops.
+        SCRAPE_MAX_CONTENT_LENGTH (int): Pages declaring more bytes are refused unread.
+        SCRAPE_TIMEOUT_SECONDS (int): Connect/read timeout for web_scrape.
+        WEBHOOK_DISPATCHERS (int): Webhook delivery threads per process (0: deliver elsewhere).
+        WEBHOOK_SECRET (str): Key from which per-user signing keys derive (default: SECRET_KEY).
+        WEBHOOK_MAX_ATTEMPTS (int): Deliveries tried before a webhook is dead-lettered.
+        WEBHOOK_BACKOFF_SECONDS (float): First retry delay, doubled on every attempt.
+        WEBHOOK_MAX_BACKOFF_SECONDS (float): Retry delay cap.
+        WEBHOOK_TIMEOUT_SECONDS (float): Per-delivery HTTP timeout.
+        WEBHOOK_POLL_SECONDS (float): Idle poll interval of webhook dispatchers.
+        WEBHOOK_ALLOW_PRIVATE_URLS (bool): Allow callbacks to loopback/private addresses.
+        VECTOR_INDEX (bool): Index completed research for similarity search.
+        VECTOR_INDEX_DIR (str): Directory of the memory-mapped vector index.
+        VECTOR_INDEX_DIM (int): Embedding dimensions (changing it rebuilds the index).
+        VECTOR_INDEX_SYNC_SECONDS (float): Interval of the background database sync of the index.
+        RESEARCH_REUSE_PRIOR (bool): Give the researcher related earlier research as context.
+        PRIOR_RESEARCH_LIMIT (int): Earlier sessions given to the researcher.
+        PRIOR_RESEARCH_MIN_SCORE (float): Cosine similarity an earlier session needs to be reused.
+        PRIOR_RESEARCH_TOKENS (int): Tokens of each earlier report given to the researcher.
     """
-    pass
+
+    # ------------------------------
+    # Tokens
+    # ------------------------------
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 15              # Short-lived, self-contained access tokens
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 14                # Stored, rotated on every refresh
+
+    # ------------------------------
+    # Authenticated User Cache
+    # ------------------------------
+    USER_CACHE_TTL_SECONDS: int = 30                   # Lifetime of cached principals (0 disables)
+    USER_CACHE_MAX_SIZE: int = 10_000                  # Max cached principals per process
+    AUTH_CLAIMS_ONLY: bool = False                     # Trust token claims without loading the user
+
+    # ------------------------------
+    # Password Hashing (Argon2id)
+    # ------------------------------
+    ARGON2_TIME_COST: int = 3                          # Iterations
+    ARGON2_MEMORY_COST: int = 65536                    # Memory in KiB (64 MiB)
+    ARGON2_PARALLELISM: int = 4                        # Lanes/threads per hash
+    PASSWORD_HASH_WORKERS: int = 2                     # Dedicated hashing threads
+    PASSWORD_HASH_QUEUE_SIZE: int = 16                 # Waiting jobs before 429
+
+    # ------------------------------
+    # Research Rate Limits / Quotas
+    # ------------------------------
+    RESEARCH_RATE_PER_MINUTE: float = 6.0              # Token bucket refill rate per user
+    RESEARCH_BURST: int = 3                            # Token bucket capacity per user
+    RESEARCH_MAX_CONCURRENT: int = 2                   # In-flight runs per user (0 disables)
+    RESEARCH_SLOT_TTL_SECONDS: int = 900               # Reclaim slots of crashed workers
+    RATE_LIMIT_BACKEND: str = "memory"                 # "memory", "redis" or "sql"
+    REDIS_URL: str = "redis://localhost:6379/0"        # Shared backend for multi-worker setups
+
+    # ------------------------------
+    # Research Workflow
+    # ------------------------------
+    RESEARCH_PARALLEL_BRANCHES: int = 3                # Planner sub-questions in "parallel" mode
+    RESEARCH_EARLY_EXIT: bool = True                   # Skip researcher turns once results suffice
+    RESEARCH_SUFFICIENCY_THRESHOLD: float = 0.8        # Heuristic scorer threshold (0-1)
+    TOOL_RESULT_DEDUP: bool = True                     # Collapse near-duplicate tool results
+    TOOL_RESULT_DEDUP_THRESHOLD: float = 0.8           # Estimated Jaccard similarity (0-1)
+    EVIDENCE_TOP_K: int = 8                            # BM25-ranked passages per prompt
+
+    # ------------------------------
+    # Prompt Budgets (tokens)
+    # ------------------------------
+    TOKENIZER_ENCODING: str = "o200k_base"             # gpt-oss / GPT-4o family
+    RESEARCH_PROMPT_TOKENS: int = 8000                 # Whole researcher prompt, history included
+    FACT_CHECK_PROMPT_TOKENS: int = 3000               # Whole fact-checker prompt, history included
+    SUMMARY_PROMPT_TOKENS: int = 4000                  # Longer research -> top evidence instead
+
+    # ------------------------------
+    # LLM Dispatch
+    # ------------------------------
+    LLM_MICRO_BATCH: bool = False                      # Only for backends with real batching
+    LLM_BATCH_WINDOW_MS: int = 20                      # Added latency of the first call in a batch
+    LLM_BATCH_MAX_SIZE: int = 8
+
+    # ------------------------------
+    # Tool Output Artifacts
+    # ------------------------------
+    ARTIFACT_STORE: str = "memory"                     # "memory", "file" or "none"
+    ARTIFACT_DIR: str = "./artifacts"                  # Used by the "file" store
+    ARTIFACT_MIN_CHARS: int = 1000                     # Smaller outputs stay inline
+    ARTIFACT_EXCERPT_CHARS: int = 240                  # Excerpt kept in the state
+    ARTIFACT_MEMORY_MAX_CHARS: int = 50_000_000        # LRU bound of the "memory" store
+
+    # ------------------------------
+    # Research Execution / Job Queue
+    # ------------------------------
+    RESEARCH_EXECUTION: str = "inline"                 # "inline" or "queue"
+    RESEARCH_QUEUE_WORKERS: int = 1                    # Worker threads per API process (inline: batches)
+    RESEARCH_LEASE_SECONDS: int = 120                  # Renewed every third of the lease
+    RESEARCH_QUEUE_POLL_SECONDS: float = 1.0           # Idle poll interval
+    RESEARCH_CANCEL_POLL_SECONDS: float = 1.0          # Cancellation check of running jobs
+    CANCELLABLE_CALL_THREADS: int = 32                 # Shared by all runs of the process
+    CANCELLABLE_ABANDONED_CALLS: int = 32              # Beyond this, abandoned calls keep a call thread
+
+    # ------------------------------
+    # Research Result Cache
+    # ------------------------------
+    RESULT_CACHE_BACKEND: str = "memory"               # "memory", "redis" or "sql"
+    RESULT_CACHE_TTL_SECONDS: int = 0                  # Reuse identical research (0 disables)
+
+    # ------------------------------
+    # Batch Research
+    # ------------------------------
+    RESEARCH_BATCH_MAX_SIZE: int = 500                 # Questions per batch
+    RESEARCH_BATCH_CONCURRENCY: int = 4                # Running jobs per batch (default and cap)
+    SEARCH_SHARE_SECONDS: int = 300                    # Reuse identical searches (0 disables)
+
+    # ------------------------------
+    # Web Scraping
+    # ------------------------------
+    SCRAPE_MAX_TOKENS: int = 250                       # Main-content tokens returned
+    SCRAPE_MAX_BYTES: int = 1_000_000                  # Stop reading a page after this
+    SCRAPE_MAX_CONTENT_LENGTH: int = 10_000_000        # Refuse larger pages from the headers
+    SCRAPE_TIMEOUT_SECONDS: int = 10
+
+    # ------------------------------
+    # Webhook Callbacks
+    # ------------------------------
+    WEBHOOK_DISPATCHERS: int = 1                       # Delivery threads per process
+    WEBHOOK_SECRET: str = ""                           # Signing key root (default: SECRET_KEY)
+    WEBHOOK_MAX_ATTEMPTS: int = 8                      # Then dead-lettered
+    WEBHOOK_BACKOFF_SECONDS: float = 10.0              # Doubled per attempt, with jitter
+    WEBHOOK_MAX_BACKOFF_SECONDS: float = 3600.0        # Retry delay cap
+    WEBHOOK_TIMEOUT_SECONDS: float = 10.0              # Per delivery
+    WEBHOOK_POLL_SECONDS: float = 1.0                  # Idle poll interval of dispatchers
+    WEBHOOK_ALLOW_PRIVATE_URLS: bool = False           # SSRF guard; enable for local receivers
+
+    # ------------------------------
+    # Past Research Retrieval
+    # ------------------------------
+    VECTOR_INDEX: bool = True                          # Similarity search over completed research
+    VECTOR_INDEX_DIR: str = "./vector_index"           # Shared by the processes on one host
+    VECTOR_INDEX_DIM: int = 512                        # Hashing embedder dimensions
+    VECTOR_INDEX_SYNC_SECONDS: float = 60.0            # Background catch-up; sessions index on completion
+    RESEARCH_REUSE_PRIOR: bool = True                  # Related earlier research as context
+    PRIOR_RESEARCH_LIMIT: int = 2                      # Earlier sessions per run
+    PRIOR_RESEARCH_MIN_SCORE: float = 0.35             # Cosine similarity (0-1)
+    PRIOR_RESEARCH_TOKENS: int = 400                   # Excerpt of each earlier report
 
 # ------------------------------
 # API Metadata
@@ -52,7 +239,7 @@ GROQ_API_KEY: str                                  # Required - must be set
 # ------------------------------
 SECRET_KEY: str                                    # JWT signing secret
 ALGORITHM: str = "HS256"                           # JWT signing algorithm
-ACCESS_TOKEN_EXPIRE_MINUTES: int = 1440            # Token validity period
+ACCESS_TOKEN_EXPIRE_MINUTES: int = 15              # Token validity period
 
 # ------------------------------
 # Database Configuration
@@ -1,12 +1,31 @@
-from sqlalchemy import create_engine
+from contextlib import contextmanager
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import sessionmaker, Session
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
 from app.database.models import Base
+import fcntl
 import os
 
 
 # Database URL (SQLite file)
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./research_assistant.db")
 
+# Migration scripts live next to this module
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "migrations")
+
+# Revision that matches the schema older releases built with create_all
+BASELINE_REVISION = "0001"
+
+# Migrate on startup; set DB_AUTO_MIGRATE=false where a one-shot step
+# (python -m app.database.db) migrates and processes only check the revision
+AUTO_MIGRATE = os.getenv("DB_AUTO_MIGRATE", "true").lower() not in ("0", "false", "no")
+
+# pg_advisory_lock key serializing migrations across processes
+MIGRATION_LOCK_KEY = 7_041_952_033
+
 # Create engine
 engine = create_engine(
     DATABASE_URL,
@@ -16,16 +35,118 @@ engine = create_engine(
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-def init_db():
-    """Initialize database - create all tables"""
-    print("🗄️  Creating database tables...")
-    Base.metadata.create_all(bind=engine)
+
+def get_alembic_config(bind=None) -> Config:
+    """Alembic config pointing at our migration scripts (independent of cwd)"""
+    config = Config()
+    config.set_main_option("script_location", MIGRATIONS_DIR)
+    bind = bind if bind is not None else engine
+    config.set_main_option(
+        "sqlalchemy.url",
+        bind.url.render_as_string(hide_password=False).replace("%", "%%")
+    )
+    return config
+
+
+def get_schema_revision(bind=None):
+    """Return (current revision, head revision) for the database"""
+    bind = bind if bind is not None else engine
+    head = ScriptDirectory.from_config(get_alembic_config(bind)).get_current_head()
+    with bind.connect() as conn:
+        current = MigrationContext.configure(conn).get_current_revision()
+    return current, head
+
+
+class SchemaOutOfDate(RuntimeError):
+    """The database is behind the code and this process may not migrate it"""
+
+
+@contextmanager
+def migration_lock(bind):
+    """
+    Hold the migration lock: a Postgres advisory lock, or a lock file next
+    to a SQLite database, so processes starting together migrate one at a time
+    """
+    if bind.dialect.name == "postgresql":
+        with bind.connect() as conn:
+            conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+            conn.commit()  # The lock belongs to the session, not the transaction
+            try:
+                yield
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+                conn.commit()
+    elif bind.dialect.name == "sqlite" and bind.url.database not in (None, "", ":memory:"):
+        with open(f"{bind.url.database}.migrate.lock", "a+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+    else:
+        yield
+
+
+def init_db(bind=None, migrate=None):
+    """
+    Initialize database - check schema version, migrate only if behind
+
+    On an up-to-date database this is a single read of `alembic_version`;
+    the schema itself is never reflected. Migrations run under
+    migration_lock(); processes that lost the race find the schema up to
+    date. With migrate False (default: DB_AUTO_MIGRATE) a database that is
+    behind raises SchemaOutOfDate instead.
+    """
+    bind = bind if bind is not None else engine
+    migrate = AUTO_MIGRATE if migrate is None else migrate
+    current, head = get_schema_revision(bind)
+
+    if current == head:
+        print(f"✅ Database schema up to date (revision {current})")
+        return
+    if not migrate:
+        raise SchemaOutOfDate(
+            f"Database schema is at revision {current}, code expects {head}: "
+            "run `python -m app.database.db` to migrate"
+        )
+
+    with migration_lock(bind):
+        # Another process may have migrated while we waited for the lock
+        current, head = get_schema_revision(bind)
+        if current == head:
+            print(f"✅ Database schema up to date (revision {current})")
+            return
+        _upgrade(bind, current, head)
+
+
+def _upgrade(bind, current, head):
+    """Stamp a legacy create_all schema if needed, then upgrade to head"""
+    # Databases created by create_all before migrations existed
+    legacy = current is None and inspect(bind).has_table("users")
+
+    config = get_alembic_config(bind)
+    with bind.connect() as conn:
+        # Alembic manages the transactions so that migrations needing an
+        # autocommit block (e.g. CREATE INDEX CONCURRENTLY) can run
+        config.attributes["connection"] = conn
+        if legacy:
+            print(f"🗄️  Stamping existing schema at revision {BASELINE_REVISION}")
+            command.stamp(config, BASELINE_REVISION)
+
+        print(f"🗄️  Migrating database schema {current} -> {head}...")
+        command.upgrade(config, "head")
     print("✅ Database initialized!")
 
+
 def get_db():
     """Dependency for FastAPI - provides database session"""
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+if __name__ == "__main__":
+    # One-shot migration step of a deployment
+    init_db(migrate=True)
@@ -0,0 +1,38 @@
+"""Index research_sessions by (user_id, created_at)
+
+Serves `/research/history`, which filters by user and orders by
+`created_at DESC`. On PostgreSQL the index is built CONCURRENTLY so the
+table stays writable during the build.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_research_sessions_user_created",
+            "research_sessions",
+            ["user_id", "created_at"],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_research_sessions_user_created",
+            table_name="research_sessions",
+            postgresql_concurrently=True,
+        )
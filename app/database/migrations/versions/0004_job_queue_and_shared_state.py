@@ -0,0 +1,71 @@
+"""Job queue lease columns and shared-state tables
+
+Adds what multi-worker deployments need:
+* research_sessions: max_iterations, lease_owner, lease_expires_at,
+  started_at and a (status, id) index for claiming pending jobs
+* cache_entries: shared result cache
+* rate_limit_buckets / rate_limit_slots: shared rate limiter state
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("research_sessions") as batch:
+        batch.add_column(sa.Column("max_iterations", sa.Integer(), nullable=True))
+        batch.add_column(sa.Column("lease_owner", sa.String(), nullable=True))
+        batch.add_column(sa.Column("lease_expires_at", sa.DateTime(), nullable=True))
+        batch.add_column(sa.Column("started_at", sa.DateTime(), nullable=True))
+    op.create_index("ix_research_sessions_status_id", "research_sessions", ["status", "id"])
+
+    op.create_table(
+        "cache_entries",
+        sa.Column("key", sa.String(length=64), nullable=False),
+        sa.Column("value", sa.Text(), nullable=False),
+        sa.Column("expires_at", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint("key"),
+    )
+    op.create_index("ix_cache_entries_expires_at", "cache_entries", ["expires_at"])
+
+    op.create_table(
+        "rate_limit_buckets",
+        sa.Column("key", sa.String(), nullable=False),
+        sa.Column("tokens", sa.Float(), nullable=False),
+        sa.Column("updated_at", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint("key"),
+    )
+
+    op.create_table(
+        "rate_limit_slots",
+        sa.Column("id", sa.String(length=32), nullable=False),
+        sa.Column("key", sa.String(), nullable=False),
+        sa.Column("expires_at", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_rate_limit_slots_key", "rate_limit_slots", ["key"])
+
+
+def downgrade():
+    op.drop_index("ix_rate_limit_slots_key", table_name="rate_limit_slots")
+    op.drop_table("rate_limit_slots")
+    op.drop_table("rate_limit_buckets")
+    op.drop_index("ix_cache_entries_expires_at", table_name="cache_entries")
+    op.drop_table("cache_entries")
+
+    op.drop_index("ix_research_sessions_status_id", table_name="research_sessions")
+    with op.batch_alter_table("research_sessions") as batch:
+        batch.drop_column("started_at")
+        batch.drop_column("lease_expires_at")
+        batch.drop_column("lease_owner")
+        batch.drop_column("max_iterations")
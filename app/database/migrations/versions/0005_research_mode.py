@@ -0,0 +1,28 @@
+"""Research mode column
+
+Stores the requested workflow ("serial" or "parallel") so queue workers run
+the job the way it was requested.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("research_sessions") as batch:
+        batch.add_column(sa.Column("research_mode", sa.String(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table("research_sessions") as batch:
+        batch.drop_column("research_mode")
@@ -0,0 +1,82 @@
+"""Full-text search index over research_sessions (query, final_report)
+
+SQLite: FTS5 index over a view of the table, kept in sync by triggers, with
+a u<user_id> owner token per row so searches stay within one user's rows.
+PostgreSQL: generated tsvector column with a GIN index (built
+CONCURRENTLY). Existing rows are indexed by the migration.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+SQLITE_UPGRADE = (
+    """CREATE VIEW research_sessions_search AS
+    SELECT id, query, final_report, 'u' || user_id AS owner FROM research_sessions""",
+    """CREATE VIRTUAL TABLE research_sessions_fts USING fts5(
+    query, final_report, owner,
+    content='research_sessions_search', content_rowid='id', tokenize='porter unicode61')""",
+    """CREATE TRIGGER research_sessions_fts_insert AFTER INSERT ON research_sessions BEGIN
+    INSERT INTO research_sessions_fts(rowid, query, final_report, owner)
+    VALUES (new.id, new.query, new.final_report, 'u' || new.user_id);
+    END""",
+    """CREATE TRIGGER research_sessions_fts_delete AFTER DELETE ON research_sessions BEGIN
+    INSERT INTO research_sessions_fts(research_sessions_fts, rowid, query, final_report, owner)
+    VALUES ('delete', old.id, old.query, old.final_report, 'u' || old.user_id);
+    END""",
+    """CREATE TRIGGER research_sessions_fts_update AFTER UPDATE OF query, final_report, user_id
+    ON research_sessions BEGIN
+    INSERT INTO research_sessions_fts(research_sessions_fts, rowid, query, final_report, owner)
+    VALUES ('delete', old.id, old.query, old.final_report, 'u' || old.user_id);
+    INSERT INTO research_sessions_fts(rowid, query, final_report, owner)
+    VALUES (new.id, new.query, new.final_report, 'u' || new.user_id);
+    END""",
+    "INSERT INTO research_sessions_fts(research_sessions_fts) VALUES ('rebuild')",
+)
+
+SQLITE_DOWNGRADE = (
+    "DROP TRIGGER research_sessions_fts_update",
+    "DROP TRIGGER research_sessions_fts_delete",
+    "DROP TRIGGER research_sessions_fts_insert",
+    "DROP TABLE research_sessions_fts",
+    "DROP VIEW research_sessions_search",
+)
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        for statement in SQLITE_UPGRADE:
+            op.execute(statement)
+    elif dialect == "postgresql":
+        op.execute(
+            """ALTER TABLE research_sessions ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(query, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(final_report, '')), 'B')) STORED"""
+        )
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+        with op.get_context().autocommit_block():
+            op.execute(
+                "CREATE INDEX CONCURRENTLY ix_research_sessions_search_vector "
+                "ON research_sessions USING gin (search_vector)"
+            )
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        for statement in SQLITE_DOWNGRADE:
+            op.execute(statement)
+    elif dialect == "postgresql":
+        with op.get_context().autocommit_block():
+            op.execute("DROP INDEX CONCURRENTLY ix_research_sessions_search_vector")
+        op.execute("ALTER TABLE research_sessions DROP COLUMN search_vector")
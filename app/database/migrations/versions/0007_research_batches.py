@@ -0,0 +1,62 @@
+"""Research batches
+
+Adds research_batches and research_sessions.batch_id, with a
+(batch_id, status) index for batch progress and per-batch concurrency.
+The column is added in place, not with a batch-mode table rebuild that
+would drop the SQLite full-text search triggers from 0006; SQLite can't add
+its foreign key constraint that way (and doesn't enforce it by default).
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "research_batches",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("max_concurrent", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_research_batches_user_id", "research_batches", ["user_id"])
+
+    op.add_column("research_sessions", sa.Column("batch_id", sa.Integer(), nullable=True))
+    if op.get_bind().dialect.name != "sqlite":
+        op.create_foreign_key(
+            "fk_research_sessions_batch_id", "research_sessions", "research_batches",
+            ["batch_id"], ["id"]
+        )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_research_sessions_batch_status",
+            "research_sessions",
+            ["batch_id", "status"],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_research_sessions_batch_status",
+            table_name="research_sessions",
+            postgresql_concurrently=True,
+        )
+    if op.get_bind().dialect.name != "sqlite":
+        op.drop_constraint("fk_research_sessions_batch_id", "research_sessions", type_="foreignkey")
+    op.drop_column("research_sessions", "batch_id")
+    op.drop_index("ix_research_batches_user_id", table_name="research_batches")
+    op.drop_table("research_batches")
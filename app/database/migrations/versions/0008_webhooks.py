@@ -0,0 +1,69 @@
+"""Webhook callbacks
+
+Adds research_sessions.callback_url, the webhook_deliveries retry queue and
+the webhook_dead_letters table.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # In place, keeping the SQLite full-text search triggers (see 0007)
+    op.add_column("research_sessions", sa.Column("callback_url", sa.String(), nullable=True))
+
+    op.create_table(
+        "webhook_deliveries",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("research_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("url", sa.String(), nullable=False),
+        sa.Column("event", sa.String(), nullable=False),
+        sa.Column("payload", sa.Text(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("next_attempt_at", sa.DateTime(), nullable=False),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("delivered_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["research_id"], ["research_sessions.id"]),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_webhook_deliveries_research_id", "webhook_deliveries", ["research_id"])
+    op.create_index("ix_webhook_deliveries_status_next", "webhook_deliveries", ["status", "next_attempt_at"])
+
+    op.create_table(
+        "webhook_dead_letters",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("research_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("url", sa.String(), nullable=False),
+        sa.Column("event", sa.String(), nullable=False),
+        sa.Column("payload", sa.Text(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("failed_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_webhook_dead_letters_research_id", "webhook_dead_letters", ["research_id"])
+
+
+def downgrade():
+    op.drop_index("ix_webhook_dead_letters_research_id", table_name="webhook_dead_letters")
+    op.drop_table("webhook_dead_letters")
+    op.drop_index("ix_webhook_deliveries_status_next", table_name="webhook_deliveries")
+    op.drop_index("ix_webhook_deliveries_research_id", table_name="webhook_deliveries")
+    op.drop_table("webhook_deliveries")
+    op.drop_column("research_sessions", "callback_url")
@@ -0,0 +1,39 @@
+"""Cascade research deletes to webhook deliveries
+
+webhook_deliveries.research_id gets ON DELETE CASCADE, so deleting a
+session with a queued callback doesn't violate the foreign key. SQLite
+doesn't enforce it by default and can't alter it in place; DELETE
+/research/{id} removes the session's deliveries itself.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+# PostgreSQL's name for the unnamed constraint created in 0008
+CONSTRAINT = "webhook_deliveries_research_id_fkey"
+
+
+def upgrade():
+    if op.get_bind().dialect.name == "sqlite":
+        return
+    op.drop_constraint(CONSTRAINT, "webhook_deliveries", type_="foreignkey")
+    op.create_foreign_key(
+        CONSTRAINT, "webhook_deliveries", "research_sessions",
+        ["research_id"], ["id"], ondelete="CASCADE"
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name == "sqlite":
+        return
+    op.drop_constraint(CONSTRAINT, "webhook_deliveries", type_="foreignkey")
+    op.create_foreign_key(CONSTRAINT, "webhook_deliveries", "research_sessions", ["research_id"], ["id"])
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey, Index, Float, DDL, event
 from sqlalchemy.orm import relationship,declarative_base
 from datetime import datetime
 
@@ -25,6 +25,14 @@ class User(Base):
 class ResearchSession(Base):
     """Research sessions - stores all research queries and results"""
     __tablename__ = "research_sessions"
+    __table_args__ = (
+        # History listing: WHERE user_id = ? ORDER BY created_at DESC
+        Index("ix_research_sessions_user_created", "user_id", "created_at"),
+        # Job queue: WHERE status = 'pending' ORDER BY id
+        Index("ix_research_sessions_status_id", "status", "id"),
+        # Batch progress and per-batch concurrency: WHERE batch_id = ? [AND status = ?]
+        Index("ix_research_sessions_batch_status", "batch_id", "status"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -36,14 +44,166 @@ class ResearchSession(Base):
     final_report = Column(Text)
     
     # Metadata
-    status = Column(String, default="pending")  # pending, completed, failed
+    status = Column(String, default="pending")  # pending, waiting, processing, completed, failed, cancelled
+    # (waiting: repeated query in a batch, filled in when its twin finishes)
+    max_iterations = Column(Integer, default=2)
+    research_mode = Column(String, default="serial")  # serial, parallel, pipelined
     agent_iterations = Column(Integer, default=0)
     processing_time = Column(Integer)  # seconds
     created_at = Column(DateTime, default=datetime.now)
     completed_at = Column(DateTime)
     
+    # Job queue lease (queue mode): the worker holding the job keeps
+    # extending lease_expires_at; an expired lease means the worker died
+    lease_owner = Column(String)
+    lease_expires_at = Column(DateTime)
+    started_at = Column(DateTime)
+    
+    batch_id = Column(Integer, ForeignKey("research_batches.id"))  # POST /research/batch
+    callback_url = Column(String)  # Webhook POSTed the result when the run finishes
+    
     # Relationship
     user = relationship("User", back_populates="research_sessions")
     
     def __repr__(self):
         return f"<ResearchSession {self.id}: {self.query[:30]}>"
+
+
+# Full-text search over query and final_report (app/search/full_text.py).
+# SQLite: an FTS5 index kept in sync by triggers. Its "owner" column holds a
+# u<user_id> token, so a user's search only walks that user's postings.
+# PostgreSQL: a generated tsvector column with a GIN index.
+# Migration 0006 creates the same objects on migrated databases.
+SQLITE_SEARCH_DDL = (
+    """CREATE VIEW research_sessions_search AS
+    SELECT id, query, final_report, 'u' || user_id AS owner FROM research_sessions""",
+    """CREATE VIRTUAL TABLE research_sessions_fts USING fts5(
+    query, final_report, owner,
+    content='research_sessions_search', content_rowid='id', tokenize='porter unicode61')""",
+    """CREATE TRIGGER research_sessions_fts_insert AFTER INSERT ON research_sessions BEGIN
+    INSERT INTO research_sessions_fts(rowid, query, final_report, owner)
+    VALUES (new.id, new.query, new.final_report, 'u' || new.user_id);
+    END""",
+    """CREATE TRIGGER research_sessions_fts_delete AFTER DELETE ON research_sessions BEGIN
+    INSERT INTO research_sessions_fts(research_sessions_fts, rowid, query, final_report, owner)
+    VALUES ('delete', old.id, old.query, old.final_report, 'u' || old.user_id);
+    END""",
+    # Status and lease updates don't touch the index
+    """CREATE TRIGGER research_sessions_fts_update AFTER UPDATE OF query, final_report, user_id
+    ON research_sessions BEGIN
+    INSERT INTO research_sessions_fts(research_sessions_fts, rowid, query, final_report, owner)
+    VALUES ('delete', old.id, old.query, old.final_report, 'u' || old.user_id);
+    INSERT INTO research_sessions_fts(rowid, query, final_report, owner)
+    VALUES (new.id, new.query, new.final_report, 'u' || new.user_id);
+    END""",
+)
+
+POSTGRES_SEARCH_DDL = (
+    """ALTER TABLE research_sessions ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('english', coalesce(query, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(final_report, '')), 'B')) STORED""",
+    "CREATE INDEX ix_research_sessions_search_vector ON research_sessions USING gin (search_vector)",
+)
+
+for statement in SQLITE_SEARCH_DDL:
+    event.listen(ResearchSession.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+for statement in POSTGRES_SEARCH_DDL:
+    event.listen(ResearchSession.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+event.listen(ResearchSession.__table__, "before_drop",
+             DDL("DROP VIEW IF EXISTS research_sessions_search").execute_if(dialect="sqlite"))
+event.listen(ResearchSession.__table__, "before_drop",
+             DDL("DROP TABLE IF EXISTS research_sessions_fts").execute_if(dialect="sqlite"))
+
+
+
+class ResearchBatch(Base):
+    """Batch of research questions submitted together (POST /research/batch)"""
+    __tablename__ = "research_batches"
+    
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    max_concurrent = Column(Integer, nullable=False)  # Jobs of the batch processing at once
+    created_at = Column(DateTime, default=datetime.now)
+    
+    def __repr__(self):
+        return f"<ResearchBatch {self.id} user={self.user_id}>"
+
+
+class WebhookDelivery(Base):
+    """Webhook retry queue: one row per callback until delivered or dead-lettered"""
+    __tablename__ = "webhook_deliveries"
+    __table_args__ = (
+        # Dispatcher: WHERE status = 'pending' AND next_attempt_at <= now
+        Index("ix_webhook_deliveries_status_next", "status", "next_attempt_at"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    research_id = Column(Integer, ForeignKey("research_sessions.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    url = Column(String, nullable=False)
+    event = Column(String, nullable=False)  # research.completed, research.failed
+    payload = Column(Text, nullable=False)  # JSON body, fixed when the run finished
+    status = Column(String, nullable=False, default="pending")  # pending, delivered
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False)  # Also the claim (compare-and-set) version
+    last_error = Column(Text)
+    created_at = Column(DateTime, default=datetime.now)
+    delivered_at = Column(DateTime)
+
+
+class WebhookDeadLetter(Base):
+    """Webhooks given up on (retries exhausted or rejected); kept for inspection and replay"""
+    __tablename__ = "webhook_dead_letters"
+    
+    id = Column(Integer, primary_key=True)
+    research_id = Column(Integer, nullable=False, index=True)
+    user_id = Column(Integer, nullable=False)
+    url = Column(String, nullable=False)
+    event = Column(String, nullable=False)
+    payload = Column(Text, nullable=False)
+    attempts = Column(Integer, nullable=False)
+    last_error = Column(Text)
+    created_at = Column(DateTime)  # When the delivery was queued
+    failed_at = Column(DateTime, default=datetime.now)
+
+
+class RefreshToken(Base):
+    """Refresh tokens - only a SHA-256 of each token is stored"""
+    __tablename__ = "refresh_tokens"
+    
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    token_hash = Column(String(64), unique=True, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    revoked_at = Column(DateTime)  # Set on rotation, logout or reuse detection
+    
+    def __repr__(self):
+        return f"<RefreshToken {self.id} user={self.user_id}>"
+
+
+
+class CacheEntry(Base):
+    """Shared result cache (RESULT_CACHE_BACKEND=sql)"""
+    __tablename__ = "cache_entries"
+    
+    key = Column(String(64), primary_key=True)
+    value = Column(Text, nullable=False)
+    expires_at = Column(Float, nullable=False, index=True)  # epoch seconds
+
+
+class RateLimitBucket(Base):
+    """Token bucket state (RATE_LIMIT_BACKEND=sql)"""
+    __tablename__ = "rate_limit_buckets"
+    
+    key = Column(String, primary_key=True)
+    tokens = Column(Float, nullable=False)
+    updated_at = Column(Float, nullable=False)  # epoch seconds, also the CAS version
+
+
+class RateLimitSlot(Base):
+    """Held concurrency slots (RATE_LIMIT_BACKEND=sql)"""
+    __tablename__ = "rate_limit_slots"
+    
+    id = Column(String(32), primary_key=True)
+    key = Column(String, nullable=False, index=True)
+    expires_at = Column(Float, nullable=False)  # epoch seconds
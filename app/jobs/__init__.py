@@ -0,0 +1 @@
+"""Research job execution: inline runs, the shared job queue and its workers"""
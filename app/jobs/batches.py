@@ -0,0 +1,67 @@
+"""
+Batches Module - Many research questions submitted at once
+Purpose: Back POST /research/batch and its progress endpoint
+
+A batch is one research_batches row plus one ResearchSession per question,
+inserted in a single bulk INSERT. Workers run the batch's pending jobs at
+most max_concurrent at a time (see queue.claim_next). A question repeated
+in the batch runs once: its other rows are "waiting" and get the result
+when that run finishes.
+"""
+
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+
+from app.database.models import ResearchBatch, ResearchSession
+
+ACTIVE_STATUSES = ("pending", "waiting", "processing")
+
+
+def normalize_query(query: str) -> str:
+    """Questions differing only in whitespace are the same question"""
+    return " ".join(query.split())
+
+
+def create_batch(db: Session, user_id: int, queries: list, max_iterations: int, mode: str,
+                 max_concurrent: int) -> ResearchBatch:
+    """Store the batch and its jobs (one bulk insert); first occurrence of each query runs"""
+    batch = ResearchBatch(user_id=user_id, max_concurrent=max_concurrent)
+    db.add(batch)
+    db.flush()
+
+    seen = set()
+    rows = []
+    for query in map(normalize_query, queries):
+        rows.append({
+            "user_id": user_id,
+            "batch_id": batch.id,
+            "query": query,
+            "max_iterations": max_iterations,
+            "research_mode": mode,
+            "status": "waiting" if query in seen else "pending",
+        })
+        seen.add(query)
+    db.execute(insert(ResearchSession), rows)
+    db.commit()
+    db.refresh(batch)
+    return batch
+
+
+def has_active_batch(db: Session, user_id: int) -> bool:
+    """Whether any of the user's batches still has unfinished jobs"""
+    return db.query(ResearchSession.id)\
+        .filter(
+            ResearchSession.user_id == user_id,
+            ResearchSession.batch_id.isnot(None),
+            ResearchSession.status.in_(ACTIVE_STATUSES)
+        )\
+        .first() is not None
+
+
+def batch_status_counts(db: Session, batch_id: int) -> dict:
+    """Number of the batch's jobs per status"""
+    rows = db.query(ResearchSession.status, func.count())\
+        .filter(ResearchSession.batch_id == batch_id)\
+        .group_by(ResearchSession.status)\
+        .all()
+    return dict(rows)
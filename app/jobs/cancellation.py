@@ -0,0 +1,81 @@
+"""
+Cancellation Module - Deliver POST /research/{id}/cancel to the running job
+Purpose: Stop a research run wherever it executes (this API process, a
+worker thread, another worker process)
+
+The cancel endpoint sets the row's status to "cancelled" (queue.cancel_job)
+and cancels the run directly when it runs in this process. Every run also
+has a watcher thread that polls the row's status every
+RESEARCH_CANCEL_POLL_SECONDS and cancels the run's CancelToken once the row
+is cancelled or deleted, which reaches runs in other processes.
+"""
+
+import logging
+import threading
+from contextlib import contextmanager
+
+from app.agent.cancellation import CancelToken
+from app.config.settings import settings
+from app.database.models import ResearchSession
+
+logger = logging.getLogger(__name__)
+
+_running = {}  # research_id -> CancelToken of runs in this process
+_running_lock = threading.Lock()
+
+
+def cancel_local(research_id: int) -> bool:
+    """Cancel the run of research_id if it runs in this process"""
+    with _running_lock:
+        token = _running.get(research_id)
+    if token is None:
+        return False
+    token.cancel()
+    return True
+
+
+class CancellationWatcher(threading.Thread):
+    """Polls a job's status and cancels its token once the row is cancelled or gone"""
+
+    def __init__(self, research_id: int, token: CancelToken, session_factory, poll_seconds=None):
+        super().__init__(daemon=True, name=f"cancel-watch-{research_id}")
+        self.research_id = research_id
+        self.token = token
+        self.session_factory = session_factory
+        self.poll_seconds = poll_seconds if poll_seconds is not None else settings.RESEARCH_CANCEL_POLL_SECONDS
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        while not self._stop_event.wait(self.poll_seconds) and not self.token.cancelled:
+            try:
+                with self.session_factory() as db:
+                    row = db.query(ResearchSession.status)\
+                        .filter(ResearchSession.id == self.research_id)\
+                        .first()
+            except Exception:
+                logger.exception("Cancellation check of research %s failed", self.research_id)
+                continue
+            if row is None or row.status == "cancelled":
+                logger.info("Research %s was cancelled; stopping its run", self.research_id)
+                self.token.cancel()
+                return
+
+
+@contextmanager
+def watch_cancellation(research_id: int, session_factory, poll_seconds=None):
+    """CancelToken for the run of research_id, cancelled when the job is"""
+    token = CancelToken()
+    watcher = CancellationWatcher(research_id, token, session_factory, poll_seconds)
+    with _running_lock:
+        _running[research_id] = token
+    watcher.start()
+    try:
+        yield token
+    finally:
+        watcher.stop()
+        with _running_lock:
+            if _running.get(research_id) is token:
+                del _running[research_id]
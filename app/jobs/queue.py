@@ -0,0 +1,257 @@
+"""
+Queue Module - Research job queue on the research_sessions table
+Purpose: Let any number of worker processes share research runs safely
+
+A job is a ResearchSession row with status "pending". Workers claim it with
+a conditional UPDATE (row-level compare-and-set on status), so exactly one
+worker wins. The winner holds a lease it keeps renewing. If it dies, the
+lease expires and the job is marked failed rather than re-run: jobs execute
+at most once, since a research run spends LLM and search quota.
+
+Jobs of a batch (POST /research/batch) are claimed only while fewer than
+the batch's max_concurrent are processing. A query repeated in a batch is
+stored "waiting" and gets its twin's result (or failure).
+
+Cancelling (POST /research/{id}/cancel) sets status "cancelled"; the
+worker running the job polls its status and stops the run.
+"""
+
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.orm import Session, aliased
+
+from app.database.models import ResearchBatch, ResearchSession
+from app.jobs.batches import ACTIVE_STATUSES
+
+
+def make_worker_id() -> str:
+    """Unique lease owner id: host, pid and a random suffix"""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def has_batch_capacity():
+    """SQL condition: the row is not in a batch, or its batch is below max_concurrent"""
+    running = aliased(ResearchSession)
+    processing = select(func.count())\
+        .where(running.batch_id == ResearchSession.batch_id, running.status == "processing")\
+        .scalar_subquery()
+    limit = select(ResearchBatch.max_concurrent)\
+        .where(ResearchBatch.id == ResearchSession.batch_id)\
+        .scalar_subquery()
+    return or_(ResearchSession.batch_id.is_(None), processing < limit)
+
+
+def claim_next(db: Session, worker_id: str, lease_seconds: int, batch: int = 5,
+               batches_only: bool = False, skip_users=()):
+    """
+    Claim the oldest pending job; returns its ResearchSession or None
+
+    Candidates are read first, then claimed one by one with
+    UPDATE ... WHERE id = ? AND status = 'pending' (and, for batch jobs,
+    while the batch has capacity). Losing a race on one row just moves on to
+    the next candidate. batches_only restricts claims to batch jobs; jobs of
+    skip_users are left alone.
+    """
+    candidates = db.query(ResearchSession.id)\
+        .filter(ResearchSession.status == "pending", has_batch_capacity())
+    if batches_only:
+        candidates = candidates.filter(ResearchSession.batch_id.isnot(None))
+    if skip_users:
+        candidates = candidates.filter(ResearchSession.user_id.notin_(skip_users))
+    candidates = candidates.order_by(ResearchSession.id).limit(batch)
+    if db.get_bind().dialect.name == "postgresql":
+        # Other workers skip rows we're looking at instead of queueing on them
+        candidates = candidates.with_for_update(skip_locked=True)
+
+    now = datetime.now()
+    for (job_id,) in candidates.all():
+        claimed = db.query(ResearchSession)\
+            .filter(ResearchSession.id == job_id, ResearchSession.status == "pending", has_batch_capacity())\
+            .update({
+                "status": "processing",
+                "lease_owner": worker_id,
+                "lease_expires_at": now + timedelta(seconds=lease_seconds),
+                "started_at": now,
+            }, synchronize_session=False)
+        db.commit()
+        if claimed:
+            return db.get(ResearchSession, job_id)
+    db.commit()  # End the read transaction (releases FOR UPDATE locks)
+    return None
+
+
+def release_job(db: Session, job_id: int, worker_id: str) -> bool:
+    """Put a claimed job back as pending, unstarted; False if we no longer hold it"""
+    released = db.query(ResearchSession)\
+        .filter(
+            ResearchSession.id == job_id,
+            ResearchSession.lease_owner == worker_id,
+            ResearchSession.status == "processing"
+        )\
+        .update({
+            "status": "pending",
+            "lease_owner": None,
+            "lease_expires_at": None,
+            "started_at": None,
+        }, synchronize_session=False)
+    db.commit()
+    return released > 0
+
+
+def renew_lease(db: Session, job_id: int, worker_id: str, lease_seconds: int) -> bool:
+    """Extend our lease; False if we no longer hold the job"""
+    renewed = db.query(ResearchSession)\
+        .filter(
+            ResearchSession.id == job_id,
+            ResearchSession.lease_owner == worker_id,
+            ResearchSession.status == "processing"
+        )\
+        .update({
+            "lease_expires_at": datetime.now() + timedelta(seconds=lease_seconds)
+        }, synchronize_session=False)
+    db.commit()
+    return renewed > 0
+
+
+def finish_twins(db: Session, job_id: int, values: dict):
+    """Give waiting batch rows with the same query the job's outcome (caller commits)"""
+    job = db.query(ResearchSession.batch_id, ResearchSession.query)\
+        .filter(ResearchSession.id == job_id)\
+        .first()
+    if job is None or job.batch_id is None:
+        return
+    db.query(ResearchSession)\
+        .filter(
+            ResearchSession.batch_id == job.batch_id,
+            ResearchSession.query == job.query,
+            ResearchSession.status == "waiting"
+        )\
+        .update(values, synchronize_session=False)
+
+
+def complete_job(db: Session, job_id: int, worker_id: str, fields: dict) -> bool:
+    """Store results if we still hold the lease; False if the job was taken from us"""
+    values = {**fields, "status": "completed", "completed_at": datetime.now()}
+    completed = db.query(ResearchSession)\
+        .filter(
+            ResearchSession.id == job_id,
+            ResearchSession.lease_owner == worker_id,
+            ResearchSession.status == "processing"
+        )\
+        .update({
+            **values,
+            "lease_owner": None,
+            "lease_expires_at": None,
+        }, synchronize_session=False)
+    if completed:
+        finish_twins(db, job_id, values)
+    db.commit()
+    return completed > 0
+
+
+def fail_job(db: Session, job_id: int, worker_id: str) -> bool:
+    values = {"status": "failed", "completed_at": datetime.now()}
+    failed = db.query(ResearchSession)\
+        .filter(
+            ResearchSession.id == job_id,
+            ResearchSession.lease_owner == worker_id,
+            ResearchSession.status == "processing"
+        )\
+        .update({
+            **values,
+            "lease_owner": None,
+            "lease_expires_at": None,
+        }, synchronize_session=False)
+    if failed:
+        finish_twins(db, job_id, values)
+    db.commit()
+    return failed > 0
+
+
+def cancel_job(db: Session, job_id: int) -> bool:
+    """
+    Mark a pending, waiting or running job cancelled; False if it already
+    finished. Its worker notices the status and stops the run. A waiting
+    batch row with the same query takes over the run (pending again).
+    """
+    cancelled = db.query(ResearchSession)\
+        .filter(ResearchSession.id == job_id, ResearchSession.status.in_(ACTIVE_STATUSES))\
+        .update({
+            "status": "cancelled",
+            "completed_at": datetime.now(),
+            "lease_owner": None,
+            "lease_expires_at": None,
+        }, synchronize_session=False)
+    if cancelled:
+        job = db.query(ResearchSession.batch_id, ResearchSession.query)\
+            .filter(ResearchSession.id == job_id)\
+            .first()
+        if job.batch_id is not None:
+            promote_twin(db, job.batch_id, job.query)
+    db.commit()
+    return cancelled > 0
+
+
+def promote_twin(db: Session, batch_id: int, query: str):
+    """Make the first waiting row of the query pending if no twin runs it (caller commits)"""
+    twins = db.query(ResearchSession.id, ResearchSession.status)\
+        .filter(
+            ResearchSession.batch_id == batch_id,
+            ResearchSession.query == query,
+            ResearchSession.status.in_(ACTIVE_STATUSES)
+        )\
+        .order_by(ResearchSession.id)\
+        .all()
+    if twins and all(twin.status == "waiting" for twin in twins):
+        db.query(ResearchSession)\
+            .filter(ResearchSession.id == twins[0].id, ResearchSession.status == "waiting")\
+            .update({"status": "pending"}, synchronize_session=False)
+
+
+def reap_expired_leases(db: Session) -> int:
+    """
+    Fail jobs whose worker stopped renewing its lease (never re-run them),
+    and waiting batch rows left without a pending or running twin
+    """
+    reaped = db.query(ResearchSession)\
+        .filter(
+            ResearchSession.status == "processing",
+            ResearchSession.lease_expires_at.isnot(None),
+            ResearchSession.lease_expires_at < datetime.now()
+        )\
+        .update({
+            "status": "failed",
+            "completed_at": datetime.now(),
+            "lease_owner": None,
+            "lease_expires_at": None,
+        }, synchronize_session=False)
+
+    twin = aliased(ResearchSession)
+    live_twin = select(twin.id).where(
+        twin.batch_id == ResearchSession.batch_id,
+        twin.query == ResearchSession.query,
+        twin.status.in_(["pending", "processing"])
+    ).exists()
+    db.query(ResearchSession)\
+        .filter(ResearchSession.status == "waiting", ~live_twin)\
+        .update({"status": "failed", "completed_at": datetime.now()}, synchronize_session=False)
+    db.commit()
+    return reaped
+
+
+def count_active_jobs(db: Session, user_id: int) -> int:
+    """
+    Queued or running single jobs of a user (shared in-flight count across
+    workers); batches have their own concurrency limit
+    """
+    return db.query(ResearchSession)\
+        .filter(
+            ResearchSession.user_id == user_id,
+            ResearchSession.status.in_(["pending", "processing"]),
+            ResearchSession.batch_id.is_(None)
+        )\
+        .count()
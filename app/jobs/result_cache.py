@@ -0,0 +1,144 @@
+"""
+Result Cache Module - Reuse results of identical research requests
+Purpose: Skip the whole agent graph when the same query was just researched
+
+Backends: "memory" (per process), "redis" or "sql" (shared by all workers).
+Disabled unless RESULT_CACHE_TTL_SECONDS > 0.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy.exc import IntegrityError
+
+from app.config.settings import settings
+from app.database.models import CacheEntry
+
+
+def cache_key(query: str, max_iterations: int, mode: str = "serial", prior_research: str = "") -> str:
+    """
+    Stable key for a research request (case/whitespace-insensitive). Runs
+    given a user's earlier research are keyed by it too: their reports
+    draw on that user's history, so they are not shared with other users.
+    """
+    normalized = " ".join(query.lower().split())
+    key = f"{mode}:{max_iterations}:{normalized}"
+    if prior_research:
+        key += ":" + hashlib.sha256(prior_research.encode()).hexdigest()
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+class ResultCache:
+    """Interface for result cache backends; values are JSON-serializable dicts"""
+
+    def get(self, key: str):
+        raise NotImplementedError
+
+    def set(self, key: str, value: dict, ttl: int):
+        raise NotImplementedError
+
+
+class MemoryResultCache(ResultCache):
+    """Per-process LRU with TTL"""
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class RedisResultCache(ResultCache):
+    def __init__(self, url: str, prefix: str = "research:result:"):
+        try:
+            import redis
+        except ImportError as exc:
+            raise RuntimeError("RESULT_CACHE_BACKEND=redis requires the 'redis' package") from exc
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw else None
+
+    def set(self, key, value, ttl):
+        self.client.setex(self.prefix + key, ttl, json.dumps(value))
+
+
+class SQLResultCache(ResultCache):
+    """Stores entries in the cache_entries table of the app database"""
+
+    def __init__(self, session_factory=None):
+        if session_factory is None:
+            from app.database.db import SessionLocal
+            session_factory = SessionLocal
+        self.session_factory = session_factory
+
+    def get(self, key):
+        with self.session_factory() as db:
+            entry = db.get(CacheEntry, key)
+            if entry is None or entry.expires_at <= time.time():
+                return None
+            return json.loads(entry.value)
+
+    def set(self, key, value, ttl):
+        now = time.time()
+        with self.session_factory() as db:
+            # Opportunistic cleanup keeps the table small
+            db.query(CacheEntry).filter(CacheEntry.expires_at <= now).delete(synchronize_session=False)
+            entry = db.get(CacheEntry, key)
+            if entry is None:
+                db.add(CacheEntry(key=key, value=json.dumps(value), expires_at=now + ttl))
+            else:
+                entry.value = json.dumps(value)
+                entry.expires_at = now + ttl
+            try:
+                db.commit()
+            except IntegrityError:
+                db.rollback()  # Another worker cached the same result first
+
+
+def create_result_cache(name: str) -> ResultCache:
+    """Backend factory for RESULT_CACHE_BACKEND"""
+    if name == "memory":
+        return MemoryResultCache()
+    if name == "redis":
+        return RedisResultCache(settings.REDIS_URL)
+    if name == "sql":
+        return SQLResultCache()
+    raise ValueError(f"Unknown result cache backend: {name}")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_result_cache():
+    """Process-wide cache, or None when caching is disabled"""
+    global _cache
+    if settings.RESULT_CACHE_TTL_SECONDS <= 0:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = create_result_cache(settings.RESULT_CACHE_BACKEND)
+    return _cache
@@ -0,0 +1,48 @@
+"""
+Runner Module - Execute one research request
+Purpose: Shared by inline requests and queue workers, so both paths use the
+result cache and store the same fields
+"""
+
+import time
+
+from app.agent.graph import research
+from app.config.settings import settings
+from app.jobs.result_cache import cache_key, get_result_cache
+
+
+def run_research(query: str, max_iterations: int, mode: str = "serial", prior_research: str = "",
+                 cancel_token=None) -> dict:
+    """
+    Run the agent graph (or reuse a cached result)
+
+    prior_research: related earlier research given to the researcher
+    (see app.search.vector_index.find_prior_research).
+    cancel_token: app.agent.cancellation.CancelToken stopping the run
+    (raises ResearchCancelled).
+
+    Returns the ResearchSession fields to store: research_data,
+    verified_facts, final_report, agent_iterations, processing_time.
+    """
+    cache = get_result_cache()
+    key = cache_key(query, max_iterations, mode, prior_research)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            print(f"♻️  Result cache hit for '{query}'")
+            return {**cached, "processing_time": 0}
+
+    start_time = time.time()
+    result = research(query=query, max_iterations=max_iterations, mode=mode, prior_research=prior_research,
+                      cancel_token=cancel_token)
+    fields = {
+        "research_data": result["research_data"],
+        "verified_facts": result["verified_facts"],
+        "final_report": result["final_report"],
+        "agent_iterations": result.get("iteration", 0),
+    }
+    if cache is not None:
+        cache.set(key, fields, settings.RESULT_CACHE_TTL_SECONDS)
+
+    fields["processing_time"] = int(time.time() - start_time)
+    return fields
@@ -0,0 +1,278 @@
+"""
+Webhooks Module - POST finished research to the client's callback_url
+Purpose: Let clients get results pushed instead of polling GET /research/{id}
+
+When a run with a callback_url finishes, a webhook_deliveries row is queued
+with the payload. Dispatcher threads claim due rows (compare-and-set on
+next_attempt_at, which doubles as a lease), POST them and retry failures
+with exponential backoff and jitter. After WEBHOOK_MAX_ATTEMPTS, or on a
+permanent rejection (410 Gone, disallowed address), the row moves to
+webhook_dead_letters. Delivery is at least once: receivers should dedupe on
+X-Research-Delivery.
+
+Bodies are signed with HMAC-SHA256 under a per-user key derived from
+WEBHOOK_SECRET (users fetch theirs from GET /research/webhooks/secret):
+    X-Research-Signature: t=<unix time>,v1=<hex HMAC of "<t>.<body>">
+"""
+
+import hashlib
+import hmac
+import ipaddress
+import json
+import logging
+import random
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+
+import httpx
+from sqlalchemy.orm import Session
+
+from app.auth.security import SECRET_KEY
+from app.config.settings import settings
+from app.database.db import SessionLocal
+from app.database.models import ResearchSession, WebhookDeadLetter, WebhookDelivery
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_HEADER = "X-Research-Signature"
+SIGNATURE_TOLERANCE_SECONDS = 300
+
+
+class PermanentDeliveryError(Exception):
+    """Retrying won't help (address not allowed, receiver answered 410 Gone)"""
+
+
+# ===== SIGNATURES =====
+
+def signing_key(user_id: int) -> str:
+    """The user's webhook signing key (derived, so nothing is stored)"""
+    root = (settings.WEBHOOK_SECRET or SECRET_KEY).encode()
+    return hmac.new(root, f"webhook:{user_id}".encode(), hashlib.sha256).hexdigest()
+
+
+def sign(key: str, body: bytes, timestamp: int = None) -> str:
+    timestamp = int(time.time()) if timestamp is None else timestamp
+    digest = hmac.new(key.encode(), f"{timestamp}.".encode() + body, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={digest}"
+
+
+def verify_signature(key: str, header: str, body: bytes,
+                     tolerance: int = SIGNATURE_TOLERANCE_SECONDS) -> bool:
+    """Receiver side: header matches the body and is recent (replay protection)"""
+    try:
+        fields = dict(part.split("=", 1) for part in header.split(","))
+        timestamp = int(fields["t"])
+    except (KeyError, ValueError):
+        return False
+    if abs(time.time() - timestamp) > tolerance:
+        return False
+    return hmac.compare_digest(sign(key, body, timestamp), header)
+
+
+# ===== QUEUEING =====
+
+def research_payload(session: ResearchSession) -> dict:
+    return {
+        "id": session.id,
+        "query": session.query,
+        "status": session.status,
+        "research_data": session.research_data or "",
+        "verified_facts": session.verified_facts or "",
+        "final_report": session.final_report or "",
+        "iterations": session.agent_iterations,
+        "processing_time": session.processing_time,
+        "created_at": str(session.created_at),
+        "completed_at": str(session.completed_at) if session.completed_at else None,
+    }
+
+
+def enqueue_webhook(db: Session, session: ResearchSession):
+    """Queue the callback of a finished session; None if it has no callback_url"""
+    if session is None or not session.callback_url:
+        return None
+    event = f"research.{session.status}" if session.status in ("completed", "cancelled") else "research.failed"
+    delivery = WebhookDelivery(
+        research_id=session.id,
+        user_id=session.user_id,
+        url=session.callback_url,
+        event=event,
+        payload=json.dumps({"event": event, "research": research_payload(session)}),
+        status="pending",
+        attempts=0,
+        next_attempt_at=datetime.now(),
+    )
+    db.add(delivery)
+    db.commit()
+    return delivery
+
+
+def backoff_seconds(attempts: int) -> float:
+    """Delay before the next try after `attempts` failures: doubling, capped, +-20% jitter"""
+    delay = min(settings.WEBHOOK_MAX_BACKOFF_SECONDS, settings.WEBHOOK_BACKOFF_SECONDS * 2 ** (attempts - 1))
+    return delay * random.uniform(0.8, 1.2)
+
+
+def claim_due(db: Session, limit: int = 1) -> list:
+    """
+    Claim due deliveries by pushing next_attempt_at past their delivery (a
+    lease). They are POSTed one after another, so the lease covers a
+    timeout per claimed row; dispatchers claim one at a time by default.
+    """
+    now = datetime.now()
+    due = db.query(WebhookDelivery.id, WebhookDelivery.next_attempt_at)\
+        .filter(WebhookDelivery.status == "pending", WebhookDelivery.next_attempt_at <= now)\
+        .order_by(WebhookDelivery.next_attempt_at)\
+        .limit(limit)\
+        .all()
+    lease_until = now + timedelta(seconds=settings.WEBHOOK_TIMEOUT_SECONDS * len(due) + 30)
+    claimed = []
+    for delivery_id, next_attempt_at in due:
+        won = db.query(WebhookDelivery)\
+            .filter(WebhookDelivery.id == delivery_id, WebhookDelivery.next_attempt_at == next_attempt_at)\
+            .update({"next_attempt_at": lease_until}, synchronize_session=False)
+        db.commit()
+        if won:
+            claimed.append(db.get(WebhookDelivery, delivery_id))
+    return claimed
+
+
+# ===== DELIVERY =====
+
+def check_url(url: str):
+    """
+    Refuse callbacks to loopback/private/link-local addresses (SSRF) unless
+    allowed; returns the checked address to connect to (None when allowed)
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise PermanentDeliveryError(f"Invalid callback URL: {url}")
+    if settings.WEBHOOK_ALLOW_PRIVATE_URLS:
+        return None
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(parts.hostname, parts.port or 443)}
+    except socket.gaierror as e:
+        raise ConnectionError(f"Cannot resolve {parts.hostname}: {e}")  # DNS may recover: retry
+    for address in addresses:
+        ip = ipaddress.ip_address(address.split("%")[0])
+        if not ip.is_global:
+            raise PermanentDeliveryError(f"Callback address {address} is not public")
+    return sorted(addresses)[0].split("%")[0]
+
+
+def post_webhook(client: httpx.Client, delivery: WebhookDelivery):
+    """One attempt; raises on failure"""
+    address = check_url(delivery.url)
+    url = httpx.URL(delivery.url)
+    headers = {
+        "Content-Type": "application/json",
+        "User-Agent": "research-assistant-webhooks",
+        "X-Research-Event": delivery.event,
+        "X-Research-Delivery": str(delivery.id),
+    }
+    extensions = {}
+    if address is not None:
+        # Connect to the address just checked: resolving the name again would let its
+        # DNS answer a private address this time (rebinding). Host and TLS SNI/certificate
+        # checks still use the name
+        headers["Host"] = url.netloc.decode("ascii")
+        extensions["sni_hostname"] = url.host
+        url = url.copy_with(host=address)
+    body = delivery.payload.encode()
+    headers[SIGNATURE_HEADER] = sign(signing_key(delivery.user_id), body)
+    response = client.post(url, content=body, headers=headers, extensions=extensions)
+    if response.status_code == 410:
+        raise PermanentDeliveryError("Receiver answered 410 Gone")
+    response.raise_for_status()
+
+
+def dead_letter(db: Session, delivery: WebhookDelivery, attempts: int, error: str):
+    db.add(WebhookDeadLetter(
+        research_id=delivery.research_id,
+        user_id=delivery.user_id,
+        url=delivery.url,
+        event=delivery.event,
+        payload=delivery.payload,
+        attempts=attempts,
+        last_error=error,
+        created_at=delivery.created_at,
+    ))
+    db.delete(delivery)
+    db.commit()
+    logger.warning("Webhook %s for research %s dead-lettered after %d attempt(s): %s",
+                   delivery.id, delivery.research_id, attempts, error)
+
+
+def deliver(db: Session, client: httpx.Client, delivery: WebhookDelivery) -> bool:
+    """Attempt a claimed delivery and record the outcome; True if delivered"""
+    attempts = delivery.attempts + 1
+    try:
+        post_webhook(client, delivery)
+    except PermanentDeliveryError as e:
+        dead_letter(db, delivery, attempts, str(e))
+        return False
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"[:1000]
+        if attempts >= settings.WEBHOOK_MAX_ATTEMPTS:
+            dead_letter(db, delivery, attempts, error)
+            return False
+        delivery.attempts = attempts
+        delivery.last_error = error
+        delivery.next_attempt_at = datetime.now() + timedelta(seconds=backoff_seconds(attempts))
+        db.commit()
+        return False
+
+    delivery.attempts = attempts
+    delivery.status = "delivered"
+    delivery.delivered_at = datetime.now()
+    delivery.last_error = None
+    db.commit()
+    return True
+
+
+class WebhookDispatcher(threading.Thread):
+    """Delivers due webhooks; any number may run across processes"""
+
+    def __init__(self, session_factory=SessionLocal, poll_seconds=None):
+        super().__init__(daemon=True, name="webhook-dispatcher")
+        self.session_factory = session_factory
+        self.poll_seconds = poll_seconds if poll_seconds is not None else settings.WEBHOOK_POLL_SECONDS
+        self._stop_event = threading.Event()
+        self._client = httpx.Client(timeout=settings.WEBHOOK_TIMEOUT_SECONDS, follow_redirects=False)
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                worked = self.run_once()
+            except Exception:
+                logger.exception("Webhook dispatcher error")
+                worked = False
+            if not worked:
+                self._stop_event.wait(self.poll_seconds)
+        self._client.close()
+
+    def run_once(self, limit: int = 10) -> bool:
+        """Deliver up to limit due webhooks, claiming each just before its POST; False when none were due"""
+        attempted = 0
+        with self.session_factory() as db:
+            while attempted < limit and not self._stop_event.is_set():
+                claimed = claim_due(db)
+                if not claimed:
+                    break
+                deliver(db, self._client, claimed[0])
+                attempted += 1
+        return attempted > 0
+
+
+def start_dispatchers(count=None, session_factory=SessionLocal):
+    """Start webhook dispatchers in this process; stop them with worker.stop_workers()"""
+    count = settings.WEBHOOK_DISPATCHERS if count is None else count
+    dispatchers = [WebhookDispatcher(session_factory) for _ in range(count)]
+    for dispatcher in dispatchers:
+        dispatcher.start()
+    return dispatchers
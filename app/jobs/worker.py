@@ -0,0 +1,167 @@
+"""
+Worker Module - Run queued research jobs
+Purpose: Execute research outside the request, in any number of processes
+
+Workers run as threads inside each API process (RESEARCH_EXECUTION=queue)
+or standalone:
+    RESEARCH_QUEUE_WORKERS=4 python -m app.jobs.worker
+
+In inline mode, each API process runs batch jobs only, on the same number
+of threads; a job waits while its user is at RESEARCH_MAX_CONCURRENT.
+"""
+
+import logging
+import signal
+import threading
+
+from app.agent.cancellation import ResearchCancelled
+from app.api.rate_limit import RateLimitExceeded
+from app.config.settings import settings
+from app.database.db import SessionLocal
+from app.database.models import ResearchSession
+from app.jobs.queue import (
+    claim_next, complete_job, fail_job, make_worker_id, reap_expired_leases, release_job, renew_lease
+)
+from app.jobs.cancellation import watch_cancellation
+from app.jobs.runner import run_research
+from app.jobs.webhooks import enqueue_webhook, start_dispatchers
+from app.search.vector_index import find_prior_research, index_session, start_index_sync
+
+logger = logging.getLogger(__name__)
+
+
+class ResearchWorker(threading.Thread):
+    """
+    Claims pending jobs one at a time and runs them under a renewed lease;
+    with batches_only, only batch jobs. With a limiter, each job holds one
+    of its user's concurrency slots while it runs.
+    """
+
+    def __init__(self, session_factory=SessionLocal, lease_seconds=None, poll_seconds=None,
+                 batches_only=False, limiter=None):
+        super().__init__(daemon=True)
+        self.worker_id = make_worker_id()
+        self.name = f"research-worker-{self.worker_id.rsplit(':', 1)[-1]}"
+        self.session_factory = session_factory
+        self.batches_only = batches_only
+        self.limiter = limiter
+        self._over_quota = set()  # Users whose jobs wait for a slot until the queue is idle
+        self.lease_seconds = lease_seconds or settings.RESEARCH_LEASE_SECONDS
+        self.poll_seconds = poll_seconds if poll_seconds is not None else settings.RESEARCH_QUEUE_POLL_SECONDS
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        """Finish the current job, then exit"""
+        self._stop_event.set()
+
+    def run(self):
+        logger.info("Research worker %s started", self.worker_id)
+        while not self._stop_event.is_set():
+            try:
+                worked = self.run_once()
+            except Exception:
+                logger.exception("Research worker %s error", self.worker_id)
+                worked = False
+            if not worked:
+                self._stop_event.wait(self.poll_seconds)
+        logger.info("Research worker %s stopped", self.worker_id)
+
+    def run_once(self) -> bool:
+        """Reap dead leases and run one job; returns False when the queue was empty"""
+        with self.session_factory() as db:
+            reaped = reap_expired_leases(db)
+            if reaped:
+                logger.warning("Failed %d research job(s) whose worker stopped responding", reaped)
+            job = claim_next(db, self.worker_id, self.lease_seconds,
+                             batches_only=self.batches_only, skip_users=self._over_quota)
+            if job is None:
+                self._over_quota.clear()
+                return False
+            job_id, user_id, query = job.id, job.user_id, job.query
+            max_iterations, mode = job.max_iterations, job.research_mode or "serial"
+            prior_research = find_prior_research(db, user_id, query)
+            try:
+                slot_id = self.limiter.acquire_slot(user_id) if self.limiter else None
+            except RateLimitExceeded:
+                # Leave it for later and look for other users' jobs right away
+                release_job(db, job_id, self.worker_id)
+                self._over_quota.add(user_id)
+                return True
+
+        heartbeat_stop = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._heartbeat, args=(job_id, heartbeat_stop), daemon=True
+        )
+        heartbeat.start()
+        try:
+            with watch_cancellation(job_id, self.session_factory) as cancel_token:
+                fields = run_research(query, max_iterations, mode, prior_research, cancel_token)
+        except ResearchCancelled:
+            # cancel_job already finished the row (and queued its webhook)
+            logger.info("Research job %s was cancelled", job_id)
+            return True
+        except Exception:
+            logger.exception("Research job %s failed", job_id)
+            fields = None
+        finally:
+            heartbeat_stop.set()
+            heartbeat.join()
+            if self.limiter:
+                self.limiter.release(user_id, slot_id)
+
+        with self.session_factory() as db:
+            if fields is None:
+                finished = fail_job(db, job_id, self.worker_id)
+            else:
+                finished = complete_job(db, job_id, self.worker_id, fields)
+                if not finished:
+                    logger.warning("Lost the lease on research job %s; result discarded", job_id)
+            if finished:
+                session = db.get(ResearchSession, job_id)
+                index_session(db, session)
+                enqueue_webhook(db, session)
+        return True
+
+    def _heartbeat(self, job_id, stop_event):
+        """Renew the lease every third of its length while the job runs"""
+        while not stop_event.wait(self.lease_seconds / 3):
+            with self.session_factory() as db:
+                if not renew_lease(db, job_id, self.worker_id, self.lease_seconds):
+                    logger.warning("Research job %s lease was taken over", job_id)
+                    return
+
+
+def start_workers(count=None, session_factory=SessionLocal, batches_only=False, limiter=None):
+    """Start queue workers in this process; returns them for stop_workers()"""
+    count = settings.RESEARCH_QUEUE_WORKERS if count is None else count
+    workers = [
+        ResearchWorker(session_factory, batches_only=batches_only, limiter=limiter)
+        for _ in range(count)
+    ]
+    for worker in workers:
+        worker.start()
+    return workers
+
+
+def stop_workers(workers, timeout=None):
+    for worker in workers:
+        worker.stop()
+    for worker in workers:
+        worker.join(timeout)
+
+
+def main():
+    from app.database.db import init_db
+
+    logging.basicConfig(level=logging.INFO)
+    init_db()
+    workers = start_workers() + start_dispatchers() + start_index_sync()
+    stopped = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopped.set())
+    signal.signal(signal.SIGINT, lambda *_: stopped.set())
+    stopped.wait()
+    stop_workers(workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,14 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+from app.agent.llm_dispatch import llm_stats
 from app.database.db import init_db
+from app.config.settings import settings
+from app.jobs.webhooks import start_dispatchers
+from app.jobs.worker import start_workers, stop_workers
+from app.search.vector_index import start_index_sync
 from app.api.auth_routes import router as auth_router
+from app.api.rate_limit import get_research_limiter
 from app.api.research_routes import router as research_router
 import warnings
 import logging
@@ -16,11 +22,21 @@ async def lifespan(app: FastAPI):
     """Startup and shutdown events"""
     # Startup
     logger.info("Starting Research Assistant API...")
-    init_db()
-    logger.info("Database initialized")
+    init_db()  # Checks schema version; migrates only when behind
+    logger.info("Database schema ready")
+    workers = []
+    if settings.RESEARCH_EXECUTION == "queue":
+        workers = start_workers()
+        logger.info(f"Started {len(workers)} research queue worker(s)")
+    else:
+        # Inline runs hold concurrency slots in the request; batch jobs take theirs here
+        workers = start_workers(batches_only=True, limiter=get_research_limiter())
+        logger.info(f"Started {len(workers)} research batch worker(s)")
+    workers += start_dispatchers() + start_index_sync()
     yield
     # Shutdown
     logger.info("Shutting down...")
+    stop_workers(workers)
 
 # Create FastAPI app
 app = FastAPI(
@@ -61,4 +77,9 @@ def root():
 @app.get("/health")
 def health_check():
     """Health check endpoint"""
-    return {"status": "healthy", "database": "connected"}
\ No newline at end of file
+    return {"status": "healthy", "database": "connected"}
+
+@app.get("/health/llm")
+def llm_metrics():
+    """LLM calls of this process: prompt-cache hits and micro-batch sizes"""
+    return llm_stats.snapshot()
\ No newline at end of file
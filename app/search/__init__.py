@@ -0,0 +1 @@
+"""Search over past research: full-text (FTS) and semantic (vector) retrieval"""
@@ -0,0 +1,87 @@
+"""
+Full-Text Search Module - Ranked keyword search over a user's research
+Purpose: Serve GET /research/search from the database's own FTS index
+
+SQLite uses the FTS5 table research_sessions_fts (BM25 ranking, snippet()),
+PostgreSQL the search_vector tsvector column (ts_rank_cd, ts_headline).
+Both are created by migration 0006 and kept in sync by the database, so
+every write to research_sessions is searchable immediately.
+"""
+
+import re
+
+from sqlalchemy import text
+
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_END = "</mark>"
+SNIPPET_TOKENS = 24
+
+# Column weights: a hit in the query counts more than one in the report
+SQLITE_SEARCH = text(f"""
+    SELECT s.id, s.query, s.status, s.created_at,
+           -bm25(research_sessions_fts, 3.0, 1.0, 0.0) AS score,
+           snippet(research_sessions_fts, 1, '{HIGHLIGHT_START}', '{HIGHLIGHT_END}', '...', {SNIPPET_TOKENS})
+               AS snippet
+    FROM research_sessions_fts
+    JOIN research_sessions s ON s.id = research_sessions_fts.rowid
+    WHERE research_sessions_fts MATCH :match
+    ORDER BY score DESC, s.id DESC
+    LIMIT :limit OFFSET :skip
+""")
+
+# Headlines are built for the returned page only
+POSTGRES_SEARCH = text(f"""
+    SELECT page.id, page.query, page.status, page.created_at, page.score,
+           ts_headline('english', coalesce(page.final_report, ''), page.tsq,
+                       'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_END}, MaxWords={SNIPPET_TOKENS}, MinWords=8')
+               AS snippet
+    FROM (
+        SELECT s.id, s.query, s.status, s.created_at, s.final_report, q.tsq,
+               ts_rank_cd(s.search_vector, q.tsq) AS score
+        FROM research_sessions s, websearch_to_tsquery('english', :text) AS q(tsq)
+        WHERE s.user_id = :user_id AND s.search_vector @@ q.tsq
+        ORDER BY score DESC, s.id DESC
+        LIMIT :limit OFFSET :skip
+    ) AS page
+    ORDER BY page.score DESC, page.id DESC
+""")
+
+
+def fts5_match(user_id: int, query: str) -> str:
+    """
+    FTS5 MATCH expression: every word of the query (quoted, so user input
+    is never parsed as FTS syntax) in query or final_report, restricted to
+    the user's rows. "" when the query has no words.
+    """
+    words = re.findall(r"\w+", query)
+    if not words:
+        return ""
+    phrase = " ".join(f'"{word}"' for word in words)
+    return f'owner:"u{user_id}" AND {{query final_report}}: ({phrase})'
+
+
+def search_research(db, user_id: int, query: str, skip: int = 0, limit: int = 10) -> list:
+    """The user's sessions matching query, best first: dicts with score and highlighted snippet"""
+    dialect = db.get_bind().dialect.name
+    params = {"user_id": user_id, "text": query, "skip": skip, "limit": limit}
+    if dialect == "sqlite":
+        params["match"] = fts5_match(user_id, query)
+        if not params["match"]:
+            return []
+        rows = db.execute(SQLITE_SEARCH, params)
+    elif dialect == "postgresql":
+        rows = db.execute(POSTGRES_SEARCH, params)
+    else:
+        raise NotImplementedError(f"Full-text search is not available on {dialect}")
+
+    return [
+        {
+            "id": row.id,
+            "query": row.query,
+            "status": row.status,
+            "score": round(float(row.score), 4),
+            "snippet": row.snippet or "",
+            "created_at": str(row.created_at),
+        }
+        for row in rows
+    ]
@@ -0,0 +1,386 @@
+"""
+Vector Index Module - Semantic retrieval over past research
+Purpose: Find completed research related to a new query, to reuse it as
+researcher context and to list it through GET /research/similar
+
+Sessions are embedded with a hashing embedder (CPU only, no model files)
+into a memory-mapped float32 matrix on disk. Random-hyperplane LSH tables
+over the matrix give approximate nearest neighbours, re-ranked by exact
+cosine similarity (small indexes are scanned exactly). Sessions are added
+as they complete (index_session); a background sync at startup and every
+VECTOR_INDEX_SYNC_SECONDS (IndexSyncer) picks up the rest, e.g. sessions
+completed on other hosts or while the index was off. Lookups only read.
+Processes on one host share the files; appends hold a file lock.
+"""
+
+import fcntl
+import hashlib
+import json
+import logging
+import math
+import os
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+from sqlalchemy import func
+
+from app.agent.sufficiency import terms
+from app.agent.tokens import truncate_tokens
+from app.config.settings import settings
+from app.database.db import SessionLocal
+from app.database.models import ResearchSession
+
+logger = logging.getLogger(__name__)
+
+
+class HashingEmbedder:
+    """Signed feature hashing of words and word pairs, log-scaled and L2-normalized"""
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+
+    def embed(self, text: str) -> np.ndarray:
+        words = terms(text)
+        counts = {}
+        for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+            counts[feature] = counts.get(feature, 0) + 1
+
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature, count in counts.items():
+            # blake2b, not hash(): vectors must match across processes and restarts
+            h = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "big")
+            vector[h % self.dim] += (1.0 if h >> 63 else -1.0) * (1 + math.log(count))
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+class VectorIndex:
+    """
+    Files in directory:
+        vectors.f32  (capacity x dim) float32 matrix, one row per session
+        rows.i64     (capacity x 2) session id, user id
+        meta.json    count, capacity, source database, sync watermark
+
+    The sync watermark is a session id: every session below it was finished
+    (and, if completed, indexed) when it was set. It only moves up, past
+    sessions as they finish, so a session that completes late is still
+    found by the next sync.
+    """
+
+    # Sessions that can still complete
+    UNFINISHED = ("pending", "waiting", "processing")
+
+    def __init__(self, directory: str, embedder: HashingEmbedder = None, tables: int = 8,
+                 bits: int = 10, brute_force_below: int = 5000, seed: int = 7):
+        self.directory = directory
+        self.embedder = embedder or HashingEmbedder()
+        self.dim = self.embedder.dim
+        self.brute_force_below = brute_force_below
+        rng = np.random.default_rng(seed)
+        self.planes = rng.standard_normal((tables, bits, self.dim)).astype(np.float32)
+        self._bit_weights = 1 << np.arange(bits)
+        self._lock = threading.Lock()
+        self._vectors = self._rows = None
+        self._capacity = 0
+        self._reset_tables()
+        os.makedirs(directory, exist_ok=True)
+
+    # ----- files -----
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    @contextmanager
+    def _file_lock(self):
+        with open(self._path(".lock"), "a+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _read_meta(self) -> dict:
+        try:
+            with open(self._path("meta.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("dim") == self.dim:
+                return meta
+        except (FileNotFoundError, ValueError):
+            pass
+        return {"dim": self.dim, "count": 0, "capacity": 0, "source": "", "synced_id": 0}
+
+    def _write_meta(self, meta: dict):
+        tmp_path = self._path("meta.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self._path("meta.json"))  # Readers never see a partial file
+
+    def _map(self, capacity: int):
+        self._capacity = capacity
+        if not capacity:
+            self._vectors = self._rows = None
+            return
+        self._vectors = np.memmap(self._path("vectors.f32"), dtype=np.float32, mode="r+",
+                                  shape=(capacity, self.dim))
+        self._rows = np.memmap(self._path("rows.i64"), dtype=np.int64, mode="r+", shape=(capacity, 2))
+
+    def _grow(self, needed: int) -> int:
+        capacity = max(1024, self._capacity)
+        while capacity < needed:
+            capacity *= 2
+        for name, row_bytes in (("vectors.f32", self.dim * 4), ("rows.i64", 16)):
+            with open(self._path(name), "ab") as f:
+                f.truncate(capacity * row_bytes)
+        self._map(capacity)
+        return capacity
+
+    # ----- in-memory LSH tables -----
+
+    def _reset_tables(self):
+        self._buckets = [{} for _ in range(len(self.planes))]
+        self._indexed = set()
+        self._count = 0
+        self._source = None
+
+    def _codes(self, vectors: np.ndarray) -> np.ndarray:
+        """(tables, n) bucket codes: sign pattern against each table's hyperplanes"""
+        return (np.einsum("tbd,nd->tnb", self.planes, vectors) > 0) @ self._bit_weights
+
+    def _load_rows(self, start: int, end: int):
+        codes = self._codes(np.asarray(self._vectors[start:end]))
+        for table, buckets in enumerate(self._buckets):
+            for offset, code in enumerate(codes[table].tolist()):
+                buckets.setdefault(code, []).append(start + offset)
+        self._indexed.update(self._rows[start:end, 0].tolist())
+        self._count = end
+
+    def _refresh(self) -> dict:
+        """Pick up rows appended by other processes (or a reset); needs self._lock"""
+        meta = self._read_meta()
+        if meta["source"] != self._source or meta["count"] < self._count:
+            self._reset_tables()
+            self._source = meta["source"]
+        if meta["capacity"] != self._capacity:
+            self._map(meta["capacity"])
+        if meta["count"] > self._count:
+            self._load_rows(self._count, meta["count"])
+        return meta
+
+    # ----- public API -----
+
+    def __len__(self):
+        with self._lock:
+            return self._refresh()["count"]
+
+    def add(self, items: list, source: str = None, synced_id: int = None) -> int:
+        """
+        Index (session_id, user_id, text) items not indexed yet; returns how
+        many were added. A different source (database) resets the index.
+        """
+        with self._lock, self._file_lock():
+            meta = self._refresh()
+            if source is not None and meta["source"] != source:
+                meta = {**meta, "count": 0, "source": source, "synced_id": 0}
+                self._reset_tables()
+                self._source = source
+
+            new = [item for item in items if item[0] not in self._indexed]
+            count = meta["count"]
+            if count + len(new) > self._capacity:
+                meta["capacity"] = self._grow(count + len(new))
+            for offset, (session_id, user_id, text) in enumerate(new):
+                self._vectors[count + offset] = self.embedder.embed(text)
+                self._rows[count + offset] = (session_id, user_id)
+            if new:
+                self._vectors.flush()
+                self._rows.flush()
+
+            meta["count"] = count + len(new)
+            if synced_id is not None:
+                meta["synced_id"] = max(meta.get("synced_id", 0), synced_id)
+            self._write_meta(meta)  # Rows are written before the count that exposes them
+            if new:
+                self._load_rows(count, meta["count"])
+            return len(new)
+
+    def search(self, text: str, k: int = 5, user_id: int = None, exclude=(), min_score: float = 0.0) -> list:
+        """(session_id, cosine similarity) of the k nearest sessions, best first"""
+        query = self.embedder.embed(text)
+        if not query.any():
+            return []
+        with self._lock:
+            self._refresh()
+            if not self._count:
+                return []
+            if self._count < self.brute_force_below:
+                candidates = np.arange(self._count)
+            else:
+                codes = self._codes(query[None, :])[:, 0]
+                found = set()
+                for table, buckets in enumerate(self._buckets):
+                    found.update(buckets.get(int(codes[table]), ()))
+                candidates = np.fromiter(found, dtype=np.int64, count=len(found))
+
+            rows = np.asarray(self._rows[candidates]) if len(candidates) else np.empty((0, 2), np.int64)
+            keep = np.ones(len(candidates), dtype=bool)
+            if user_id is not None:
+                keep &= rows[:, 1] == user_id
+            if exclude:
+                keep &= ~np.isin(rows[:, 0], list(exclude))
+            candidates, rows = candidates[keep], rows[keep]
+            if not len(candidates):
+                return []
+
+            scores = np.asarray(self._vectors[candidates]) @ query
+            best = np.argsort(-scores, kind="stable")[:k]
+            return [
+                (int(rows[i, 0]), round(float(scores[i]), 4))
+                for i in best if scores[i] >= min_score
+            ]
+
+    def sync(self, db, batch: int = 500) -> int:
+        """Index completed sessions from the watermark on that are not indexed yet"""
+        source = db.get_bind().url.render_as_string(hide_password=True)
+        with self._lock:
+            meta = self._refresh()
+        since = meta.get("synced_id", 0) if meta["source"] == source else 0
+
+        # The next watermark is read first: a session finishing during the scan stays above it
+        unfinished = db.query(func.min(ResearchSession.id))\
+            .filter(ResearchSession.id >= since, ResearchSession.status.in_(self.UNFINISHED))\
+            .scalar()
+        last_id = db.query(func.max(ResearchSession.id)).scalar() or 0
+        watermark = unfinished if unfinished is not None else last_id + 1
+
+        added, after = 0, since - 1
+        while True:
+            ids = [
+                row.id for row in db.query(ResearchSession.id)
+                .filter(ResearchSession.status == "completed", ResearchSession.id > after)
+                .order_by(ResearchSession.id)
+                .limit(batch)
+            ]
+            with self._lock:
+                self._refresh()
+                missing = [session_id for session_id in ids if session_id not in self._indexed]
+            sessions = db.query(ResearchSession)\
+                .filter(ResearchSession.id.in_(missing))\
+                .order_by(ResearchSession.id)\
+                .all() if missing else []
+            added += self.add([session_item(s) for s in sessions], source=source)
+            if len(ids) < batch:
+                break
+            after = ids[-1]
+        self.add([], source=source, synced_id=watermark)
+        return added
+
+
+class IndexSyncer(threading.Thread):
+    """Syncs the index from the database now and every VECTOR_INDEX_SYNC_SECONDS"""
+
+    def __init__(self, index: VectorIndex, session_factory=SessionLocal, interval=None):
+        super().__init__(daemon=True, name="vector-index-sync")
+        self.index = index
+        self.session_factory = session_factory
+        self.interval = interval if interval is not None else settings.VECTOR_INDEX_SYNC_SECONDS
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                with self.session_factory() as db:
+                    added = self.index.sync(db)
+                if added:
+                    logger.info("Vector index sync added %d research session(s)", added)
+            except Exception:
+                logger.exception("Vector index sync failed")
+            self._stop_event.wait(self.interval)
+
+
+def session_item(session) -> tuple:
+    """(session_id, user_id, text) of a completed session, as VectorIndex.add() takes it"""
+    return session.id, session.user_id, f"{session.query}\n{session.final_report or session.research_data or ''}"
+
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_vector_index():
+    """Process-wide index, or None when VECTOR_INDEX is off"""
+    global _index
+    if not settings.VECTOR_INDEX:
+        return None
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = VectorIndex(settings.VECTOR_INDEX_DIR, HashingEmbedder(settings.VECTOR_INDEX_DIM))
+    return _index
+
+
+def start_index_sync(session_factory=SessionLocal):
+    """Start the index sync in this process (none when VECTOR_INDEX is off); stop it with worker.stop_workers()"""
+    index = get_vector_index()
+    if index is None:
+        return []
+    syncer = IndexSyncer(index, session_factory)
+    syncer.start()
+    return [syncer]
+
+
+def find_similar(db, user_id: int, text: str, k: int = 5, exclude=(), min_score: float = 0.0) -> list:
+    """(ResearchSession, score) of the user's sessions most similar to text"""
+    index = get_vector_index()
+    if index is None:
+        return []
+    hits = index.search(text, k=k, user_id=user_id, exclude=exclude, min_score=min_score)
+    if not hits:
+        return []
+    sessions = {
+        s.id: s for s in db.query(ResearchSession).filter(
+            ResearchSession.id.in_([session_id for session_id, _ in hits]),
+            ResearchSession.user_id == user_id
+        )
+    }
+    # Deleted sessions stay in the index; skip them
+    return [(sessions[session_id], score) for session_id, score in hits if session_id in sessions]
+
+
+def index_session(db, session):
+    """Add a session that just completed to the index (the next sync retries on failure)"""
+    index = get_vector_index()
+    if index is None or session is None or session.status != "completed":
+        return
+    try:
+        index.add([session_item(session)], source=db.get_bind().url.render_as_string(hide_password=True))
+    except Exception:
+        logger.exception("Indexing research %s failed", session.id)
+
+
+def find_prior_research(db, user_id: int, query: str) -> str:
+    """
+    Excerpts of the user's related earlier reports, as researcher context
+    ("" if none, or RESEARCH_REUSE_PRIOR is off)
+    """
+    if not settings.RESEARCH_REUSE_PRIOR:
+        return ""
+    try:
+        related = find_similar(
+            db, user_id, query, k=settings.PRIOR_RESEARCH_LIMIT,
+            min_score=settings.PRIOR_RESEARCH_MIN_SCORE
+        )
+        sections = [
+            f"### {session.query} (similarity {score:.2f})\n"
+            f"{truncate_tokens(session.final_report or session.research_data or '', settings.PRIOR_RESEARCH_TOKENS)}"
+            for session, score in related
+        ]
+    except Exception:
+        # Reuse is an optimization: research without it rather than fail
+        logger.exception("Prior research lookup failed")
+        return ""
+    if sections:
+        print(f"📚 Reusing {len(sections)} related earlier research session(s)")
+    return "\n\n".join(sections)
@@ -0,0 +1,291 @@
+"""
+Agent Graph Benchmark
+Purpose: Measure the compiled research graph offline, with recorded LLM and
+tool responses replayed at realistic latencies.
+
+Reports per fixture: total and per-node wall time, LLM/tool calls, prompt
+chars/tokens sent to the LLM, messages in the final state and peak Python
+memory. Results can be saved as a JSON baseline and compared later.
+
+Usage:
+    python -m benchmarks.bench_graph                       # all fixtures
+    python -m benchmarks.bench_graph --latency-scale 0     # no injected latency
+    python -m benchmarks.bench_graph --save benchmarks/baselines/graph.json
+    python -m benchmarks.bench_graph --compare benchmarks/baselines/graph.json
+    python -m benchmarks.bench_graph --mode parallel       # planner + parallel branches
+    python -m benchmarks.bench_graph --mode pipelined      # fact-check during research
+
+Node times are measured between streamed updates, so they are exact for the
+serial graph and approximate when nodes run concurrently.
+"""
+
+import argparse
+import contextlib
+import functools
+import glob
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timezone
+
+# The app builds real clients at import time; the benchmark never calls them
+for _key in ("GROQ_API_KEY", "GOOGLE_API_KEY", "GOOGLE_CSE_ID"):
+    os.environ.setdefault(_key, "offline-benchmark")
+
+from benchmarks.replay import build_replay_components, estimate_tokens, load_fixture  # noqa: E402
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "graph")
+
+# Metrics where lower is better, compared against the baseline
+COMPARED_METRICS = [
+    "wall_time_s", "llm_calls", "tool_calls", "prompt_chars",
+    "prompt_tokens", "messages", "state_chars", "peak_memory_kb",
+]
+
+
+def default_scorer():
+    from app.agent.graph import default_sufficiency_scorer
+    return default_sufficiency_scorer()
+
+
+def replay_tool_node(tools, dedup=True):
+    from app.agent.graph import default_tool_node
+    return default_tool_node(tools, dedup=None if dedup else False)
+
+
+def build_graph(llms, tools, early_exit=True, dedup=True):
+    """Compile the production workflow around replay components"""
+    from app.agent.agents import ResearcherAgent, FactCheckerAgent, SummarizerAgent
+    from app.agent.graph import build_workflow
+
+    return build_workflow(
+        ResearcherAgent(llms["researcher"], tools),
+        FactCheckerAgent(llms["fact_checker"], tools),
+        SummarizerAgent(llms["summarizer"]),
+        replay_tool_node(tools, dedup),
+        default_scorer() if early_exit else None,
+    ).compile()
+
+
+def build_parallel_graph(llms, tools, early_exit=True, dedup=True):
+    """Compile the parallel (planner + research branches) workflow"""
+    from app.agent.agents import PlannerAgent, ResearcherAgent, FactCheckerAgent, SummarizerAgent
+    from app.agent.graph import build_parallel_workflow
+    from app.config.settings import settings
+
+    return build_parallel_workflow(
+        PlannerAgent(llms["planner"], settings.RESEARCH_PARALLEL_BRANCHES),
+        ResearcherAgent(llms["researcher"], tools),
+        FactCheckerAgent(llms["fact_checker"], tools),
+        SummarizerAgent(llms["summarizer"]),
+        replay_tool_node(tools, dedup),
+        default_scorer() if early_exit else None,
+    ).compile()
+
+
+def build_pipelined_graph(llms, tools, early_exit=True, dedup=True):
+    """Compile the pipelined (fact-check during research) workflow"""
+    from app.agent.agents import ResearcherAgent, IncrementalFactCheckerAgent, SummarizerAgent
+    from app.agent.graph import build_pipelined_workflow
+
+    return build_pipelined_workflow(
+        ResearcherAgent(llms["researcher"], tools),
+        IncrementalFactCheckerAgent(llms["batch_fact_checker"]),
+        SummarizerAgent(llms["summarizer"]),
+        replay_tool_node(tools, dedup),
+        default_scorer() if early_exit else None,
+    ).compile()
+
+
+GRAPH_BUILDERS = {
+    "serial": build_graph,
+    "parallel": build_parallel_graph,
+    "pipelined": build_pipelined_graph,
+}
+
+
+def initial_state(fixture):
+    from app.agent.indexes import initial_indexes
+
+    return {
+        "messages": [],
+        "query": fixture["query"],
+        "run_id": uuid.uuid4().hex,
+        "prior_research": "",
+        "research_data": "",
+        "verified_facts": "",
+        "final_report": "",
+        "iteration": 0,
+        "max_iterations": fixture.get("max_iterations", 2),
+        "fact_check_iteration": 0,
+        "max_fact_check_iterations": 1,
+        "sub_questions": [],
+        "branch_findings": [],
+        "fact_checked_results": 0,
+        "research_sufficient": False,
+        "iterations_saved": 0,
+        "dedup_chars_removed": 0,
+        "dedup_tokens_removed": 0,
+        **initial_indexes(),
+    }
+
+
+def run_fixture(fixture, latency_scale=1.0, seed=0, graph_builder=build_graph):
+    """Run one fixture through the graph and collect metrics"""
+    from app.agent.tools import my_tools
+
+    llms, tools, stats = build_replay_components(fixture, my_tools, latency_scale, seed)
+    graph = graph_builder(llms, tools)
+
+    node_times = {}
+    final_state = None
+
+    tracemalloc.start()
+    started = last = time.perf_counter()
+    # Updates arrive as each node finishes; the gap since the previous update
+    # is that node's wall time (exact for the serial graph)
+    for mode, chunk in graph.stream(initial_state(fixture), stream_mode=["updates", "values"]):
+        if mode == "values":
+            final_state = chunk
+            continue
+        now = time.perf_counter()
+        for node in chunk:
+            node_times[node] = node_times.get(node, 0.0) + (now - last)
+        last = now
+    wall_time = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "wall_time_s": round(wall_time, 4),
+        "node_time_s": {node: round(t, 4) for node, t in sorted(node_times.items())},
+        "llm_calls": stats.llm_calls,
+        "tool_calls": stats.tool_calls,
+        "prompt_chars": stats.prompt_chars,
+        "prompt_tokens": estimate_tokens(stats.prompt_chars),
+        "prompt_chars_by_agent": dict(sorted(stats.per_agent_prompt_chars.items())),
+        "tool_output_chars": stats.tool_output_chars,
+        "messages": len(final_state.get("messages", [])) if final_state else 0,
+        # Message text carried in the state (copied/checkpointed every step)
+        "state_chars": sum(
+            len(str(message.content)) for message in final_state.get("messages", [])
+        ) if final_state else 0,
+        "final_report_chars": len(final_state.get("final_report", "")) if final_state else 0,
+        "researcher_iterations": final_state.get("iteration", 0) if final_state else 0,
+        "iterations_saved": final_state.get("iterations_saved", 0) if final_state else 0,
+        "dedup_chars_removed": final_state.get("dedup_chars_removed", 0) if final_state else 0,
+        "dedup_tokens_removed": final_state.get("dedup_tokens_removed", 0) if final_state else 0,
+        "peak_memory_kb": round(peak / 1024, 1),
+    }
+
+
+def baseline_revision(path):
+    """
+    Last commit of the baseline file (a revision stored in the file would
+    name the commit before the one recording it)
+    """
+    try:
+        revision = subprocess.check_output(
+            ["git", "log", "-1", "--format=%h", "--", path], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+        dirty = subprocess.check_output(
+            ["git", "status", "--porcelain", "--", path], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    if not revision:
+        return "uncommitted"
+    return f"{revision}, modified" if dirty else revision
+
+
+def print_report(results):
+    print("=" * 80)
+    print("📊 Agent graph benchmark")
+    print("=" * 80)
+    for name, metrics in results.items():
+        print(f"\n▶ {name}")
+        print(f"  wall time      {metrics['wall_time_s']:.3f}s")
+        for node, seconds in metrics["node_time_s"].items():
+            print(f"    {node:<18}{seconds:.3f}s")
+        print(f"  llm / tool calls  {metrics['llm_calls']} / {metrics['tool_calls']}")
+        print(f"  prompt chars      {metrics['prompt_chars']} (~{metrics['prompt_tokens']} tokens)")
+        print(f"  messages          {metrics['messages']} ({metrics['state_chars']} chars in state)")
+        print(f"  iterations        {metrics['researcher_iterations']} "
+              f"({metrics['iterations_saved']} saved by early exit)")
+        print(f"  dedup removed     {metrics['dedup_chars_removed']} chars "
+              f"({metrics['dedup_tokens_removed']} tokens)")
+        print(f"  peak memory       {metrics['peak_memory_kb']} KiB")
+
+
+def print_comparison(results, baseline, revision="?"):
+    print("\n" + "=" * 80)
+    print(f"📈 Compared with baseline {revision} ({baseline.get('created_at', '?')})")
+    print("=" * 80)
+    for name, metrics in results.items():
+        before = baseline.get("results", {}).get(name)
+        if before is None:
+            print(f"\n▶ {name}: not in baseline")
+            continue
+        print(f"\n▶ {name}")
+        for metric in COMPARED_METRICS:
+            old, new = before.get(metric), metrics.get(metric)
+            if old is None or new is None:
+                continue
+            change = (new - old) / old * 100 if old else 0.0
+            flag = "⚠️ " if change > 10 else "  "
+            print(f"  {flag}{metric:<16}{old:>12} -> {new:<12} ({change:+.1f}%)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmark of the agent graph")
+    parser.add_argument("fixtures", nargs="*", help="Fixture files (default: all)")
+    parser.add_argument("--latency-scale", type=float, default=1.0,
+                        help="Multiply recorded latencies (0 disables them)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--mode", choices=sorted(GRAPH_BUILDERS), default="serial",
+                        help="Workflow to benchmark")
+    parser.add_argument("--no-early-exit", action="store_true",
+                        help="Disable the sufficiency check (always run max_iterations)")
+    parser.add_argument("--no-dedup", action="store_true",
+                        help="Keep repeated tool results (no dedup stage)")
+    parser.add_argument("--save", help="Write results as a JSON baseline")
+    parser.add_argument("--compare", help="Compare against a saved baseline")
+    parser.add_argument("--verbose", action="store_true", help="Show the agents' own output")
+    args = parser.parse_args(argv)
+
+    paths = args.fixtures or sorted(glob.glob(os.path.join(FIXTURES_DIR, "*.json")))
+    results = {}
+    for path in paths:
+        fixture = load_fixture(path)
+        output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+        with output:
+            results[fixture.get("name", os.path.basename(path))] = run_fixture(
+                fixture, args.latency_scale, args.seed,
+                functools.partial(GRAPH_BUILDERS[args.mode], early_exit=not args.no_early_exit,
+                                  dedup=not args.no_dedup),
+            )
+
+    print_report(results)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            print_comparison(results, json.load(f), baseline_revision(args.compare))
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({
+                "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "latency_scale": args.latency_scale,
+                "results": results,
+            }, f, indent=2)
+        print(f"\n💾 Saved baseline to {args.save}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""
+Login Throughput Benchmark
+Purpose: Measure /auth/login throughput and latency under concurrency, and
+check that a login burst doesn't starve cheap endpoints (/health).
+
+Starts the API with uvicorn on a temporary SQLite database, registers one
+user, then fires concurrent logins while probing /health in the background.
+
+Usage:
+    python -m benchmarks.bench_login --concurrency 32 --requests 400
+    PASSWORD_HASH_WORKERS=4 python -m benchmarks.bench_login
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int):
+    """Run the app in a background thread; returns the uvicorn server"""
+    import uvicorn
+    from app.main import app
+
+    config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+
+    deadline = time.time() + 15
+    while not server.started:
+        if time.time() > deadline:
+            raise RuntimeError("uvicorn did not start")
+        time.sleep(0.05)
+    return server
+
+
+def probe_health(base_url, stop, latencies):
+    with httpx.Client(base_url=base_url) as client:
+        while not stop.is_set():
+            start = time.perf_counter()
+            client.get("/health")
+            latencies.append(time.perf_counter() - start)
+            time.sleep(0.02)
+
+
+def run(args):
+    base_url = f"http://127.0.0.1:{args.port}"
+    credentials = {"username": "bench_user", "password": "bench-password-123"}
+
+    with httpx.Client(base_url=base_url) as client:
+        client.post("/auth/register", json={**credentials, "email": "bench@example.com"})
+
+    def login_once(_):
+        with httpx.Client(base_url=base_url, timeout=60) as client:
+            start = time.perf_counter()
+            response = client.post("/auth/login", json=credentials)
+            return response.status_code, time.perf_counter() - start
+
+    health_latencies = []
+    stop = threading.Event()
+    prober = threading.Thread(target=probe_health, args=(base_url, stop, health_latencies))
+    prober.start()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(login_once, range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    prober.join()
+
+    ok = [latency for code, latency in results if code == 200]
+    rejected = sum(1 for code, _ in results if code == 429)
+    errors = sum(1 for code, _ in results if code not in (200, 429))
+
+    print("=" * 60)
+    print(f"Login benchmark: {args.requests} requests, concurrency {args.concurrency}")
+    print("=" * 60)
+    print(f"Wall time:          {elapsed:.2f}s")
+    print(f"Successful logins:  {len(ok)} ({len(ok) / elapsed:.1f}/s)")
+    print(f"Rejected (429):     {rejected}")
+    print(f"Errors:             {errors}")
+    if ok:
+        print(f"Login latency p50:  {percentile(ok, 50) * 1000:.1f} ms")
+        print(f"Login latency p95:  {percentile(ok, 95) * 1000:.1f} ms")
+        print(f"Login latency p99:  {percentile(ok, 99) * 1000:.1f} ms")
+    if health_latencies:
+        print(f"/health p50 during burst: {statistics.median(health_latencies) * 1000:.1f} ms")
+        print(f"/health p99 during burst: {percentile(health_latencies, 99) * 1000:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark /auth/login under concurrency")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--port", type=int, default=0)
+    args = parser.parse_args()
+    args.port = args.port or free_port()
+
+    # Throwaway database, must be set before the app is imported
+    workdir = tempfile.mkdtemp(prefix="bench_login_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+
+    server = start_server(args.port)
+    try:
+        run(args)
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    sys.exit(main())
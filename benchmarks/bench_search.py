@@ -0,0 +1,113 @@
+"""
+Full-Text Search Benchmark
+Purpose: Measure GET /research/search query latency on a large history
+
+Builds a temporary SQLite database through the migrations, fills it with
+synthetic research sessions (FTS index maintained by the triggers, as in
+production) and times search_research() for one user's queries.
+
+Usage:
+    python -m benchmarks.bench_search --rows 100000 --users 50
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.database.db import init_db
+from app.database.models import ResearchSession, User
+from app.search.full_text import search_research
+from benchmarks.bench_login import percentile
+
+TOPICS = [
+    "LangGraph agents", "electric vehicle batteries", "quantum error correction", "protein folding",
+    "solar panel efficiency", "Python free-threading", "large language model evaluation",
+    "coral reef bleaching", "central bank interest rates", "fusion energy experiments",
+    "vector databases", "semiconductor supply chains", "malaria vaccines", "Mars sample return",
+]
+WORDS = (
+    "research report findings evidence source study analysis market growth performance cost "
+    "release version model framework benchmark latency throughput accuracy adoption risk policy "
+    "trend forecast dataset training inference hardware regulation investment survey result"
+).split()
+
+
+def synthetic_report(rng: random.Random, topic: str) -> str:
+    sentences = [
+        " ".join([topic] + rng.sample(WORDS, 10)) + f" in {rng.randint(2015, 2025)}."
+        for _ in range(rng.randint(8, 16))
+    ]
+    return "\n".join(sentences)
+
+
+def fill(session_factory, rows: int, users: int, seed: int):
+    rng = random.Random(seed)
+    with session_factory() as db:
+        db.execute(insert(User), [
+            {"id": i, "username": f"user{i}", "email": f"user{i}@example.com", "hashed_password": "x"}
+            for i in range(1, users + 1)
+        ])
+        for start in range(0, rows, 5000):
+            batch = []
+            for _ in range(start, min(rows, start + 5000)):
+                topic = rng.choice(TOPICS)
+                batch.append({
+                    "user_id": rng.randint(1, users), "query": f"Latest {topic} developments",
+                    "final_report": synthetic_report(rng, topic), "status": "completed",
+                })
+            db.execute(insert(ResearchSession), batch)
+            db.commit()
+
+
+def run(args, session_factory):
+    rng = random.Random(args.seed + 1)
+    queries = [
+        rng.choice(TOPICS) if i % 2 else f"{rng.choice(TOPICS)} {rng.choice(WORDS)}"
+        for i in range(args.queries)
+    ]
+    latencies, hits = [], 0
+    with session_factory() as db:
+        for i, query in enumerate(queries):
+            user_id = 1 + i % args.users
+            skip = 0 if i % 4 else 10  # Some second pages
+            start = time.perf_counter()
+            hits += len(search_research(db, user_id, query, skip=skip, limit=10))
+            latencies.append(time.perf_counter() - start)
+
+    print("=" * 60)
+    print(f"Search benchmark: {args.rows} sessions, {args.users} users, {args.queries} queries")
+    print("=" * 60)
+    print(f"Results per query:  {hits / len(queries):.1f}")
+    print(f"Latency p50:        {percentile(latencies, 50) * 1000:.2f} ms")
+    print(f"Latency p95:        {percentile(latencies, 95) * 1000:.2f} ms")
+    print(f"Latency p99:        {percentile(latencies, 99) * 1000:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark full-text search over research history")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_search_")
+    engine = create_engine(f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+    init_db(engine)
+    session_factory = sessionmaker(bind=engine)
+
+    started = time.perf_counter()
+    fill(session_factory, args.rows, args.users, args.seed)
+    print(f"Inserted {args.rows} sessions (indexed by triggers) in {time.perf_counter() - started:.1f}s")
+    run(args, session_factory)
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
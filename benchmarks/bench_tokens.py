@@ -0,0 +1,77 @@
+"""
+Tokenizer Benchmark
+Purpose: Measure token counting and truncation throughput on large inputs
+
+Generates synthetic research text (reports, URLs, figures) and times
+count_tokens() on whole documents, truncate_tokens() to a prompt budget,
+and fit_sections() over many tool results, with the configured tokenizer
+(tiktoken, or the approximate fallback when it is not installed).
+
+Usage:
+    python -m benchmarks.bench_tokens --megabytes 4 --repeat 5
+"""
+
+import argparse
+import random
+import sys
+import time
+
+from app.agent.tokens import PromptSection, count_tokens, fit_sections, get_tokenizer, truncate_tokens
+from benchmarks.bench_login import percentile
+from benchmarks.bench_search import TOPICS, synthetic_report
+
+
+def synthetic_text(rng: random.Random, chars: int) -> str:
+    parts, size = [], 0
+    while size < chars:
+        topic = rng.choice(TOPICS)
+        part = f"{synthetic_report(rng, topic)}\nSource: https://example.org/{topic.replace(' ', '-')}/{rng.randint(1, 10 ** 6)}\n"
+        parts.append(part)
+        size += len(part)
+    return "".join(parts)[:chars]
+
+
+def timed(fn, repeat: int) -> list:
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark token counting and prompt fitting")
+    parser.add_argument("--megabytes", type=float, default=4)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget", type=int, default=4000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    tokenizer = get_tokenizer()
+    text = synthetic_text(rng, int(args.megabytes * 1_000_000))
+    results = [synthetic_text(rng, 20_000) for _ in range(50)]
+    megabytes = len(text.encode()) / 1_000_000
+
+    # Fresh strings each time: count_tokens caches repeated ones
+    count = timed(lambda: tokenizer.count(text), args.repeat)
+    truncate = timed(lambda: truncate_tokens(text, args.budget), args.repeat * 20)
+    batches = iter([[f"{result} {n}" for result in results] for n in range(args.repeat)])
+    fit = timed(lambda: fit_sections(
+        [PromptSection(result, priority=i, min_tokens=args.budget // len(results))
+         for i, result in enumerate(next(batches))], args.budget
+    ), args.repeat)
+    tokens = count_tokens(text)
+
+    print("=" * 60)
+    print(f"Tokenizer benchmark: {tokenizer.name}, {megabytes:.1f} MB, budget {args.budget} tokens")
+    print("=" * 60)
+    print(f"Tokens:             {tokens} ({len(text) / tokens:.2f} chars/token)")
+    print(f"Count throughput:   {megabytes / percentile(count, 50):.1f} MB/s")
+    print(f"Truncate p50:       {percentile(truncate, 50) * 1000:.3f} ms")
+    print(f"Fit 50 x 20 KB p50: {percentile(fit, 50) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
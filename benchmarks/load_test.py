@@ -0,0 +1,200 @@
+"""
+HTTP Load Test - Throughput and tail latency of the running API
+Purpose: Size uvicorn workers and thread pools end to end
+
+Drives a running API at a target request rate (open loop: arrivals don't
+wait for responses) with a weighted mix of:
+    login     POST /auth/login
+    research  POST /research/
+    history   GET  /research/history
+    get       GET  /research/{id}
+and reports per-endpoint p50/p95/p99, error and throttling (429) rates.
+
+Run against local stubs instead of Groq/Google:
+    python -m benchmarks.stubs.llm_server --port 9001 --scrape-url http://127.0.0.1:9002/page/1 &
+    python -m benchmarks.stubs.search_server --port 9002 &
+    GROQ_API_BASE=http://127.0.0.1:9001 \\
+    SEARCH_API_URL=http://127.0.0.1:9002/customsearch/v1 \\
+    RESEARCH_RATE_PER_MINUTE=600 RESEARCH_BURST=50 \\
+        uvicorn app.main:app --port 8000 --workers 4 &
+    python -m benchmarks.load_test --rps 20 --duration 60 --users 20
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from collections import defaultdict
+
+import httpx
+
+DEFAULT_MIX = "login=1,research=1,history=4,get=8"
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def parse_mix(spec: str):
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        if name not in ("login", "research", "history", "get"):
+            raise ValueError(f"Unknown operation in mix: {name}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+class LoadTest:
+    def __init__(self, args):
+        self.args = args
+        self.mix = parse_mix(args.mix)
+        self.rng = random.Random(args.seed)
+        self.users = []                      # (credentials, token)
+        self.research_ids = defaultdict(list)  # user index -> ids
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.in_flight = asyncio.Semaphore(args.max_in_flight)
+        self.dropped = 0
+
+    async def setup(self, client):
+        """Register/login the virtual users (not measured)"""
+        for i in range(self.args.users):
+            credentials = {"username": f"load_user_{i}", "password": self.args.password}
+            await client.post("/auth/register", json={**credentials, "email": f"load_user_{i}@example.com"})
+            response = await client.post("/auth/login", json=credentials)
+            response.raise_for_status()
+            self.users.append([credentials, response.json()["access_token"]])
+
+    def _auth(self, user):
+        return {"Authorization": f"Bearer {self.users[user][1]}"}
+
+    async def op_login(self, client, user):
+        response = await client.post("/auth/login", json=self.users[user][0])
+        if response.status_code == 200:
+            self.users[user][1] = response.json()["access_token"]
+        return response
+
+    async def op_research(self, client, user):
+        response = await client.post(
+            "/research/",
+            headers=self._auth(user),
+            json={"query": f"{self.args.research_query} #{self.rng.randint(1, 10_000)}",
+                  "max_iterations": self.args.max_iterations},
+        )
+        if response.status_code == 200:
+            self.research_ids[user].append(response.json()["id"])
+        return response
+
+    async def op_history(self, client, user):
+        return await client.get("/research/history", headers=self._auth(user))
+
+    async def op_get(self, client, user):
+        ids = self.research_ids[user]
+        if not ids:
+            return await self.op_history(client, user)
+        return await client.get(f"/research/{self.rng.choice(ids)}", headers=self._auth(user))
+
+    async def run_one(self, client, name):
+        user = self.rng.randrange(len(self.users))
+        start = time.perf_counter()
+        try:
+            response = await getattr(self, f"op_{name}")(client, user)
+            status = response.status_code
+        except httpx.HTTPError as exc:
+            status = type(exc).__name__
+        finally:
+            self.in_flight.release()
+        self.latencies[name].append(time.perf_counter() - start)
+        self.statuses[name][status] += 1
+
+    async def run(self):
+        limits = httpx.Limits(max_connections=self.args.max_in_flight)
+        timeout = httpx.Timeout(self.args.timeout)
+        async with httpx.AsyncClient(base_url=self.args.base_url, limits=limits, timeout=timeout) as client:
+            await self.setup(client)
+
+            names, weights = zip(*self.mix.items())
+            tasks = []
+            started = time.perf_counter()
+            next_at = started
+            while next_at - started < self.args.duration:
+                await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+                # Open loop: if too many are in flight, count the arrival as dropped
+                if self.in_flight.locked():
+                    self.dropped += 1
+                else:
+                    await self.in_flight.acquire()
+                    name = self.rng.choices(names, weights)[0]
+                    tasks.append(asyncio.create_task(self.run_one(client, name)))
+                next_at += self.rng.expovariate(self.args.rps)
+            await asyncio.gather(*tasks)
+            return time.perf_counter() - started
+
+    def report(self, elapsed):
+        rows = {}
+        for name, latencies in self.latencies.items():
+            statuses = self.statuses[name]
+            total = sum(statuses.values())
+            ok = sum(n for s, n in statuses.items() if isinstance(s, int) and 200 <= s < 300)
+            throttled = statuses.get(429, 0)
+            rows[name] = {
+                "requests": total,
+                "rps": round(total / elapsed, 2),
+                "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+                "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+                "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+                "max_ms": round(max(latencies) * 1000, 1),
+                "error_rate": round((total - ok - throttled) / total, 4) if total else 0.0,
+                "throttled_rate": round(throttled / total, 4) if total else 0.0,
+                "statuses": {str(s): n for s, n in statuses.items()},
+            }
+
+        print("=" * 96)
+        print(f"📈 Load test: target {self.args.rps} rps for {self.args.duration}s "
+              f"against {self.args.base_url} ({elapsed:.1f}s elapsed, {self.dropped} dropped arrivals)")
+        print("=" * 96)
+        print(f"{'endpoint':<10}{'reqs':>7}{'rps':>8}{'p50 ms':>10}{'p95 ms':>10}"
+              f"{'p99 ms':>10}{'max ms':>10}{'errors':>9}{'429s':>8}")
+        for name, row in sorted(rows.items()):
+            print(f"{name:<10}{row['requests']:>7}{row['rps']:>8}{row['p50_ms']:>10}{row['p95_ms']:>10}"
+                  f"{row['p99_ms']:>10}{row['max_ms']:>10}{row['error_rate']:>9.1%}{row['throttled_rate']:>8.1%}")
+        return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP load test for the research API")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--rps", type=float, default=10.0, help="Target arrival rate")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of load")
+    parser.add_argument("--users", type=int, default=10, help="Virtual users (spread rate limits)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Weighted operations (default {DEFAULT_MIX})")
+    parser.add_argument("--max-in-flight", type=int, default=256)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--max-iterations", type=int, default=1)
+    parser.add_argument("--research-query", default="Load test research question")
+    parser.add_argument("--password", default="load-test-password")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args(argv)
+
+    test = LoadTest(args)
+    elapsed = asyncio.run(test.run())
+    rows = test.report(elapsed)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "elapsed_s": elapsed, "dropped": test.dropped,
+                       "endpoints": rows}, f, indent=2)
+    return rows
+
+
+if __name__ == "__main__":
+    main()
+    sys.exit(0)
@@ -0,0 +1,214 @@
+"""
+Replay Module - Recorded LLM/tool stand-ins for offline benchmarks
+Purpose: Drive the real agent graph with recorded responses and realistic
+latencies, while measuring what each call was sent.
+
+Fixture format (benchmarks/fixtures/graph/*.json):
+
+    {
+      "name": "...", "query": "...", "max_iterations": 2,
+      "llm": {
+        "latency_ms": {"mean": 500, "stdev": 150,
+                       "per_1k_prompt_chars": 40, "per_1k_output_chars": 600},
+        "responses": {
+          "planner":      [{"content": "sub-question\nsub-question"}],
+          "researcher":   [{"content": "...", "tool_calls": [...]}, ...],
+          "fact_checker": [...],
+          "batch_fact_checker": [...],   (pipelined mode; default: fact_checker)
+          "summarizer":   [...]
+        }
+      },
+      "tools": {
+        "google_web_search": {
+          "latency_ms": {"mean": 450, "stdev": 120},
+          "outputs": {"<query arg>": "<recorded output>"},
+          "default": "<output for unrecorded args>"
+        }
+      }
+    }
+"""
+
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+
+from langchain_core.messages import AIMessage
+from langchain_core.tools import StructuredTool
+
+
+def message_chars(messages) -> int:
+    """Total characters of message content sent in a prompt"""
+    total = 0
+    for message in messages:
+        content = message.content
+        if isinstance(content, str):
+            total += len(content)
+        else:
+            total += sum(len(str(part)) for part in content)
+    return total
+
+
+def estimate_tokens(chars: int) -> int:
+    """Rough token estimate (~4 chars/token for English text)"""
+    return (chars + 3) // 4
+
+
+@dataclass
+class LatencyModel:
+    """
+    Normal latency (clamped at 0), scaled for faster/slower replays
+
+    LLM calls can add time per 1k prompt chars (prefill) and per 1k output
+    chars (decoding), so shorter prompts and answers replay faster.
+    """
+    mean_ms: float = 0.0
+    stdev_ms: float = 0.0
+    scale: float = 1.0
+    rng: random.Random = field(default_factory=lambda: random.Random(0))
+    prompt_ms_per_1k: float = 0.0
+    output_ms_per_1k: float = 0.0
+
+    @classmethod
+    def from_fixture(cls, spec, scale=1.0, seed=0):
+        spec = spec or {}
+        return cls(
+            spec.get("mean", 0.0), spec.get("stdev", 0.0), scale, random.Random(seed),
+            spec.get("per_1k_prompt_chars", 0.0), spec.get("per_1k_output_chars", 0.0),
+        )
+
+    def sleep(self, prompt_chars=0, output_chars=0):
+        if self.scale <= 0 or self.mean_ms <= 0:
+            return
+        delay_ms = max(0.0, self.rng.gauss(self.mean_ms, self.stdev_ms))
+        delay_ms += prompt_chars / 1000 * self.prompt_ms_per_1k
+        delay_ms += output_chars / 1000 * self.output_ms_per_1k
+        time.sleep(delay_ms * self.scale / 1000)
+
+
+@dataclass
+class CallStats:
+    """Counters shared by all replay LLMs/tools of one run"""
+    llm_calls: int = 0
+    tool_calls: int = 0
+    prompt_chars: int = 0
+    tool_output_chars: int = 0
+    per_agent_prompt_chars: dict = field(default_factory=dict)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def record_prompt(self, agent, chars):
+        with self.lock:
+            self.llm_calls += 1
+            self.prompt_chars += chars
+            self.per_agent_prompt_chars[agent] = self.per_agent_prompt_chars.get(agent, 0) + chars
+
+    def record_tool(self, chars):
+        with self.lock:
+            self.tool_calls += 1
+            self.tool_output_chars += chars
+
+
+class ReplayLLM:
+    """
+    Chat model stand-in that replays recorded responses in order
+
+    With by_turn the response is picked by the number of AI messages already
+    in the prompt instead of the global call count, so every conversation
+    (e.g. each parallel research branch) replays the recording from the start.
+    """
+
+    def __init__(self, agent, responses, latency: LatencyModel, stats: CallStats, by_turn=False):
+        self.agent = agent
+        self.responses = responses or [{"content": ""}]
+        self.latency = latency
+        self.stats = stats
+        self.by_turn = by_turn
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def bind_tools(self, tools):
+        return self
+
+    def invoke(self, messages, *args, **kwargs):
+        prompt_chars = message_chars(messages)
+        self.stats.record_prompt(self.agent, prompt_chars)
+        with self._lock:
+            call_number = self.calls
+            self.calls += 1
+        turn = sum(isinstance(m, AIMessage) for m in messages) if self.by_turn else call_number
+        # Repeat the last recording if the graph asks for more turns
+        recorded = self.responses[min(turn, len(self.responses) - 1)]
+        self.latency.sleep(prompt_chars, len(recorded.get("content", "")))
+
+        tool_calls = [
+            {
+                "name": call["name"],
+                "args": call["args"],
+                # Unique ids even when a recording is replayed twice
+                "id": f"{call.get('id', 'call')}_{self.agent}_{call_number}",
+                "type": "tool_call",
+            }
+            for call in recorded.get("tool_calls", [])
+        ]
+        return AIMessage(content=recorded.get("content", ""), tool_calls=tool_calls)
+
+
+def make_replay_tool(template, spec, latency: LatencyModel, stats: CallStats):
+    """Replay tool with the same name/schema as a real tool"""
+    outputs = spec.get("outputs", {})
+    default = spec.get("default", f"No recorded output for {template.name}")
+
+    def replay(**kwargs):
+        key = next(iter(kwargs.values()), "") if kwargs else ""
+        latency.sleep()
+        output = outputs.get(str(key), default)
+        stats.record_tool(len(output))
+        return output
+
+    return StructuredTool.from_function(
+        func=replay,
+        name=template.name,
+        description=template.description,
+        args_schema=template.args_schema,
+    )
+
+
+def load_fixture(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def build_replay_components(fixture, real_tools, latency_scale=1.0, seed=0):
+    """Replay LLMs (one per agent) and tools for a fixture, plus shared stats"""
+    stats = CallStats()
+    llm_spec = fixture.get("llm", {})
+    responses = llm_spec.get("responses", {})
+
+    llms = {
+        agent: ReplayLLM(
+            agent,
+            responses.get(agent) or responses.get(agent.replace("batch_", "")),
+            LatencyModel.from_fixture(llm_spec.get("latency_ms"), latency_scale, seed + i),
+            stats,
+            # The researcher's own messages are its whole prompt, so turns are exact
+            by_turn=(agent == "researcher"),
+        )
+        for i, agent in enumerate(
+            ["researcher", "fact_checker", "summarizer", "planner", "batch_fact_checker"]
+        )
+    }
+
+    tool_specs = fixture.get("tools", {})
+    tools = [
+        make_replay_tool(
+            real_tool,
+            tool_specs.get(real_tool.name, {}),
+            LatencyModel.from_fixture(
+                tool_specs.get(real_tool.name, {}).get("latency_ms"), latency_scale, seed + 100 + i
+            ),
+            stats,
+        )
+        for i, real_tool in enumerate(real_tools)
+    ]
+    return llms, tools, stats
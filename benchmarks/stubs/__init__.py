@@ -0,0 +1 @@
+"""Local stand-ins for external services (LLM, search, web pages) used in load tests"""
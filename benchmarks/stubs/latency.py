@@ -0,0 +1,46 @@
+"""
+Latency Module - Configurable latency distributions for stub servers
+
+Spec strings (milliseconds):
+    fixed:200               always 200 ms
+    uniform:100:400         uniform between 100 and 400 ms
+    normal:300:80           mean 300, stdev 80 (clamped at 0)
+    lognormal:800:0.5       median 800, sigma 0.5 (long right tail, like real APIs)
+"""
+
+import math
+import random
+import threading
+import time
+
+
+class Latency:
+    """Thread-safe sampler for a latency spec"""
+
+    def __init__(self, spec: str = "fixed:0", seed=None):
+        self.spec = spec
+        parts = spec.split(":")
+        self.kind = parts[0]
+        self.params = [float(p) for p in parts[1:]]
+        expected = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2}
+        if self.kind not in expected or len(self.params) != expected[self.kind]:
+            raise ValueError(f"Invalid latency spec: {spec!r}")
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample_ms(self) -> float:
+        with self._lock:
+            if self.kind == "fixed":
+                return self.params[0]
+            if self.kind == "uniform":
+                return self._rng.uniform(*self.params)
+            if self.kind == "normal":
+                return max(0.0, self._rng.gauss(*self.params))
+            median, sigma = self.params
+            return self._rng.lognormvariate(math.log(max(median, 1e-3)), sigma)
+
+    def sleep(self):
+        delay = self.sample_ms()
+        if delay > 0:
+            time.sleep(delay / 1000)
+        return delay
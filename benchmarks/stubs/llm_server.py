@@ -0,0 +1,144 @@
+"""
+Stub LLM Server - OpenAI/Groq-compatible chat completions
+Purpose: Stand in for Groq during load tests, with configurable latency
+
+Serves POST /openai/v1/chat/completions (Groq's path) and
+POST /v1/chat/completions. Behaviour per request:
+* tools offered, no tool results yet  -> call the first search tool
+* tools offered, tool results present -> optionally scrape --scrape-url
+  once, otherwise answer in text
+* no tools (summarizer)               -> answer with a markdown report
+
+Usage:
+    python -m benchmarks.stubs.llm_server --port 9001 --latency lognormal:800:0.4
+    GROQ_API_BASE=http://127.0.0.1:9001 uvicorn app.main:app
+"""
+
+import argparse
+import json
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.stubs.latency import Latency
+
+REPORT = (
+    "# Research Report\n\n## Executive Summary\nStub summary of the findings.\n\n"
+    "## Key Findings\n- Finding one backed by the search results.\n"
+    "- Finding two, cross-checked during fact-checking.\n\n"
+    "## Uncertainties\n- Generated by the load-test stub.\n"
+)
+NOTES = (
+    "Findings: the search results describe the topic in detail, list recent "
+    "developments and cite several independent sources that agree."
+)
+
+
+def _query_text(messages):
+    """The research query (Query: "..." line), else the last user/system text"""
+    for message in messages:
+        content = message.get("content")
+        if message.get("role") == "user" and isinstance(content, str) and content.startswith('Query: "'):
+            return content[len('Query: "'):].split('"')[0]
+    for message in reversed(messages):
+        content = message.get("content")
+        if message.get("role") in ("user", "system") and isinstance(content, str):
+            return content
+    return "research topic"
+
+
+def build_reply(body, scrape_url=None):
+    """Assistant message for a chat completion request"""
+    messages = body.get("messages", [])
+    tools = [t["function"]["name"] for t in body.get("tools", []) if t.get("type") == "function"]
+    tool_results = [m for m in messages if m.get("role") == "tool"]
+    called = {
+        call["function"]["name"]
+        for m in messages if m.get("role") == "assistant"
+        for call in m.get("tool_calls") or []
+    }
+
+    def tool_call(name, args):
+        return {
+            "id": f"call_{uuid.uuid4().hex[:12]}",
+            "type": "function",
+            "function": {"name": name, "arguments": json.dumps(args)},
+        }
+
+    if tools and not tool_results:
+        search_tool = next((t for t in tools if "search" in t), tools[0])
+        query = " ".join(_query_text(messages).split()[:12])
+        return {"role": "assistant", "content": "", "tool_calls": [tool_call(search_tool, {"query": query})]}
+
+    if tools and scrape_url and "web_scrape" in tools and "web_scrape" not in called:
+        return {"role": "assistant", "content": NOTES, "tool_calls": [tool_call("web_scrape", {"url": scrape_url})]}
+
+    return {"role": "assistant", "content": NOTES if tools else REPORT}
+
+
+def make_handler(latency: Latency, scrape_url=None):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self.send_error(404)
+                return
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            latency.sleep()
+
+            message = build_reply(body, scrape_url)
+            prompt_chars = sum(len(str(m.get("content") or "")) for m in body.get("messages", []))
+            completion_chars = len(message.get("content") or "")
+            payload = {
+                "id": f"chatcmpl-{uuid.uuid4().hex}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "stub"),
+                "choices": [{
+                    "index": 0,
+                    "message": message,
+                    "finish_reason": "tool_calls" if message.get("tool_calls") else "stop",
+                }],
+                "usage": {
+                    "prompt_tokens": prompt_chars // 4,
+                    "completion_tokens": completion_chars // 4,
+                    "total_tokens": (prompt_chars + completion_chars) // 4,
+                },
+            }
+            data = json.dumps(payload).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass  # Keep load tests quiet
+
+    return Handler
+
+
+def serve(port=9001, latency="fixed:0", scrape_url=None, host="127.0.0.1"):
+    """Create the server (call serve_forever() on it, or run it in a thread)"""
+    server = ThreadingHTTPServer((host, port), make_handler(Latency(latency), scrape_url))
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI/Groq-compatible stub LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9001)
+    parser.add_argument("--latency", default="lognormal:800:0.4", help="See benchmarks/stubs/latency.py")
+    parser.add_argument("--scrape-url", help="Page the researcher scrapes after its first search")
+    args = parser.parse_args()
+
+    server = serve(args.port, args.latency, args.scrape_url, args.host)
+    print(f"🤖 Stub LLM on http://{args.host}:{args.port} (latency {args.latency})")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
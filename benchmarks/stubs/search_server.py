@@ -0,0 +1,116 @@
+"""
+Stub Search Server - Custom Search JSON results and scrapeable pages
+Purpose: Stand in for Google/DuckDuckGo and scraped sites during load tests
+
+Endpoints:
+    GET /customsearch/v1?q=...&num=N  -> {"items": [{"title", "link", "snippet"}]}
+    GET /page/<n>                     -> HTML article with nav boilerplate
+
+Usage:
+    python -m benchmarks.stubs.search_server --port 9002 --latency normal:350:100
+    SEARCH_API_URL=http://127.0.0.1:9002/customsearch/v1 uvicorn app.main:app
+"""
+
+import argparse
+import hashlib
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.stubs.latency import Latency
+
+SENTENCES = [
+    "Independent analysts reported steady growth in adoption over the past year.",
+    "The latest release focuses on reliability, observability and lower cost per request.",
+    "Several universities published evaluations comparing the leading approaches.",
+    "Industry surveys show most teams moved pilots into production in 2025.",
+    "Critics point out that benchmark results do not always transfer to real workloads.",
+    "Regulators in the EU and US issued guidance affecting deployments.",
+    "Open-source projects saw record contributor numbers and faster release cycles.",
+    "Vendors announced interoperability standards to connect tools and data sources.",
+]
+
+
+def make_items(query: str, num: int, base_url: str):
+    """Deterministic results for a query (same query -> same results)"""
+    seed = int(hashlib.sha256(query.encode()).hexdigest(), 16)
+    items = []
+    for i in range(num):
+        first = SENTENCES[(seed + i) % len(SENTENCES)]
+        second = SENTENCES[(seed // 7 + 3 * i) % len(SENTENCES)]
+        items.append({
+            "title": f"{query[:60]} — source {i + 1}",
+            "link": f"{base_url}/page/{(seed + i) % 1000}",
+            "snippet": f"{query[:80]}: {first} {second}",
+        })
+    return items
+
+
+def make_page(n: int) -> str:
+    nav = "".join(f"<a href='/page/{n + i}'>Related {i}</a> " for i in range(1, 30))
+    body = " ".join(SENTENCES[(n + i) % len(SENTENCES)] for i in range(40))
+    return (
+        "<html><head><title>Stub article</title></head><body>"
+        f"<nav>{nav}</nav><header>Home | Products | Blog | Sign in</header>"
+        f"<article><h1>Article {n}</h1><p>{body}</p></article>"
+        "<footer>© Stub Media. Cookies. Privacy. Terms.</footer></body></html>"
+    )
+
+
+def make_handler(latency: Latency):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, status, content_type, data: bytes):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            latency.sleep()
+            if url.path.rstrip("/").endswith("/customsearch/v1"):
+                params = parse_qs(url.query)
+                query = params.get("q", [""])[0]
+                num = min(10, int(params.get("num", ["10"])[0]))
+                base_url = f"http://{self.headers.get('Host', 'localhost')}"
+                payload = {"items": make_items(query, num, base_url)}
+                self._send(200, "application/json", json.dumps(payload).encode())
+            elif url.path.startswith("/page/"):
+                try:
+                    n = int(url.path.rsplit("/", 1)[-1])
+                except ValueError:
+                    self.send_error(404)
+                    return
+                self._send(200, "text/html; charset=utf-8", make_page(n).encode())
+            else:
+                self.send_error(404)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(port=9002, latency="fixed:0", host="127.0.0.1"):
+    server = ThreadingHTTPServer((host, port), make_handler(Latency(latency)))
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub search + web page server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9002)
+    parser.add_argument("--latency", default="normal:350:100", help="See benchmarks/stubs/latency.py")
+    args = parser.parse_args()
+
+    server = serve(args.port, args.latency, args.host)
+    print(f"🔎 Stub search on http://{args.host}:{args.port}/customsearch/v1 (latency {args.latency})")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
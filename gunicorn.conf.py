@@ -0,0 +1,31 @@
+"""
+Gunicorn config for multi-worker deployments
+    gunicorn app.main:app -c gunicorn.conf.py
+
+Every worker is a separate process. Run with shared state so limits, the
+job queue and cached results hold across workers and nodes:
+    RATE_LIMIT_BACKEND=redis (or sql), RESULT_CACHE_BACKEND=redis (or sql),
+    RESEARCH_EXECUTION=queue and a server database (DATABASE_URL=postgresql://...)
+
+The master migrates the database once before forking; workers then only
+check the schema revision.
+"""
+
+import multiprocessing
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Inline research runs can take minutes
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "300"))
+graceful_timeout = 30
+keepalive = 5
+
+
+def on_starting(server):
+    from app.database.db import engine, init_db
+
+    init_db(migrate=True)
+    engine.dispose()  # Workers open their own connections after the fork
@@ -0,0 +1,10 @@
+import pytest
+
+from app.search import vector_index
+
+
+@pytest.fixture(autouse=True)
+def vector_index_dir(tmp_path, monkeypatch):
+    """Keep the vector index of every test out of the working directory"""
+    monkeypatch.setattr(vector_index.settings, "VECTOR_INDEX_DIR", str(tmp_path / "vector_index"))
+    monkeypatch.setattr(vector_index, "_index", None)
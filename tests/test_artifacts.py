@@ -0,0 +1,84 @@
+"""
+Tests for the artifact store keeping large tool outputs out of the state
+"""
+
+import os
+
+from langchain_core.messages import ToolMessage
+
+from app.agent import artifacts, graph
+from app.agent.artifacts import (
+    ArtifactToolNode, FileArtifactStore, MemoryArtifactStore, artifact_key, artifact_reference,
+    expand_artifacts, expand_messages
+)
+from benchmarks.bench_graph import FIXTURES_DIR, run_fixture
+from benchmarks.replay import load_fixture
+
+PAGE = "Webpage Content :\n" + "Python 3.14 makes the free-threaded build officially supported. " * 40
+
+
+def test_memory_store_round_trip_and_eviction():
+    store = MemoryArtifactStore(max_chars=2 * len(PAGE))
+    key = store.put(PAGE)
+
+    assert key == artifact_key(PAGE)
+    assert store.put(PAGE) == key
+    assert store.get(key) == PAGE
+
+    store.put(PAGE + "1")
+    store.put(PAGE + "2")
+    assert store.get(key) is None  # Least recently used goes first
+    assert store.get(artifact_key(PAGE + "2")) == PAGE + "2"
+
+
+def test_file_store_round_trip(tmp_path):
+    store = FileArtifactStore(str(tmp_path))
+    key = store.put(PAGE)
+
+    assert os.path.exists(tmp_path / key[:2] / key)
+    assert FileArtifactStore(str(tmp_path)).get(key) == PAGE
+    assert store.get("0" * 64) is None
+
+
+def test_references_expand_to_stored_text():
+    store = MemoryArtifactStore()
+    reference = artifact_reference(store.put(PAGE), PAGE, excerpt_chars=40)
+
+    assert len(reference) < 150
+    assert expand_artifacts(f"Results:\n{reference}\nEnd", store) == f"Results:\n{PAGE}\nEnd"
+    # Evicted artifacts degrade to their excerpt
+    assert expand_artifacts(reference, MemoryArtifactStore()) == PAGE[:40].rstrip() + " ..."
+
+
+def test_tool_node_stores_large_results_only():
+    store = MemoryArtifactStore()
+
+    class FakeToolNode:
+        def invoke(self, state, config=None):
+            return {"messages": [ToolMessage(content=PAGE, tool_call_id="a"),
+                                 ToolMessage(content="42", tool_call_id="b")],
+                    "dedup_chars_removed": 0}
+
+    update = ArtifactToolNode(FakeToolNode(), store, min_chars=1000)({"messages": []}, {})
+    large, small = update["messages"]
+
+    assert large.content.startswith("[artifact sha256:")
+    assert large.tool_call_id == "a"
+    assert small.content == "42"
+    assert update["dedup_chars_removed"] == 0
+    assert expand_messages(update["messages"], store)[0].content == PAGE
+
+
+def test_graph_keeps_references_in_state(monkeypatch):
+    fixture = load_fixture(os.path.join(FIXTURES_DIR, "ai_agents_2025.json"))
+
+    monkeypatch.setattr(graph, "get_artifact_store", lambda: None)
+    inline = run_fixture(fixture, latency_scale=0)
+
+    monkeypatch.setattr(graph, "get_artifact_store", artifacts.get_artifact_store)
+    monkeypatch.setattr(graph.settings, "ARTIFACT_MIN_CHARS", 300)
+    compact = run_fixture(fixture, latency_scale=0)
+
+    # Prompts still see the full text
+    assert compact["prompt_chars"] == inline["prompt_chars"]
+    assert compact["state_chars"] < inline["state_chars"]
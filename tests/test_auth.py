@@ -0,0 +1,302 @@
+"""
+Tests for authentication: user principal cache, claims-only validation,
+the password hashing pool and refresh tokens
+"""
+
+import threading
+
+import pytest
+from argon2 import PasswordHasher
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api.auth_routes import login
+from app.api.models import UserLogin
+from app.auth import dependencies, security, tokens
+from app.auth.dependencies import get_current_user
+from app.auth.security import create_access_token
+from app.auth.user_cache import UserCache, UserPrincipal, user_cache
+from app.database.models import Base, User
+
+
+# =============================================
+# HELPERS
+# =============================================
+
+class FakeQuery:
+    def __init__(self, user):
+        self.user = user
+
+    def filter(self, *args):
+        return self
+
+    def first(self):
+        return self.user
+
+
+class FakeDB:
+    """Counts queries instead of talking to a database"""
+
+    def __init__(self, user=None):
+        self.user = user
+        self.queries = 0
+
+    def query(self, model):
+        self.queries += 1
+        return FakeQuery(self.user)
+
+
+def make_user(**overrides):
+    fields = dict(id=7, username="alice", email="alice@test.com",
+                  hashed_password="x", is_active=True)
+    fields.update(overrides)
+    return User(**fields)
+
+
+def bearer(token):
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+
+def full_claims_token(user):
+    return create_access_token(data={
+        "sub": user.username, "uid": user.id,
+        "email": user.email, "active": user.is_active,
+    })
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture(autouse=True)
+def clean_cache():
+    user_cache.clear()
+    yield
+    user_cache.clear()
+
+
+# =============================================
+# TEST UserCache
+# =============================================
+
+def test_cache_hit_and_ttl_expiry(monkeypatch):
+    cache = UserCache(ttl_seconds=10, max_size=10)
+    principal = UserPrincipal(id=1, username="bob", email="b@x.com", is_active=True)
+    now = [1000.0]
+    monkeypatch.setattr("app.auth.user_cache.time.monotonic", lambda: now[0])
+
+    cache.set(principal)
+    assert cache.get("bob") == principal
+
+    now[0] += 11
+    assert cache.get("bob") is None
+
+
+def test_cache_is_size_bounded():
+    cache = UserCache(ttl_seconds=60, max_size=2)
+    for i in range(3):
+        cache.set(UserPrincipal(id=i, username=f"u{i}", email="e", is_active=True))
+
+    assert cache.get("u0") is None
+    assert cache.get("u1") is not None
+    assert cache.get("u2") is not None
+
+
+def test_cache_skips_inactive_users():
+    cache = UserCache(ttl_seconds=60, max_size=10)
+    cache.set(UserPrincipal(id=1, username="bob", email="e", is_active=False))
+    assert cache.get("bob") is None
+
+
+# =============================================
+# TEST get_current_user
+# =============================================
+
+def test_second_request_is_served_from_cache():
+    user = make_user()
+    db = FakeDB(user)
+    token = create_access_token(data={"sub": user.username})
+
+    first = get_current_user(bearer(token), db)
+    second = get_current_user(bearer(token), db)
+
+    assert first == second
+    assert second.id == 7
+    assert db.queries == 1
+
+
+def test_deactivation_invalidates_cache(db):
+    user = make_user(username="carol", email="carol@test.com")
+    db.add(user)
+    db.commit()
+    token = create_access_token(data={"sub": "carol"})
+
+    get_current_user(bearer(token), db)
+    assert user_cache.get("carol") is not None
+
+    user.is_active = False
+    db.commit()
+    assert user_cache.get("carol") is None
+
+    with pytest.raises(HTTPException) as exc:
+        get_current_user(bearer(token), db)
+    assert exc.value.status_code == 400
+
+
+def test_claims_only_skips_database(monkeypatch):
+    monkeypatch.setattr(dependencies.settings, "AUTH_CLAIMS_ONLY", True)
+    user = make_user()
+    db = FakeDB(user)
+
+    principal = get_current_user(bearer(full_claims_token(user)), db)
+
+    assert principal.id == 7
+    assert principal.email == "alice@test.com"
+    assert db.queries == 0
+
+
+def test_claims_only_rechecks_after_invalidation(monkeypatch):
+    monkeypatch.setattr(dependencies.settings, "AUTH_CLAIMS_ONLY", True)
+    user = make_user()
+    token = full_claims_token(user)
+    user_cache.invalidate(user.username)
+
+    db = FakeDB(make_user(is_active=False))
+    with pytest.raises(HTTPException) as exc:
+        get_current_user(bearer(token), db)
+
+    assert exc.value.status_code == 400
+    assert db.queries == 1
+
+
+def test_deactivation_elsewhere_applies_when_cache_expires(db, monkeypatch):
+    # Another process (or raw SQL) deactivates the user: no ORM event fires here
+    user = make_user(username="dana", email="dana@test.com")
+    db.add(user)
+    db.commit()
+    token = create_access_token(data={"sub": "dana"})
+    now = [1000.0]
+    monkeypatch.setattr("app.auth.user_cache.time.monotonic", lambda: now[0])
+    get_current_user(bearer(token), db)
+
+    db.execute(User.__table__.update().where(User.id == user.id).values(is_active=False))
+    db.commit()
+    assert get_current_user(bearer(token), db).is_active  # Revocation window: the cache TTL
+
+    now[0] += user_cache.ttl_seconds + 1
+    with pytest.raises(HTTPException) as exc:
+        get_current_user(bearer(token), db)
+    assert exc.value.status_code == 400
+
+
+def test_invalid_token_rejected():
+    with pytest.raises(HTTPException) as exc:
+        get_current_user(bearer("not-a-jwt"), FakeDB())
+    assert exc.value.status_code == 401
+
+
+# =============================================
+# TEST password hashing pool
+# =============================================
+
+def test_verify_password_returns_false_on_mismatch():
+    hashed = security.hash_password("right")
+
+    assert security.verify_password("right", hashed) is True
+    assert security.verify_password("wrong", hashed) is False
+
+
+def test_hashing_rejects_work_when_pool_saturated(monkeypatch):
+    monkeypatch.setattr(security, "_hash_slots", threading.BoundedSemaphore(1))
+    security._hash_slots.acquire()
+
+    with pytest.raises(security.PasswordHashingBusy):
+        security.hash_password("secret")
+
+
+def test_hash_made_with_old_parameters_needs_rehash():
+    old = PasswordHasher(time_cost=1, memory_cost=8192, parallelism=1).hash("pw")
+
+    assert security.password_needs_rehash(old) is True
+    assert security.password_needs_rehash(security.hash_password("pw")) is False
+
+
+def test_login_rehashes_outdated_hash(db, monkeypatch):
+    old_hash = PasswordHasher(time_cost=1, memory_cost=8192, parallelism=1).hash("pw")
+    db.add(make_user(username="dave", email="dave@test.com", hashed_password=old_hash))
+    db.commit()
+
+    login(UserLogin(username="dave", password="pw"), db)
+
+    user = db.query(User).filter(User.username == "dave").first()
+    assert user.hashed_password != old_hash
+    assert security.verify_password("pw", user.hashed_password)
+
+
+# =============================================
+# TEST refresh tokens
+# =============================================
+
+@pytest.fixture
+def stored_user(db):
+    user = make_user(username="erin", email="erin@test.com")
+    db.add(user)
+    db.commit()
+    return user
+
+
+def test_access_token_is_self_contained(stored_user):
+    claims = security.decode_token_claims(tokens.create_user_access_token(stored_user))
+
+    assert claims["uid"] == stored_user.id
+    assert claims["active"] is True
+    assert claims["type"] == "access"
+
+
+def test_refresh_rotates_token(db, stored_user):
+    first = tokens.issue_refresh_token(db, stored_user)
+
+    user, pair = tokens.rotate_refresh_token(db, first)
+
+    assert user.id == stored_user.id
+    assert pair["refresh_token"] != first
+    assert security.decode_access_token(pair["access_token"]) == "erin"
+    # The new token works, the old one is spent
+    tokens.rotate_refresh_token(db, pair["refresh_token"])
+
+
+def test_refresh_token_reuse_revokes_family(db, stored_user):
+    first = tokens.issue_refresh_token(db, stored_user)
+    _, pair = tokens.rotate_refresh_token(db, first)
+
+    with pytest.raises(tokens.RefreshTokenError):
+        tokens.rotate_refresh_token(db, first)
+
+    # Replaying the old token also killed the legitimately rotated one
+    with pytest.raises(tokens.RefreshTokenError):
+        tokens.rotate_refresh_token(db, pair["refresh_token"])
+
+
+def test_refresh_rejected_for_inactive_user(db, stored_user):
+    token = tokens.issue_refresh_token(db, stored_user)
+    stored_user.is_active = False
+    db.commit()
+
+    with pytest.raises(tokens.RefreshTokenError):
+        tokens.rotate_refresh_token(db, token)
+
+
+def test_logout_revokes_refresh_token(db, stored_user):
+    token = tokens.issue_refresh_token(db, stored_user)
+
+    assert tokens.revoke_refresh_token(db, token) is True
+    with pytest.raises(tokens.RefreshTokenError):
+        tokens.rotate_refresh_token(db, token)
@@ -0,0 +1,150 @@
+"""
+Tests for the offline graph benchmark (also an end-to-end run of the graph
+with recorded LLM/tool responses, no network needed)
+"""
+
+import functools
+import glob
+import json
+import os
+
+import pytest
+from langchain_core.messages import ToolMessage
+
+from benchmarks.bench_graph import (
+    FIXTURES_DIR, build_graph, build_parallel_graph, build_pipelined_graph, initial_state, main, run_fixture
+)
+from benchmarks.replay import build_replay_components, load_fixture
+
+FIXTURES = sorted(glob.glob(os.path.join(FIXTURES_DIR, "*.json")))
+
+# Workflow variants always running max_iterations (no early exit)
+full_serial = functools.partial(build_graph, early_exit=False)
+full_parallel = functools.partial(build_parallel_graph, early_exit=False)
+full_pipelined = functools.partial(build_pipelined_graph, early_exit=False)
+
+
+@pytest.mark.parametrize("path", FIXTURES, ids=os.path.basename)
+def test_fixture_runs_through_graph(path):
+    metrics = run_fixture(load_fixture(path), latency_scale=0)
+
+    assert metrics["final_report_chars"] > 0
+    assert metrics["llm_calls"] >= 3  # researcher, fact-checker, summarizer
+    assert metrics["prompt_chars"] > 0
+    assert metrics["messages"] > 0
+    assert {"researcher", "fact_checker", "summarizer"} <= set(metrics["node_time_s"])
+
+
+def test_replay_is_deterministic():
+    fixture = load_fixture(FIXTURES[0])
+
+    first = run_fixture(fixture, latency_scale=0)
+    second = run_fixture(fixture, latency_scale=0)
+
+    for metric in ("llm_calls", "tool_calls", "prompt_chars", "messages"):
+        assert first[metric] == second[metric]
+
+
+def test_save_and_compare_baseline(tmp_path, capsys):
+    baseline = tmp_path / "baseline.json"
+
+    main([FIXTURES[0], "--latency-scale", "0", "--save", str(baseline)])
+    saved = json.loads(baseline.read_text())
+    assert saved["results"]
+
+    main([FIXTURES[0], "--latency-scale", "0", "--compare", str(baseline)])
+    assert "Compared with baseline" in capsys.readouterr().out
+
+
+def test_parallel_mode_merges_branches():
+    fixture = load_fixture(FIXTURES[0])
+    planned = fixture["llm"]["responses"]["planner"][0]["content"].splitlines()
+
+    metrics = run_fixture(fixture, latency_scale=0, graph_builder=full_parallel)
+
+    assert metrics["final_report_chars"] > 0
+    assert {"planner", "research_branch", "merge_research", "fact_checker"} <= set(metrics["node_time_s"])
+    # Planner, max_iterations researcher turns per branch, fact-checker, summarizer
+    assert metrics["llm_calls"] == 1 + len(planned) * fixture["max_iterations"] + 2
+
+
+def test_parallel_branches_overlap():
+    fixture = load_fixture(FIXTURES[0])
+
+    serial = run_fixture(fixture, latency_scale=0.2, graph_builder=full_serial)
+    parallel = run_fixture(fixture, latency_scale=0.2, graph_builder=full_parallel)
+
+    # Three branches, each as long as the serial research loop, run at once:
+    # research takes about one loop instead of three
+    one_loop = serial["node_time_s"]["researcher"] + serial["node_time_s"]["tools"]
+    assert parallel["node_time_s"]["research_branch"] < 2 * one_loop
+
+
+def test_pipelined_mode_accumulates_verified_facts():
+    from app.agent.tools import my_tools
+
+    fixture = load_fixture(FIXTURES[0])
+    llms, tools, _ = build_replay_components(fixture, my_tools, latency_scale=0)
+    result = full_pipelined(llms, tools).invoke(initial_state(fixture))
+
+    # One check per tool batch, in order, each appended to verified_facts
+    batches = [r["content"] for r in fixture["llm"]["responses"]["batch_fact_checker"]]
+    assert result["verified_facts"] == "\n\n".join(batches)
+    assert result["fact_checked_results"] == sum(
+        isinstance(m, ToolMessage) for m in result["messages"]
+    )
+    assert result["final_report"]
+
+
+@pytest.mark.parametrize("path", FIXTURES, ids=os.path.basename)
+def test_pipelined_mode_is_faster(path):
+    fixture = load_fixture(path)
+
+    serial = run_fixture(fixture, latency_scale=0.5, graph_builder=full_serial)
+    pipelined = run_fixture(fixture, latency_scale=0.5, graph_builder=full_pipelined)
+
+    assert pipelined["wall_time_s"] < serial["wall_time_s"]
+
+
+def test_early_exit_saves_iterations():
+    fixture = load_fixture(os.path.join(FIXTURES_DIR, "ai_agents_2025.json"))
+    # The second turn repeats the first searches, so its results add nothing new
+    responses = fixture["llm"]["responses"]["researcher"]
+    responses[1] = {**responses[1], "tool_calls": responses[0]["tool_calls"]}
+    fixture["max_iterations"] = 4
+
+    full = run_fixture(fixture, latency_scale=0, graph_builder=full_serial)
+    early = run_fixture(fixture, latency_scale=0)
+
+    # The researcher summarizes right after the repeated batch
+    assert early["iterations_saved"] == 1
+    assert early["researcher_iterations"] == full["researcher_iterations"] - 1
+    assert early["llm_calls"] < full["llm_calls"]
+    assert early["final_report_chars"] > 0
+
+
+def test_early_exit_at_default_max_iterations():
+    # Google and DuckDuckGo return overlapping results for the first search
+    fixture = load_fixture(os.path.join(FIXTURES_DIR, "ai_agents_2025.json"))
+    assert fixture["max_iterations"] == 2
+
+    full = run_fixture(fixture, latency_scale=0, graph_builder=full_serial)
+    early = run_fixture(fixture, latency_scale=0)
+
+    assert early["iterations_saved"] == 1
+    assert early["researcher_iterations"] == full["researcher_iterations"] - 1
+    assert early["tool_calls"] < full["tool_calls"]
+    assert early["final_report_chars"] > 0
+
+
+def test_dedup_shrinks_prompts():
+    fixture = load_fixture(os.path.join(FIXTURES_DIR, "ai_agents_2025.json"))
+
+    kept = run_fixture(fixture, latency_scale=0, graph_builder=functools.partial(build_graph, dedup=False))
+    deduped = run_fixture(fixture, latency_scale=0)
+
+    # The Google and DuckDuckGo results overlap
+    assert deduped["dedup_chars_removed"] > 0
+    assert deduped["dedup_tokens_removed"] > 0
+    assert deduped["prompt_chars"] < kept["prompt_chars"]
+    assert deduped["llm_calls"] == kept["llm_calls"]
@@ -0,0 +1,64 @@
+"""
+Tests for the safe calculator behind the calculate tool
+"""
+
+import time
+
+import numpy as np
+import pytest
+
+from app.agent.calculator import CalculationError, compile_expression, evaluate, format_result
+from app.agent.tools import calculate
+
+
+def test_scalar_arithmetic_is_exact():
+    assert evaluate("2 + 3 * 4") == 14
+    assert evaluate("2 ** 100") == 1267650600228229401496703205376
+    assert evaluate("2^10") == 1024
+    assert evaluate("7 // 2 + 7 % 2") == 4
+    assert format_result(evaluate("(1.05 ** 10) * 1000")) == "1628.89462678"
+    assert format_result(evaluate("round(pi, 4)")) == "3.1416"
+
+
+def test_lists_and_ranges_are_vectorized():
+    assert format_result(evaluate("[1, 2, 3] * 2")) == "[2, 4, 6]"
+    assert format_result(evaluate("sum(range(1, 1001))")) == "500500"
+    assert evaluate("mean([1, 2, 3, 4])") == 2.5
+    assert format_result(evaluate("range(100)")) == "[0, 1, 2, 3, 4, ..., 95, 96, 97, 98, 99] (100 values)"
+    assert isinstance(evaluate("sqrt(range(0, 5))"), np.ndarray)
+
+
+@pytest.mark.parametrize("expression, message", [
+    ("__import__('os')", "Unknown function"),
+    ("(1).__class__.__mro__", "Unsupported syntax"),
+    ("'a' * 10", "Unsupported value"),
+    ("x + 1", "Unknown name"),
+    ("10 / 0", "Division by zero"),
+    ("(-8) ** (1 / 3)", "not a real number"),
+    ("[1, [2]]", "Nested lists"),
+])
+def test_rejects_unsafe_or_invalid_expressions(expression, message):
+    with pytest.raises(CalculationError, match=message):
+        evaluate(expression)
+
+
+@pytest.mark.parametrize("expression", [
+    "9 ** 9 ** 9", "10 ** 4000", "10.0 ** 400", "factorial(10 ** 6)", "range(10 ** 9)",
+    "+".join(["1"] * 300),
+])
+def test_pathological_expressions_fail_fast(expression):
+    start = time.perf_counter()
+    with pytest.raises(CalculationError):
+        evaluate(expression)
+    assert time.perf_counter() - start < 0.05
+
+
+def test_deadline_and_compiled_cache():
+    with pytest.raises(CalculationError, match="too long"):
+        evaluate("sum(range(100000) ** 2)", max_seconds=-1)
+    assert compile_expression("1 + 1") is compile_expression("1 + 1")
+
+
+def test_calculate_tool_reports_results_and_errors():
+    assert calculate.invoke("sum([1, 2, 3])") == "Result: 6"
+    assert calculate.invoke("9 ** 9 ** 9") == "Calculation error: Result exceeds 4096 bits"
@@ -0,0 +1,221 @@
+"""
+Tests for cooperative cancellation of research runs
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+from langgraph.graph import END, StateGraph
+from typing_extensions import TypedDict
+
+from app.agent import cancellation, graph
+from app.agent.cancellation import (
+    CancelToken, CancellableToolNode, ResearchCancelled, cancellation_scope, check_cancelled, run_cancellable
+)
+
+
+# =============================================
+# TEST CancelToken / run_cancellable
+# =============================================
+
+def test_token_runs_callbacks_once():
+    token = CancelToken()
+    calls = []
+    token.on_cancel(lambda: calls.append("a"))
+    remove = token.on_cancel(lambda: calls.append("b"))
+    remove()
+
+    token.check()
+    token.cancel()
+    token.cancel()
+    assert calls == ["a"]
+    with pytest.raises(ResearchCancelled):
+        token.check()
+    token.on_cancel(lambda: calls.append("late"))  # Already cancelled: called at once
+    assert calls == ["a", "late"]
+
+
+def test_run_cancellable_without_a_run_calls_inline():
+    assert run_cancellable(threading.current_thread) is threading.current_thread()
+    check_cancelled()
+
+
+def test_run_cancellable_returns_results_and_raises_errors():
+    with cancellation_scope(CancelToken()):
+        assert run_cancellable(lambda a, b=0: a + b, 1, b=2) == 3
+        with pytest.raises(ZeroDivisionError):
+            run_cancellable(lambda: 1 / 0)
+
+
+def test_run_cancellable_abandons_call_on_cancel():
+    token = CancelToken()
+    release = threading.Event()
+    threading.Timer(0.05, token.cancel).start()
+
+    start = time.monotonic()
+    with cancellation_scope(token), pytest.raises(ResearchCancelled):
+        run_cancellable(release.wait, 10)
+    assert time.monotonic() - start < 5
+    release.set()
+
+
+def test_calls_share_a_bounded_pool(monkeypatch):
+    monkeypatch.setattr(cancellation, "_pool", None)
+    monkeypatch.setattr(cancellation.settings, "CANCELLABLE_CALL_THREADS", 1)
+    monkeypatch.setattr(cancellation.settings, "CANCELLABLE_ABANDONED_CALLS", 0)
+    token = CancelToken()
+    release, started = threading.Event(), []
+
+    def blocked():
+        started.append("blocked")
+        release.wait(10)
+
+    def queued():
+        started.append("queued")
+
+    threading.Timer(0.05, token.cancel).start()
+    with cancellation_scope(token), pytest.raises(ResearchCancelled):
+        run_cancellable(blocked)
+    with cancellation_scope(CancelToken()) as other:
+        threading.Timer(0.05, other.cancel).start()
+        with pytest.raises(ResearchCancelled):
+            run_cancellable(queued)  # Waits behind the abandoned call, then never runs
+    release.set()
+    cancellation._pool.shutdown(wait=True)
+    assert started == ["blocked"]
+
+
+def test_abandoned_calls_do_not_starve_the_pool(monkeypatch):
+    monkeypatch.setattr(cancellation, "_pool", None)
+    monkeypatch.setattr(cancellation.settings, "CANCELLABLE_CALL_THREADS", 2)
+    monkeypatch.setattr(cancellation.settings, "CANCELLABLE_ABANDONED_CALLS", 2)
+    release, outcomes = threading.Event(), []
+
+    def abandon_hanging_calls(count):
+        tokens = [CancelToken() for _ in range(count)]
+        threads = [threading.Thread(target=run_hanging, args=(token,)) for token in tokens]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.1)
+        for token in tokens:
+            token.cancel()
+        for thread in threads:
+            thread.join(5)
+
+    def run_hanging(token):
+        with cancellation_scope(token):
+            try:
+                run_cancellable(release.wait, 10)
+            except ResearchCancelled:
+                outcomes.append("cancelled")
+
+    # Cancelled runs filled every call thread; their calls move to the spare threads
+    abandon_hanging_calls(2)
+    with cancellation_scope(CancelToken()):
+        assert run_cancellable(lambda: "served") == "served"
+
+    # With the spare threads taken, further abandoned calls keep their call thread
+    abandon_hanging_calls(2)
+    with cancellation_scope(CancelToken()) as other:
+        threading.Timer(0.2, other.cancel).start()
+        with pytest.raises(ResearchCancelled):
+            run_cancellable(lambda: "starved")
+
+    release.set()
+    with cancellation_scope(CancelToken()):
+        assert run_cancellable(lambda: "served") == "served"
+    cancellation._pool.shutdown(wait=True)
+    assert outcomes == ["cancelled"] * 4
+
+
+def test_nested_calls_run_inline(monkeypatch):
+    monkeypatch.setattr(cancellation, "_pool", None)
+    monkeypatch.setattr(cancellation.settings, "CANCELLABLE_CALL_THREADS", 1)
+
+    with cancellation_scope(CancelToken()):
+        assert run_cancellable(run_cancellable, lambda: 42) == 42  # One thread: no deadlock
+    cancellation._pool.shutdown(wait=True)
+
+
+def test_async_calls_are_cancelled_not_abandoned():
+    token = CancelToken()
+    outcome = []
+
+    async def request():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            outcome.append("cancelled")
+            raise
+
+    async def answer(a, b=0):
+        return a + b
+
+    with cancellation_scope(token):
+        assert run_cancellable(lambda a, b=0: None, 1, b=2, async_fn=answer) == 3
+        threading.Timer(0.05, token.cancel).start()
+        with pytest.raises(ResearchCancelled):
+            run_cancellable(lambda: None, async_fn=request)
+    for _ in range(100):
+        if outcome:
+            break
+        time.sleep(0.01)
+    assert outcome == ["cancelled"]
+
+
+def test_call_sees_the_current_token():
+    token = CancelToken()
+    with cancellation_scope(token):
+        token.cancel()
+        with pytest.raises(ResearchCancelled):
+            check_cancelled()
+    check_cancelled()  # Scope left: no current run
+
+
+def test_cancellable_tool_node():
+    class ToolNode:
+        def invoke(self, state, config=None):
+            check_cancelled()
+            return {"messages": [state["query"]]}
+
+    node = CancellableToolNode(ToolNode())
+    token = CancelToken()
+    with cancellation_scope(token):
+        assert node({"query": "q"}, None) == {"messages": ["q"]}
+        token.cancel()
+        with pytest.raises(ResearchCancelled):
+            node.invoke({"query": "q"})
+
+
+# =============================================
+# TEST research() between graph steps
+# =============================================
+
+class StepState(TypedDict, total=False):
+    steps: int
+    final_report: str
+
+
+def test_research_stops_between_graph_steps(monkeypatch):
+    token = CancelToken()
+    seen = []
+
+    def step(state):
+        seen.append(state.get("steps", 0))
+        if len(seen) == 2:
+            token.cancel()
+        return {"steps": state.get("steps", 0) + 1}
+
+    builder = StateGraph(StepState)
+    builder.add_node("step", step)
+    builder.set_entry_point("step")
+    builder.add_conditional_edges("step", lambda state: END if state["steps"] >= 5 else "step")
+    monkeypatch.setitem(graph.AGENTS_BY_MODE, "serial", builder.compile())
+
+    with pytest.raises(ResearchCancelled):
+        graph.research("Cancelled question", cancel_token=token)
+    assert seen == [0, 1]
+
+    assert graph.research("Finished question")["steps"] == 5
@@ -0,0 +1,102 @@
+"""
+Tests for the tool-result dedup stage
+"""
+
+from langchain_core.messages import AIMessage, ToolMessage
+
+from app.agent.dedup import (
+    DUPLICATE_RESULT, TRIMMED_RESULT, DedupToolNode, MinHasher, ToolResultDeduplicator,
+    split_sentences
+)
+from app.agent.tokens import count_tokens
+
+FIRST = (
+    "Python 3.14.0 was released on October 7, 2025 by the Python core team. "
+    "The free-threaded build is now officially supported on all tier one platforms."
+)
+REWORDED = (
+    "Python 3.14.0 was released on October 7, 2025 by the Python core team! "
+    "Template string literals give libraries a safe way to process interpolated text."
+)
+
+
+def test_minhash_estimates_similarity():
+    hasher = MinHasher()
+    a = hasher.signature("the free threaded build is now officially supported on all platforms")
+    b = hasher.signature("the free threaded build is now officially supported on all platforms today")
+    c = hasher.signature("template string literals give libraries a safe way to process text")
+
+    assert MinHasher.similarity(a, a) == 1.0
+    assert MinHasher.similarity(a, b) > 0.6
+    assert MinHasher.similarity(a, c) < 0.2
+
+
+def test_repeated_sentences_are_removed():
+    results, removed = ToolResultDeduplicator().dedup([FIRST], [REWORDED])
+
+    assert "released on October 7" not in results[0]
+    assert "Template string literals" in results[0]
+    assert results[0].endswith(TRIMMED_RESULT)
+    assert removed == len(REWORDED) - len(results[0])
+
+
+def test_fully_repeated_result_is_collapsed():
+    results, removed = ToolResultDeduplicator().dedup([], [FIRST, FIRST])
+
+    assert results == [FIRST, DUPLICATE_RESULT]
+    assert removed == len(FIRST) - len(DUPLICATE_RESULT)
+
+
+def test_new_results_are_untouched():
+    text = "Webpage Content :\n" + FIRST
+
+    assert ToolResultDeduplicator().dedup([REWORDED.split("! ")[1]], [text]) == ([text], 0)
+
+
+class FakeToolNode:
+    def __init__(self, messages):
+        self.messages = messages
+
+    def invoke(self, state, config=None):
+        return {"messages": self.messages}
+
+
+def test_dedup_node_records_removed_chars_and_tokens():
+    new = [
+        ToolMessage(content=FIRST, name="duck_duck_web_search", tool_call_id="b"),
+        ToolMessage(content=FIRST, name="calculator", tool_call_id="c"),
+    ]
+    state = {"messages": [AIMessage(content=""), ToolMessage(content=FIRST, name="google_web_search",
+                                                             tool_call_id="a")]}
+
+    update = DedupToolNode(FakeToolNode(new))(state, {})
+
+    assert update["messages"][0].content == DUPLICATE_RESULT
+    assert update["messages"][0].tool_call_id == "b"
+    assert update["messages"][1].content == FIRST  # Only search/scrape results are deduplicated
+    assert update["dedup_chars_removed"] == len(FIRST) - len(DUPLICATE_RESULT)
+    assert update["dedup_tokens_removed"] == count_tokens(FIRST) - count_tokens(DUPLICATE_RESULT)
+
+
+def test_dedup_node_keeps_a_per_run_index(monkeypatch):
+    first = [ToolMessage(content=FIRST, name="google_web_search", tool_call_id="a")]
+    state = {"messages": [AIMessage(content="")], "run_id": "dedup-run", "query": "q",
+             "tool_message_count": 0}
+    node = DedupToolNode(FakeToolNode(first))
+    node(state, {})
+
+    # The next step hashes only its own results, not the history
+    hashed = []
+    signature = node.deduplicator.hasher.signature
+    monkeypatch.setattr(node.deduplicator.hasher, "signature", lambda text: hashed.append(text) or signature(text))
+    node.tool_node = FakeToolNode([ToolMessage(content=FIRST, name="duck_duck_web_search", tool_call_id="b")])
+    state = {**state, "messages": state["messages"] + first, "tool_message_count": 1}
+    update = node(state, {})
+
+    assert update["messages"][0].content == DUPLICATE_RESULT
+    assert len(hashed) == len([s for s in split_sentences(FIRST) if len(s) >= 30])
+
+    # A state the index doesn't match (e.g. another process ran the last step) is rebuilt
+    hashed.clear()
+    node(state, {})
+    assert len(hashed) > len([s for s in split_sentences(FIRST) if len(s) >= 30])
@@ -0,0 +1,82 @@
+"""
+Tests for the BM25 evidence index
+"""
+
+from langchain_core.messages import AIMessage, ToolMessage
+
+from app.agent.evidence import (
+    EvidenceIndex, EvidenceToolNode, build_evidence_index, extract_evidence, get_evidence_index,
+    select_evidence
+)
+from app.agent.tokens import count_tokens
+
+PAGE = (
+    "Webpage Content : \nHome | Products | Docs | Blog\nThe State of AI Agents in 2025\n"
+    "LangGraph 1.0 reached general availability in October 2025. "
+    "Many teams said they were still evaluating which framework fits their needs."
+)
+SNIPPETS = (
+    "Python 3.14.0 was released on October 7, 2025 with an officially supported free-threaded build. "
+    "The Rust compiler gained a new borrow checker implementation in nightly builds. "
+    "Template string literals landed in Python 3.14 as PEP 750."
+)
+
+
+def test_extracts_scraped_page_with_title_source_and_claims():
+    [passage] = extract_evidence("web_scrape", {"url": "https://example.org/agents"}, PAGE)
+
+    assert passage["source"] == "https://example.org/agents"
+    assert passage["title"] == "The State of AI Agents in 2025"
+    assert passage["snippet"].startswith("LangGraph 1.0")
+    assert passage["claims"] == ("LangGraph 1.0 reached general availability in October 2025.",)
+
+
+def test_no_results_yield_no_evidence():
+    assert extract_evidence("google_web_search", {"query": "x"}, "No good Google Search Result was found") == []
+
+
+def test_bm25_ranks_relevant_passages_first():
+    index = EvidenceIndex()
+    for sentence in SNIPPETS.split(". "):
+        index.add("google_web_search: python", "python", sentence)
+    index.add("google_web_search: python", "python", SNIPPETS.split(". ")[0])  # Repeat is ignored
+
+    hits = index.search("When was Python 3.14 released?", k=2)
+
+    assert len(index) == 3
+    assert [hit.snippet[:12] for hit in hits] == ["Python 3.14.", "Template str"]
+    assert hits[0].score > hits[1].score > 0
+
+
+def tool_state(run_id=""):
+    call = {"id": "c1", "name": "google_web_search", "args": {"query": "python 3.14"}}
+    return {"run_id": run_id, "query": "When was Python 3.14 released?",
+            "messages": [AIMessage(content="", tool_calls=[call])]}
+
+
+class FakeToolNode:
+    def invoke(self, state, config=None):
+        return {"messages": [ToolMessage(content=SNIPPETS, name="google_web_search", tool_call_id="c1")]}
+
+
+def test_tool_node_indexes_results_per_run():
+    state = tool_state("run-evidence-test")
+    update = EvidenceToolNode(FakeToolNode())(state, {})
+
+    index = get_evidence_index("run-evidence-test")
+    assert len(index) == 1
+    assert index.sources[0] == "google_web_search: python 3.14"
+    # Rebuilding from the messages gives the same passages
+    rebuilt = build_evidence_index(state["messages"] + update["messages"])
+    assert rebuilt.snippets == index.snippets
+
+
+def test_select_evidence_keeps_short_text_and_ranks_long_text():
+    state = tool_state()
+    state["messages"].append(ToolMessage(content=SNIPPETS, name="google_web_search", tool_call_id="c1"))
+
+    assert select_evidence(state, "short findings", max_tokens=100) == "short findings"
+    selected = select_evidence(state, "word " * 5000, max_tokens=100, k=3)
+    assert selected.startswith("[1] Python 3.14.0 was released")
+    assert "Source: google_web_search: python 3.14" in selected
+    assert count_tokens(selected) <= 100
@@ -0,0 +1,81 @@
+"""
+Tests for full-text search over research history
+"""
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database.db import init_db
+from app.database.models import Base, ResearchSession, User
+from app.search.full_text import fts5_match, search_research
+
+
+@pytest.fixture(params=["create_all", "migrations"])
+def db(request, tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'search.db'}")
+    if request.param == "create_all":
+        Base.metadata.create_all(bind=engine)
+    else:
+        init_db(engine)
+    with sessionmaker(bind=engine)() as session:
+        session.add_all([
+            User(id=1, username="quinn", email="quinn@test.com", hashed_password="x"),
+            User(id=2, username="robin", email="robin@test.com", hashed_password="x"),
+        ])
+        session.commit()
+        yield session
+    engine.dispose()
+
+
+def add(db, user_id, query, report=None):
+    session = ResearchSession(user_id=user_id, query=query, final_report=report, status="completed")
+    db.add(session)
+    db.commit()
+    return session
+
+
+def test_ranks_matches_and_highlights_snippets(db):
+    add(db, 1, "Electric vehicle batteries", "Battery prices fell sharply in 2025.")
+    best = add(db, 1, "LangGraph agents", "Supervisor agents route work between LangGraph workers.")
+    add(db, 1, "Agent frameworks compared", "CrewAI and AutoGen were compared with LangGraph.")
+
+    hits = search_research(db, 1, "langgraph agents")
+
+    assert [hit["id"] for hit in hits][0] == best.id
+    assert len(hits) == 2
+    assert "<mark>LangGraph</mark>" in hits[0]["snippet"]
+    assert hits[0]["score"] >= hits[1]["score"]
+
+
+def test_only_searches_own_research_and_paginates(db):
+    for i in range(5):
+        add(db, 1, f"Quantum computing question {i}")
+    add(db, 2, "Quantum computing for robin")
+
+    assert len(search_research(db, 1, "quantum", limit=3)) == 3
+    assert len(search_research(db, 1, "quantum", skip=3, limit=3)) == 2
+    assert [hit["query"] for hit in search_research(db, 2, "quantum")] == ["Quantum computing for robin"]
+
+
+def test_index_follows_updates_and_deletes(db):
+    session = add(db, 1, "Pending research")
+    assert search_research(db, 1, "photosynthesis") == []
+
+    session.final_report = "Photosynthesis converts light into chemical energy."
+    session.status = "completed"
+    db.commit()
+    assert [hit["id"] for hit in search_research(db, 1, "photosynthesis")] == [session.id]
+
+    db.delete(session)
+    db.commit()
+    assert search_research(db, 1, "photosynthesis") == []
+
+
+def test_user_input_is_not_fts_syntax(db):
+    add(db, 1, "Rust AND Go", "Comparing Rust and Go.")
+
+    assert fts5_match(1, '"); DROP --') == '''owner:"u1" AND {query final_report}: ("DROP")'''
+    assert fts5_match(1, "*** ---") == ""
+    assert search_research(db, 1, 'rust AND "go') != []
+    assert search_research(db, 1, "***") == []
@@ -128,3 +128,41 @@ def test_final_report_non_empty():
 
     assert isinstance(res["final_report"], str)
     assert len(res["final_report"]) > 0
+
+
+# ===========================================
+# PARALLEL MODE
+# ===========================================
+
+def test_planner_parses_sub_questions():
+    from app.agent.agents import PlannerAgent
+
+    class PlanLLM(MockLLM):
+        def invoke(self, messages):
+            return AIMessage(content="1. First sub-question?\n- Second sub-question?\n\n2) first SUB-question?\n3. Third one?")
+
+    planner = PlannerAgent(PlanLLM(), max_branches=2)
+
+    assert planner({"query": "Test query"})["sub_questions"] == ["First sub-question?", "Second sub-question?"]
+
+
+def test_planner_falls_back_to_query():
+    from app.agent.agents import PlannerAgent
+
+    class EmptyLLM(MockLLM):
+        def invoke(self, messages):
+            return AIMessage(content="")
+
+    assert PlannerAgent(EmptyLLM())({"query": "Test query"})["sub_questions"] == ["Test query"]
+
+
+def test_merge_keeps_planner_order():
+    from app.agent.router import merge_research_data
+
+    merged = merge_research_data({"branch_findings": [
+        {"index": 1, "query": "B?", "findings": "about b", "iterations": 2},
+        {"index": 0, "query": "A?", "findings": "about a", "iterations": 1},
+    ]})
+
+    assert merged["research_data"] == "## A?\n\nabout a\n\n## B?\n\nabout b"
+    assert merged["iteration"] == 3
@@ -0,0 +1,84 @@
+"""
+Tests for the incremental message indexes kept in state
+"""
+
+import os
+
+from langchain_core.messages import AIMessage, ToolMessage
+
+from app.agent.indexes import (
+    IndexedToolNode, agent_output, index_updates, initial_indexes, recent_tool_results, tool_message_count
+)
+from app.agent.router import extract_agent_output, recent_tool_output
+from app.agent.state import TOOL_RESULT_BUFFER, keep_recent
+from app.agent.tools import my_tools
+from benchmarks.bench_graph import FIXTURES_DIR, build_graph, initial_state
+from benchmarks.replay import build_replay_components, load_fixture
+
+# Copied at import: test_graph replaces the list's contents with mock tools
+TOOLS = list(my_tools)
+SUMMARY = "The researcher found that agent frameworks matured considerably during 2025."
+
+
+def test_index_updates_record_outputs_and_tool_results():
+    updates = index_updates([AIMessage(content=SUMMARY)], "Researcher")
+
+    assert updates == {"last_ai_output": SUMMARY, "agent_outputs": {"Researcher": SUMMARY}}
+    assert index_updates([AIMessage(content="short")], "Researcher") == {}
+
+    tools = [ToolMessage(content=f"r{i}", tool_call_id=str(i)) for i in range(2)]
+    assert index_updates(tools) == {"recent_tool_results": ["r0", "r1"], "tool_message_count": 2}
+
+
+def test_ring_buffer_keeps_recent_results():
+    buffer = keep_recent([], [str(i) for i in range(TOOL_RESULT_BUFFER)])
+
+    assert keep_recent(buffer, ["new"]) == [str(i) for i in range(1, TOOL_RESULT_BUFFER)] + ["new"]
+
+
+def test_readers_match_message_scan():
+    messages = [AIMessage(content=SUMMARY)] + [
+        ToolMessage(content=f"result {i}", tool_call_id=str(i)) for i in range(TOOL_RESULT_BUFFER + 2)
+    ]
+    scanned = {"messages": messages}
+    indexed = {"messages": messages, **initial_indexes()}
+    for message in messages:
+        update = index_updates([message], "Researcher")
+        indexed["agent_outputs"].update(update.get("agent_outputs", {}))
+        indexed["last_ai_output"] = update.get("last_ai_output", indexed["last_ai_output"])
+        indexed["recent_tool_results"] = keep_recent(
+            indexed["recent_tool_results"], update.get("recent_tool_results", [])
+        )
+        indexed["tool_message_count"] += update.get("tool_message_count", 0)
+
+    for state in (scanned, indexed):
+        assert agent_output(state, "Researcher") == SUMMARY
+        assert agent_output(state, "Fact-Checker") == SUMMARY  # Falls back to the latest output
+        assert tool_message_count(state) == TOOL_RESULT_BUFFER + 2
+        assert recent_tool_results(state, 3) == [f"result {i}" for i in range(9, 12)]
+        # More than the buffer holds
+        assert len(recent_tool_results(state, TOOL_RESULT_BUFFER + 1)) == TOOL_RESULT_BUFFER + 1
+    assert recent_tool_output(indexed, limit=2) == "result 10\n\n---\n\nresult 11"
+
+
+def test_indexed_tool_node_counts_results():
+    class FakeToolNode:
+        def invoke(self, state, config=None):
+            return {"messages": [ToolMessage(content="found", tool_call_id="a")]}
+
+    update = IndexedToolNode(FakeToolNode())({"messages": []}, {})
+
+    assert update["recent_tool_results"] == ["found"]
+    assert update["tool_message_count"] == 1
+
+
+def test_graph_keeps_indexes_current():
+    fixture = load_fixture(os.path.join(FIXTURES_DIR, "ai_agents_2025.json"))
+    llms, tools, _ = build_replay_components(fixture, TOOLS, latency_scale=0)
+    result = build_graph(llms, tools).invoke(initial_state(fixture))
+
+    tool_results = [m.content for m in result["messages"] if isinstance(m, ToolMessage)]
+    assert result["tool_message_count"] == len(tool_results)
+    assert result["recent_tool_results"] == tool_results[-TOOL_RESULT_BUFFER:]
+    assert result["agent_outputs"]["Summarizer"] == result["final_report"]
+    assert extract_agent_output(result, "Summarizer") == result["final_report"]
@@ -0,0 +1,405 @@
+"""
+Tests for the research job queue, result cache and shared (SQL) rate limits
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api.rate_limit import MemoryRateLimitBackend, ResearchLimiter, SQLRateLimitBackend
+from app.database.models import Base, ResearchSession, User
+from app.jobs import queue, runner
+from app.jobs.batches import batch_status_counts, create_batch, has_active_batch
+from app.jobs.result_cache import MemoryResultCache, SQLResultCache, cache_key
+from app.jobs import worker as worker_module
+from app.jobs.worker import ResearchWorker
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    # A file database so sessions on several threads see each other's commits
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'jobs.db'}", connect_args={"check_same_thread": False}
+    )
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(bind=engine, autoflush=False)
+    engine.dispose()
+
+
+@pytest.fixture
+def user_id(session_factory):
+    with session_factory() as db:
+        user = User(username="quinn", email="quinn@test.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        return user.id
+
+
+def enqueue(session_factory, user_id, query="Queued research question"):
+    with session_factory() as db:
+        job = ResearchSession(user_id=user_id, query=query, status="pending", max_iterations=1)
+        db.add(job)
+        db.commit()
+        return job.id
+
+
+# =============================================
+# TEST claim / lease
+# =============================================
+
+def test_each_job_is_claimed_once(session_factory, user_id):
+    job_ids = {enqueue(session_factory, user_id, f"Question number {i}") for i in range(5)}
+    claimed, lock = [], threading.Lock()
+
+    def claim_all(worker_id):
+        with session_factory() as db:
+            while (job := queue.claim_next(db, worker_id, lease_seconds=60)) is not None:
+                with lock:
+                    claimed.append(job.id)
+
+    threads = [threading.Thread(target=claim_all, args=(f"w{i}",)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(claimed) == sorted(job_ids)
+
+
+def test_only_lease_owner_can_complete(session_factory, user_id):
+    job_id = enqueue(session_factory, user_id)
+    with session_factory() as db:
+        queue.claim_next(db, "owner", lease_seconds=60)
+
+        assert not queue.complete_job(db, job_id, "intruder", {"final_report": "x"})
+        assert queue.complete_job(db, job_id, "owner", {"final_report": "done"})
+        assert db.get(ResearchSession, job_id).status == "completed"
+
+
+def test_expired_lease_fails_job_without_rerun(session_factory, user_id):
+    job_id = enqueue(session_factory, user_id)
+    with session_factory() as db:
+        queue.claim_next(db, "dead-worker", lease_seconds=60)
+        db.query(ResearchSession).update(
+            {"lease_expires_at": datetime.now() - timedelta(seconds=1)}
+        )
+        db.commit()
+
+        assert queue.reap_expired_leases(db) == 1
+        assert queue.claim_next(db, "other", lease_seconds=60) is None
+        assert not queue.complete_job(db, job_id, "dead-worker", {"final_report": "late"})
+        job = db.get(ResearchSession, job_id)
+        db.refresh(job)
+        assert job.status == "failed"
+
+
+def test_worker_runs_job(session_factory, user_id, monkeypatch):
+    job_id = enqueue(session_factory, user_id)
+    monkeypatch.setattr(runner, "get_result_cache", lambda: None)
+    monkeypatch.setattr(worker_module, "find_prior_research", lambda db, user_id, query: "")
+    monkeypatch.setattr(runner, "research", lambda query, max_iterations, mode, prior_research, cancel_token=None: {
+        "research_data": "data", "verified_facts": "facts",
+        "final_report": f"report on {query}", "iteration": max_iterations,
+    })
+    worker = ResearchWorker(session_factory, lease_seconds=60, poll_seconds=0)
+
+    assert worker.run_once() is True
+    assert worker.run_once() is False
+    with session_factory() as db:
+        job = db.get(ResearchSession, job_id)
+        assert job.status == "completed"
+        assert job.final_report == "report on Queued research question"
+        assert job.agent_iterations == 1
+        assert job.lease_owner is None
+
+
+def test_worker_marks_failed_runs(session_factory, user_id, monkeypatch):
+    job_id = enqueue(session_factory, user_id)
+    monkeypatch.setattr(runner, "get_result_cache", lambda: None)
+    monkeypatch.setattr(worker_module, "find_prior_research", lambda db, user_id, query: "")
+
+    def broken(query, max_iterations, mode, prior_research, cancel_token=None):
+        raise RuntimeError("LLM unavailable")
+
+    monkeypatch.setattr(runner, "research", broken)
+    ResearchWorker(session_factory, lease_seconds=60, poll_seconds=0).run_once()
+
+    with session_factory() as db:
+        assert db.get(ResearchSession, job_id).status == "failed"
+
+
+def test_count_active_jobs(session_factory, user_id):
+    enqueue(session_factory, user_id)
+    done = enqueue(session_factory, user_id)
+    with session_factory() as db:
+        db.get(ResearchSession, done).status = "completed"
+        db.commit()
+
+        assert queue.count_active_jobs(db, user_id) == 1
+
+
+# =============================================
+# TEST batches
+# =============================================
+
+BATCH = ["Question one", "Question two", "Question  one", "Question three"]
+
+
+def fake_research(query, max_iterations, mode, prior_research, cancel_token=None):
+    return {"research_data": "", "verified_facts": "", "final_report": f"report on {query}", "iteration": 1}
+
+
+def test_batch_runs_repeated_queries_once(session_factory, user_id):
+    with session_factory() as db:
+        batch = create_batch(db, user_id, BATCH, 1, "serial", max_concurrent=4)
+
+        assert batch_status_counts(db, batch.id) == {"pending": 3, "waiting": 1}
+        assert has_active_batch(db, user_id)
+        assert queue.count_active_jobs(db, user_id) == 0  # Batches have their own limit
+
+        job = queue.claim_next(db, "w", lease_seconds=60)
+        assert job.query == "Question one"
+        queue.complete_job(db, job.id, "w", {"final_report": "shared"})
+        twins = db.query(ResearchSession).filter(ResearchSession.query == "Question one").all()
+        assert [(t.status, t.final_report) for t in twins] == [("completed", "shared")] * 2
+
+
+def test_batch_concurrency_limit(session_factory, user_id):
+    with session_factory() as db:
+        batch = create_batch(db, user_id, BATCH, 1, "serial", max_concurrent=2)
+    single = enqueue(session_factory, user_id)
+
+    with session_factory() as db:
+        claimed = [queue.claim_next(db, f"w{i}", lease_seconds=60) for i in range(3)]
+        # The full batch doesn't hold up jobs queued after it
+        assert [job.batch_id for job in claimed] == [batch.id, batch.id, None]
+        assert claimed[2].id == single
+        assert queue.claim_next(db, "w3", lease_seconds=60) is None
+
+        queue.fail_job(db, claimed[0].id, "w0")
+        assert batch_status_counts(db, batch.id) == {"failed": 2, "processing": 1, "pending": 1}
+        assert queue.claim_next(db, "w4", lease_seconds=60).batch_id == batch.id
+
+
+def test_waiting_rows_without_a_twin_are_reaped(session_factory, user_id):
+    with session_factory() as db:
+        batch = create_batch(db, user_id, BATCH, 1, "serial", max_concurrent=2)
+        first = db.query(ResearchSession).filter(ResearchSession.query == "Question one").first()
+        db.delete(first)
+        db.commit()
+
+        queue.reap_expired_leases(db)
+        assert batch_status_counts(db, batch.id) == {"pending": 2, "failed": 1}
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return condition()
+
+
+def test_batch_workers_run_only_batch_jobs(session_factory, user_id, monkeypatch):
+    monkeypatch.setattr(runner, "get_result_cache", lambda: None)
+    monkeypatch.setattr(worker_module, "find_prior_research", lambda db, user_id, query: "")
+    monkeypatch.setattr(runner, "research", fake_research)
+    with session_factory() as db:
+        batch = create_batch(db, user_id, BATCH, 1, "serial", max_concurrent=2)
+    other = enqueue(session_factory, user_id)
+
+    workers = worker_module.start_workers(2, session_factory, batches_only=True)
+    try:
+        assert wait_for(lambda: not has_active_batch(session_factory(), user_id))
+    finally:
+        worker_module.stop_workers(workers, 10)
+
+    with session_factory() as db:
+        assert batch_status_counts(db, batch.id) == {"completed": 4}
+        assert db.get(ResearchSession, other).status == "pending"  # Not part of the batch
+
+
+def test_batch_jobs_take_their_users_concurrency_slots(session_factory, user_id, monkeypatch):
+    monkeypatch.setattr(runner, "get_result_cache", lambda: None)
+    monkeypatch.setattr(worker_module, "find_prior_research", lambda db, user_id, query: "")
+    monkeypatch.setattr(runner, "research", fake_research)
+    with session_factory() as db:
+        busy = create_batch(db, user_id, BATCH, 1, "serial", max_concurrent=4)
+        other_user = User(username="riley", email="riley@test.com", hashed_password="x")
+        db.add(other_user)
+        db.commit()
+        free = create_batch(db, other_user.id, BATCH, 1, "serial", max_concurrent=4)
+        busy_id, free_id = busy.id, free.id
+
+    limiter = ResearchLimiter(MemoryRateLimitBackend(), rate_per_minute=0, burst=1,
+                              max_concurrent=1, slot_ttl=60)
+    inline_slot = limiter.acquire(user_id)  # An inline request of the first user is running
+    worker = ResearchWorker(session_factory, batches_only=True, limiter=limiter)
+
+    # The first user's job is put back untouched; the other user's three run
+    for _ in range(4):
+        assert worker.run_once() is True
+    assert worker.run_once() is False
+    with session_factory() as db:
+        assert batch_status_counts(db, busy_id) == {"pending": 3, "waiting": 1}
+        assert batch_status_counts(db, free_id) == {"completed": 4}
+        assert db.query(ResearchSession).filter(ResearchSession.started_at.isnot(None),
+                                                ResearchSession.batch_id == busy_id).count() == 0
+
+    limiter.release(user_id, inline_slot)
+    while worker.run_once():
+        pass
+    with session_factory() as db:
+        assert batch_status_counts(db, busy_id) == {"completed": 4}
+    assert limiter.backend.acquire_slot(str(user_id), 1, 60) is not None  # Slots were given back
+
+
+# =============================================
+# TEST cancellation
+# =============================================
+
+def test_cancel_job(session_factory, user_id):
+    job_id = enqueue(session_factory, user_id)
+    with session_factory() as db:
+        job = queue.claim_next(db, "w", lease_seconds=60)
+
+        assert queue.cancel_job(db, job.id) is True
+        assert queue.cancel_job(db, job.id) is False
+        db.refresh(job)
+        assert (job.status, job.lease_owner) == ("cancelled", None)
+        assert queue.complete_job(db, job_id, "w", {"final_report": "late"}) is False
+
+
+def test_cancelled_batch_job_hands_run_to_waiting_twin(session_factory, user_id):
+    with session_factory() as db:
+        batch = create_batch(db, user_id, BATCH, 1, "serial", max_concurrent=4)
+        first, twin = db.query(ResearchSession).filter(ResearchSession.query == "Question one")\
+            .order_by(ResearchSession.id).all()
+
+        queue.cancel_job(db, first.id)
+        db.refresh(twin)
+        assert twin.status == "pending"
+        assert batch_status_counts(db, batch.id) == {"cancelled": 1, "pending": 3}
+
+
+def test_worker_stops_cancelled_run(session_factory, user_id, monkeypatch):
+    job_id = enqueue(session_factory, user_id)
+    monkeypatch.setattr(runner, "get_result_cache", lambda: None)
+    monkeypatch.setattr(worker_module, "find_prior_research", lambda db, user_id, query: "")
+    monkeypatch.setattr(worker_module.settings, "RESEARCH_CANCEL_POLL_SECONDS", 0.01)
+    started = threading.Event()
+
+    def slow_research(query, max_iterations, mode, prior_research, cancel_token=None):
+        started.set()
+        while True:
+            cancel_token.check()
+            time.sleep(0.01)
+
+    monkeypatch.setattr(runner, "research", slow_research)
+    worker = ResearchWorker(session_factory, lease_seconds=60, poll_seconds=0)
+    thread = threading.Thread(target=worker.run_once)
+    thread.start()
+    assert started.wait(5)
+    with session_factory() as db:
+        queue.cancel_job(db, job_id)
+    thread.join(5)
+
+    assert not thread.is_alive()
+    with session_factory() as db:
+        assert db.get(ResearchSession, job_id).status == "cancelled"
+
+
+# =============================================
+# TEST result cache
+# =============================================
+
+def test_cache_key_ignores_case_and_whitespace():
+    assert cache_key("AI  agents 2025", 2) == cache_key(" ai agents 2025 ", 2)
+    assert cache_key("AI agents 2025", 2) != cache_key("AI agents 2025", 3)
+
+
+@pytest.mark.parametrize("make_cache", [
+    lambda factory: MemoryResultCache(),
+    lambda factory: SQLResultCache(factory),
+])
+def test_result_cache_round_trip_and_expiry(session_factory, make_cache):
+    cache = make_cache(session_factory)
+    cache.set("k", {"final_report": "cached"}, ttl=60)
+
+    assert cache.get("k") == {"final_report": "cached"}
+    assert cache.get("missing") is None
+
+    cache.set("k", {"final_report": "stale"}, ttl=-1)
+    assert cache.get("k") is None
+
+
+def test_runner_reuses_cached_result(monkeypatch):
+    calls = []
+    monkeypatch.setattr(runner, "get_result_cache", lambda cache=MemoryResultCache(): cache)
+    monkeypatch.setattr(runner.settings, "RESULT_CACHE_TTL_SECONDS", 60)
+
+    def fake_research(query, max_iterations, mode, prior_research, cancel_token=None):
+        calls.append(query)
+        return {"research_data": "", "verified_facts": "", "final_report": "report", "iteration": 1}
+
+    monkeypatch.setattr(runner, "research", fake_research)
+    first = runner.run_research("Same question", 1)
+    second = runner.run_research("same  question", 1)
+
+    assert calls == ["Same question"]
+    assert second["final_report"] == first["final_report"]
+    assert second["processing_time"] == 0
+
+
+def test_runner_does_not_share_results_built_on_prior_research(monkeypatch):
+    calls = []
+    monkeypatch.setattr(runner, "get_result_cache", lambda cache=MemoryResultCache(): cache)
+    monkeypatch.setattr(runner.settings, "RESULT_CACHE_TTL_SECONDS", 60)
+
+    def fake_research(query, max_iterations, mode, prior_research, cancel_token=None):
+        calls.append(prior_research)
+        return {"research_data": "", "verified_facts": "", "final_report": f"report on {prior_research}",
+                "iteration": 1}
+
+    monkeypatch.setattr(runner, "research", fake_research)
+    first = runner.run_research("Same question", 1, prior_research="User A's private report")
+    second = runner.run_research("Same question", 1, prior_research="User B's report")
+    again = runner.run_research("Same question", 1, prior_research="User A's private report")
+
+    assert calls == ["User A's private report", "User B's report"]
+    assert "User A" not in second["final_report"]
+    assert again["final_report"] == first["final_report"]
+
+
+# =============================================
+# TEST SQLRateLimitBackend
+# =============================================
+
+def test_sql_token_bucket(session_factory):
+    backend = SQLRateLimitBackend(session_factory)
+
+    assert backend.take_token("u", rate_per_sec=0.01, capacity=2) == 0
+    assert backend.take_token("u", rate_per_sec=0.01, capacity=2) == 0
+    assert backend.take_token("u", rate_per_sec=0.01, capacity=2) > 0
+    assert backend.take_token("other", rate_per_sec=0.01, capacity=2) == 0
+
+
+def test_sql_slots_limit_and_release(session_factory):
+    backend = SQLRateLimitBackend(session_factory)
+    first = backend.acquire_slot("u", limit=1, ttl=60)
+
+    assert first is not None
+    assert backend.acquire_slot("u", limit=1, ttl=60) is None
+
+    backend.release_slot("u", first)
+    assert backend.acquire_slot("u", limit=1, ttl=60) is not None
+
+
+def test_sql_slots_expire(session_factory):
+    backend = SQLRateLimitBackend(session_factory)
+    backend.acquire_slot("u", limit=1, ttl=-1)
+
+    assert backend.acquire_slot("u", limit=1, ttl=60) is not None
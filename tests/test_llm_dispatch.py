@@ -0,0 +1,145 @@
+"""
+Tests for metered LLM calls, micro-batching and static prompt prefixes
+"""
+
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from app.agent.agents import FACT_CHECKER_PROMPT, SUMMARIZER_PROMPT, FactCheckerAgent, SummarizerAgent
+from app.agent.llm_dispatch import DispatchingLLM, LLMStats, MicroBatcher
+
+
+class EchoModel:
+    """Answers with the text of the last message; records batch() sizes"""
+
+    def __init__(self, fail_on=None):
+        self.batches = []
+        self.fail_on = fail_on
+
+    def reply(self, messages):
+        text = messages[-1].content
+        if text == self.fail_on:
+            raise ValueError(f"cannot answer {text}")
+        return AIMessage(content=f"re: {text}", usage_metadata={
+            "input_tokens": 100, "output_tokens": 5, "total_tokens": 105,
+            "input_token_details": {"cache_read": 60},
+        })
+
+    def invoke(self, messages, config=None, **kwargs):
+        return self.reply(messages)
+
+    def batch(self, inputs, config=None, return_exceptions=False, **kwargs):
+        self.batches.append(len(inputs))
+        outputs = []
+        for messages in inputs:
+            try:
+                outputs.append(self.reply(messages))
+            except Exception as exc:
+                if not return_exceptions:
+                    raise
+                outputs.append(exc)
+        return outputs
+
+    def bind_tools(self, tools, **kwargs):
+        return EchoModel(self.fail_on)
+
+
+def call_concurrently(llm, texts):
+    results, barrier = {}, threading.Barrier(len(texts))
+
+    def call(text):
+        barrier.wait()
+        try:
+            results[text] = llm.invoke([HumanMessage(content=text)]).content
+        except ValueError as exc:
+            results[text] = exc
+
+    threads = [threading.Thread(target=call, args=(text,)) for text in texts]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_calls_share_batches_and_get_their_own_results():
+    model, stats = EchoModel(), LLMStats()
+    llm = DispatchingLLM(model, MicroBatcher(window_seconds=0.5, max_size=3, stats=stats), stats)
+    texts = [f"question {i}" for i in range(7)]
+
+    results = call_concurrently(llm, texts)
+
+    assert results == {text: f"re: {text}" for text in texts}
+    snapshot = stats.snapshot()
+    assert sum(size * count for size, count in stats.batch_sizes.items()) == 7
+    assert snapshot["max_batch_size"] == 3
+    assert snapshot["batches"] <= 4
+    assert snapshot["calls"] == 7
+    assert snapshot["cache_hit_rate"] == 0.6
+
+
+def test_failures_stay_with_their_call():
+    stats = LLMStats()
+    llm = DispatchingLLM(EchoModel(fail_on="bad"), MicroBatcher(window_seconds=0.5, stats=stats), stats)
+
+    results = call_concurrently(llm, ["good", "bad"])
+
+    assert results["good"] == "re: good"
+    assert isinstance(results["bad"], ValueError)
+
+
+def test_different_tool_bindings_are_not_batched_together():
+    stats = LLMStats()
+    batcher = MicroBatcher(window_seconds=0.2, stats=stats)
+    llm = DispatchingLLM(EchoModel(), batcher, stats)
+    with_tools, plain = llm.bind_tools(["search"]), llm
+
+    barrier = threading.Barrier(2)
+    threads = [
+        threading.Thread(target=lambda model=model: (barrier.wait(), model.invoke([HumanMessage(content="x")])))
+        for model in (with_tools, plain)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert stats.batch_sizes == {1: 2}
+
+
+class RecordingLLM:
+    def __init__(self):
+        self.prompts = []
+
+    def invoke(self, messages):
+        self.prompts.append(messages)
+        return AIMessage(content="ok")
+
+    def bind_tools(self, tools):
+        return self
+
+
+@pytest.mark.parametrize("agent, system_prompt", [
+    (FactCheckerAgent(RecordingLLM(), []), FACT_CHECKER_PROMPT),
+    (SummarizerAgent(RecordingLLM()), SUMMARIZER_PROMPT),
+])
+def test_prompts_start_with_a_static_prefix(agent, system_prompt):
+    for query in ("First question?", "Another topic"):
+        agent({"query": query, "research_data": f"Findings about {query} " * 5, "messages": []})
+
+    first, second = agent.llm.prompts
+    assert first[0] == second[0] == SystemMessage(content=system_prompt)
+    assert 'Query: "First question?"' in first[-1].content
+    assert 'Query: "Another topic"' in second[-1].content
+
+
+def test_llm_metrics_endpoint():
+    from app.main import app
+
+    response = TestClient(app).get("/health/llm")
+
+    assert response.status_code == 200
+    assert {"calls", "cache_hit_rate", "mean_batch_size", "batch_sizes"} <= set(response.json())
@@ -0,0 +1,98 @@
+"""
+Tests for database migrations and startup schema check
+"""
+
+import threading
+
+import pytest
+from sqlalchemy import create_engine, inspect
+
+from alembic import command
+
+from app.database.db import (
+    init_db, get_schema_revision, get_alembic_config, BASELINE_REVISION, SchemaOutOfDate
+)
+from app.database.models import Base
+
+
+@pytest.fixture
+def engine(tmp_path):
+    eng = create_engine(f"sqlite:///{tmp_path / 'migrations.db'}")
+    yield eng
+    eng.dispose()
+
+
+def test_init_db_migrates_fresh_database(engine):
+    init_db(engine)
+
+    current, head = get_schema_revision(engine)
+    assert current == head
+
+    tables = inspect(engine).get_table_names()
+    assert "users" in tables
+    assert "research_sessions" in tables
+
+
+def test_migrated_schema_matches_models(engine):
+    init_db(engine)
+    inspector = inspect(engine)
+
+    for table in Base.metadata.sorted_tables:
+        columns = {c["name"] for c in inspector.get_columns(table.name)}
+        assert columns == set(table.columns.keys()), table.name
+
+        indexes = {i["name"] for i in inspector.get_indexes(table.name)}
+        assert {i.name for i in table.indexes} <= indexes, table.name
+
+
+def test_init_db_is_noop_when_up_to_date(engine, capsys):
+    init_db(engine)
+    capsys.readouterr()
+
+    init_db(engine)
+    assert "up to date" in capsys.readouterr().out
+
+
+def test_init_db_adopts_legacy_create_all_schema(engine):
+    """Databases built by create_all get stamped, then upgraded"""
+    # Recreate the pre-migrations schema: revision 0001 without alembic_version
+    command.upgrade(get_alembic_config(engine), BASELINE_REVISION)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP TABLE alembic_version")
+
+    init_db(engine)
+
+    current, head = get_schema_revision(engine)
+    assert current == head
+    indexes = {i["name"] for i in inspect(engine).get_indexes("research_sessions")}
+    assert "ix_research_sessions_user_created" in indexes
+
+
+def test_init_db_without_migrate_only_checks(engine):
+    with pytest.raises(SchemaOutOfDate):
+        init_db(engine, migrate=False)
+    assert get_schema_revision(engine)[0] is None
+
+    init_db(engine)
+    init_db(engine, migrate=False)
+
+
+def test_concurrent_init_db_migrates_once(engine, capsys):
+    errors = []
+
+    def start():
+        try:
+            init_db(engine)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=start) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert capsys.readouterr().out.count("Migrating database schema") == 1
+    current, head = get_schema_revision(engine)
+    assert current == head
@@ -0,0 +1,146 @@
+"""
+Tests for per-user research rate limiting and concurrency quotas
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import rate_limit
+from app.api.rate_limit import (
+    MemoryRateLimitBackend,
+    RateLimitExceeded,
+    ResearchLimiter,
+    get_research_limiter,
+)
+from app.auth.security import create_access_token
+from app.main import app
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now[0])
+    return now
+
+
+def make_limiter(**overrides):
+    options = dict(rate_per_minute=60, burst=2, max_concurrent=0, slot_ttl=60)
+    options.update(overrides)
+    return ResearchLimiter(MemoryRateLimitBackend(), **options)
+
+
+# =============================================
+# TEST MemoryRateLimitBackend
+# =============================================
+
+def test_token_bucket_allows_burst_then_refills(clock):
+    backend = MemoryRateLimitBackend()
+
+    assert backend.take_token("u", rate_per_sec=1, capacity=2) == 0
+    assert backend.take_token("u", rate_per_sec=1, capacity=2) == 0
+    assert backend.take_token("u", rate_per_sec=1, capacity=2) == pytest.approx(1.0)
+
+    clock[0] += 1
+    assert backend.take_token("u", rate_per_sec=1, capacity=2) == 0
+
+
+def test_buckets_are_per_key(clock):
+    backend = MemoryRateLimitBackend()
+    backend.take_token("a", rate_per_sec=1, capacity=1)
+
+    assert backend.take_token("b", rate_per_sec=1, capacity=1) == 0
+
+
+def test_slots_limit_and_release(clock):
+    backend = MemoryRateLimitBackend()
+    first = backend.acquire_slot("u", limit=1, ttl=60)
+
+    assert first is not None
+    assert backend.acquire_slot("u", limit=1, ttl=60) is None
+
+    backend.release_slot("u", first)
+    assert backend.acquire_slot("u", limit=1, ttl=60) is not None
+
+
+def test_expired_slots_are_reclaimed(clock):
+    backend = MemoryRateLimitBackend()
+    backend.acquire_slot("u", limit=1, ttl=60)
+
+    clock[0] += 61
+    assert backend.acquire_slot("u", limit=1, ttl=60) is not None
+
+
+def test_idle_state_is_swept(clock):
+    backend = MemoryRateLimitBackend()
+    for user in range(100):
+        backend.take_token(f"user{user}", rate_per_sec=1, capacity=2)
+    backend.take_token("busy", rate_per_sec=0.01, capacity=2)
+    backend.acquire_slot("crashed", limit=1, ttl=30)  # Never released
+
+    clock[0] += backend.SWEEP_SECONDS
+    assert backend.take_token("busy", rate_per_sec=0.01, capacity=2) == 0
+
+    # Refilled buckets and expired slots are gone; a partly spent bucket stays
+    assert list(backend._buckets) == ["busy"]
+    assert backend._slots == {}
+    assert backend.take_token("busy", rate_per_sec=0.01, capacity=2) > 0
+    assert backend.take_token("user1", rate_per_sec=1, capacity=2) == 0
+
+
+# =============================================
+# TEST ResearchLimiter
+# =============================================
+
+def test_limiter_rate_limit_has_retry_after(clock):
+    limiter = make_limiter(rate_per_minute=6, burst=1)
+    limiter.acquire(1)
+
+    with pytest.raises(RateLimitExceeded) as exc:
+        limiter.acquire(1)
+    assert exc.value.retry_after == 10
+
+
+def test_limiter_concurrency_cap(clock):
+    limiter = make_limiter(burst=10, max_concurrent=1)
+    slot = limiter.acquire(1)
+
+    with pytest.raises(RateLimitExceeded):
+        limiter.acquire(1)
+
+    limiter.release(1, slot)
+    limiter.acquire(1)
+
+
+def test_rejected_by_rate_limit_frees_concurrency_slot(clock):
+    limiter = make_limiter(rate_per_minute=1, burst=1, max_concurrent=1)
+    limiter.release(1, limiter.acquire(1))
+
+    with pytest.raises(RateLimitExceeded):
+        limiter.acquire(1)
+    assert limiter.backend.acquire_slot("1", limit=1, ttl=60) is not None
+
+
+# =============================================
+# TEST POST /research enforcement
+# =============================================
+
+def test_research_endpoint_returns_429_with_retry_after(monkeypatch):
+    monkeypatch.setattr(rate_limit.settings, "AUTH_CLAIMS_ONLY", True)  # User exists only in the token
+    limiter = make_limiter(rate_per_minute=1, burst=1)
+    limiter.acquire(42)  # Bucket now empty for user 42
+    app.dependency_overrides[get_research_limiter] = lambda: limiter
+
+    token = create_access_token(data={
+        "sub": "ratelimited", "uid": 42, "email": "r@test.com", "active": True
+    })
+    try:
+        response = TestClient(app).post(
+            "/research/",
+            headers={"Authorization": f"Bearer {token}"},
+            json={"query": "Anything at all"},
+        )
+    finally:
+        del app.dependency_overrides[get_research_limiter]
+
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
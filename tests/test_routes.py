@@ -1,9 +1,17 @@
+import csv
+import gzip
+import io
+import json
+from datetime import datetime
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from app.main import app   # <-- your FastAPI app entrypoint
 from app.database.db import Base, get_db, DATABASE_URL
+from app.database.models import ResearchSession
+from app.search.vector_index import index_session
 
 # --- Test Database Setup ---
 # Use a separate SQLite DB for tests
@@ -74,6 +82,31 @@ def test_login(client, db):
     assert response.status_code == 200
     assert "access_token" in response.json()
 
+def test_refresh_token_flow(client):
+    client.post("/auth/register", json={
+        "username": "asad",
+        "email": "asad@test.com",
+        "password": "pass123"
+    })
+    login = client.post("/auth/login", json={
+        "username": "asad",
+        "password": "pass123"
+    }).json()
+    assert "refresh_token" in login
+
+    response = client.post("/auth/refresh", json={"refresh_token": login["refresh_token"]})
+    assert response.status_code == 200
+    refreshed = response.json()
+    assert refreshed["refresh_token"] != login["refresh_token"]
+
+    me = client.get("/auth/me", headers={"Authorization": f"Bearer {refreshed['access_token']}"})
+    assert me.status_code == 200
+    assert me.json()["username"] == "asad"
+
+    # Old refresh token was rotated out
+    response = client.post("/auth/refresh", json={"refresh_token": login["refresh_token"]})
+    assert response.status_code == 401
+
 def test_research_flow(client, token):
     response = client.post(
         "/research/",
@@ -90,3 +123,172 @@ def test_research_flow(client, token):
     assert "final_report" in data
     assert data["status"] == "completed"
 
+
+def test_queued_research_returns_pending(client, token, monkeypatch):
+    from app.api import research_routes
+    monkeypatch.setattr(research_routes.settings, "RESEARCH_EXECUTION", "queue")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = client.post("/research/", headers=headers, json={"query": "Queued AI agents"})
+    assert response.status_code == 202
+    assert response.json()["status"] == "pending"
+
+    # Polling returns the stored session until a worker picks it up
+    research_id = response.json()["id"]
+    response = client.get(f"/research/{research_id}", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["status"] == "pending"
+
+
+def test_cancel_research(client, token, db, monkeypatch):
+    from app.api import research_routes
+    from app.api.rate_limit import enforce_research_quota
+    monkeypatch.setattr(research_routes.settings, "RESEARCH_EXECUTION", "queue")
+    monkeypatch.setattr(research_routes.settings, "RESEARCH_MAX_CONCURRENT", 0)
+    monkeypatch.setitem(app.dependency_overrides, enforce_research_quota, lambda: None)
+    headers = {"Authorization": f"Bearer {token}"}
+    research_id = client.post("/research/", headers=headers, json={"query": "Cancelled research"}).json()["id"]
+
+    response = client.post(f"/research/{research_id}/cancel", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["status"] == "cancelled"
+    assert client.post(f"/research/{research_id}/cancel", headers=headers).status_code == 200
+    assert client.post("/research/999999/cancel", headers=headers).status_code == 404
+
+    finished = client.post("/research/", headers=headers, json={"query": "Finished research"}).json()["id"]
+    db.get(ResearchSession, finished).status = "completed"
+    db.commit()
+    assert client.post(f"/research/{finished}/cancel", headers=headers).status_code == 409
+
+
+def test_delete_cancels_running_research(client, token, db, monkeypatch):
+    from app.api import research_routes
+    from app.api.rate_limit import enforce_research_quota
+    monkeypatch.setattr(research_routes.settings, "RESEARCH_EXECUTION", "queue")
+    monkeypatch.setattr(research_routes.settings, "RESEARCH_MAX_CONCURRENT", 0)
+    monkeypatch.setitem(app.dependency_overrides, enforce_research_quota, lambda: None)
+    headers = {"Authorization": f"Bearer {token}"}
+    research_id = client.post("/research/", headers=headers, json={"query": "Deleted research"}).json()["id"]
+    cancelled = []
+    monkeypatch.setattr(research_routes, "cancel_local", cancelled.append)
+
+    assert client.delete(f"/research/{research_id}", headers=headers).status_code == 200
+    assert cancelled == [research_id]
+    assert client.get(f"/research/{research_id}", headers=headers).status_code == 404
+
+
+def test_delete_research_with_queued_webhook(client, token, db, monkeypatch):
+    from app.api import research_routes
+    from app.api.rate_limit import enforce_research_quota
+    from app.database.models import WebhookDelivery
+    monkeypatch.setattr(research_routes.settings, "RESEARCH_EXECUTION", "queue")
+    monkeypatch.setattr(research_routes.settings, "RESEARCH_MAX_CONCURRENT", 0)
+    monkeypatch.setitem(app.dependency_overrides, enforce_research_quota, lambda: None)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    research_id = client.post("/research/", headers=headers, json={
+        "query": "Deleted webhook research", "callback_url": "https://example.com/hook"
+    }).json()["id"]
+    # Deleting cancels the pending job, which queues its research.cancelled webhook
+    assert client.delete(f"/research/{research_id}", headers=headers).status_code == 200
+    assert db.query(WebhookDelivery).filter(WebhookDelivery.research_id == research_id).count() == 0
+
+
+def test_similar_research(client, token, db, monkeypatch):
+    from app.api import research_routes
+    monkeypatch.setattr(research_routes.settings, "RESEARCH_EXECUTION", "queue")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = client.post("/research/", headers=headers,
+                           json={"query": "Similar LangGraph agents"})
+    research_id = response.json()["id"]
+    session = db.get(ResearchSession, research_id)
+    session.status, session.completed_at = "completed", datetime.utcnow()
+    session.final_report = "LangGraph supervisor agents route work between research agents"
+    db.commit()
+    index_session(db, session)  # As the worker does when the job completes
+
+    response = client.get("/research/similar", headers=headers, params={"query": "LangGraph supervisor agents"})
+    assert response.status_code == 200
+    assert response.json()[0]["id"] == research_id
+
+    response = client.get("/research/similar", headers=headers, params={"research_id": research_id})
+    assert all(item["id"] != research_id for item in response.json())
+    assert client.get("/research/similar", headers=headers).status_code == 422
+
+
+def test_search_research(client, token, db):
+    headers = {"Authorization": f"Bearer {token}"}
+    user_id = client.get("/auth/me", headers=headers).json()["id"]
+    db.add(ResearchSession(user_id=user_id, query="Searchable photosynthesis research", status="completed",
+                           final_report="Photosynthesis converts light into chemical energy."))
+    db.commit()
+
+    response = client.get("/research/search", headers=headers, params={"q": "photosynthesis"})
+    assert response.status_code == 200
+    assert response.json()[0]["query"] == "Searchable photosynthesis research"
+    assert client.get("/research/search", headers=headers, params={"q": "photosynthesis", "skip": 1}).json() == []
+
+
+def test_research_batch(client, token, monkeypatch):
+    from app.api import research_routes
+    from app.api.rate_limit import enforce_research_rate
+    monkeypatch.setitem(app.dependency_overrides, enforce_research_rate, lambda: None)
+    headers = {"Authorization": f"Bearer {token}"}
+    queries = ["Batch question one", "Batch question two", "Batch question one"]
+
+    response = client.post("/research/batch", headers=headers, json={"queries": queries})
+    assert response.status_code == 202
+    batch = response.json()
+    assert (batch["total"], batch["pending"], batch["progress"], batch["done"]) == (3, 3, 0.0, False)
+    assert [item["status"] for item in batch["items"]] == ["pending", "pending", "waiting"]
+
+    # One unfinished batch per user
+    assert client.post("/research/batch", headers=headers, json={"queries": queries}).status_code == 429
+    assert client.get(f"/research/batch/{batch['id']}", headers=headers).json()["total"] == 3
+    assert client.get("/research/batch/999999", headers=headers).status_code == 404
+
+    monkeypatch.setattr(research_routes.settings, "RESEARCH_BATCH_MAX_SIZE", 2)
+    assert client.post("/research/batch", headers=headers, json={"queries": queries}).status_code == 422
+
+
+def test_export_research_history(client, token, db):
+    headers = {"Authorization": f"Bearer {token}"}
+    user_id = client.get("/auth/me", headers=headers).json()["id"]
+    db.add(ResearchSession(user_id=user_id, query="Exported research, with a comma", status="completed",
+                           final_report='Line one\nLine "two"', completed_at=datetime(2030, 1, 1)))
+    db.commit()
+
+    response = client.get("/research/export", headers=headers)
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert rows[-1]["final_report"] == 'Line one\nLine "two"'
+    assert rows[-1]["completed_at"] == "2030-01-01T00:00:00"
+    assert len(rows) == db.query(ResearchSession).filter(ResearchSession.user_id == user_id).count()
+
+    response = client.get("/research/export", headers=headers,
+                          params={"format": "csv", "compress": True, "since": "2029-12-31T00:00:00"})
+    assert 'filename="research_history.csv.gz"' in response.headers["content-disposition"]
+    rows = list(csv.DictReader(io.StringIO(gzip.decompress(response.content).decode())))
+    assert [row["query"] for row in rows] == ["Exported research, with a comma"]
+    assert rows[0]["final_report"] == 'Line one\nLine "two"'
+
+
+def test_callback_url_and_webhook_secret(client, token, db, monkeypatch):
+    from app.api import research_routes
+    from app.api.rate_limit import enforce_research_quota
+    monkeypatch.setattr(research_routes.settings, "RESEARCH_EXECUTION", "queue")
+    monkeypatch.setattr(research_routes.settings, "RESEARCH_MAX_CONCURRENT", 0)
+    monkeypatch.setitem(app.dependency_overrides, enforce_research_quota, lambda: None)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = client.post("/research/", headers=headers,
+                           json={"query": "Research with a webhook", "callback_url": "https://example.com/hook"})
+    assert response.status_code == 202
+    assert db.get(ResearchSession, response.json()["id"]).callback_url == "https://example.com/hook"
+    assert client.post("/research/", headers=headers,
+                       json={"query": "Research with a webhook", "callback_url": "not a url"}).status_code == 422
+
+    secret = client.get("/research/webhooks/secret", headers=headers).json()
+    assert secret["header"] == "X-Research-Signature"
+    assert len(secret["secret"]) == 64
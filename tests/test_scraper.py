@@ -0,0 +1,126 @@
+"""
+Tests for the streaming scraper, against a local HTTP server
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.agent import scraper
+from app.agent.scraper import ScrapeError, extract_main_content, scrape_page
+from app.agent.tokens import count_tokens
+from app.agent.tools import web_scrape
+
+ARTICLE = (
+    "Python 3.14 was released on October 7, 2025 with an officially supported free-threaded build. "
+    "Template string literals arrived as PEP 750, and the new interpreter is faster on most benchmarks."
+)
+PAGE = f"""<html><head><title>Python 3.14 released | Example News</title>
+<style>body {{ color: red }}</style><script>var tracking = "lots of script text here";</script></head>
+<body>
+<nav><ul><li><a href="/">Home</a></li><li><a href="/news">News</a></li></ul></nav>
+<div class="cookie-banner">We use cookies to improve your experience on this website, accept them all.</div>
+<article><h1>Python 3.14 released</h1><p>{ARTICLE}<p>Second paragraph with &amp; entities and more detail.</article>
+<div class="related"><a href="/a">Another story about something else entirely on this site</a></div>
+<footer>Copyright 2025 Example News. All rights reserved worldwide.</footer>
+</body></html>"""
+
+
+def test_extracts_article_without_boilerplate():
+    title, text = extract_main_content(PAGE)
+
+    assert title == "Python 3.14 released | Example News"
+    assert text.startswith("Python 3.14 released\n" + ARTICLE)
+    assert "Second paragraph with & entities" in text
+    for boilerplate in ("Home", "cookies", "tracking", "Another story", "Copyright"):
+        assert boilerplate not in text
+
+
+def test_without_main_element_drops_link_heavy_and_short_blocks():
+    html = ("<div><a href='/x'>Products and services for every customer we have</a></div>"
+            "<div>Menu</div><p>" + ARTICLE + "</p>")
+
+    assert extract_main_content(html)[1] == ARTICLE
+
+
+def test_text_is_cut_at_a_word_boundary():
+    text = extract_main_content(f"<p>{ARTICLE}</p>", max_chars=50)[1]
+
+    assert len(text) <= 50
+    assert ARTICLE.startswith(text + " ")
+
+
+@pytest.fixture
+def server():
+    """Local server; routes maps path -> (content type, body bytes, extra headers)"""
+    routes, served = {}, {}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            content_type, body, headers = routes[self.path]
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            served[self.path] = 0
+            try:
+                for start in range(0, len(body), 4096):
+                    self.wfile.write(body[start:start + 4096])
+                    served[self.path] += 4096
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # The client stopped reading
+
+        def log_message(self, *args):
+            pass
+
+    http = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=http.serve_forever, daemon=True).start()
+    http.url = f"http://127.0.0.1:{http.server_address[1]}"
+    http.routes, http.served = routes, served
+    yield http
+    http.shutdown()
+
+
+def test_scrape_page_streams_and_decodes(server):
+    server.routes["/page"] = ("text/html; charset=utf-8", PAGE.replace("Python", "Pythön").encode(), {})
+
+    title, text = scrape_page(server.url + "/page")
+
+    assert title.startswith("Pythön 3.14 released")
+    assert ARTICLE.replace("Python", "Pythön") in text
+
+
+def test_scrape_page_stops_reading_at_byte_budget_and_closed_article(server):
+    filler = "<p>" + "Padding paragraph text that never ends. " * 20 + "</p>"
+    server.routes["/huge"] = ("text/html", (filler * 5000).encode(), {})
+    server.routes["/early"] = ("text/html", (f"<article><p>{ARTICLE}</p></article>" + filler * 5000).encode(), {})
+
+    _, text = scrape_page(server.url + "/huge", max_bytes=64 * 1024)
+    assert text.startswith("Padding paragraph")
+    assert server.served["/huge"] < 4 * 1024 * 1024
+
+    _, text = scrape_page(server.url + "/early", max_tokens=25, max_bytes=10 ** 8)
+    assert ARTICLE.startswith(text)
+    assert count_tokens(text) <= 25
+
+
+def test_scrape_page_refuses_from_headers(server, monkeypatch):
+    server.routes["/report.pdf"] = ("application/pdf", b"%PDF-1.7", {})
+    server.routes["/big"] = ("text/html", b"<p>small</p>", {"Content-Length": "12"})
+    monkeypatch.setattr(scraper.settings, "SCRAPE_MAX_CONTENT_LENGTH", 5)
+
+    with pytest.raises(ScrapeError, match="unsupported content type application/pdf"):
+        scrape_page(server.url + "/report.pdf")
+    with pytest.raises(ScrapeError, match="page too large"):
+        scrape_page(server.url + "/big")
+
+
+def test_web_scrape_tool_returns_title_and_article(server):
+    server.routes["/page"] = ("text/html", PAGE.encode(), {})
+
+    result = web_scrape.invoke(server.url + "/page")
+
+    assert result.startswith("Webpage Content : \nPython 3.14 released | Example News\nPython 3.14 released\n")
+    assert "cookies" not in result
@@ -0,0 +1,64 @@
+"""
+Tests for the load-test stub servers: real clients must accept their responses
+"""
+
+import threading
+
+import pytest
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from app.agent import tools
+from benchmarks.stubs import llm_server, search_server
+from benchmarks.stubs.latency import Latency
+
+
+@pytest.fixture
+def running():
+    servers = []
+
+    def start(server):
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        host, port = server.server_address
+        return f"http://{host}:{port}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_latency_specs():
+    assert Latency("fixed:5").sample_ms() == 5
+    assert 1 <= Latency("uniform:1:2").sample_ms() <= 2
+    assert Latency("lognormal:100:0.5").sample_ms() > 0
+    with pytest.raises(ValueError):
+        Latency("gamma:1")
+
+
+def test_groq_client_talks_to_llm_stub(running):
+    from langchain_groq import ChatGroq
+
+    base_url = running(llm_server.serve(port=0))
+    llm = ChatGroq(model="stub", api_key="x", base_url=base_url)
+
+    # Not my_tools: other tests swap that list for mocks
+    with_tools = llm.bind_tools([tools.google_web_search, tools.web_scrape]).invoke([
+        SystemMessage(content="You are a research assistant."),
+        HumanMessage(content="What is new in Python?"),
+    ])
+    assert with_tools.tool_calls[0]["name"] == "google_web_search"
+
+    report = llm.invoke([SystemMessage(content="Create a comprehensive report")])
+    assert report.content.startswith("# Research Report")
+
+
+def test_search_tools_use_search_stub(running, monkeypatch):
+    base_url = running(search_server.serve(port=0))
+    monkeypatch.setattr(tools, "SEARCH_API_URL", f"{base_url}/customsearch/v1")
+
+    first = tools.google_web_search.invoke({"query": "AI agents"})
+    again = tools.duck_duck_web_search.invoke({"query": "AI agents"})
+
+    assert first.startswith("AI agents:")
+    assert first == again  # Deterministic per query
@@ -0,0 +1,153 @@
+"""
+Tests for the early-exit sufficiency check
+"""
+
+from langchain_core.messages import AIMessage, ToolMessage
+
+from app.agent.dedup import TRIMMED_RESULT
+from app.agent.router import after_tools, after_tools_pipelined, save_research_data, should_continue_research
+from app.agent.sufficiency import HeuristicSufficiencyScorer, SufficiencyCheck, SufficiencyVerdict
+
+RESULT = (
+    "Python 3.14.0 was released on October 7, 2025. It makes the free-threaded build "
+    "officially supported and introduces template string literals. "
+) * 3
+
+
+def tool_step(*results, call_id="c"):
+    calls = [{"name": "search", "args": {}, "id": f"{call_id}{i}"} for i in range(len(results))]
+    return [AIMessage(content="", tool_calls=calls)] + [
+        ToolMessage(content=result, tool_call_id=f"{call_id}{i}") for i, result in enumerate(results)
+    ]
+
+
+def make_state(messages, query="When was Python 3.14 released?", iteration=1, max_iterations=3):
+    return {"messages": messages, "query": query, "iteration": iteration,
+            "max_iterations": max_iterations, "research_data": ""}
+
+
+def test_first_batch_from_one_source_is_not_sufficient():
+    # Searching for the query itself covers its words at once
+    verdict = HeuristicSufficiencyScorer().assess(make_state(tool_step(RESULT + "https://python.org/3.14")))
+
+    assert not verdict.sufficient
+    assert verdict.score == 1.0
+
+
+def test_first_batch_from_several_hosts_is_sufficient():
+    other = ("Python 3.14 was released in October 2025 with an experimental JIT compiler, "
+             "deferred evaluation of annotations and a zstd module. ") * 2
+    third = ("Released this autumn, Python 3.14 ships multiple interpreters in the standard "
+             "library and better error messages for common mistakes. ") * 2
+    results = [f"{text} Source: https://{host}/python-3.14"
+               for text, host in ((RESULT, "python.org"), (other, "lwn.net"))]
+    state = make_state(tool_step(*results, third + " https://www.realpython.com/python314"))
+    verdict = HeuristicSufficiencyScorer().assess(state)
+
+    assert verdict.sufficient
+    assert "3 sources" in verdict.reason
+    # The same host twice is one source
+    state = make_state(tool_step(*results, third + " https://www.python.org/downloads"))
+    assert not HeuristicSufficiencyScorer().assess(state).sufficient
+
+
+def test_first_batch_repeated_by_another_result_is_sufficient():
+    trimmed = f"Python 3.14 was released on October 7, 2025.\n{TRIMMED_RESULT}"
+    state = make_state(tool_step(RESULT, trimmed))
+    verdict = HeuristicSufficiencyScorer().assess(state)
+
+    assert verdict.sufficient
+    assert "repeated by another result" in verdict.reason
+
+
+def test_confirmed_coverage_is_sufficient():
+    more = RESULT + "The release notes list a new incremental garbage collector. " * 2
+    messages = tool_step(RESULT, call_id="a") + tool_step(more, call_id="b")
+    verdict = HeuristicSufficiencyScorer().assess(make_state(messages, iteration=2))
+
+    assert verdict.sufficient
+    assert "confirmed" in verdict.reason
+
+
+def test_new_findings_keep_research_going():
+    other = ("The free-threaded build of Python 3.14 runs single-threaded code about ten percent "
+             "slower, while multi-threaded workloads scale across cores without the GIL. ") * 2
+    messages = tool_step(RESULT, call_id="a") + tool_step(other, call_id="b")
+
+    assert not HeuristicSufficiencyScorer().assess(make_state(messages, iteration=2)).sufficient
+
+
+def test_signals_accumulate_per_run():
+    scorer = HeuristicSufficiencyScorer()
+    first = tool_step(RESULT, call_id="a")
+    state = {**make_state(first), "run_id": "run", "tool_message_count": 1, "recent_tool_results": [RESULT]}
+    assert not scorer.assess(state).sufficient
+
+    # The second check reads only the new result from the indexes, not the messages
+    state = {**state, "messages": [], "tool_message_count": 2, "recent_tool_results": [RESULT, RESULT]}
+    assert scorer.assess(state).sufficient
+
+
+def test_uncovered_query_is_not_sufficient():
+    state = make_state(tool_step(RESULT), query="Who maintains the Rust compiler backend?")
+
+    assert not HeuristicSufficiencyScorer().assess(state).sufficient
+
+
+def test_empty_results_are_not_evidence():
+    state = make_state(tool_step("Webpage Content : \nNo content found " + RESULT))
+
+    assert not HeuristicSufficiencyScorer().assess(state).sufficient
+
+
+def test_repeated_results_stop_research():
+    # Partial coverage, but the second batch adds nothing new
+    query = "When was Python 3.14 released and how fast is its JIT?"
+    messages = tool_step(RESULT, call_id="a") + tool_step(RESULT, call_id="b")
+    verdict = HeuristicSufficiencyScorer().assess(make_state(messages, query=query, iteration=2))
+
+    assert verdict.sufficient
+    assert "new" in verdict.reason
+
+
+class AlwaysSufficient:
+    def assess(self, state):
+        return SufficiencyVerdict(True, 1.0, "test")
+
+
+def test_check_records_iterations_saved_and_routes_to_summary():
+    state = make_state(tool_step(RESULT), iteration=1, max_iterations=3)
+    update = SufficiencyCheck(AlwaysSufficient())(state)
+
+    # One of the two remaining turns is the researcher's summary
+    assert update == {"research_sufficient": True, "iterations_saved": 1}
+    assert after_tools({**state, **update}) == "researcher"
+
+    summary = AIMessage(content="Python 3.14.0 was released on October 7, 2025, with free threading.")
+    state = {**state, **update, "messages": state["messages"] + [summary], "iteration": 2}
+    assert should_continue_research(state) == "save_research"
+    assert save_research_data(state)["research_data"] == summary.content
+
+
+def test_check_on_the_last_turn_but_one_saves_results_as_found():
+    # max_iterations=2 (the API default): the summary turn would be the last turn anyway
+    state = make_state(tool_step(RESULT), iteration=1, max_iterations=2)
+    update = SufficiencyCheck(AlwaysSufficient())(state)
+
+    assert update == {"research_sufficient": True, "iterations_saved": 1}
+    state = {**state, **update}
+    assert after_tools(state) == "save_research"
+    assert after_tools_pipelined(state) == ["save_research", "check_batch"]
+    assert save_research_data(state)["research_data"] == RESULT
+
+
+def test_check_after_the_last_turn_saves_nothing():
+    state = make_state(tool_step(RESULT), iteration=3, max_iterations=3)
+
+    assert SufficiencyCheck(AlwaysSufficient())(state) == {"research_sufficient": False}
+
+
+def test_check_ignores_fact_checking_tool_steps():
+    state = {**make_state(tool_step(RESULT)), "research_data": "saved"}
+
+    assert SufficiencyCheck(AlwaysSufficient())(state) == {}
@@ -0,0 +1,146 @@
+"""
+Tests for token counting and prompt budgets
+"""
+
+import random
+import time
+
+from langchain_core.messages import AIMessage, ToolMessage
+
+from app.agent import tokens
+from app.agent.agents import FactCheckerAgent, IncrementalFactCheckerAgent, ResearcherAgent, SummarizerAgent
+from app.agent.tokens import (
+    ApproximateTokenizer, PromptSection, allocate, count_tokens, fit_sections, get_tokenizer, truncate_tokens
+)
+from benchmarks.bench_tokens import synthetic_text
+
+TEXT = "LangGraph 1.0 reached general availability in October 2025, see https://example.org/langgraph."
+
+
+def test_approximate_tokenizer_counts_word_pieces_and_punctuation():
+    tokenizer = ApproximateTokenizer()
+
+    assert tokenizer.count("free-threaded build") == 6  # free - thre aded buil d
+    assert tokenizer.truncate(TEXT, 3) == "LangGraph"
+    assert tokenizer.truncate(TEXT, 10_000) == TEXT
+
+
+def test_truncate_fits_budget_and_keeps_short_text():
+    assert truncate_tokens(TEXT, 1000) == TEXT
+    assert truncate_tokens(TEXT, 0) == ""
+    cut = truncate_tokens(TEXT * 50, 40)
+    assert (TEXT * 50).startswith(cut)
+    assert 30 <= count_tokens(cut) <= 40
+
+
+def test_allocate_by_priority_with_reserved_minimum():
+    high, low, facts = TEXT * 10, TEXT * 10, TEXT * 10
+    need = count_tokens(high)
+    sections = [
+        PromptSection(low, priority=2),
+        PromptSection(high, priority=0),
+        PromptSection(facts, priority=1, min_tokens=20),
+    ]
+
+    assert allocate(sections, 10 * need) == [need, need, need]
+    assert allocate(sections, need + 30) == [0, need, 30]  # Leftover goes to the next priority
+    fitted = fit_sections(sections, need + 30)
+    assert fitted[0] == "" and fitted[1] == high and count_tokens(fitted[2]) <= 30
+
+
+def test_tokenizer_is_loaded_once():
+    assert get_tokenizer() is get_tokenizer()
+
+
+def test_count_cache_keeps_digests_not_texts(monkeypatch):
+    monkeypatch.setattr(tokens, "_counts", type(tokens._counts)())
+    monkeypatch.setattr(tokens, "COUNT_CACHE_SIZE", 2)
+    texts = [f"{i} " + TEXT * 100 for i in range(3)]
+
+    assert [count_tokens(text) for text in texts] == [get_tokenizer().count(text) for text in texts]
+    assert len(tokens._counts) == 2  # Least recently used evicted
+    assert all(len(digest) == 16 for _, digest in tokens._counts)
+
+
+class RecordingLLM:
+    def __init__(self):
+        self.prompts = []
+
+    def invoke(self, messages):
+        self.prompts.append("\n".join(message.content for message in messages))
+        return AIMessage(content="Report")
+
+    def bind_tools(self, tools):
+        return self
+
+
+def test_summarizer_fits_prompt_to_budget():
+    llm = RecordingLLM()
+    state = {"query": "AI agents", "research_data": TEXT * 500, "verified_facts": TEXT * 500, "messages": []}
+
+    SummarizerAgent(llm, max_prompt_tokens=600)(state)
+
+    assert count_tokens(llm.prompts[0]) <= 600
+    assert "Verified Facts:\nLangGraph 1.0" in llm.prompts[0]  # Facts keep their reserved share
+
+
+def tool_turns(count):
+    """AI tool calls, each followed by its (long) result"""
+    messages = []
+    for i in range(count):
+        messages += [
+            AIMessage(content="", tool_calls=[{"name": "web_search", "args": {"query": str(i)}, "id": str(i)}]),
+            ToolMessage(content=f"Result {i}: " + TEXT * 100, tool_call_id=str(i)),
+        ]
+    return messages
+
+
+def test_researcher_cuts_oldest_tool_results_first():
+    llm = RecordingLLM()
+    state = {"query": "AI", "iteration": 3, "messages": tool_turns(4), "prior_research": "Earlier report"}
+
+    ResearcherAgent(llm, [], max_prompt_tokens=1200)(state)
+
+    assert count_tokens(llm.prompts[0]) <= 1200
+    assert "Earlier report" in llm.prompts[0]
+    assert TEXT * 10 in llm.prompts[0].split("Result 3:")[1]  # Newest kept
+    assert "Result 0:" not in llm.prompts[0]  # Oldest cut
+
+
+def test_fact_checker_budgets_recent_messages():
+    llm = RecordingLLM()
+    state = {"query": "AI", "research_data": TEXT * 200, "messages": tool_turns(4)}
+
+    FactCheckerAgent(llm, [], max_prompt_tokens=1000)(state)
+
+    assert count_tokens(llm.prompts[0]) <= 1000
+    assert "Research findings (excerpt):\nLangGraph 1.0" in llm.prompts[0]
+    assert "Result 3:" in llm.prompts[0] and "Result 0:" not in llm.prompts[0]
+
+
+def test_incremental_fact_checker_gives_every_result_a_share():
+    llm = RecordingLLM()
+    results = [ToolMessage(content=f"Result {i}: " + TEXT * 100, tool_call_id=str(i)) for i in range(4)]
+
+    IncrementalFactCheckerAgent(llm, max_prompt_tokens=500)({"query": "AI", "messages": results})
+
+    assert count_tokens(llm.prompts[0]) <= 500
+    assert all(f"Result {i}:" in llm.prompts[0] for i in range(4))
+
+
+def test_throughput_on_large_inputs():
+    text = synthetic_text(random.Random(0), 4_000_000)
+    tokenizer = get_tokenizer()
+
+    start = time.perf_counter()
+    tokens = tokenizer.count(text)
+    counted = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(100):
+        truncate_tokens(text, 4000)
+    truncated = (time.perf_counter() - start) / 100
+
+    assert tokens > 500_000
+    assert counted < 2.0       # At least 2 MB/s (tiktoken and the fallback both do ~20 MB/s)
+    assert truncated < 0.02    # Cost follows the budget, not the input size
@@ -0,0 +1,52 @@
+"""
+Tests for the research tools
+"""
+
+import threading
+import time
+
+import pytest
+
+from app.agent.tools import SharedSearches
+
+
+def test_concurrent_identical_searches_share_one_call():
+    calls = []
+
+    def fetch(query):
+        calls.append(query)
+        time.sleep(0.1)
+        return f"results for {query}"
+
+    shared = SharedSearches(ttl=60)
+    results = []
+    threads = [
+        threading.Thread(target=lambda q=q: results.append(shared.run("google", q, fetch)))
+        for q in ["AI agents", "ai  agents", "AI agents", "Other topic"]
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(calls) == ["AI agents", "Other topic"]
+    assert results.count("results for AI agents") == 3
+    assert shared.run("google", "AI AGENTS", fetch) == "results for AI agents"  # Reused
+    assert len(calls) == 2
+
+
+def test_failed_searches_are_not_shared_later():
+    attempts = []
+
+    def flaky(query):
+        attempts.append(query)
+        if len(attempts) == 1:
+            raise ConnectionError("provider down")
+        return "ok"
+
+    shared = SharedSearches(ttl=60)
+    with pytest.raises(ConnectionError):
+        shared.run("google", "q", flaky)
+    assert shared.run("google", "q", flaky) == "ok"
+    assert SharedSearches(ttl=0).run("google", "q", flaky) == "ok"
+    assert len(attempts) == 3
@@ -0,0 +1,162 @@
+"""
+Tests for the vector index over past research
+"""
+
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database.models import Base, ResearchSession, User
+from app.search import vector_index
+from app.search.vector_index import (
+    HashingEmbedder, IndexSyncer, VectorIndex, find_prior_research, index_session
+)
+
+DOCS = [
+    (1, 1, "LangGraph multi-agent orchestration with supervisor agents and tool calling"),
+    (2, 1, "Python 3.14 free-threaded build and template string literals"),
+    (3, 2, "LangGraph agents with supervisor routing between research agents"),
+    (4, 1, "Electric vehicle battery prices fell in 2025"),
+]
+
+
+def test_embedder_ranks_related_text_higher():
+    embedder = HashingEmbedder()
+    query = embedder.embed("multi-agent LangGraph supervisor")
+
+    assert query @ embedder.embed(DOCS[0][2]) > query @ embedder.embed(DOCS[1][2])
+    assert not embedder.embed("the of and").any()  # Stopwords only
+
+
+def test_search_filters_by_user_and_exclude(tmp_path):
+    index = VectorIndex(str(tmp_path))
+    assert index.add(DOCS) == 4
+    assert index.add(DOCS[:1]) == 0  # Already indexed
+
+    hits = index.search("LangGraph supervisor agents", k=3, user_id=1)
+    assert hits[0][0] == 1
+    assert all(session_id != 3 for session_id, _ in hits)  # User 2's session
+    assert [s for s, _ in index.search("LangGraph supervisor agents", user_id=1, exclude=[1])][0] != 1
+
+
+def test_lsh_finds_near_duplicates_and_persists(tmp_path):
+    index = VectorIndex(str(tmp_path), brute_force_below=0)
+    index.add(DOCS)
+
+    assert index.search(DOCS[1][2], k=1) == [(2, 1.0)]
+    # A new instance (another process) reads the same files
+    reopened = VectorIndex(str(tmp_path), brute_force_below=0)
+    assert len(reopened) == 4
+    assert reopened.search(DOCS[3][2], k=1)[0][0] == 4
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'search.db'}")
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(bind=engine, autoflush=False)
+    engine.dispose()
+
+
+def add_sessions(db, user_id, docs, completed_at):
+    for offset, (_, _, text) in enumerate(docs):
+        db.add(ResearchSession(user_id=user_id, query=text[:40], final_report=text, status="completed",
+                               completed_at=completed_at + timedelta(seconds=offset)))
+    db.commit()
+
+
+def test_sync_indexes_completed_sessions_incrementally(tmp_path, session_factory):
+    index = VectorIndex(str(tmp_path / "index"))
+    with session_factory() as db:
+        user = User(username="quinn", email="quinn@test.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        db.add(ResearchSession(user_id=user.id, query="Still running", status="running"))
+        add_sessions(db, user.id, DOCS[:2], datetime(2025, 1, 1))
+
+        assert index.sync(db, batch=1) == 2
+        assert index.sync(db) == 0
+        add_sessions(db, user.id, DOCS[2:], datetime(2025, 2, 1))
+        assert index.sync(db) == 2
+        assert len(index) == 4
+
+
+def test_sync_finds_sessions_that_complete_late(tmp_path, session_factory):
+    index = VectorIndex(str(tmp_path / "index"))
+    with session_factory() as db:
+        user = User(username="quinn", email="quinn@test.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        running = ResearchSession(user_id=user.id, query="Slow research", status="processing")
+        db.add(running)
+        db.commit()
+        add_sessions(db, user.id, DOCS[:2], datetime(2025, 1, 1))
+        assert index.sync(db) == 2
+
+        # Completes after later sessions were synced, with an older completed_at
+        running.status, running.completed_at = "completed", datetime(2024, 1, 1)
+        running.final_report = DOCS[3][2]
+        db.commit()
+        assert index.sync(db) == 1
+        assert index.search(DOCS[3][2], k=1)[0][0] == running.id
+        assert index.sync(db) == 0
+
+
+def test_lookups_only_read_and_the_syncer_catches_up(tmp_path, session_factory, monkeypatch):
+    index = VectorIndex(str(tmp_path / "index"))
+    monkeypatch.setattr(vector_index, "get_vector_index", lambda: index)
+    with session_factory() as db:
+        user = User(username="quinn", email="quinn@test.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        add_sessions(db, user.id, DOCS[:1], datetime(2025, 1, 1))  # Completed elsewhere
+        user_id = user.id
+
+        assert vector_index.find_similar(db, user_id, DOCS[0][2]) == []
+        assert len(index) == 0
+
+    syncer = IndexSyncer(index, session_factory, interval=0.05)
+    syncer.start()
+    try:
+        deadline = time.monotonic() + 5
+        while len(index) < 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        with session_factory() as db:
+            assert [s.final_report for s, _ in vector_index.find_similar(db, user_id, DOCS[0][2])] == [DOCS[0][2]]
+    finally:
+        syncer.stop()
+        syncer.join(5)
+    assert not syncer.is_alive()
+
+
+def test_index_session_on_completion(session_factory):
+    with session_factory() as db:
+        user = User(username="quinn", email="quinn@test.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        add_sessions(db, user.id, DOCS[:1], datetime(2025, 1, 1))
+        session = db.query(ResearchSession).one()
+
+        index_session(db, session)
+        index = vector_index.get_vector_index()
+        assert index.search(DOCS[0][2], k=1)[0][0] == session.id
+        assert index.sync(db) == 0  # Already indexed
+
+
+def test_prior_research_reuses_related_reports(tmp_path, session_factory, monkeypatch):
+    index = VectorIndex(str(tmp_path / "index"))
+    monkeypatch.setattr(vector_index, "get_vector_index", lambda: index)
+    with session_factory() as db:
+        user = User(username="quinn", email="quinn@test.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        add_sessions(db, user.id, DOCS, datetime(2025, 1, 1))
+        index.sync(db)
+
+        prior = find_prior_research(db, user.id, "LangGraph supervisor agents orchestration")
+        assert prior.startswith("### LangGraph multi-agent orchestration")
+        assert "battery" not in prior
+        assert find_prior_research(db, user.id + 1, "LangGraph supervisor agents") == ""
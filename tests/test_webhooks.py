@@ -0,0 +1,225 @@
+"""
+Tests for webhook callbacks, against a local HTTP receiver
+"""
+
+import json
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.database.models import Base, ResearchSession, User, WebhookDeadLetter, WebhookDelivery
+from app.jobs import runner, webhooks
+from app.jobs import worker as worker_module
+from app.jobs.webhooks import (
+    SIGNATURE_HEADER, WebhookDispatcher, claim_due, enqueue_webhook, sign, signing_key, verify_signature
+)
+from app.jobs.worker import ResearchWorker
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'webhooks.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(bind=engine, autoflush=False)
+    engine.dispose()
+
+
+@pytest.fixture
+def receiver(monkeypatch):
+    """Local HTTP receiver answering with the queued status codes (then 200)"""
+    monkeypatch.setattr(webhooks.settings, "WEBHOOK_ALLOW_PRIVATE_URLS", True)
+    received, statuses = [], []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            received.append((dict(self.headers), body))
+            self.send_response(statuses.pop(0) if statuses else 200)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/hook"
+    server.received, server.statuses = received, statuses
+    yield server
+    server.shutdown()
+
+
+def finished_session(session_factory, url, status="completed"):
+    with session_factory() as db:
+        user = User(username="quinn", email="quinn@test.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        session = ResearchSession(user_id=user.id, query="Webhook research", status=status,
+                                  final_report="report", callback_url=url, completed_at=datetime.now())
+        db.add(session)
+        db.commit()
+        return enqueue_webhook(db, session).id, user.id
+
+
+def dispatch(session_factory):
+    return WebhookDispatcher(session_factory, poll_seconds=0).run_once()
+
+
+def make_due(session_factory):
+    with session_factory() as db:
+        db.query(WebhookDelivery).update({"next_attempt_at": datetime.now()})
+        db.commit()
+
+
+def test_signatures_verify_and_expire():
+    key = signing_key(1)
+    header = sign(key, b'{"a": 1}')
+
+    assert key != signing_key(2)
+    assert verify_signature(key, header, b'{"a": 1}')
+    assert not verify_signature(key, header, b'{"a": 2}')
+    assert not verify_signature(signing_key(2), header, b'{"a": 1}')
+    assert not verify_signature(key, sign(key, b'{"a": 1}', timestamp=1), b'{"a": 1}')
+
+
+def test_worker_result_is_delivered_signed(session_factory, receiver, monkeypatch):
+    with session_factory() as db:
+        user = User(username="quinn", email="quinn@test.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        db.add(ResearchSession(user_id=user.id, query="Queued research", status="pending", max_iterations=1,
+                               callback_url=receiver.url))
+        db.commit()
+        user_id = user.id
+    monkeypatch.setattr(runner, "get_result_cache", lambda: None)
+    monkeypatch.setattr(worker_module, "find_prior_research", lambda db, user_id, query: "")
+    monkeypatch.setattr(runner, "research", lambda query, max_iterations, mode, prior_research, cancel_token=None: {
+        "research_data": "", "verified_facts": "", "final_report": "pushed report", "iteration": 1,
+    })
+    ResearchWorker(session_factory, lease_seconds=60, poll_seconds=0).run_once()
+
+    assert dispatch(session_factory)
+    [(headers, body)] = receiver.received
+    assert json.loads(body)["research"]["final_report"] == "pushed report"
+    assert headers["X-Research-Event"] == "research.completed"
+    assert verify_signature(signing_key(user_id), headers[SIGNATURE_HEADER], body)
+    with session_factory() as db:
+        assert db.query(WebhookDelivery).one().status == "delivered"
+    assert not dispatch(session_factory)
+
+
+def test_failed_deliveries_retry_with_backoff(session_factory, receiver):
+    receiver.statuses.extend([500, 503])
+    finished_session(session_factory, receiver.url, status="failed")
+
+    assert dispatch(session_factory)
+    with session_factory() as db:
+        delivery = db.query(WebhookDelivery).one()
+        assert (delivery.status, delivery.attempts) == ("pending", 1)
+        assert delivery.next_attempt_at > datetime.now()  # Backing off
+        assert "500" in delivery.last_error
+    assert not dispatch(session_factory)
+
+    for _ in range(2):
+        make_due(session_factory)
+        dispatch(session_factory)
+    with session_factory() as db:
+        assert db.query(WebhookDelivery).one().attempts == 3
+        assert db.query(WebhookDelivery).one().status == "delivered"
+    assert json.loads(receiver.received[0][1])["event"] == "research.failed"
+
+
+def test_exhausted_and_rejected_deliveries_are_dead_lettered(session_factory, receiver, monkeypatch):
+    monkeypatch.setattr(webhooks.settings, "WEBHOOK_MAX_ATTEMPTS", 2)
+    receiver.statuses.extend([500, 500])
+    finished_session(session_factory, receiver.url)
+
+    dispatch(session_factory)
+    make_due(session_factory)
+    dispatch(session_factory)
+    with session_factory() as db:
+        assert db.query(WebhookDelivery).count() == 0
+        dead = db.query(WebhookDeadLetter).one()
+        assert dead.attempts == 2
+        assert json.loads(dead.payload)["research"]["query"] == "Webhook research"
+
+        # 410 Gone is final
+        receiver.statuses.append(410)
+        enqueue_webhook(db, db.query(ResearchSession).one())
+    dispatch(session_factory)
+    with session_factory() as db:
+        assert db.query(WebhookDeadLetter).count() == 2
+
+
+def test_private_addresses_are_refused(session_factory, receiver, monkeypatch):
+    monkeypatch.setattr(webhooks.settings, "WEBHOOK_ALLOW_PRIVATE_URLS", False)
+    finished_session(session_factory, receiver.url)
+
+    dispatch(session_factory)
+    assert receiver.received == []
+    with session_factory() as db:
+        assert "not public" in db.query(WebhookDeadLetter).one().last_error
+
+
+def test_delivery_connects_to_the_checked_address(session_factory, monkeypatch):
+    monkeypatch.setattr(webhooks.settings, "WEBHOOK_ALLOW_PRIVATE_URLS", False)
+    answers = iter(["93.184.215.14", "127.0.0.1"])  # Rebinding: public first, loopback after
+    monkeypatch.setattr(webhooks.socket, "getaddrinfo",
+                        lambda host, port: [(None, None, None, "", (next(answers), port))])
+    sent = []
+
+    def receive(request):
+        sent.append(request)
+        return httpx.Response(200)
+
+    finished_session(session_factory, "https://hooks.example.com/hook")
+    with session_factory() as db, httpx.Client(transport=httpx.MockTransport(receive)) as client:
+        assert webhooks.deliver(db, client, claim_due(db)[0])
+
+    request = sent[0]
+    assert request.url.host == "93.184.215.14"
+    assert request.headers["Host"] == "hooks.example.com"
+    assert request.extensions["sni_hostname"] == "hooks.example.com"
+    assert next(answers) == "127.0.0.1"  # Resolved once; the second answer was never used
+
+
+def test_each_delivery_is_claimed_once(session_factory):
+    finished_session(session_factory, "https://example.com/hook")
+    with session_factory() as db, session_factory() as other:
+        assert len(claim_due(db)) == 1
+        assert claim_due(other) == []
+
+
+def test_leases_cover_sequential_deliveries(session_factory, monkeypatch):
+    monkeypatch.setattr(webhooks.settings, "WEBHOOK_TIMEOUT_SECONDS", 10.0)
+    finished_session(session_factory, "https://example.com/hook")
+    with session_factory() as db:
+        session = db.query(ResearchSession).one()
+        for _ in range(3):
+            enqueue_webhook(db, session)
+
+    with session_factory() as db, session_factory() as other:
+        first = claim_due(db)  # One row per claim: the others stay free for other dispatchers
+        assert len(first) == 1
+        assert first[0].next_attempt_at - datetime.now() < timedelta(seconds=41)
+        claimed = claim_due(other, limit=3)
+        assert len(claimed) == 3
+        assert claimed[0].next_attempt_at - datetime.now() > timedelta(seconds=59)  # 3 timeouts + 30s
+
+
+def test_deleting_research_removes_queued_deliveries(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'cascade.db'}")
+    event.listen(engine, "connect", lambda connection, _: connection.execute("PRAGMA foreign_keys=ON"))
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine, autoflush=False)
+    finished_session(session_factory, "https://example.com/hook")
+
+    with session_factory() as db:
+        db.delete(db.query(ResearchSession).one())
+        db.commit()
+        assert db.query(WebhookDelivery).count() == 0
+    engine.dispose()